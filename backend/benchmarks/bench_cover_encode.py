@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+封面下载与 WebP 编码分阶段基准测试
+
+在本地生成一组 JPEG 封面，由桩服务提供下载，分别统计：
+  - 下载阶段（线程池，网络 I/O）的吞吐
+  - 编码阶段在线程池中执行（旧方式，与 GIL 争用）和在进程池中执行的吞吐
+  - download_all_covers 端到端吞吐（下载线程内编码 vs 编码进程池 vs CDN 缩放图）
+  - 每张封面下载的字节数
+
+CDN 缩放图模式下，桩服务为每张封面提供 @{宽}w_{高}h_1c.webp 缩放图，
+桩服务地址被视为B站图片CDN。
+
+用法（在 backend 目录下执行）：
+  python -m benchmarks.bench_cover_encode [--covers 40] [--latency 0.05] [--download-workers 4]
+                                          [--quality 85] [--method 6] [--encode-workers N]
+                                          [--cdn-width 672] [--cdn-height 378]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from benchmarks.stub_server import StubBilibiliServer
+from src.downloader.cover_encoder import CoverEncoder, encode_webp, encode_webp_bytes
+from src.downloader.download_thumbs import download_all_covers, download_binary
+from src.utils.config import get_cover_config
+
+
+def make_fixture_jpeg(seed, size=(1146, 717)):
+    """生成一张与B站封面尺寸相近、带噪点的 JPEG
+
+    Args:
+        seed: 随机种子
+        size: 图片尺寸
+
+    Returns:
+        bytes: JPEG 字节
+    """
+    rng = random.Random(seed)
+    small = Image.new('RGB', (size[0] // 8, size[1] // 8))
+    small.putdata([
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for _ in range(small.size[0] * small.size[1])
+    ])
+    img = small.resize(size, Image.BILINEAR)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def bench_download(base_url, names, out_dir, workers):
+    """下载阶段：线程池下载原图
+
+    Returns:
+        float: 耗时秒数
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        ok = list(executor.map(
+            lambda name: download_binary(f"{base_url}/bfs/archive/{name}", out_dir / name, quiet=True),
+            names
+        ))
+    elapsed = time.perf_counter() - start
+    assert all(ok), "部分封面下载失败"
+    return elapsed
+
+
+def bench_encode_threads(paths, out_dir, workers, quality, method):
+    """编码阶段（旧方式）：在线程池中编码
+
+    Returns:
+        float: 耗时秒数
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        ok = list(executor.map(
+            lambda path: encode_webp(path, out_dir / f"{path.stem}.webp", quality, method), paths
+        ))
+    elapsed = time.perf_counter() - start
+    assert all(ok), "部分封面编码失败"
+    return elapsed
+
+
+def bench_encode_processes(paths, out_dir, workers, quality, method):
+    """编码阶段：在进程池中编码（含进程启动开销）
+
+    Returns:
+        float: 耗时秒数
+    """
+    start = time.perf_counter()
+    with CoverEncoder(quality=quality, method=method, workers=workers) as encoder:
+        futures = [encoder.submit(path, out_dir / f"{path.stem}.webp") for path in paths]
+        ok = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    assert all(ok), "部分封面编码失败"
+    return elapsed
+
+
+def make_cdn_variant(jpeg, width, height, quality):
+    """模拟CDN：把原图裁剪缩放到指定尺寸并编码为 WebP
+
+    Returns:
+        bytes: WebP 字节
+    """
+    with Image.open(io.BytesIO(jpeg)) as img:
+        variant = img.resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    variant.save(buffer, 'JPEG', quality=95)
+    return encode_webp_bytes(buffer.getvalue(), quality, 4)
+
+
+def bench_end_to_end(base_url, names, work_dir, download_workers, encoder, cdn_resize=False):
+    """端到端：download_all_covers 下载并编码全部封面
+
+    Returns:
+        float: 耗时秒数
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    thumbs_dir = work_dir / "thumbs"
+    videos_path = work_dir / "videos.json"
+    videos = [
+        {"id": str(i + 1), "bv": Path(name).stem, "cover": "",
+         "cover_url": f"{base_url}/bfs/archive/{name}"}
+        for i, name in enumerate(names)
+    ]
+    videos_path.write_text(json.dumps(videos, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = download_all_covers(videos_path, thumbs_dir, quiet=True, max_workers=download_workers,
+                                      encoder=encoder, cdn_resize=cdn_resize, variants=[])
+    elapsed = time.perf_counter() - start
+    assert results['success'] == len(names), f"端到端成功 {results['success']} 个"
+    return elapsed
+
+
+def report(label, count, elapsed, baseline=None, image_bytes=None):
+    speedup = f"  加速比 {baseline / elapsed:5.2f}x" if baseline else ""
+    downloaded = f"  下载 {image_bytes / count / 1024:7.1f} KB/张" if image_bytes is not None else ""
+    print(f"{label:<28s} 耗时 {elapsed:6.2f}s  吞吐 {count / elapsed:7.2f} 张/秒{speedup}{downloaded}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='封面下载与 WebP 编码分阶段基准测试')
+    parser.add_argument('--covers', type=int, default=40, help='封面数量（默认：40）')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩服务单次请求延迟秒数（默认：0.05）')
+    parser.add_argument('--download-workers', type=int, default=4, help='下载线程数（默认：4）')
+    parser.add_argument('--quality', type=int, default=85, help='WebP 质量（默认：85）')
+    parser.add_argument('--method', type=int, default=6, help='WebP 编码方法（默认：6）')
+    parser.add_argument('--encode-workers', type=int, default=os.cpu_count() or 1,
+                        help='编码进程数（默认：CPU 核心数）')
+    parser.add_argument('--cdn-width', type=int, default=672, help='CDN 缩放宽度（默认：672）')
+    parser.add_argument('--cdn-height', type=int, default=378, help='CDN 缩放高度（默认：378）')
+    args = parser.parse_args()
+
+    names = [f"BV1cover{i:04d}.jpg" for i in range(args.covers)]
+    print(f"封面数: {args.covers}, 下载线程: {args.download_workers}, 编码进程: {args.encode_workers}, "
+          f"quality={args.quality}, method={args.method}, CPU 核心数: {os.cpu_count()}")
+
+    with StubBilibiliServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for i, name in enumerate(names):
+            server.images[name] = make_fixture_jpeg(i)
+            server.images[f"{name}@{args.cdn_width}w_{args.cdn_height}h_1c.webp"] = make_cdn_variant(
+                server.images[name], args.cdn_width, args.cdn_height, args.quality
+            )
+
+        originals = tmp / "originals"
+        elapsed = bench_download(server.base_url, names, originals, args.download_workers)
+        report("下载阶段(线程池)", len(names), elapsed)
+
+        paths = [originals / name for name in names]
+        (tmp / "webp_threads").mkdir()
+        (tmp / "webp_processes").mkdir()
+        baseline = bench_encode_threads(paths, tmp / "webp_threads", args.download_workers,
+                                        args.quality, args.method)
+        report("编码阶段(线程池)", len(names), baseline)
+        elapsed = bench_encode_processes(paths, tmp / "webp_processes", args.encode_workers,
+                                         args.quality, args.method)
+        report("编码阶段(进程池)", len(names), elapsed, baseline)
+
+        inline = CoverEncoder(quality=args.quality, method=args.method, workers=0)
+        server.image_bytes = 0
+        baseline = bench_end_to_end(server.base_url, names, tmp / "e2e_inline", args.download_workers, inline)
+        report("端到端(线程内编码)", len(names), baseline, image_bytes=server.image_bytes)
+        with CoverEncoder(quality=args.quality, method=args.method, workers=args.encode_workers) as encoder:
+            server.image_bytes = 0
+            elapsed = bench_end_to_end(server.base_url, names, tmp / "e2e_pool", args.download_workers, encoder)
+            report("端到端(编码进程池)", len(names), elapsed, baseline, image_bytes=server.image_bytes)
+
+            # 桩服务地址视为B站图片CDN，下载CDN缩放好的 WebP，不再本地编码
+            server.image_bytes = 0
+            cdn_config = {'cdn_resize': True, 'cdn_width': args.cdn_width, 'cdn_height': args.cdn_height}
+            with patch('src.downloader.download_thumbs.BILIBILI_IMAGE_HOSTS', ('127.0.0.1',)), \
+                    patch('src.downloader.download_thumbs.get_cover_config',
+                          side_effect=lambda: dict(get_cover_config(), **cdn_config)):
+                elapsed = bench_end_to_end(server.base_url, names, tmp / "e2e_cdn", args.download_workers,
+                                           encoder, cdn_resize=True)
+            report("端到端(CDN 缩放图)", len(names), elapsed, baseline, image_bytes=server.image_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+元数据并发爬取基准测试
+
+在本地桩服务上对比顺序爬取与并发爬取的耗时。所有工作线程共用同一个
+RateLimiter，请求频率预算固定，加速来自请求延迟与限速等待的重叠。
+
+用法（在 backend 目录下执行）：
+  python -m benchmarks.bench_crawl_concurrency [--videos 40] [--rps 10] [--latency 0.3] [--workers 1 4 8] [--batch-size 8]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.stub_server import StubBilibiliServer
+from src.crawler.video_crawler import VideoCrawler
+from src.crawler.utils.rate_limiter import RateLimiter
+
+
+def run_crawl(base_url, bv_list, rps, workers, batch_size=1):
+    """使用指定并发数爬取一遍BV列表
+    
+    Args:
+        base_url: 桩服务根地址
+        bv_list: BV号列表
+        rps: 每秒请求数预算
+        workers: 工作线程数
+        batch_size: 批量搜索每批BV号数量
+        
+    Returns:
+        tuple: (耗时秒数, 成功数量)
+    """
+    crawler = VideoCrawler(max_workers=workers, batch_size=batch_size)
+    interval = 1.0 / rps
+    crawler.rate_limiter = RateLimiter(
+        min_delay=interval,
+        max_delay=interval,
+        enable_jitter=False,
+        enable_adaptive=False
+    )
+    crawler.api_config['search_url'] = f"{base_url}/x/web-interface/wbi/search/all/v2"
+    crawler.api_config['base_url'] = f"{base_url}/x/web-interface/wbi/view/detail"
+    
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        videos = crawler.crawl_from_bv_list(bv_list, 'lvjiang', full_crawl=True)
+    elapsed = time.perf_counter() - start
+    
+    # 校验结果顺序与输入一致
+    assert [video['bv'] for video in videos] == bv_list, "结果顺序与输入不一致"
+    return elapsed, len(videos)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='元数据并发爬取基准测试')
+    parser.add_argument('--videos', type=int, default=40, help='模拟的视频数量（默认：40）')
+    parser.add_argument('--rps', type=float, default=10.0, help='每秒请求数预算（默认：10）')
+    parser.add_argument('--latency', type=float, default=0.3, help='桩服务单次请求延迟秒数（默认：0.3）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='对比的并发数列表')
+    parser.add_argument('--batch-size', type=int, default=1, help='批量搜索每批BV号数量（默认：1，不启用）')
+    args = parser.parse_args()
+    
+    bv_list = [f"BV1bench{i:04d}" for i in range(args.videos)]
+    
+    print(f"视频数: {args.videos}, 请求预算: {args.rps}/s, 单次延迟: {args.latency}s, 批量大小: {args.batch_size}")
+    
+    with StubBilibiliServer(latency=args.latency) as server:
+        baseline = None
+        for workers in args.workers:
+            requests_before = server.request_count
+            elapsed, count = run_crawl(server.base_url, bv_list, args.rps, workers, args.batch_size)
+            if baseline is None:
+                baseline = elapsed
+            print(
+                f"workers={workers:<3d} 耗时 {elapsed:6.2f}s  "
+                f"吞吐 {count / elapsed:6.2f} 个/秒  加速比 {baseline / elapsed:5.2f}x  "
+                f"上游请求 {server.request_count - requests_before} 次"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+浏览器收藏脚本基准测试
+
+在本地桩服务的视频页面上运行 add_to_favorites_concurrent 的收藏流程，对比：
+  - 每个视频启动一个浏览器（旧方式，page_reuse=1, browser_pages=1）
+  - 每个工作线程复用一个浏览器，页面按上限回收（默认方式）
+输出每分钟处理的视频数和浏览器启动次数。
+
+需要已安装 Chromium（playwright install chromium）。
+
+用法（在 backend 目录下执行）：
+  python -m benchmarks.bench_favorites_browser [--videos 12] [--workers 4] [--latency 0.05] [--page-reuse 20]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_server import StubBilibiliServer
+from scripts.add_to_favorites_concurrent import BiliBiliFavoritesAdderConcurrent
+
+
+def run_adder(base_url, fav_folder, bv_codes, work_dir, workers, page_reuse, browser_pages):
+    """运行一遍收藏流程
+
+    Returns:
+        tuple: (耗时秒数, 成功数量, 浏览器启动次数)
+    """
+    bv_file = work_dir / f"bv-{page_reuse}-{browser_pages}.txt"
+    bv_file.write_text("\n".join(bv_codes), encoding='utf-8')
+    adder = BiliBiliFavoritesAdderConcurrent(
+        bv_file, fav_folder, cookie_file=work_dir / "cookies.json", max_workers=workers,
+        max_retries=1, retry_delay=0, page_reuse=page_reuse, browser_pages=browser_pages,
+        base_url=base_url
+    )
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        adder.run()
+    elapsed = time.perf_counter() - start
+    assert adder.success_count == len(bv_codes), \
+        f"成功 {adder.success_count}/{len(bv_codes)} 个，请确认已执行 playwright install chromium"
+    return elapsed, adder.success_count, adder.browser_launches
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='浏览器收藏脚本基准测试')
+    parser.add_argument('--videos', type=int, default=12, help='视频数量（默认：12）')
+    parser.add_argument('--workers', type=int, default=4, help='并发数（默认：4）')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩服务单次请求延迟秒数（默认：0.05）')
+    parser.add_argument('--page-reuse', type=int, default=20, help='单个页面处理的视频数（默认：20）')
+    args = parser.parse_args()
+
+    bv_codes = [f"BV1fav{i:06d}" for i in range(args.videos)]
+    print(f"视频数: {args.videos}, 并发数: {args.workers}, 页面复用: {args.page_reuse}")
+
+    with StubBilibiliServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        modes = [
+            ("每个视频启动浏览器", 1, 1),
+            ("工作线程复用浏览器", args.page_reuse, None),
+        ]
+        baseline = None
+        for label, page_reuse, browser_pages in modes:
+            elapsed, success, launches = run_adder(
+                server.base_url, server.fav_folder, bv_codes, tmp, args.workers, page_reuse, browser_pages
+            )
+            per_minute = args.videos / elapsed * 60
+            speedup = f"  加速比 {per_minute / baseline:5.2f}x" if baseline else ""
+            baseline = baseline or per_minute
+            print(f"{label:<12s} 耗时 {elapsed:6.2f}s  吞吐 {per_minute:6.1f} 个/分钟  "
+                  f"成功 {success}/{args.videos}  浏览器启动 {launches} 次{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+请求频率限制器争用基准测试
+
+多个线程共用一个 RateLimiter，每个线程循环执行：wait -> 模拟请求 -> record_success。
+对比旧实现（在锁内睡眠）与令牌桶实现（锁内预约、锁外睡眠）：
+
+- 吞吐：单个桶时两者都受请求频率预算限制；多个桶（如按主机限速）时令牌桶实现按桶数线性扩展，
+  旧实现所有桶共用一把锁，仍只有一个桶的吞吐
+- record_success 延迟：旧实现中等待线程持有锁睡眠，记录结果要排队等待
+
+用法（在 backend 目录下执行）：
+  python -m benchmarks.bench_rate_limiter [--threads 32] [--rps 50] [--buckets 1 4] [--duration 2]
+"""
+
+import argparse
+import threading
+import time
+
+from src.crawler.utils.rate_limiter import RateLimiter
+
+
+class LockedRateLimiter(RateLimiter):
+    """旧实现：在锁内睡眠，所有桶共用同一个请求间隔（用于对比）"""
+
+    def wait(self, attempt: int = 0, bucket: str = 'default') -> float:
+        delay = self._calculate_delay(attempt)
+        with self._lock:
+            elapsed = time.monotonic() - getattr(self, '_last_request_time', 0)
+            if elapsed < delay:
+                time.sleep(delay - elapsed)
+            self._last_request_time = time.monotonic()
+        return delay
+
+
+def run(limiter_cls, threads, rps, buckets, duration, latency):
+    """运行一轮争用测试
+
+    Args:
+        limiter_cls: 限制器类
+        threads: 线程数
+        rps: 每个桶的每秒请求数预算
+        buckets: 桶数量
+        duration: 持续时间（秒）
+        latency: 模拟的单次请求耗时（秒）
+
+    Returns:
+        tuple: (每秒请求数, record_success 平均耗时毫秒, record_success 最大耗时毫秒)
+    """
+    interval = 1.0 / rps
+    limiter = limiter_cls(min_delay=interval, max_delay=interval, enable_jitter=False)
+    deadline = time.monotonic() + duration
+    counts = [0] * threads
+    record_times = [[] for _ in range(threads)]
+
+    def worker(index):
+        bucket = f"host{index % buckets}"
+        while time.monotonic() < deadline:
+            limiter.wait(bucket=bucket)
+            time.sleep(latency)
+            start = time.perf_counter()
+            limiter.record_success()
+            record_times[index].append(time.perf_counter() - start)
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.monotonic()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    samples = [value for values in record_times for value in values] or [0.0]
+    return sum(counts) / elapsed, sum(samples) / len(samples) * 1000, max(samples) * 1000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='请求频率限制器争用基准测试')
+    parser.add_argument('--threads', type=int, default=32, help='线程数（默认：32）')
+    parser.add_argument('--rps', type=float, default=50.0, help='每个桶的每秒请求数预算（默认：50）')
+    parser.add_argument('--buckets', type=int, nargs='+', default=[1, 4], help='对比的桶数量列表')
+    parser.add_argument('--duration', type=float, default=2.0, help='每轮持续秒数（默认：2）')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟的单次请求耗时秒数（默认：0.05）')
+    args = parser.parse_args()
+
+    print(f"线程数: {args.threads}, 每桶请求预算: {args.rps}/s, 每轮 {args.duration}s, 单次请求 {args.latency}s")
+    for buckets in args.buckets:
+        for name, limiter_cls in [('锁内睡眠', LockedRateLimiter), ('令牌桶', RateLimiter)]:
+            throughput, record_avg, record_max = run(
+                limiter_cls, args.threads, args.rps, buckets, args.duration, args.latency
+            )
+            print(
+                f"buckets={buckets:<2d} {name:<6s} 吞吐 {throughput:7.1f} 次/秒 "
+                f"(预算 {args.rps * buckets:.0f})  record_success 平均 {record_avg:7.3f}ms  最大 {record_max:7.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+本地B站接口桩服务
+
+为基准测试提供可控延迟的搜索API、详情API、视频页面和封面图片，避免访问真实的B站接口。
+/video/<BV号> 返回带收藏按钮和收藏夹弹窗的页面，供浏览器自动化脚本使用。
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_video_item(bv_code):
+    """构造一条搜索API返回的视频结果
+    
+    Args:
+        bv_code: BV号
+        
+    Returns:
+        dict: 与搜索API结构一致的视频条目
+    """
+    return {
+        "bvid": bv_code,
+        "arcurl": f"https://www.bilibili.com/video/{bv_code}",
+        "title": f"测试视频 {bv_code}",
+        "description": "基准测试数据",
+        "pubdate": 1700000000,
+        "play": 100,
+        "danmaku": 10,
+        "author": "测试UP主",
+        "pic": f"//i0.hdslb.com/bfs/archive/{bv_code}.jpg",
+        "duration": "03:00"
+    }
+
+
+def make_video_page(bv_code, fav_folder):
+    """构造带收藏按钮和收藏夹弹窗的视频页面
+    
+    Args:
+        bv_code: BV号
+        fav_folder: 弹窗中显示的收藏夹名称
+        
+    Returns:
+        str: 页面HTML
+    """
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{bv_code}</title></head>
+<body>
+  <div class="video-fav video-toolbar-left-item"
+       onclick="document.querySelector('.collection-m-exp').style.display = 'block'">收藏</div>
+  <div class="collection-m-exp" style="display: none">
+    <div class="group-list"><ul>
+      <li><span class="fav-title">{fav_folder}</span><input type="checkbox"></li>
+    </ul></div>
+    <div class="bottom">
+      <button class="btn submit-move"
+              onclick="document.querySelector('.collection-m-exp').style.display = 'none';
+                       document.querySelector('.video-fav').classList.add('on')">确定</button>
+    </div>
+  </div>
+</body>
+</html>"""
+
+
+class StubBilibiliServer:
+    """本地B站接口桩服务
+    
+    Attributes:
+        latency: 每个请求的模拟延迟（秒）
+        request_count: 已处理的请求数
+        image_bytes: 已返回的图片字节数
+    """
+    
+    def __init__(self, latency=0.2, host='127.0.0.1', port=0):
+        """初始化桩服务
+        
+        Args:
+            latency: 每个请求的模拟延迟（秒）
+            host: 监听地址
+            port: 监听端口，0 表示自动分配
+        """
+        self.latency = latency
+        self.request_count = 0
+        self.image_bytes = 0
+        # 封面图片：文件名 -> 图片字节，通过 /bfs/archive/<文件名> 访问，
+        # CDN 缩放图以带 @ 参数的完整文件名作为键，如 a.jpg@672w_378h_1c.webp
+        self.images = {}
+        # 视频页面收藏夹弹窗中显示的收藏夹名称
+        self.fav_folder = '默认收藏夹'
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self):
+        """桩服务根地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _make_handler(self):
+        """创建请求处理类"""
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                time.sleep(server.latency)
+                
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                
+                if parsed.path.endswith('/search/all/v2'):
+                    keywords = query.get('keyword', [''])[0].split()
+                    payload = {
+                        "code": 0,
+                        "data": {
+                            "result": [{
+                                "result_type": "video",
+                                "data": [make_video_item(bv) for bv in keywords]
+                            }]
+                        }
+                    }
+                    self._send_json(payload)
+                elif parsed.path.startswith('/bfs/archive/'):
+                    image = server.images.get(parsed.path.rsplit('/', 1)[-1])
+                    if image is None:
+                        self.send_response(404)
+                        self.end_headers()
+                        return
+                    with server._lock:
+                        server.image_bytes += len(image)
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'image/webp' if '@' in parsed.path else 'image/jpeg')
+                    self.send_header('Content-Length', str(len(image)))
+                    self.end_headers()
+                    self.wfile.write(image)
+                elif parsed.path.startswith('/video/'):
+                    bv_code = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+                    body = make_video_page(bv_code, server.fav_folder).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif parsed.path.endswith('/view/detail'):
+                    bv_code = query.get('bvid', [''])[0]
+                    item = make_video_item(bv_code)
+                    payload = {
+                        "code": 0,
+                        "data": {
+                            "View": {
+                                "title": item['title'],
+                                "desc": item['description'],
+                                "pubdate": item['pubdate'],
+                                "stat": {"view": item['play'], "danmaku": item['danmaku']},
+                                "owner": {"name": item['author']},
+                                "pic": "https:" + item['pic'],
+                                "duration": 180
+                            }
+                        }
+                    }
+                    self._send_json(payload)
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+            
+            def _send_json(self, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        return Handler
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
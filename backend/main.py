@@ -9,33 +9,16 @@ from pathlib import Path
 from src.crawler.favorites_crawler import FavoritesCrawler
 from src.crawler.video_crawler import VideoCrawler
 from src.crawler.timeline_generator import TimelineGenerator
-from src.downloader.download_thumbs import download_all_covers
-from src.updater.frontend_updater import update_frontend_files
-from src.utils.path_manager import get_all_data_types, ensure_directories, get_data_paths
-from src.utils.config import get_config
-
-
-def download_covers_for_timeline(timeline_file: Path) -> dict:
-    """根据时间线文件下载封面图片
-    
-    Args:
-        timeline_file: 时间线文件路径
-        
-    Returns:
-        dict: 下载结果统计
-    """
-    import json
-    
-    if not timeline_file.exists():
-        return {'success': 0, 'failed': 0, 'skipped': 0}
-    
-    with open(timeline_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    if not isinstance(data, list):
-        return {'success': 0, 'failed': 0, 'skipped': 0}
-    
-    return download_all_covers(timeline_file, quiet=False, update_videos_json=True)
+from src.downloader.cover_gc import collect_cover_garbage
+from src.downloader.cover_manifest import load_cover_manifest
+from src.downloader.download_thumbs import get_download_transport
+from src.downloader.cover_encoder import create_cover_encoder
+from src.pipeline import DataTypePipeline, run_pipelines
+from src.utils.path_manager import get_all_data_types
+from src.utils.config import get_config, get_cover_config, get_frontend_thumbs_dir, PROJECT_ROOT
+from src.crawler.utils.metadata_cache import MetadataCache
+from src.crawler.utils.negative_cache import NegativeCache
+from src.crawler.utils.dead_letters import DeadLetterQueue
 
 
 def main():
@@ -45,98 +28,146 @@ def main():
     # 获取配置
     config = get_config()
     full_crawl = config['crawler'].get('full_crawl', False)
+    max_workers = config['crawler'].get('max_workers', 1)
+    batch_size = config['crawler'].get('batch_size', 1)
+    cover_workers = config['crawler'].get('cover_workers', 4)
+    queue_size = config['crawler'].get('pipeline_queue_size', 32)
+    metadata_cache_file = config['crawler'].get('metadata_cache', '')
+    negative_cache_file = config['crawler'].get('negative_cache', '')
+    crawl_journal = config['crawler'].get('crawl_journal', True)
+    dead_letters_file = config['crawler'].get('dead_letters', '')
+    dead_letter_delay = config['crawler'].get('dead_letter_delay', 5.0)
+    dead_letter_limit = config['crawler'].get('dead_letter_limit', 20)
+    journal_flush_interval = config['crawler'].get('journal_flush_interval', 2.0)
     
     print(f"爬取模式: {'全量爬取' if full_crawl else '增量爬取'}")
+    print(f"元数据爬取并发数: {max_workers}")
+    print(f"批量搜索每批BV号数: {batch_size}")
+    print(f"封面下载并发数: {cover_workers}")
+    
+    # 持久化元数据缓存（跨运行保存，配置为空时不启用）
+    metadata_cache = None
+    if metadata_cache_file:
+        metadata_cache_path = Path(metadata_cache_file)
+        if not metadata_cache_path.is_absolute():
+            metadata_cache_path = PROJECT_ROOT / metadata_cache_path
+        metadata_cache = MetadataCache(metadata_cache_path)
+        print(f"元数据缓存: {metadata_cache_path}（{len(metadata_cache)} 条）")
+    
+    # 失效视频缓存（已删除、不可见等视频在复查时间前不再请求，配置为空时不启用）
+    negative_cache = None
+    if negative_cache_file:
+        negative_cache_path = Path(negative_cache_file)
+        if not negative_cache_path.is_absolute():
+            negative_cache_path = PROJECT_ROOT / negative_cache_path
+        negative_cache = NegativeCache.load(negative_cache_path)
+        print(f"失效视频缓存: {negative_cache_path}（{len(negative_cache)} 个）")
+    
+    # 失败视频重试队列（所有来源都失败的视频在主爬取之后以独立的频率预算重试，配置为空时不启用）
+    dead_letters = None
+    if dead_letters_file:
+        dead_letters_path = Path(dead_letters_file)
+        if not dead_letters_path.is_absolute():
+            dead_letters_path = PROJECT_ROOT / dead_letters_path
+        dead_letters = DeadLetterQueue.load(dead_letters_path)
+        print(f"失败视频重试队列: {dead_letters_path}（{len(dead_letters)} 个）")
     
     # 初始化各个模块
+    # 收藏夹爬虫和时间线生成器在各数据类型间共用；视频爬虫每个数据类型一个实例，
+    # 共用同一个请求频率限制器，并行时对B站接口的请求总频率不变；
+    # 共用同一个元数据解析器，出现在多个收藏夹中的视频只请求一次
     favorites_crawler = FavoritesCrawler()
-    video_crawler = VideoCrawler()
     timeline_generator = TimelineGenerator()
     
-    # 清除缓存，确保使用最新数据
-    video_crawler.clear_cache()
-    
     # 获取所有数据类型
     data_types = get_all_data_types()
     
-    # 爬取收藏夹到内存
-    print("\n=== 1. 爬取收藏夹获取BV号 ===")
-    favorites_result = favorites_crawler.run_with_memory()
-    print(f"收藏夹爬取结果: {favorites_result}")
+    # 封面清单只加载和校验一次（只重新解码有变化的文件，损坏的封面会重新下载），所有数据类型共用
+    thumbs_dir = get_frontend_thumbs_dir()
+    cover_manifest = load_cover_manifest(thumbs_dir)
+    existing_covers = set(cover_manifest)
     
-    # 添加成功标志，跟踪是否成功生成了时间线数据
-    timeline_generated = False
+    # WebP 编码进程池（CPU 密集），所有数据类型共用，进程数默认等于 CPU 核心数
+    cover_encoder = create_cover_encoder()
+    print(f"封面编码进程数: {cover_encoder.workers}")
     
-    # 处理每个数据类型
+    pipelines = []
+    rate_limiter = None
+    source_router = None
+    metadata_resolver = None
     for data_type in data_types:
-        print(f"\n=== 处理 {data_type} 数据 ===")
-        
-        # 确保目录存在
-        ensure_directories(data_type)
-        
-        # 从内存中获取BV号列表
-        print(f"\n=== 2. 从内存获取BV号列表 ===")
-        bv_list = []
-        data_result = favorites_result.get(data_type, {})
-        if data_result.get('success'):
-            bv_list = data_result.get('bv_list', [])
-        
-        if not bv_list:
-            print(f"没有找到 {data_type} 的BV号")
-            continue
-        
-        # 获取时间线文件路径
-        timeline_file = get_data_paths(data_type).get('TIMELINE_FILE')
-        
-        # 直接从内存中的BV号列表爬取视频元数据
-        print(f"\n=== 3. 直接爬取视频元数据 ===")
-        videos = video_crawler.crawl_from_bv_list(bv_list, data_type, full_crawl)
-        
-        if not videos:
-            if full_crawl:
-                print(f"没有爬取到 {data_type} 的视频元数据")
-            else:
-                print(f"所有 {data_type} 的视频都已爬取，无需更新")
-            continue
-        
-        # 生成时间线数据
-        print(f"\n=== 4. 生成时间线数据 ===")
-        timeline_result = timeline_generator.run(videos, data_type)
-        print(f"时间线生成结果: {timeline_result}")
-        
-        if timeline_result.get('success'):
-            # 更新成功标志
-            timeline_generated = True
-            
-            print(f"\n=== 5. 下载封面图片 ===")
-            cover_result = download_covers_for_timeline(timeline_file)
+        video_crawler = VideoCrawler(
+            max_workers=max_workers,
+            batch_size=batch_size,
+            metadata_cache=metadata_cache,
+            rate_limiter=rate_limiter,
+            source_router=source_router,
+            negative_cache=negative_cache,
+            dead_letters=dead_letters,
+            dead_letter_delay=dead_letter_delay,
+            metadata_resolver=metadata_resolver
+        )
+        rate_limiter = video_crawler.rate_limiter
+        source_router = video_crawler.source_router
+        metadata_resolver = video_crawler.metadata_resolver
+        pipelines.append(DataTypePipeline(
+            data_type,
+            favorites_crawler,
+            video_crawler,
+            timeline_generator,
+            thumbs_dir,
+            full_crawl=full_crawl,
+            cover_workers=cover_workers,
+            queue_size=queue_size,
+            existing_covers=existing_covers,
+            encoder=cover_encoder,
+            manifest=cover_manifest,
+            journal_flush_interval=journal_flush_interval if crawl_journal else None,
+            dead_letter_limit=dead_letter_limit if dead_letters is not None else None
+        ))
+    
+    # 各数据类型并行执行：收藏夹 -> 元数据（边爬取边下载封面）-> 时间线 -> 封面文件名 -> 前端
+    # 所有数据类型的封面下载线程共用一个连接池，连接数等于下载线程总数
+    get_download_transport(cover_workers * max(len(pipelines), 1))
+    print(f"\n=== 并行处理 {len(pipelines)} 个数据类型 ===")
+    start_time = time.time()
+    # 元数据缓存无论成功与否都要关闭数据库连接，之后 CI 才能缓存完整的数据库文件
+    try:
+        try:
+            results = run_pipelines(pipelines)
+        finally:
+            cover_encoder.shutdown()
+            cover_manifest.save()
+            if negative_cache is not None:
+                negative_cache.save()
+            if dead_letters is not None:
+                dead_letters.save()
+    
+        print("\n=== 各数据类型处理结果 ===")
+        for data_type, result in results.items():
+            print(f"{data_type}: {'成功' if result['success'] else '失败'} {result.get('message', '')}")
+            print(f"  阶段耗时(秒): {result['timings']}")
+        print(f"总耗时: {time.time() - start_time:.2f} 秒")
+        if metadata_resolver is not None:
+            resolver_stats = metadata_resolver.get_stats()
+            print(f"元数据共享: 请求 {resolver_stats['fetched']} 个BV号，复用已有结果 {resolver_stats['memo_hits']} 次，"
+                  f"合并并发请求 {resolver_stats['coalesced']} 次，节省请求 {resolver_stats['requests_saved']} 次")
+    
+        # 所有数据类型都成功时才清理封面目录（失败的数据类型的时间线可能缺少新下载的封面）
+        gc_mode = get_cover_config()['gc_mode']
+        if gc_mode != 'off' and all(result['success'] for result in results.values()):
+            print("\n=== 封面目录清理 ===")
+            collect_cover_garbage(thumbs_dir, gc_mode, manifest=cover_manifest)
     
-    # 只有当成功生成了时间线数据时，才执行前端文件更新
-    if timeline_generated:
-        # 更新前端文件
-        print("\n=== 更新前端文件 ===")
-        # 从配置文件获取前端数据目录
-        config = {
-            'backend_data_dir': './data'
-        }
-        
-        for data_type in data_types:
-            print(f"\n=== 更新 {data_type} 前端文件 ===")
-            result = update_frontend_files(data_type, config)
-            
-            print(f"结果: {'成功' if result['success'] else '失败'}")
-            print(f"消息: {result.get('message', '')}")
-            
-            if 'merge_result' in result:
-                merge_msg = result['merge_result'].get('message', '')
-                print(f"合并结果: {merge_msg}")
-            
-            if 'copy_result' in result:
-                copy_msg = result['copy_result'].get('message', '')
-                print(f"复制结果: {copy_msg}")
-    else:
-        print("\n=== 跳过更新前端文件 ===")
-        print("原因: 没有成功生成时间线数据，无需更新前端文件")
+        if metadata_cache is not None:
+            print(f"\n元数据缓存统计: {metadata_cache.get_stats()}")
+        if negative_cache is not None:
+            print(f"失效视频缓存统计: {negative_cache.get_stats()}")
+        if dead_letters is not None:
+            print(f"失败视频重试队列统计: {dead_letters.get_stats()}")
+    finally:
+        if metadata_cache is not None:
+            metadata_cache.close()
 
     print("\n=== 时间线更新完成 ===")
 
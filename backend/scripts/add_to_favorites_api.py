@@ -37,11 +37,16 @@ import time
 import json
 import re
 import os
+import sys
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 from urllib.parse import urlencode
-import requests
+
+# 添加 backend 目录到路径，复用共享的HTTP传输层
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.crawler.utils.http_transport import get_shared_transport
 
 
 class BiliBiliFavoritesAPI:
@@ -64,7 +69,7 @@ class BiliBiliFavoritesAPI:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.min_delay = min_delay
-        self.session = requests.Session()
+        self.cookies = {}  # 认证相关Cookie
         self.lock = threading.Lock()
         self.semaphore = threading.Semaphore(max_workers)
         self.success_count = 0
@@ -76,17 +81,20 @@ class BiliBiliFavoritesAPI:
         self.success_bv_codes = []  # 存储成功添加的BV号
         
         # 设置请求头
-        self.session.headers.update({
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36",
             "Accept": "*/*",
             "Accept-Language": "zh-CN,zh;q=0.9",
             "Content-Type": "application/x-www-form-urlencoded",
             "Origin": "https://www.bilibili.com",
             "Referer": "https://www.bilibili.com/"
-        })
+        }
         
         # 加载Cookie
         self._load_cookies()
+        
+        # HTTP传输层（进程内共享，退出时统一关闭；请求头按请求传入）
+        self.transport = get_shared_transport()
     
     def _load_cookies(self):
         """从文件加载Cookie"""
@@ -106,9 +114,9 @@ class BiliBiliFavoritesAPI:
                 cookie_parts.append(f"{name}={value}")
             
             cookie_str = "; ".join(cookie_parts)
-            self.session.headers.update({"Cookie": cookie_str})
+            self.headers.update({"Cookie": cookie_str})
             
-            # 同时设置Session Cookie
+            # 同时记录认证Cookie
             cookie_dict = {}
             for cookie in cookies:
                 name = cookie.get('name', '')
@@ -116,7 +124,7 @@ class BiliBiliFavoritesAPI:
                 if name in ['SESSDATA', 'DedeUserID', 'bili_jct', 'bili_ticket']:
                     cookie_dict[name] = value
             
-            self.session.cookies.update(cookie_dict)
+            self.cookies.update(cookie_dict)
             
             print(f"✅ 已加载Cookie，包含 {len(cookies)} 个cookie")
             
@@ -151,7 +159,7 @@ class BiliBiliFavoritesAPI:
         Returns:
             tuple: (SESSDATA, DedeUserID, bili_jct)
         """
-        cookies = self.session.cookies.get_dict()
+        cookies = self.cookies
         return (
             cookies.get('SESSDATA', ''),
             cookies.get('DedeUserID', ''),
@@ -178,7 +186,7 @@ class BiliBiliFavoritesAPI:
         }
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.transport.get(url, params=params, headers=self.headers, timeout=10)
             
             if response.status_code != 200:
                 print(f"API响应错误: {response.status_code}")
@@ -261,7 +269,7 @@ class BiliBiliFavoritesAPI:
                 self._rate_limit_wait(is_retry=is_retry)
                 
                 try:
-                    response = self.session.post(url, data=data, timeout=10)
+                    response = self.transport.post(url, data=data, headers=self.headers, timeout=10)
                     result = response.json()
                     
                     if result.get("code") == 0:
@@ -327,7 +335,7 @@ class BiliBiliFavoritesAPI:
         params = {"bvid": bv_code}
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.transport.get(url, params=params, headers=self.headers, timeout=10)
             data = response.json()
             
             if data.get("code") == 0:
@@ -650,5 +658,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
@@ -3,7 +3,8 @@
 批量添加B站视频到收藏夹脚本（无头模式+并发版）
 
 从指定的BV号列表文件中读取视频ID，并批量添加这些视频到B站用户的指定收藏夹中。
-脚本使用无头模式运行，支持并发处理多个视频。
+脚本使用无头模式运行，支持并发处理多个视频。每个工作线程在整个任务期间独占一个
+浏览器和上下文，Cookie 只读取一次，页面处理若干视频后回收重建。
 
 使用方法:
     python add_to_favorites_concurrent.py --bv-file <bv文件路径> --fav-folder <收藏夹名称> [--workers <并发数>] [--headless] [--max-retries <重试次数>] [--retry-delay <重试间隔>]
@@ -27,23 +28,132 @@
     --workers: 最大并发数（默认: 4）
     --max-retries: 最大重试次数（默认: 3）
     --retry-delay: 重试间隔秒数（默认: 2）
+    --page-reuse: 单个页面处理的视频数，超过后关闭并新建页面（默认: 20）
+    --browser-pages: 单个浏览器创建的页面数，超过后重启浏览器（默认: 不限制）
 """
 
 import argparse
+import queue
 import time
 import json
 import os
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 from playwright.sync_api import sync_playwright
 import playwright
 
 
+class BrowserSession:
+    """工作线程独占的浏览器会话
+    
+    Playwright 同步API的对象只能在创建它的线程中使用，因此每个工作线程持有
+    自己的浏览器和上下文，首次使用时启动，在整个任务期间保持打开。
+    每个浏览器同时只打开一个页面：页面处理 max_page_uses 个视频后关闭并新建，
+    浏览器累计创建 max_browser_pages 个页面后重启，避免长时间运行后内存增长。
+    """
+    
+    def __init__(self, headless=True, cookies=None, max_page_uses=20, max_browser_pages=None):
+        """初始化浏览器会话（不立即启动浏览器）
+        
+        Args:
+            headless: 是否使用无头模式
+            cookies: 添加到上下文的Cookie列表
+            max_page_uses: 单个页面处理的视频数上限
+            max_browser_pages: 单个浏览器创建的页面数上限，None 表示不限制
+        """
+        if max_page_uses < 1:
+            raise ValueError("max_page_uses必须大于等于1")
+        if max_browser_pages is not None and max_browser_pages < 1:
+            raise ValueError("max_browser_pages必须大于等于1")
+        
+        self.headless = headless
+        self.cookies = cookies or []
+        self.max_page_uses = max_page_uses
+        self.max_browser_pages = max_browser_pages
+        self.browser_launches = 0
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._page_uses = 0
+        self._browser_pages = 0
+    
+    def _launch(self):
+        """启动浏览器并创建带Cookie的上下文"""
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._context = self._browser.new_context()
+        if self.cookies:
+            self._context.add_cookies(self.cookies)
+        self._browser_pages = 0
+        self.browser_launches += 1
+    
+    def _close_page(self):
+        """关闭当前页面"""
+        if self._page is not None:
+            try:
+                self._page.close()
+            except Exception:
+                pass
+            self._page = None
+    
+    def _close_browser(self):
+        """关闭页面、上下文和浏览器"""
+        self._close_page()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._context = None
+    
+    def page(self):
+        """获取可用页面，按上限回收页面和浏览器
+        
+        Returns:
+            Playwright page对象
+        """
+        if self._page is not None and (self._page_uses >= self.max_page_uses or self._page.is_closed()):
+            self._close_page()
+        
+        if self._page is None:
+            browser_exhausted = (self.max_browser_pages is not None
+                                 and self._browser_pages >= self.max_browser_pages)
+            if self._browser is None or browser_exhausted or not self._browser.is_connected():
+                self._close_browser()
+                self._launch()
+            self._page = self._context.new_page()
+            self._page_uses = 0
+            self._browser_pages += 1
+        
+        self._page_uses += 1
+        return self._page
+    
+    def discard(self):
+        """出错后丢弃当前页面，浏览器已断开时一并丢弃，下次使用时重新创建"""
+        if self._browser is not None and not self._browser.is_connected():
+            self._close_browser()
+        else:
+            self._close_page()
+    
+    def close(self):
+        """关闭浏览器和 Playwright（必须在创建会话的线程中调用）"""
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
 class BiliBiliFavoritesAdderConcurrent:
     """并发添加B站视频到收藏夹"""
     
-    def __init__(self, bv_file, fav_folder, cookie_file=None, force_login=False, headless=True, max_workers=4, max_retries=3, retry_delay=2):
+    def __init__(self, bv_file, fav_folder, cookie_file=None, force_login=False, headless=True, max_workers=4, max_retries=3, retry_delay=2,
+                 page_reuse=20, browser_pages=None, base_url='https://www.bilibili.com'):
         """初始化添加器
         
         Args:
@@ -55,6 +165,9 @@ class BiliBiliFavoritesAdderConcurrent:
             max_workers: 最大并发数，默认为 4
             max_retries: 最大重试次数，默认为 3
             retry_delay: 重试间隔（秒），默认为 2
+            page_reuse: 单个页面处理的视频数，默认为 20
+            browser_pages: 单个浏览器创建的页面数上限，默认为 None（不限制）
+            base_url: 视频页面根地址，默认为 https://www.bilibili.com
         """
         self.bv_file = Path(bv_file)
         self.fav_folder = fav_folder
@@ -70,6 +183,12 @@ class BiliBiliFavoritesAdderConcurrent:
         self.fail_count = 0
         self.retry_count = 0
         self.success_bv_codes = []  # 存储成功添加的BV号
+        self.page_reuse = page_reuse
+        self.browser_pages = browser_pages
+        self.base_url = base_url.rstrip('/')
+        self.cookies = None
+        self.browser_launches = 0
+        self._local = threading.local()
     
     def read_bv_codes(self):
         """读取BV号列表文件
@@ -109,6 +228,66 @@ class BiliBiliFavoritesAdderConcurrent:
             print(f"读取文件失败: {e}")
             return False
     
+    def load_cookies(self):
+        """读取Cookie文件（整个任务只读取一次）
+        
+        Returns:
+            list: Cookie列表，文件不存在或读取失败时为空列表
+        """
+        with self.lock:
+            if self.cookies is None:
+                self.cookies = []
+                if self.cookie_file.exists():
+                    try:
+                        with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                            self.cookies = json.load(f)
+                    except Exception as e:
+                        print(f"读取Cookie失败: {e}")
+            return self.cookies
+    
+    def new_session(self):
+        """创建浏览器会话
+        
+        Returns:
+            BrowserSession: 未启动的浏览器会话
+        """
+        return BrowserSession(
+            headless=self.headless,
+            cookies=self.load_cookies(),
+            max_page_uses=self.page_reuse,
+            max_browser_pages=self.browser_pages
+        )
+    
+    def _close_session(self, session):
+        """关闭浏览器会话并累计浏览器启动次数"""
+        session.close()
+        with self.lock:
+            self.browser_launches += session.browser_launches
+    
+    def _worker(self, bv_queue):
+        """工作线程：持有一个浏览器会话，依次处理队列中的BV号
+        
+        Args:
+            bv_queue: 待处理BV号队列
+        """
+        session = self.new_session()
+        self._local.session = session
+        try:
+            while True:
+                try:
+                    bv = bv_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self.add_single_video(bv)
+                except Exception as e:
+                    with self.lock:
+                        print(f"[{bv}] 处理异常: {e}")
+                        self.fail_count += 1
+        finally:
+            self._local.session = None
+            self._close_session(session)
+    
     def check_login_status(self, page):
         """检查当前页面登录状态
         
@@ -135,9 +314,30 @@ class BiliBiliFavoritesAdderConcurrent:
     def add_single_video(self, bv_code):
         """添加单个视频到收藏夹（线程安全，支持重试）
         
+        在工作线程中调用时复用该线程的浏览器会话，否则临时创建一个会话。
+        
         Args:
             bv_code: BV号
             
+        Returns:
+            bool: 添加成功返回True，否则返回False
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self.new_session()
+            try:
+                return self._add_with_session(session, bv_code)
+            finally:
+                self._close_session(session)
+        return self._add_with_session(session, bv_code)
+    
+    def _add_with_session(self, session, bv_code):
+        """使用指定浏览器会话添加单个视频到收藏夹
+        
+        Args:
+            session: 浏览器会话
+            bv_code: BV号
+            
         Returns:
             bool: 添加成功返回True，否则返回False
         """
@@ -145,163 +345,146 @@ class BiliBiliFavoritesAdderConcurrent:
         
         for attempt in range(1, self.max_retries + 1):
             try:
-                playwright = sync_playwright().start()
-                browser = playwright.chromium.launch(headless=self.headless)
-                context = browser.new_context()
-                page = context.new_page()
+                page = session.page()
                 
-                # 尝试加载Cookie
-                if self.cookie_file.exists():
-                    try:
-                        import json
-                        with open(self.cookie_file, 'r', encoding='utf-8') as f:
-                            cookies = json.load(f)
-                        context.add_cookies(cookies)
-                    except:
-                        pass
+                video_url = f"{self.base_url}/video/{bv_code}"
+                page.goto(video_url, timeout=30000, wait_until='domcontentloaded')
+                page.wait_for_timeout(2000)
                 
-                try:
-                    video_url = f"https://www.bilibili.com/video/{bv_code}"
-                    page.goto(video_url, timeout=30000, wait_until='domcontentloaded')
-                    page.wait_for_timeout(2000)
-                    
-                    # 检查登录状态
-                    if not self.check_login_status(page):
-                        with self.lock:
-                            print(f"[{bv_code}] 未登录，跳过")
+                # 检查登录状态
+                if not self.check_login_status(page):
+                    with self.lock:
+                        print(f"[{bv_code}] 未登录，跳过")
+                        self.fail_count += 1
+                    return False
+                
+                # 查找收藏按钮
+                collect_button = page.locator('.video-fav.video-toolbar-left-item').first
+                if not collect_button:
+                    with self.lock:
+                        if attempt < self.max_retries:
+                            print(f"[{bv_code}] 未找到收藏按钮，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
+                            last_error = "未找到收藏按钮"
+                        else:
+                            print(f"[{bv_code}] 未找到收藏按钮，已达最大重试次数")
                             self.fail_count += 1
-                        return False
-                    
-                    # 查找收藏按钮
-                    collect_button = page.locator('.video-fav.video-toolbar-left-item').first
-                    if not collect_button:
-                        with self.lock:
-                            if attempt < self.max_retries:
-                                print(f"[{bv_code}] 未找到收藏按钮，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
-                                last_error = "未找到收藏按钮"
-                            else:
-                                print(f"[{bv_code}] 未找到收藏按钮，已达最大重试次数")
-                                self.fail_count += 1
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_delay)
+                        continue
+                    return False
+                
+                try:
+                    collect_button.wait_for(state='visible', timeout=10000)
+                except:
+                    with self.lock:
                         if attempt < self.max_retries:
-                            time.sleep(self.retry_delay)
-                            continue
-                        return False
-                    
+                            print(f"[{bv_code}] 收藏按钮不可见，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
+                            last_error = "收藏按钮不可见"
+                        else:
+                            print(f"[{bv_code}] 收藏按钮不可见，已达最大重试次数")
+                            self.fail_count += 1
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_delay)
+                        continue
+                    return False
+                
+                # 检查收藏状态
+                button_class = collect_button.get_attribute('class') or ''
+                if 'on' in button_class:
+                    with self.lock:
+                        print(f"[{bv_code}] ✅ 已收藏，跳过")
+                        self.success_count += 1
+                        self.success_bv_codes.append(bv_code)
+                    return True
+                
+                # 点击收藏按钮
+                collect_button.click()
+                page.wait_for_timeout(2000)
+                
+                # 查找弹窗
+                dialog_found = False
+                dialog_selectors = ['.collection-m-exp', '.bili-dialog-bomb', '.fav-dialog']
+                for selector in dialog_selectors:
                     try:
-                        collect_button.wait_for(state='visible', timeout=10000)
+                        if page.locator(selector).is_visible():
+                            dialog_found = True
+                            break
                     except:
-                        with self.lock:
-                            if attempt < self.max_retries:
-                                print(f"[{bv_code}] 收藏按钮不可见，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
-                                last_error = "收藏按钮不可见"
-                            else:
-                                print(f"[{bv_code}] 收藏按钮不可见，已达最大重试次数")
-                                self.fail_count += 1
-                        if attempt < self.max_retries:
-                            time.sleep(self.retry_delay)
-                            continue
-                        return False
-                    
-                    # 检查收藏状态
-                    button_class = collect_button.get_attribute('class') or ''
-                    if 'on' in button_class:
-                        with self.lock:
-                            print(f"[{bv_code}] ✅ 已收藏，跳过")
-                            self.success_count += 1
-                            self.success_bv_codes.append(bv_code)
-                        return True
-                    
-                    # 点击收藏按钮
-                    collect_button.click()
-                    page.wait_for_timeout(2000)
-                    
-                    # 查找弹窗
-                    dialog_found = False
-                    dialog_selectors = ['.collection-m-exp', '.bili-dialog-bomb', '.fav-dialog']
-                    for selector in dialog_selectors:
-                        try:
-                            if page.locator(selector).is_visible():
-                                dialog_found = True
-                                break
-                        except:
-                            continue
-                    
-                    if not dialog_found:
-                        with self.lock:
-                            if attempt < self.max_retries:
-                                print(f"[{bv_code}] 未找到收藏夹弹窗，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
-                                last_error = "未找到收藏夹弹窗"
-                            else:
-                                print(f"[{bv_code}] 未找到收藏夹弹窗，已达最大重试次数")
-                                self.fail_count += 1
+                        continue
+                
+                if not dialog_found:
+                    with self.lock:
                         if attempt < self.max_retries:
-                            time.sleep(self.retry_delay)
-                            continue
-                        return False
-                    
-                    # 使用JavaScript点击复选框
-                    js_click = f"""
-                    (function() {{
-                        const items = document.querySelectorAll('.group-list ul li');
-                        for (const item of items) {{
-                            const title = item.querySelector('.fav-title');
-                            if (title && title.textContent.includes('{self.fav_folder}')) {{
-                                const checkbox = item.querySelector('input[type="checkbox"]');
-                                if (checkbox) {{
-                                    checkbox.click();
-                                    return true;
-                                }}
+                            print(f"[{bv_code}] 未找到收藏夹弹窗，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
+                            last_error = "未找到收藏夹弹窗"
+                        else:
+                            print(f"[{bv_code}] 未找到收藏夹弹窗，已达最大重试次数")
+                            self.fail_count += 1
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_delay)
+                        continue
+                    return False
+                
+                # 使用JavaScript点击复选框
+                js_click = f"""
+                (function() {{
+                    const items = document.querySelectorAll('.group-list ul li');
+                    for (const item of items) {{
+                        const title = item.querySelector('.fav-title');
+                        if (title && title.textContent.includes('{self.fav_folder}')) {{
+                            const checkbox = item.querySelector('input[type="checkbox"]');
+                            if (checkbox) {{
+                                checkbox.click();
+                                return true;
                             }}
                         }}
-                        return false;
-                    }})();
-                    """
-                    
-                    result = page.evaluate(js_click)
-                    page.wait_for_timeout(1000)
-                    
-                    # 点击确认按钮
-                    confirm_selectors = [
-                        '.collection-m-exp .bottom .btn.submit-move',
-                        '.fav-dialog .btn-primary',
-                        'button:has-text("确定")'
-                    ]
-                    
-                    confirm_button = None
-                    for selector in confirm_selectors:
-                        try:
-                            button = page.locator(selector).first
-                            if button.is_visible():
-                                confirm_button = button
+                    }}
+                    return false;
+                }})();
+                """
+                
+                result = page.evaluate(js_click)
+                page.wait_for_timeout(1000)
+                
+                # 点击确认按钮
+                confirm_selectors = [
+                    '.collection-m-exp .bottom .btn.submit-move',
+                    '.fav-dialog .btn-primary',
+                    'button:has-text("确定")'
+                ]
+                
+                confirm_button = None
+                for selector in confirm_selectors:
+                    try:
+                        button = page.locator(selector).first
+                        if button.is_visible():
+                            confirm_button = button
+                            break
+                    except:
+                        continue
+                
+                if confirm_button:
+                    # 等待按钮启用
+                    try:
+                        for _ in range(20):  # 最多等待10秒
+                            if not confirm_button.is_disabled():
                                 break
-                        except:
-                            continue
-                    
-                    if confirm_button:
-                        # 等待按钮启用
-                        try:
-                            for _ in range(20):  # 最多等待10秒
-                                if not confirm_button.is_disabled():
-                                    break
-                                page.wait_for_timeout(500)
-                        except:
-                            pass
-                        
-                        confirm_button.click()
-                        page.wait_for_timeout(2000)
-                    
-                    with self.lock:
-                        print(f"[{bv_code}] ✅ 收藏成功")
-                        self.success_count += 1
-                        self.success_bv_codes.append(bv_code)
-                    return True
+                            page.wait_for_timeout(500)
+                    except:
+                        pass
                     
-                finally:
-                    browser.close()
-                    playwright.stop()
+                    confirm_button.click()
+                    page.wait_for_timeout(2000)
+                
+                with self.lock:
+                    print(f"[{bv_code}] ✅ 收藏成功")
+                    self.success_count += 1
+                    self.success_bv_codes.append(bv_code)
+                return True
                     
             except Exception as e:
                 last_error = str(e)
+                session.discard()
                 with self.lock:
                     if attempt < self.max_retries:
                         print(f"[{bv_code}] 添加失败: {e}，{self.retry_delay}秒后重试 ({attempt}/{self.max_retries})")
@@ -339,20 +522,19 @@ class BiliBiliFavoritesAdderConcurrent:
         
         start_time = time.time()
         
-        # 使用线程池并发处理
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self.add_single_video, bv): bv for bv in self.bv_codes}
-            
-            completed = 0
-            for future in as_completed(futures):
-                completed += 1
-                bv = futures[future]
-                try:
-                    future.result()
-                except Exception as e:
-                    with self.lock:
-                        print(f"[{bv}] 处理异常: {e}")
-                        self.fail_count += 1
+        # 每个工作线程持有一个浏览器会话，处理完队列后关闭
+        self.load_cookies()
+        bv_queue = queue.Queue()
+        for bv in self.bv_codes:
+            bv_queue.put(bv)
+        workers = [
+            threading.Thread(target=self._worker, args=(bv_queue,), name=f"fav-worker-{i}")
+            for i in range(min(self.max_workers, len(self.bv_codes)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
         
         end_time = time.time()
         
@@ -365,6 +547,7 @@ class BiliBiliFavoritesAdderConcurrent:
         print(f"添加失败: {self.fail_count}")
         if self.retry_count > 0:
             print(f"重试次数: {self.retry_count}")
+        print(f"浏览器启动次数: {self.browser_launches}")
         print(f"总耗时: {end_time - start_time:.2f} 秒")
         print(f"平均速度: {len(self.bv_codes) / (end_time - start_time):.2f} 个/秒")
         
@@ -455,6 +638,8 @@ def main():
     parser.add_argument('--workers', type=int, default=4, help='最大并发数（默认: 4）')
     parser.add_argument('--max-retries', type=int, default=3, help='最大重试次数（默认: 3）')
     parser.add_argument('--retry-delay', type=int, default=2, help='重试间隔秒数（默认: 2）')
+    parser.add_argument('--page-reuse', type=int, default=20, help='单个页面处理的视频数（默认: 20）')
+    parser.add_argument('--browser-pages', type=int, default=None, help='单个浏览器创建的页面数上限（默认: 不限制）')
     
     args = parser.parse_args()
     
@@ -467,7 +652,9 @@ def main():
         args.headless,
         args.workers,
         args.max_retries,
-        args.retry_delay
+        args.retry_delay,
+        args.page_reuse,
+        args.browser_pages
     )
     
     # 运行任务
@@ -5,10 +5,15 @@
 用于清理 videos.json 中的重复条目
 """
 
-import json
+import sys
 from pathlib import Path
 from collections import OrderedDict
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.utils.bv_utils import extract_bv_from_item, normalize_bv
+from src.utils.bv_index import BVIndex, save_timeline_records
+from src.utils.json_stream import iter_json_array
+
 
 def dedup_videos_json(videos_path: Path) -> dict:
     """对 videos.json 进行去重
@@ -23,11 +28,22 @@ def dedup_videos_json(videos_path: Path) -> dict:
         print(f"文件不存在: {videos_path}")
         return {"success": False, "message": "文件不存在"}
     
-    # 读取数据
-    with open(videos_path, 'r', encoding='utf-8') as f:
-        videos = json.load(f)
-    
-    if not isinstance(videos, list):
+    # 旁路索引有效且记录为有序、无重复、编号连续时，无需解析和重写文件
+    bv_index = BVIndex.load(videos_path)
+    if bv_index is not None and bv_index.is_mergeable and bv_index.ids_sequential:
+        print(f"无重复条目: {bv_index.count} 条")
+        return {
+            "success": True,
+            "original_count": bv_index.count,
+            "deduped_count": bv_index.count,
+            "removed_count": 0,
+            "duplicates": []
+        }
+    
+    # 读取数据（去重保留最后出现的条目，需要整体加载）
+    try:
+        videos = list(iter_json_array(videos_path))
+    except ValueError:
         print(f"数据格式错误: {videos_path}")
         return {"success": False, "message": "数据格式错误"}
     
@@ -42,20 +58,8 @@ def dedup_videos_json(videos_path: Path) -> dict:
         if not isinstance(video, dict):
             continue
         
-        # 使用 bv 字段作为唯一键
-        bv = video.get('bv', '')
-        if not bv:
-            # 如果没有 bv 字段，尝试从 cover 或 videoUrl 提取
-            cover = video.get('cover', '')
-            if cover.startswith('BV'):
-                bv = cover.split('.')[0]
-            else:
-                video_url = video.get('videoUrl', '')
-                if 'BV' in video_url:
-                    import re
-                    match = re.search(r'(BV[0-9A-Za-z]+)', video_url)
-                    if match:
-                        bv = match.group(1)
+        # 使用 bv 字段作为唯一键，没有时从 videoUrl 或 cover 提取
+        bv = normalize_bv(video.get('bv', '') or extract_bv_from_item(video))
         
         if bv:
             if bv in seen:
@@ -84,9 +88,8 @@ def dedup_videos_json(videos_path: Path) -> dict:
     if duplicates:
         print(f"重复的BV号: {', '.join(set(duplicates))}")
     
-    # 保存去重后的数据
-    with open(videos_path, 'w', encoding='utf-8') as f:
-        json.dump(deduped_videos, f, ensure_ascii=False, indent=2)
+    # 原子保存去重后的数据，同时更新旁路索引
+    save_timeline_records(videos_path, deduped_videos)
     
     print(f"已保存到: {videos_path}")
     
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+批量元数据解析模块
+将多个BV号合并为一次搜索请求，并把搜索结果分发回各个BV号
+"""
+
+import threading
+
+from src.utils.bv_utils import normalize_bv
+
+
+class BatchMetadataResolver:
+    """批量元数据解析器
+
+    搜索API单页最多返回 42 条结果，逐个BV号搜索时绝大部分结果都被丢弃。
+    批量解析器把多个BV号拼成一个关键词发起搜索，凡是命中待爬取队列中
+    任意BV号的结果都会被收集（包括逐个搜索时顺带返回的其他BV号），
+    工作线程在发起逐个请求前先从这里领取，从而减少上游请求数。
+    """
+
+    # 搜索API单页结果上限
+    MAX_BATCH_SIZE = 42
+
+    def __init__(self, crawler, batch_size=8, probe_batches=3):
+        """初始化批量解析器
+
+        Args:
+            crawler: VideoCrawler 实例，提供搜索请求和结果解析
+            batch_size: 每次搜索请求合并的BV号数量
+            probe_batches: 连续多少个批次零命中后停止批量搜索
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于等于1")
+
+        self.crawler = crawler
+        self.batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        self.probe_batches = probe_batches
+
+        self._lock = threading.Lock()
+        self._pending = set()  # 尚未获取到元数据的BV号
+        self._resolved = {}  # BV号 -> 已收集的元数据
+        self._raw = {}  # BV号 -> 搜索结果原始条目
+        self._queued = set()  # 参与了批量搜索、尚未领取的BV号
+
+        # 统计信息
+        self.batch_requests = 0
+        self.batch_http_requests = 0
+        self.failed_batches = 0
+        self.fallback_requests = 0
+        self.batch_hits = 0
+        self.harvested = 0
+        self.taken = 0
+        self.batching_disabled = False
+
+    @staticmethod
+    def normalize_bv(bv_code):
+        """标准化BV号（与 VideoCrawler.crawl_video_metadata 保持一致，保留大小写）
+
+        Args:
+            bv_code: BV号（可以带或不带BV前缀）
+
+        Returns:
+            str: 带BV前缀的BV号
+        """
+        return normalize_bv(bv_code)
+
+    def resolve(self, bv_list):
+        """批量解析BV号列表
+
+        Args:
+            bv_list: 待爬取的BV号列表
+
+        Returns:
+            int: 通过批量搜索获取到元数据的BV号数量
+        """
+        queue = []
+        with self._lock:
+            for bv_code in bv_list:
+                bv = self.normalize_bv(bv_code)
+                if bv and bv not in self._pending and bv not in self._resolved:
+                    self._pending.add(bv)
+                    queue.append(bv)
+
+        if self.batch_size < 2 or len(queue) < 2:
+            return 0
+
+        print(f"批量搜索元数据: {len(queue)} 个BV号，每批 {self.batch_size} 个")
+        with self._lock:
+            self._queued.update(queue)
+
+        index = 0
+        while index < len(queue) and not self.batching_disabled:
+            # 跳过已被之前批次顺带收集到的BV号
+            with self._lock:
+                batch = []
+                while index < len(queue) and len(batch) < self.batch_size:
+                    if queue[index] in self._pending:
+                        batch.append(queue[index])
+                    index += 1
+            if not batch:
+                break
+
+            sent_before = self.crawler.search_api_requests
+            data = self.crawler._request_search_api(' '.join(batch))
+            self.batch_requests += 1
+            # 失败的批次可能已重试多次（熔断时一次也没有发出），按实际发出的请求数计入成本
+            sent = self.crawler.search_api_requests - sent_before
+            self.batch_http_requests += max(sent, 1) if data else sent
+            if not data:
+                self.failed_batches += 1
+                continue
+
+            own_hits = self.harvest(data, requested=batch)
+            self.batch_hits += own_hits
+
+            # 上游不支持多关键词时避免持续浪费请求
+            if self.batch_requests >= self.probe_batches and self.batch_hits == 0:
+                print("批量搜索连续未命中，回退为逐个获取")
+                self.batching_disabled = True
+
+        resolved_count = len(self._resolved)
+        print(f"批量搜索完成: {self.batch_requests} 次请求获取 {resolved_count} 个视频元数据")
+        return resolved_count
+
+    def harvest(self, response_data, requested=None):
+        """从搜索API响应中收集所有命中待爬取队列的视频
+
+        Args:
+            response_data: 搜索API响应数据
+            requested: 本次请求的BV号列表，其余命中计为顺带收集
+
+        Returns:
+            int: 命中 requested 中BV号的数量
+        """
+        requested = set(requested or [])
+        own_hits = 0
+
+        for video_item in self.crawler._extract_search_video_items(response_data):
+            bv = video_item.get('bvid')
+            with self._lock:
+                if bv not in self._pending:
+                    continue
+                self._pending.discard(bv)
+                self._resolved[bv] = self.crawler._search_item_to_metadata(video_item, bv)
+                self._raw[bv] = video_item
+                if bv in requested:
+                    own_hits += 1
+                else:
+                    self.harvested += 1
+
+        return own_hits
+
+    def take(self, bv_code, with_raw=False):
+        """领取BV号的元数据
+
+        领取后该BV号不再参与收集；未收集到时由调用方走逐个获取流程。
+
+        Args:
+            bv_code: BV号
+            with_raw: 是否同时返回搜索结果原始条目
+
+        Returns:
+            dict: 视频元数据，未收集到返回None；with_raw 为 True 时返回 (元数据, 原始条目)
+        """
+        bv = self.normalize_bv(bv_code)
+        with self._lock:
+            self._pending.discard(bv)
+            metadata = self._resolved.pop(bv, None)
+            raw = self._raw.pop(bv, None)
+            if metadata:
+                self.taken += 1
+            elif bv in self._queued:
+                # 批量搜索未获取到，调用方改为逐个请求
+                self.fallback_requests += 1
+            self._queued.discard(bv)
+        if with_raw:
+            return metadata, raw
+        return metadata
+
+    def get_stats(self):
+        """获取统计信息
+
+        requests_saved 以逐个搜索（已领取的每个BV号一次请求）为基准，减去实际发出的
+        批量搜索请求（包括失败批次的重试）和批量未获取到、回退为逐个获取的请求，
+        批量搜索得不偿失时为负数。
+
+        Returns:
+            dict: 统计信息
+        """
+        with self._lock:
+            baseline = self.taken + self.fallback_requests
+            spent = self.batch_http_requests + self.fallback_requests
+            return {
+                'batch_size': self.batch_size,
+                'batch_requests': self.batch_requests,
+                'batch_http_requests': self.batch_http_requests,
+                'failed_batches': self.failed_batches,
+                'fallback_requests': self.fallback_requests,
+                'batch_hits': self.batch_hits,
+                'harvested': self.harvested,
+                'resolved_without_request': self.taken,
+                'requests_saved': baseline - spent,
+                'batching_disabled': self.batching_disabled
+            }
@@ -8,11 +8,11 @@ import re
 import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright
-import requests
 from src.utils.path_manager import get_favorites_config
 from src.crawler.utils.user_agent_rotator import UserAgentRotator
 from src.crawler.utils.rate_limiter import RateLimiter
 from src.crawler.utils.session_manager import SessionManager
+from src.crawler.utils.http_transport import get_shared_transport
 
 
 class FavoritesCrawler:
@@ -50,6 +50,9 @@ class FavoritesCrawler:
             self.rate_limiter = None
             self.session_manager = None
         
+        # 共享HTTP传输层
+        self.transport = get_shared_transport()
+        
         # API配置（内置，不依赖config.json）
         self.api_config = {
             'base_url': 'https://api.bilibili.com/x/v3/fav/resource/list',
@@ -228,24 +231,21 @@ class FavoritesCrawler:
         self._rate_limit()
         
         try:
-            # 如果启用反爬，使用SessionManager的session
+            # 如果启用反爬，合并SessionManager中当前session的请求头
             if self.use_anti_crawler and self.session_manager:
                 session = self.session_manager.get_session()
-                response = session.get(
-                    self.api_config['base_url'],
-                    params=params,
-                    headers=headers,
-                    cookies=self.api_config['cookies'],
-                    timeout=30
-                )
+                request_headers = dict(session.headers)
+                request_headers.update(headers)
             else:
-                response = requests.get(
-                    self.api_config['base_url'],
-                    params=params,
-                    headers=headers,
-                    cookies=self.api_config['cookies'],
-                    timeout=30
-                )
+                request_headers = headers
+            
+            response = self.transport.get(
+                self.api_config['base_url'],
+                params=params,
+                headers=request_headers,
+                cookies=self.api_config['cookies'],
+                timeout=30
+            )
             
             response.raise_for_status()
             
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+共享元数据解析模块
+在整次运行的所有数据类型之间共享视频元数据，同一个BV号只向上游请求一次
+"""
+
+import threading
+
+from src.utils.bv_utils import normalize_bv
+
+
+class _Call:
+    """正在进行中的一次请求"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _copy_result(result):
+    """复制结果中的元数据，避免多个调用方共用同一个字典
+
+    Args:
+        result: (元数据, 失败原因)
+
+    Returns:
+        tuple: (元数据副本, 失败原因)
+    """
+    metadata, reason = result
+    return (dict(metadata) if metadata else metadata), reason
+
+
+class MetadataResolver:
+    """共享元数据解析器（线程安全）
+
+    各数据类型的爬虫实例共用一个解析器：
+    - 同一BV号的并发请求合并为一次（singleflight），其余调用等待第一个请求的结果
+    - 成功获取的元数据在本次运行中记住，其他数据类型再遇到同一BV号时直接复用；
+      失败结果不记住，重试队列和其他数据类型再次遇到时会重新请求
+
+    结果为 (元数据, 失败原因)，失败原因的含义与 VideoCrawler 的失败记录一致
+    （None 表示视频已失效）。返回的元数据是副本，调用方修改不会影响其他数据类型。
+    """
+
+    def __init__(self):
+        """初始化共享元数据解析器"""
+        self._lock = threading.Lock()
+        self._results = {}  # BV号 -> 元数据（仅成功结果）
+        self._in_flight = {}  # BV号 -> _Call
+
+        # 统计信息
+        self.fetched = 0
+        self.memo_hits = 0
+        self.coalesced = 0
+
+    def is_known(self, bv_code):
+        """BV号是否已有成功结果或正在请求
+
+        Args:
+            bv_code: BV号
+
+        Returns:
+            bool: 已有成功结果或正在请求返回True
+        """
+        bv = normalize_bv(bv_code)
+        with self._lock:
+            return bv in self._results or bv in self._in_flight
+
+    def remember(self, bv_code, metadata):
+        """记住通过其他途径（如批量搜索）获取到的元数据，已有结果时不覆盖
+
+        Args:
+            bv_code: BV号
+            metadata: 视频元数据，为空时不记住
+        """
+        if not metadata:
+            return
+        bv = normalize_bv(bv_code)
+        with self._lock:
+            if bv not in self._results:
+                self._results[bv] = dict(metadata)
+                self.fetched += 1
+
+    def resolve(self, bv_code, fetch):
+        """获取BV号的结果：已有成功结果直接返回，正在请求时等待，否则调用 fetch 请求
+
+        Args:
+            bv_code: BV号
+            fetch: 请求函数，参数为标准化的BV号，返回 (元数据, 失败原因)
+
+        Returns:
+            tuple: (元数据副本, 失败原因)
+
+        Raises:
+            Exception: fetch 抛出的异常（等待同一请求的调用同样抛出，异常结果不会被记住）
+        """
+        bv = normalize_bv(bv_code)
+        with self._lock:
+            if bv in self._results:
+                self.memo_hits += 1
+                return dict(self._results[bv]), None
+            call = self._in_flight.get(bv)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[bv] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy_result(call.result)
+
+        try:
+            call.result = fetch(bv)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[bv]
+                if call.error is None:
+                    self.fetched += 1
+                    if call.result[0]:
+                        self._results[bv] = dict(call.result[0])
+            call.done.set()
+        return _copy_result(call.result)
+
+    def get_stats(self):
+        """获取统计信息
+
+        Returns:
+            dict: 请求数、复用已有结果数、合并的并发请求数和节省的请求数
+        """
+        with self._lock:
+            return {
+                'fetched': self.fetched,
+                'memo_hits': self.memo_hits,
+                'coalesced': self.coalesced,
+                'requests_saved': self.memo_hits + self.coalesced,
+            }
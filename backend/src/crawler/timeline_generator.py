@@ -4,12 +4,14 @@
 用于生成前端所需的时间线数据
 """
 
-import json
-import re
 from pathlib import Path
 from datetime import datetime
 from src.utils.config import get_config
 from src.utils.path_manager import get_data_paths
+from src.crawler.timeline_index import TimelineIndex
+from src.utils.bv_utils import extract_bv_from_item, normalize_bv
+from src.utils.bv_index import BVIndex, write_bv_index, save_timeline_records
+from src.utils.json_stream import iter_json_array
 
 
 class TimelineGenerator:
@@ -46,15 +48,14 @@ class TimelineGenerator:
             if not timeline_file.exists():
                 return []
             
-            with open(timeline_file, 'r', encoding='utf-8') as f:
-                timeline_data = json.load(f)
-            
-            if isinstance(timeline_data, list):
-                print(f"成功加载 {len(timeline_data)} 条现有时间线数据")
-                return timeline_data
-            else:
-                print("时间线数据格式错误，返回空列表")
+            try:
+                timeline_data = list(iter_json_array(timeline_file))
+            except ValueError as e:
+                print(f"时间线数据格式错误，返回空列表: {e}")
                 return []
+            
+            print(f"成功加载 {len(timeline_data)} 条现有时间线数据")
+            return timeline_data
         except Exception as e:
             print(f"加载现有时间线数据失败: {e}")
             return []
@@ -66,45 +67,9 @@ class TimelineGenerator:
             item: 时间线条目
             
         Returns:
-            str: BV 号，未找到返回空字符串
+            str: 标准化的 BV 号（带 BV 前缀，保持大小写），未找到返回空字符串
         """
-        if not isinstance(item, dict):
-            return ''
-        
-        bv = None
-        
-        # 1. 从 videoUrl 字段提取（优先级最高）
-        if not bv and 'videoUrl' in item:
-            url = item.get('videoUrl', '')
-            match = re.search(r'(BV[0-9A-Za-z]+)', url)
-            if match:
-                bv = match.group(1)
-        
-        # 2. 从 cover 字段提取（支持带或不带 BV 前缀的格式）
-        if not bv and 'cover' in item:
-            cover = item.get('cover', '')
-            # 检查是否带 BV 前缀
-            if cover.startswith('BV'):
-                bv = cover.split('.')[0]
-            else:
-                # 尝试从文件名中提取可能的 BV 号格式
-                # 匹配类似 15NzrBBEJQ.jpg 的格式
-                match = re.search(r'([0-9A-Za-z]{10,})\.[a-zA-Z]+$', cover)
-                if match:
-                    # 假设这是一个 BV 号（不带前缀）
-                    bv = f"BV{match.group(1)}"
-        
-        # 3. 从嵌套的 video 对象中提取
-        if not bv and 'video' in item:
-            video_info = item.get('video')
-            if isinstance(video_info, dict):
-                bv = video_info.get('bv')
-        
-        # 4. 从顶级 bv 字段提取
-        if not bv and 'bv' in item:
-            bv = item.get('bv')
-        
-        return bv if bv else ''
+        return normalize_bv(extract_bv_from_item(item))
     
     def generate_timeline(self, videos):
         """生成时间线数据
@@ -180,18 +145,18 @@ class TimelineGenerator:
     def save_timeline(self, timeline_data, output_file):
         """保存时间线数据到文件
         
+        先写入同目录临时文件再重命名覆盖，写入过程中断不会损坏原文件；
+        写入的同时生成旁路BV号索引。
+        
         Args:
-            timeline_data: 时间线数据
+            timeline_data: 时间线数据（列表或逐条生成的迭代器）
             output_file: 输出文件路径
             
         Returns:
             bool: 保存成功返回True，否则返回False
         """
         try:
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(timeline_data, f, ensure_ascii=False, indent=2)
+            save_timeline_records(output_file, timeline_data)
             
             print(f"成功保存时间线数据到 {output_file}")
             return True
@@ -199,6 +164,129 @@ class TimelineGenerator:
             print(f"保存时间线数据失败: {e}")
             return False
     
+    def _merge_incremental(self, timeline, new_items, index):
+        """将新条目按日期插入已有序的时间线
+        
+        Args:
+            timeline: 现有时间线数据（按日期降序，原地修改）
+            new_items: 新时间线条目
+            index: 现有时间线的索引
+            
+        Returns:
+            tuple: (合并后的时间线, 新增数量, 第一个需要重新编号的位置，无变化时为None)
+        """
+        added = 0
+        first_changed = None if index.ids_sequential else 0
+        
+        # 新条目按日期降序依次插入，同日期条目保持原有先后顺序
+        for item in sorted(new_items, key=TimelineIndex.date_of, reverse=True):
+            if not isinstance(item, dict):
+                continue
+            bv = self._extract_bv_from_item(item)
+            if not bv or bv in index:
+                continue
+            
+            position = index.insert(timeline, item, bv)
+            added += 1
+            if first_changed is None or position < first_changed:
+                first_changed = position
+        
+        return timeline, added, first_changed
+    
+    def _merge_stream(self, existing_records, new_items):
+        """流式归并：逐条读取已有序的现有时间线，与排好序的新条目归并
+        
+        结果与 list.sort(key=date, reverse=True) 的稳定排序一致：
+        同一日期的新条目排在已有条目之后。
+        
+        Args:
+            existing_records: 现有时间线记录迭代器（按日期降序）
+            new_items: 新条目列表（按日期降序）
+            
+        Yields:
+            dict: 重新编号后的时间线条目
+        """
+        position = 0
+        new_position = 0
+        for item in existing_records:
+            date = TimelineIndex.date_of(item)
+            while new_position < len(new_items) and TimelineIndex.date_of(new_items[new_position]) > date:
+                position += 1
+                new_items[new_position]['id'] = str(position)
+                yield new_items[new_position]
+                new_position += 1
+            position += 1
+            item['id'] = str(position)
+            yield item
+        for item in new_items[new_position:]:
+            position += 1
+            item['id'] = str(position)
+            yield item
+    
+    def _run_streaming(self, new_timeline_data, output_file, bv_index):
+        """旁路索引有效且现有时间线可增量合并时，不加载整个时间线直接流式合并
+        
+        Args:
+            new_timeline_data: 新时间线条目
+            output_file: 时间线文件路径
+            bv_index: 与时间线文件内容一致的 BVIndex
+            
+        Returns:
+            dict: 生成结果
+        """
+        fresh_items = []
+        fresh_bvs = set()
+        for item in new_timeline_data:
+            if not isinstance(item, dict):
+                continue
+            bv = self._extract_bv_from_item(item)
+            if bv and bv not in bv_index and bv not in fresh_bvs:
+                fresh_bvs.add(bv)
+                fresh_items.append(item)
+        
+        if not fresh_items and bv_index.ids_sequential:
+            print("时间线无变化，跳过保存")
+            return {"success": True, "count": bv_index.count, "added": 0}
+        
+        fresh_items.sort(key=TimelineIndex.date_of, reverse=True)
+        total = bv_index.count + len(fresh_items)
+        print(f"新增 {len(fresh_items)} 条时间线数据，流式合并 {total} 条")
+        
+        # 临时文件写完后才替换原文件，读取原文件与写入可以同时进行
+        merged = self._merge_stream(iter_json_array(output_file), fresh_items)
+        if self.save_timeline(merged, output_file):
+            return {"success": True, "count": total, "added": len(fresh_items)}
+        return {"success": False, "message": "保存失败"}
+    
+    def _merge_full(self, existing_timeline, new_items):
+        """全量合并：按BV号去重后重新排序
+        
+        Args:
+            existing_timeline: 现有时间线数据
+            new_items: 新时间线条目
+            
+        Returns:
+            tuple: (合并后的时间线, 新增数量)
+        """
+        merged = []
+        seen_bvs = set()
+        added = 0
+        
+        # 现有条目在前、新条目在后，每个条目只提取一次BV号
+        for is_new, items in ((False, existing_timeline), (True, new_items)):
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                bv = self._extract_bv_from_item(item)
+                if bv and bv not in seen_bvs:
+                    seen_bvs.add(bv)
+                    merged.append(item)
+                    if is_new:
+                        added += 1
+        
+        merged.sort(key=TimelineIndex.date_of, reverse=True)
+        return merged, added
+    
     def run(self, videos, data_type):
         """运行时间线生成任务
         
@@ -214,56 +302,47 @@ class TimelineGenerator:
         config = get_data_paths(data_type)
         output_file = config.get('TIMELINE_FILE')
         
-        existing_timeline = self.load_existing_timeline(output_file)
-        
         new_timeline_data = self.generate_timeline(videos)
         
-        if not new_timeline_data and not existing_timeline:
-            return {"success": False, "message": "无视频数据"}
+        # 旁路索引有效且时间线有序时流式合并，无需把现有时间线整体加载到内存
+        bv_index = BVIndex.load(output_file)
+        if bv_index is not None and bv_index.is_mergeable and bv_index.count:
+            return self._run_streaming(new_timeline_data, output_file, bv_index)
         
-        all_timeline_data = []
-        existing_bvs = set()
-        
-        # 处理现有时间线数据
-        for item in existing_timeline:
-            if isinstance(item, dict):
-                bv = self._extract_bv_from_item(item)
-                if bv:
-                    existing_bvs.add(bv)
-                    all_timeline_data.append(item)
-        
-        # 处理新时间线数据，确保不重复
-        for item in new_timeline_data:
-            if isinstance(item, dict):
-                bv = self._extract_bv_from_item(item)
-                if bv and bv not in existing_bvs:
-                    existing_bvs.add(bv)
-                    all_timeline_data.append(item)
+        existing_timeline = self.load_existing_timeline(output_file)
         
-        # 最终去重，确保没有重复数据
-        final_timeline_data = []
-        final_bvs = set()
+        if not new_timeline_data and not existing_timeline:
+            return {"success": False, "message": "无视频数据"}
         
-        for item in all_timeline_data:
-            if isinstance(item, dict):
-                bv = self._extract_bv_from_item(item)
-                if bv and bv not in final_bvs:
-                    final_bvs.add(bv)
-                    final_timeline_data.append(item)
-            elif item not in final_timeline_data:
-                # 非字典类型数据直接添加（如果不存在）
-                final_timeline_data.append(item)
+        # 现有时间线已有序且无重复时增量合并，否则全量去重排序
+        if bv_index is not None and bv_index.count == len(existing_timeline):
+            index = TimelineIndex.from_bv_index(bv_index, self._extract_bv_from_item)
+        else:
+            index = TimelineIndex(existing_timeline, self._extract_bv_from_item)
+        if index.is_mergeable:
+            all_timeline_data, added, first_changed = self._merge_incremental(
+                existing_timeline, new_timeline_data, index
+            )
+        else:
+            print("现有时间线未排序或存在重复条目，执行全量合并")
+            all_timeline_data, added = self._merge_full(existing_timeline, new_timeline_data)
+            first_changed = 0
         
-        all_timeline_data = final_timeline_data
+        if first_changed is None:
+            print("时间线无变化，跳过保存")
+            if bv_index is None and output_file.exists():
+                write_bv_index(output_file, all_timeline_data)
+            return {"success": True, "count": len(all_timeline_data), "added": 0}
         
-        all_timeline_data.sort(key=lambda x: x.get('date', ''), reverse=True)
+        # 只重新编号受影响的区域（第一个插入位置之后的条目）
+        for i in range(first_changed, len(all_timeline_data)):
+            all_timeline_data[i]['id'] = str(i + 1)
         
-        for i, item in enumerate(all_timeline_data):
-            item['id'] = str(i + 1)
+        print(f"新增 {added} 条时间线数据，重新编号 {len(all_timeline_data) - first_changed} 条")
         
         saved = self.save_timeline(all_timeline_data, output_file)
         
         if saved:
-            return {"success": True, "count": len(all_timeline_data)}
+            return {"success": True, "count": len(all_timeline_data), "added": added}
         else:
             return {"success": False, "message": "保存失败"}
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+时间线索引模块
+维护现有时间线的有序日期索引和BV号集合，用于增量合并新视频
+"""
+
+from bisect import bisect_left
+
+
+class TimelineIndex:
+    """时间线索引类
+
+    时间线按日期降序排列。索引内部保存升序日期列表（时间线倒序），
+    通过 bisect 计算新条目的插入位置，合并代价与新增视频数量相关，
+    而不需要对整个时间线重新排序。
+
+    插入位置与 list.sort(key=date, reverse=True) 的稳定排序结果一致：
+    同一日期的新条目排在已有条目之后。
+    """
+
+    def __init__(self, timeline, extract_bv):
+        """构建时间线索引（单次遍历）
+
+        Args:
+            timeline: 现有时间线数据（按日期降序）
+            extract_bv: 从时间线条目中提取BV号的函数
+        """
+        self.extract_bv = extract_bv
+        self.bvs = set()
+        self._asc_dates = []
+
+        # 是否可以直接增量合并：已按日期降序、每条都有唯一BV号
+        self.is_mergeable = True
+        # id 是否已经是按位置编号的 1..N
+        self.ids_sequential = True
+
+        previous_date = None
+        for position, item in enumerate(timeline):
+            if not isinstance(item, dict):
+                self.is_mergeable = False
+                continue
+
+            bv = extract_bv(item)
+            if not bv or bv in self.bvs:
+                self.is_mergeable = False
+            self.bvs.add(bv)
+
+            date = self.date_of(item)
+            if previous_date is not None and date > previous_date:
+                self.is_mergeable = False
+            previous_date = date
+            self._asc_dates.append(date)
+
+            if item.get('id') != str(position + 1):
+                self.ids_sequential = False
+
+        self._asc_dates.reverse()
+
+    @classmethod
+    def from_bv_index(cls, bv_index, extract_bv):
+        """从旁路BV号索引构建时间线索引，无需逐条提取BV号
+
+        Args:
+            bv_index: 与时间线文件内容一致的 BVIndex
+            extract_bv: 从时间线条目中提取BV号的函数（用于新条目）
+
+        Returns:
+            TimelineIndex: 时间线索引
+        """
+        index = cls([], extract_bv)
+        index.bvs = set(bv_index)
+        index.is_mergeable = bv_index.is_mergeable
+        index.ids_sequential = bv_index.ids_sequential
+        if index.is_mergeable:
+            index._asc_dates = bv_index.dates_ascending()
+        return index
+
+    @staticmethod
+    def date_of(item):
+        """获取条目的排序日期
+
+        Args:
+            item: 时间线条目
+
+        Returns:
+            str: 日期字符串，缺失时返回空字符串
+        """
+        return item.get('date') or ''
+
+    def __len__(self):
+        return len(self._asc_dates)
+
+    def __contains__(self, bv):
+        return bv in self.bvs
+
+    def insert_position(self, date):
+        """计算日期在降序时间线中的插入位置
+
+        Args:
+            date: 日期字符串
+
+        Returns:
+            int: 插入位置（排在同日期已有条目之后）
+        """
+        return len(self._asc_dates) - bisect_left(self._asc_dates, date)
+
+    def insert(self, timeline, item, bv):
+        """将新条目插入时间线并更新索引
+
+        Args:
+            timeline: 时间线数据（原地修改）
+            item: 新条目
+            bv: 新条目的BV号
+
+        Returns:
+            int: 插入位置
+        """
+        date = self.date_of(item)
+        asc_position = bisect_left(self._asc_dates, date)
+        position = len(self._asc_dates) - asc_position
+
+        self._asc_dates.insert(asc_position, date)
+        timeline.insert(position, item)
+        self.bvs.add(bv)
+        return position
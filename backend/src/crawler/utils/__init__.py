@@ -9,6 +9,12 @@ from .user_agent_rotator import UserAgentRotator, PlatformNotFoundError, Browser
 from .rate_limiter import RateLimiter
 from .session_manager import SessionManager
 from .captcha_handler import CaptchaHandler
+from .http_transport import AsyncHttpTransport, HttpTransport, TransportResponse, get_shared_transport
+from .metadata_cache import MetadataCache
+from .circuit_breaker import CircuitBreaker, SourceRouter
+from .negative_cache import NegativeCache
+from .crawl_journal import CrawlJournal
+from .dead_letters import DeadLetterQueue
 
 __all__ = [
     'UserAgentRotator',
@@ -17,4 +23,14 @@ __all__ = [
     'RateLimiter',
     'SessionManager',
     'CaptchaHandler',
+    'AsyncHttpTransport',
+    'HttpTransport',
+    'TransportResponse',
+    'get_shared_transport',
+    'MetadataCache',
+    'CircuitBreaker',
+    'SourceRouter',
+    'NegativeCache',
+    'CrawlJournal',
+    'DeadLetterQueue',
 ]
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+熔断器模块
+
+为元数据获取的每个来源（搜索API、详情API、网页爬取）维护一个熔断器，
+按最近的请求结果统计成功率和耗时：
+
+- closed: 正常放行
+- open: 连续失败或最近成功率过低时熔断，冷却期内直接跳过该来源，不再消耗限速名额和重试等待
+- half_open: 冷却期结束后只放行一个探测请求，成功则恢复，失败则以更长的冷却期再次熔断
+
+SourceRouter 按来源的健康状况调整尝试顺序：熔断中的来源被跳过，
+最近成功率偏低的来源排到健康来源之后。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """单个来源的熔断器（线程安全）
+
+    Attributes:
+        name: 来源名称
+        failure_threshold: 连续失败多少次后熔断
+        failure_rate: 最近请求的失败率达到该值时熔断
+        window_size: 统计最近多少次请求
+        min_samples: 按失败率熔断前至少需要的请求数
+        open_seconds: 首次熔断的冷却时间（秒）
+        max_open_seconds: 冷却时间上限（秒），探测失败后冷却时间翻倍
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        min_samples: int = 5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0
+    ):
+        """初始化熔断器
+
+        Args:
+            name: 来源名称
+            failure_threshold: 连续失败多少次后熔断
+            failure_rate: 最近请求的失败率达到该值时熔断 (0-1]
+            window_size: 统计最近多少次请求
+            min_samples: 按失败率熔断前至少需要的请求数
+            open_seconds: 首次熔断的冷却时间（秒）
+            max_open_seconds: 冷却时间上限（秒）
+
+        Raises:
+            ValueError: 当参数无效时抛出
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold必须大于等于1")
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate必须在0到1之间")
+        if window_size < 1 or min_samples < 1:
+            raise ValueError("window_size和min_samples必须大于等于1")
+        if open_seconds < 0 or max_open_seconds < open_seconds:
+            raise ValueError("max_open_seconds必须大于等于open_seconds")
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self._state = CLOSED
+        self._window = deque(maxlen=window_size)  # (是否成功, 耗时秒数)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._current_open_seconds = open_seconds
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.success_count = 0
+        self.failure_count = 0
+        self.rejected_count = 0
+        self.trip_count = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态（冷却期结束但还没有探测时仍为 open）"""
+        with self._lock:
+            return self._state
+
+    def _cooldown_elapsed(self, now: float) -> bool:
+        return now - self._opened_at >= self._current_open_seconds
+
+    def is_available(self) -> bool:
+        """是否可以尝试该来源（不占用探测名额）
+
+        Returns:
+            bool: closed，或冷却期已结束且没有进行中的探测时返回True
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                return self._cooldown_elapsed(time.monotonic())
+            return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """申请发起一次请求
+
+        冷却期结束后第一个申请的请求作为探测请求放行，之后的请求在探测完成前被拒绝。
+        放行后必须调用 record_success 或 record_failure。
+
+        Returns:
+            bool: 放行返回True
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._cooldown_elapsed(time.monotonic()):
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_count += 1
+            return False
+
+    def record_success(self, latency: float = 0.0) -> None:
+        """记录一次成功的请求
+
+        Args:
+            latency: 请求耗时（秒）
+        """
+        with self._lock:
+            self.success_count += 1
+            self._window.append((True, latency))
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                # 探测成功：恢复，重新开始统计
+                self._state = CLOSED
+                self._probe_in_flight = False
+                self._current_open_seconds = self.open_seconds
+                self._window.clear()
+                self._window.append((True, latency))
+
+    def record_failure(self, latency: float = 0.0) -> None:
+        """记录一次失败的请求
+
+        Args:
+            latency: 请求耗时（秒）
+        """
+        with self._lock:
+            self.failure_count += 1
+            self._window.append((False, latency))
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                # 探测失败：以翻倍的冷却时间再次熔断
+                self._probe_in_flight = False
+                self._current_open_seconds = min(self._current_open_seconds * 2, self.max_open_seconds)
+                self._trip()
+            elif self._state == CLOSED and (
+                    self._consecutive_failures >= self.failure_threshold
+                    or (len(self._window) >= self.min_samples
+                        and self._failure_ratio() >= self.failure_rate)):
+                self._trip()
+
+    def _trip(self) -> None:
+        """熔断（调用方需持有锁）"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.trip_count += 1
+
+    def _failure_ratio(self) -> float:
+        failures = sum(1 for ok, _ in self._window if not ok)
+        return failures / len(self._window) if self._window else 0.0
+
+    def success_rate(self) -> float:
+        """最近请求的成功率（没有请求时为1.0）
+
+        Returns:
+            float: 成功率 (0-1)
+        """
+        with self._lock:
+            return 1.0 - self._failure_ratio()
+
+    def reset(self) -> None:
+        """重置为 closed 状态并清空统计"""
+        with self._lock:
+            self._state = CLOSED
+            self._window.clear()
+            self._consecutive_failures = 0
+            self._current_open_seconds = self.open_seconds
+            self._probe_in_flight = False
+            self.success_count = 0
+            self.failure_count = 0
+            self.rejected_count = 0
+            self.trip_count = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息
+
+        Returns:
+            dict: 状态、累计成功/失败/跳过/熔断次数，以及最近请求的成功率和平均耗时
+        """
+        with self._lock:
+            latencies = [latency for _, latency in self._window]
+            return {
+                'state': self._state,
+                'success_count': self.success_count,
+                'failure_count': self.failure_count,
+                'rejected_count': self.rejected_count,
+                'trip_count': self.trip_count,
+                'success_rate': round(1.0 - self._failure_ratio(), 3),
+                'avg_latency': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            }
+
+
+class SourceRouter:
+    """按健康状况排列多个来源的尝试顺序
+
+    Attributes:
+        sources: 默认尝试顺序
+        healthy_rate: 最近成功率低于该值的来源排到健康来源之后
+        breakers: 来源名称 -> CircuitBreaker
+    """
+
+    def __init__(self, sources: List[str], healthy_rate: float = 0.8, **breaker_options):
+        """初始化来源路由
+
+        Args:
+            sources: 来源名称列表（默认尝试顺序）
+            healthy_rate: 健康来源的最低成功率
+            **breaker_options: 传给每个 CircuitBreaker 的参数
+        """
+        self.sources = list(sources)
+        self.healthy_rate = healthy_rate
+        self.breakers = {name: CircuitBreaker(name, **breaker_options) for name in self.sources}
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        """获取来源的熔断器
+
+        Args:
+            name: 来源名称
+
+        Returns:
+            CircuitBreaker，不存在返回 None
+        """
+        return self.breakers.get(name)
+
+    def order(self) -> List[str]:
+        """获取本次应尝试的来源及顺序
+
+        熔断中（且冷却期未结束）的来源被跳过；其余来源中健康的在前，
+        同一组内保持默认顺序。
+
+        Returns:
+            list: 来源名称列表
+        """
+        available = [name for name in self.sources if self.breakers[name].is_available()]
+        return sorted(
+            available,
+            key=lambda name: (self.breakers[name].success_rate() < self.healthy_rate, self.sources.index(name))
+        )
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有来源的统计信息
+
+        Returns:
+            dict: 来源名称 -> 统计信息
+        """
+        return {name: self.breakers[name].get_stats() for name in self.sources}
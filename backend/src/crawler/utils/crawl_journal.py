@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+爬取日志模块
+
+元数据爬取结果原本只保存在内存中，直到时间线生成时才写入磁盘，
+爬取中途崩溃、中断或遇到验证码时整次运行的结果都会丢失。
+
+本模块把每个成功获取的视频元数据追加写入时间线旁的 NDJSON 日志（每行一条记录），
+下次运行时读取日志，已完成的BV号直接复用，不再请求。时间线保存成功后删除日志。
+
+写入按批进行：记录先放入内存缓冲区，缓冲的记录数或距上次写入的时间达到阈值时
+一次性写入并 fsync，调用线程不会为每条记录等待磁盘。
+读取时忽略最后一行不完整的记录（写入中途崩溃）和超过有效期的记录。
+
+Usage (as module):
+  from src.crawler.utils.crawl_journal import CrawlJournal
+  journal = CrawlJournal(path)
+  completed = journal.load()     # BV号 -> 元数据
+  journal.append(metadata)
+  journal.close()                # 写入剩余记录
+  journal.discard()              # 时间线保存成功后删除
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+# 日志文件名（与时间线文件位于同一目录）
+JOURNAL_FILENAME = 'crawl_journal.ndjson'
+
+
+class CrawlJournal:
+    """爬取日志（线程安全）
+
+    Attributes:
+        path: 日志文件路径
+        flush_interval: 两次写入之间的最长间隔（秒）
+        flush_records: 缓冲的记录数达到该值时立即写入
+        max_age: 记录的有效期（秒），加载时忽略更早的记录
+        completed: load() 读取到的 BV号 -> 元数据
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 2.0, flush_records: int = 100,
+                 max_age: float = 86400):
+        """初始化爬取日志
+
+        Args:
+            path: 日志文件路径
+            flush_interval: 两次写入之间的最长间隔（秒），0 表示每条记录立即写入
+            flush_records: 缓冲的记录数达到该值时立即写入
+            max_age: 记录的有效期（秒），默认 1 天
+
+        Raises:
+            ValueError: 当参数无效时抛出
+        """
+        if flush_interval < 0 or flush_records < 1:
+            raise ValueError("flush_interval必须大于等于0，flush_records必须大于等于1")
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.max_age = max_age
+        self.completed = {}
+
+        self._buffer = []
+        self._file = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+
+        # 统计信息
+        self.resumed_count = 0
+        self.appended_count = 0
+        self.flush_count = 0
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """读取上次运行留下的日志
+
+        最后一行不完整时截掉，之后追加的记录从新的一行开始。
+
+        Returns:
+            dict: BV号 -> 元数据（按写入顺序，同一BV号以最后一条为准）
+        """
+        self.completed = {}
+        try:
+            with self.path.open('rb') as f:
+                data = f.read()
+        except OSError:
+            return self.completed
+
+        complete_size = data.rfind(b'\n') + 1
+        if complete_size < len(data):
+            with self.path.open('r+b') as f:
+                f.truncate(complete_size)
+
+        oldest = time.time() - self.max_age
+        for line in data[:complete_size].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or not record.get('bv') or not isinstance(record.get('metadata'), dict):
+                continue
+            if record.get('ts', 0) < oldest:
+                continue
+            self.completed[record['bv']] = record['metadata']
+        self.resumed_count = len(self.completed)
+        return self.completed
+
+    def append(self, metadata: Dict[str, Any]):
+        """追加一条元数据记录，缓冲区满或到达写入间隔时批量写入
+
+        Args:
+            metadata: 视频元数据（包含 bv）
+        """
+        if not metadata or not metadata.get('bv'):
+            return
+        line = json.dumps({'bv': metadata['bv'], 'ts': int(time.time()), 'metadata': metadata},
+                          ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(line)
+            self.appended_count += 1
+            due = (len(self._buffer) >= self.flush_records
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的记录写入日志并 fsync"""
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            if not lines:
+                return
+            self._write(lines)
+
+    def _write(self, lines: List[str]):
+        """写入一批记录（调用方需持有 _io_lock）"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open('a', encoding='utf-8')
+        self._file.write(''.join(line + '\n' for line in lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.flush_count += 1
+
+    def close(self):
+        """写入剩余记录并关闭文件（日志保留，供下次运行恢复）"""
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """删除日志（本次爬取的结果已经保存到时间线）"""
+        with self._lock:
+            self._buffer = []
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.completed = {}
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息
+
+        Returns:
+            dict: 恢复、追加的记录数和写入次数
+        """
+        return {
+            'resumed_count': self.resumed_count,
+            'appended_count': self.appended_count,
+            'flush_count': self.flush_count,
+        }
+
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+失败视频重试队列模块
+
+所有元数据来源都失败（超时、限流、接口错误等暂时性问题）的视频原本被直接丢弃，
+下次全量爬取时又要重新走一遍完整的来源链。本模块按数据类型和BV号记录这些视频：
+失败原因、尝试次数、首次和最近失败时间，以及按指数退避安排的下次重试时间。
+
+主爬取跳过队列中的视频，由单独的重试阶段在主爬取之后、使用独立的请求频率预算逐个重试，
+暂时性失败既不拖慢主爬取，也不会丢失。重试成功后移出队列。
+视频已删除、不可见等永久性失败由失效视频缓存（negative_cache）处理，不进入本队列。
+
+队列保存为 JSON 文件（原子写入），多个数据类型的爬虫实例可共用同一个实例。
+
+Usage (as module):
+  from src.crawler.utils.dead_letters import DeadLetterQueue
+  queue = DeadLetterQueue.load(path)
+  queue.add(bvid, data_type, '所有来源均失败')
+  for bvid in queue.due(data_type): ...
+  queue.save()
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# 队列格式版本
+DEAD_LETTER_VERSION = 1
+
+# 重试阶段使用的请求频率限制桶
+DEAD_LETTER_BUCKET = 'dead_letters'
+
+
+class DeadLetterQueue:
+    """失败视频重试队列（线程安全）
+
+    Attributes:
+        path: 队列文件路径
+        base_interval: 首次重试间隔（秒）
+        max_interval: 重试间隔上限（秒）
+        entries: 数据类型 -> BV号 -> {'reason', 'attempts', 'first_failed', 'last_failed', 'next_retry'}
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                 base_interval: float = 600, max_interval: float = 86400):
+        """初始化重试队列
+
+        Args:
+            path: 队列文件路径
+            entries: 数据类型 -> BV号 -> 失败记录
+            base_interval: 首次重试间隔（秒），默认 10 分钟
+            max_interval: 重试间隔上限（秒），默认 1 天
+
+        Raises:
+            ValueError: 当重试间隔无效时抛出
+        """
+        if base_interval <= 0 or max_interval < base_interval:
+            raise ValueError("max_interval必须大于等于base_interval且大于0")
+        self.path = Path(path)
+        self.entries = {data_type: dict(videos) for data_type, videos in (entries or {}).items()}
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        # 本次运行的统计
+        self.added_count = 0
+        self.retried_count = 0
+        self.recovered_count = 0
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> 'DeadLetterQueue':
+        """加载队列，不存在、损坏或版本不符时返回空队列
+
+        Args:
+            path: 队列文件路径
+            **kwargs: 传给构造函数的重试间隔参数
+
+        Returns:
+            DeadLetterQueue: 重试队列
+        """
+        queue = cls(path, **kwargs)
+        try:
+            with queue.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return queue
+        if isinstance(data, dict) and data.get('version') == DEAD_LETTER_VERSION \
+                and isinstance(data.get('videos'), dict):
+            queue.entries = {data_type: dict(videos) for data_type, videos in data['videos'].items()
+                             if isinstance(videos, dict)}
+        return queue
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(videos) for videos in self.entries.values())
+
+    def contains(self, bvid: str, data_type: str) -> bool:
+        """判断视频是否在队列中
+
+        Args:
+            bvid: BV号
+            data_type: 数据类型
+
+        Returns:
+            bool: 在队列中返回True
+        """
+        with self._lock:
+            return bvid in self.entries.get(data_type, {})
+
+    def get(self, bvid: str, data_type: str) -> Optional[Dict[str, Any]]:
+        """获取失败记录
+
+        Args:
+            bvid: BV号
+            data_type: 数据类型
+
+        Returns:
+            失败记录，不存在返回 None
+        """
+        with self._lock:
+            return self.entries.get(data_type, {}).get(bvid)
+
+    def add(self, bvid: str, data_type: str, reason: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """记录一次失败，并按尝试次数翻倍安排下次重试时间
+
+        Args:
+            bvid: BV号
+            data_type: 数据类型
+            reason: 失败原因
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            dict: 失败记录
+        """
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            videos = self.entries.setdefault(data_type, {})
+            old = videos.get(bvid) or {}
+            attempts = old.get('attempts', 0) + 1
+            interval = min(self.base_interval * 2 ** (attempts - 1), self.max_interval)
+            entry = {
+                'reason': reason,
+                'attempts': attempts,
+                'first_failed': old.get('first_failed', now),
+                'last_failed': now,
+                'next_retry': int(now + interval),
+            }
+            videos[bvid] = entry
+            if old:
+                self.retried_count += 1
+            else:
+                self.added_count += 1
+            self._dirty = True
+        return entry
+
+    def remove(self, bvid: str, data_type: str, recovered: bool = True) -> bool:
+        """移出队列
+
+        Args:
+            bvid: BV号
+            data_type: 数据类型
+            recovered: 是否因重试成功而移出（计入统计）
+
+        Returns:
+            bool: 原来在队列中返回True
+        """
+        with self._lock:
+            videos = self.entries.get(data_type)
+            if not videos or videos.pop(bvid, None) is None:
+                return False
+            if not videos:
+                del self.entries[data_type]
+            if recovered:
+                self.recovered_count += 1
+            self._dirty = True
+            return True
+
+    def pending(self, data_type: str) -> List[str]:
+        """获取数据类型在队列中的所有BV号
+
+        Args:
+            data_type: 数据类型
+
+        Returns:
+            list: BV号列表
+        """
+        with self._lock:
+            return list(self.entries.get(data_type, {}))
+
+    def due(self, data_type: str, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """获取已到重试时间的BV号（最早到期的在前）
+
+        Args:
+            data_type: 数据类型
+            now: 当前时间戳，默认 time.time()
+            limit: 最多返回的数量，None 表示不限
+
+        Returns:
+            list: BV号列表
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            videos = self.entries.get(data_type, {})
+            due = sorted((entry.get('next_retry', 0), bvid) for bvid, entry in videos.items()
+                         if entry.get('next_retry', 0) <= now)
+        return [bvid for _, bvid in due[:limit]]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息
+
+        Returns:
+            dict: 队列中的视频总数和本次运行新加入、重试仍失败、重试成功的数量
+        """
+        return {
+            'total': len(self),
+            'added_count': self.added_count,
+            'retried_count': self.retried_count,
+            'recovered_count': self.recovered_count,
+        }
+
+    def save(self) -> bool:
+        """原子保存队列（没有变化时不写入）
+
+        Returns:
+            bool: 写入了文件返回True
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = json.dumps(
+                {'version': DEAD_LETTER_VERSION,
+                 'videos': {data_type: dict(sorted(videos.items()))
+                            for data_type, videos in sorted(self.entries.items())}},
+                ensure_ascii=False, indent=2
+            ).encode('utf-8')
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            with self._lock:
+                self._dirty = True
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        return True
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+HTTP传输模块
+
+基于 httpx.AsyncClient 的共享异步传输层，提供连接池、Keep-Alive、HTTP/2（安装 h2 时启用）、
+按主机的并发上限、统一超时控制和可选的指数退避重试。
+
+同步代码通过 HttpTransport 门面调用：门面在后台线程中运行唯一的事件循环，
+所有调用线程共用同一个连接池，响应对象与异常类型与 requests 保持兼容，
+原有的 requests 异常处理逻辑无需修改。
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import json
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_PER_HOST_LIMIT = 8
+DEFAULT_BACKOFF_FACTOR = 0.5
+# 可重试的HTTP状态码
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def is_http2_available() -> bool:
+    """检查是否安装了 HTTP/2 支持（h2 包）
+
+    Returns:
+        bool: 可用返回True
+    """
+    return importlib.util.find_spec('h2') is not None
+
+
+class TransportResponse:
+    """HTTP响应对象
+
+    提供与 requests.Response 兼容的常用属性和方法，响应体已完整读入内存。
+
+    Attributes:
+        status_code: HTTP状态码
+        headers: 响应头
+        content: 响应体字节
+        url: 最终请求URL
+        encoding: 文本编码
+        http_version: 实际使用的HTTP协议版本
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes,
+                 url: str, encoding: Optional[str] = None, http_version: str = 'HTTP/1.1'):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.encoding = encoding
+        self.http_version = http_version
+
+    @classmethod
+    def from_httpx(cls, response: httpx.Response) -> 'TransportResponse':
+        """从 httpx.Response 构造响应对象"""
+        return cls(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=response.content,
+            url=str(response.url),
+            encoding=response.charset_encoding,
+            http_version=response.http_version
+        )
+
+    @property
+    def ok(self) -> bool:
+        """状态码小于400时为True"""
+        return self.status_code < 400
+
+    @property
+    def apparent_encoding(self) -> str:
+        """推测的文本编码"""
+        return self.encoding or 'utf-8'
+
+    @property
+    def text(self) -> str:
+        """按编码解码后的响应文本"""
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """解析JSON响应体"""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size: int = 8192):
+        """按块迭代响应体
+
+        Args:
+            chunk_size: 每块字节数
+        """
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def raise_for_status(self) -> None:
+        """状态码表示错误时抛出 requests.exceptions.HTTPError"""
+        if self.status_code >= 400:
+            kind = '客户端错误' if self.status_code < 500 else '服务器错误'
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind}: {self.url}",
+                response=self
+            )
+
+    def close(self) -> None:
+        """兼容 requests 接口，响应体已在内存中，无需释放"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def _stateless_cookie_jar() -> CookieJar:
+    """创建拒绝保存任何 Cookie 的 CookieJar
+
+    共享客户端被所有调用方共用，响应中的 Set-Cookie 不能保存下来，
+    否则会被带到其他调用方的后续请求中；凭据统一按请求传入（_merge_cookies）。
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _merge_cookies(headers: Dict[str, str], cookies: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """将 Cookie 字典合并到请求头中
+
+    httpx 不再推荐按请求传入 cookies，这里统一转换为 Cookie 请求头。
+    """
+    if not cookies:
+        return headers
+    cookie_str = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    existing = headers.get('Cookie') or headers.get('cookie')
+    merged = dict(headers)
+    merged.pop('cookie', None)
+    merged['Cookie'] = f"{existing}; {cookie_str}" if existing else cookie_str
+    return merged
+
+
+class AsyncHttpTransport:
+    """异步HTTP传输类
+
+    所有请求共用一个 httpx.AsyncClient 连接池，并按主机限制同时在途的请求数，
+    单个事件循环即可驱动大量并发请求。
+
+    Attributes:
+        max_connections: 连接池最大连接数
+        max_keepalive: 最大保活连接数
+        per_host_limit: 单个主机的最大并发请求数
+        timeout: 默认超时时间（秒）
+        http2: 是否启用HTTP/2
+        retries: 超时、连接错误和可重试状态码的最大重试次数
+        backoff_factor: 退避基数（秒），第 n 次重试前等待 backoff_factor * 2^(n-1) 秒
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        timeout: float = DEFAULT_TIMEOUT,
+        http2: Optional[bool] = None,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 0,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES
+    ):
+        """初始化异步传输
+
+        Args:
+            max_connections: 连接池最大连接数
+            max_keepalive: 最大保活连接数
+            per_host_limit: 单个主机的最大并发请求数
+            timeout: 默认超时时间（秒）
+            http2: 是否启用HTTP/2，None 表示安装了 h2 时自动启用
+            headers: 默认请求头
+            retries: 最大重试次数，0 表示不重试
+            backoff_factor: 退避基数（秒）
+            retry_statuses: 需要重试的HTTP状态码
+
+        Raises:
+            ValueError: 当参数无效时抛出
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections必须大于等于1")
+
+        if per_host_limit < 1:
+            raise ValueError("per_host_limit必须大于等于1")
+
+        if timeout <= 0:
+            raise ValueError("timeout必须大于0")
+
+        if retries < 0:
+            raise ValueError("retries必须大于等于0")
+
+        if backoff_factor < 0:
+            raise ValueError("backoff_factor必须大于等于0")
+
+        self.max_connections = max_connections
+        self.max_keepalive = min(max_keepalive, max_connections)
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.http2 = is_http2_available() if http2 is None else http2
+        self.headers = dict(headers or {})
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = frozenset(retry_statuses)
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # 统计信息
+        self.request_count = 0
+        self.error_count = 0
+        self.retry_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取（必要时创建）底层客户端，需在事件循环中调用"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=httpx.Timeout(self.timeout),
+                headers=self.headers,
+                cookies=_stateless_cookie_jar(),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """获取URL所属主机的并发信号量"""
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        data: Any = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        """发送HTTP请求，超时、连接错误和可重试状态码按指数退避重试
+
+        退避等待期间不占用主机并发名额。
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            params: 查询参数
+            headers: 请求头
+            cookies: Cookie字典
+            data: 表单数据
+            timeout: 超时时间（秒），None 使用默认值
+
+        Returns:
+            TransportResponse: 响应对象（重试用尽时为最后一次的响应）
+
+        Raises:
+            requests.exceptions.Timeout: 请求超时
+            requests.exceptions.ConnectionError: 连接失败
+            requests.exceptions.RequestException: 其他请求错误
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._send(method, url, params, headers, cookies, data, timeout)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in self.retry_statuses or attempt >= self.retries:
+                    return response
+            self.retry_count += 1
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        data: Any = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        """发送单次HTTP请求（不重试）
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            params: 查询参数
+            headers: 请求头
+            cookies: Cookie字典
+            data: 表单数据
+            timeout: 超时时间（秒），None 使用默认值
+
+        Returns:
+            TransportResponse: 响应对象
+
+        Raises:
+            requests.exceptions.Timeout: 请求超时
+            requests.exceptions.ConnectionError: 连接失败
+            requests.exceptions.RequestException: 其他请求错误
+        """
+        client = self._get_client()
+        request_headers = _merge_cookies(dict(headers or {}), cookies)
+        request_timeout = httpx.Timeout(timeout) if timeout is not None else httpx.USE_CLIENT_DEFAULT
+
+        async with self._get_host_semaphore(url):
+            self.request_count += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                response = await client.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=request_headers,
+                    data=data,
+                    timeout=request_timeout
+                )
+                return TransportResponse.from_httpx(response)
+            except httpx.TimeoutException as e:
+                self.error_count += 1
+                raise requests.exceptions.Timeout(f"请求超时: {url}") from e
+            except httpx.TransportError as e:
+                self.error_count += 1
+                raise requests.exceptions.ConnectionError(f"连接错误: {url}: {e}") from e
+            except httpx.HTTPError as e:
+                self.error_count += 1
+                raise requests.exceptions.RequestException(f"请求失败: {url}: {e}") from e
+            finally:
+                self.in_flight -= 1
+
+    async def get(self, url: str, **kwargs) -> TransportResponse:
+        """发送GET请求"""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> TransportResponse:
+        """发送POST请求"""
+        return await self.request('POST', url, **kwargs)
+
+    async def gather(self, request_specs: Iterable[Dict[str, Any]]) -> List[Any]:
+        """并发发送一批请求
+
+        Args:
+            request_specs: 请求描述列表，每项包含 method（默认GET）、url 及 request() 的其他参数
+
+        Returns:
+            list: 与输入顺序一致的结果列表，失败的位置为异常对象
+        """
+        coroutines = []
+        for spec in request_specs:
+            spec = dict(spec)
+            method = spec.pop('method', 'GET')
+            url = spec.pop('url')
+            coroutines.append(self.request(method, url, **spec))
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """关闭底层客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息
+
+        Returns:
+            包含统计信息的字典
+        """
+        return {
+            'request_count': self.request_count,
+            'error_count': self.error_count,
+            'retry_count': self.retry_count,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'per_host_limit': self.per_host_limit,
+        }
+
+
+class HttpTransport:
+    """HTTP传输同步门面
+
+    在后台线程中运行事件循环并驱动 AsyncHttpTransport，供同步代码调用。
+    可在多个线程中安全共用，所有线程的请求复用同一个连接池。
+    """
+
+    def __init__(self, **kwargs):
+        """初始化同步门面
+
+        Args:
+            **kwargs: 传递给 AsyncHttpTransport 的参数
+        """
+        self._async_transport = AsyncHttpTransport(**kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def async_transport(self) -> AsyncHttpTransport:
+        """底层异步传输对象"""
+        return self._async_transport
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动（必要时）后台事件循环线程"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='http-transport-loop',
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine):
+        """在传输层事件循环中执行协程并等待结果
+
+        Args:
+            coroutine: 协程对象
+
+        Returns:
+            协程的返回值
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        return future.result()
+
+    def request(self, method: str, url: str, **kwargs) -> TransportResponse:
+        """发送HTTP请求（参数同 AsyncHttpTransport.request）"""
+        return self.run(self._async_transport.request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs) -> TransportResponse:
+        """发送GET请求"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> TransportResponse:
+        """发送POST请求"""
+        return self.request('POST', url, **kwargs)
+
+    def gather(self, request_specs: Iterable[Dict[str, Any]]) -> List[Any]:
+        """并发发送一批请求（参数同 AsyncHttpTransport.gather）"""
+        return self.run(self._async_transport.gather(list(request_specs)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return self._async_transport.get_stats()
+
+    def close(self) -> None:
+        """关闭连接池并停止后台事件循环"""
+        with self._lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._async_transport.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        loop.close()
+
+
+_shared_transport: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport() -> HttpTransport:
+    """获取进程内共享的HTTP传输对象
+
+    Returns:
+        HttpTransport: 共享传输对象
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
+
+
+def close_shared_transport() -> None:
+    """关闭进程内共享的HTTP传输对象"""
+    global _shared_transport
+    with _shared_lock:
+        transport = _shared_transport
+        _shared_transport = None
+    if transport is not None:
+        transport.close()
+
+
+atexit.register(close_shared_transport)
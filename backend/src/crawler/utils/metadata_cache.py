@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+视频元数据持久化缓存模块
+
+使用 SQLite 按 BV 号保存解析后的元数据和原始 API 响应，按字段设置过期时间，
+全量爬取时只需重新验证过期的条目
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+
+class MetadataCache:
+    """视频元数据缓存类
+
+    每个字段单独记录获取时间，播放量等统计字段过期较快，标题、发布日期等
+    静态字段过期较慢。条目同时保存上游返回的 ETag / Last-Modified，
+    用于条件请求重新验证。
+
+    Attributes:
+        db_path: SQLite 数据库文件路径
+        field_ttls: 字段级过期时间（秒）
+        default_ttl: 未单独配置字段的过期时间（秒）
+    """
+
+    # 统计类字段变化频繁，默认 1 天过期
+    DEFAULT_FIELD_TTLS = {
+        'views': 24 * 3600,
+        'danmaku': 24 * 3600,
+    }
+    # 其余字段默认 30 天过期
+    DEFAULT_TTL = 30 * 24 * 3600
+
+    def __init__(
+        self,
+        db_path,
+        field_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL
+    ):
+        """初始化元数据缓存
+
+        Args:
+            db_path: SQLite 数据库文件路径，传入 ':memory:' 使用内存数据库
+            field_ttls: 字段级过期时间（秒），与默认配置合并
+            default_ttl: 未单独配置字段的过期时间（秒）
+
+        Raises:
+            ValueError: 当过期时间无效时抛出
+        """
+        if default_ttl <= 0:
+            raise ValueError("default_ttl必须大于0")
+
+        self.field_ttls = dict(self.DEFAULT_FIELD_TTLS)
+        if field_ttls:
+            self.field_ttls.update(field_ttls)
+        if any(ttl <= 0 for ttl in self.field_ttls.values()):
+            raise ValueError("字段过期时间必须大于0")
+        self.default_ttl = default_ttl
+
+        self.db_path = str(db_path)
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                bv TEXT PRIMARY KEY,
+                metadata TEXT NOT NULL,
+                field_times TEXT NOT NULL,
+                raw TEXT,
+                source TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                updated_at REAL NOT NULL
+            )
+            '''
+        )
+        self._conn.commit()
+
+        # 统计信息
+        self.hit_count = 0
+        self.stale_count = 0
+        self.miss_count = 0
+        self.write_count = 0
+        self.revalidated_count = 0
+
+    def get_entry(self, bv: str) -> Optional[Dict[str, Any]]:
+        """获取缓存条目
+
+        Args:
+            bv: BV号
+
+        Returns:
+            Optional[Dict[str, Any]]: 缓存条目，不存在返回None
+        """
+        with self._lock:
+            return self._read_entry(bv)
+
+    def _read_entry(self, bv: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目（调用方需持有 _lock）"""
+        row = self._conn.execute(
+            'SELECT metadata, field_times, raw, source, etag, last_modified, updated_at '
+            'FROM video_metadata WHERE bv = ?',
+            (bv,)
+        ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'bv': bv,
+            'metadata': json.loads(row[0]),
+            'field_times': json.loads(row[1]),
+            'raw': json.loads(row[2]) if row[2] else None,
+            'source': row[3],
+            'etag': row[4],
+            'last_modified': row[5],
+            'updated_at': row[6]
+        }
+
+    def get_stale_fields(
+        self,
+        entry: Dict[str, Any],
+        fields: Optional[Iterable[str]] = None,
+        now: Optional[float] = None
+    ) -> List[str]:
+        """获取条目中已过期（或缺失）的字段
+
+        Args:
+            entry: get_entry 返回的缓存条目
+            fields: 需要检查的字段，默认检查条目中的所有字段
+            now: 当前时间戳，默认使用 time.time()
+
+        Returns:
+            List[str]: 过期字段列表
+        """
+        if now is None:
+            now = time.time()
+        field_times = entry.get('field_times', {})
+        if fields is None:
+            fields = field_times.keys()
+
+        stale = []
+        for field in fields:
+            fetched_at = field_times.get(field)
+            ttl = self.field_ttls.get(field, self.default_ttl)
+            if fetched_at is None or now - fetched_at > ttl:
+                stale.append(field)
+        return stale
+
+    def get_fresh(
+        self,
+        bv: str,
+        fields: Optional[Iterable[str]] = None,
+        now: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """获取未过期的元数据
+
+        Args:
+            bv: BV号
+            fields: 需要未过期的字段，默认要求所有字段未过期
+            now: 当前时间戳，默认使用 time.time()
+
+        Returns:
+            Optional[Dict[str, Any]]: 元数据，不存在或已过期返回None
+        """
+        entry = self.get_entry(bv)
+        if entry is None:
+            with self._lock:
+                self.miss_count += 1
+            return None
+
+        if self.get_stale_fields(entry, fields, now):
+            with self._lock:
+                self.stale_count += 1
+            return None
+
+        with self._lock:
+            self.hit_count += 1
+        return entry['metadata']
+
+    def put(
+        self,
+        bv: str,
+        metadata: Dict[str, Any],
+        raw: Any = None,
+        source: str = '',
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """写入元数据
+
+        新元数据与已有条目按字段合并，只有本次写入的字段会刷新获取时间。
+        读取已有条目和写入在同一把锁内完成，并发写入同一BV号时不会互相覆盖字段。
+
+        Args:
+            bv: BV号
+            metadata: 解析后的视频元数据
+            raw: 上游原始响应（可 JSON 序列化）
+            source: 数据来源（SearchAPI、DetailAPI、Crawl）
+            etag: 上游返回的 ETag
+            last_modified: 上游返回的 Last-Modified
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._read_entry(bv)
+            merged = dict(entry['metadata']) if entry else {}
+            field_times = dict(entry['field_times']) if entry else {}
+
+            merged.update(metadata)
+            for field in metadata:
+                field_times[field] = now
+
+            if entry:
+                raw = raw if raw is not None else entry['raw']
+                etag = etag or entry['etag']
+                last_modified = last_modified or entry['last_modified']
+
+            self._conn.execute(
+                'INSERT OR REPLACE INTO video_metadata '
+                '(bv, metadata, field_times, raw, source, etag, last_modified, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    bv,
+                    json.dumps(merged, ensure_ascii=False),
+                    json.dumps(field_times),
+                    json.dumps(raw, ensure_ascii=False) if raw is not None else None,
+                    source,
+                    etag,
+                    last_modified,
+                    now
+                )
+            )
+            self._conn.commit()
+            self.write_count += 1
+
+    def touch(self, bv: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """标记条目已重新验证（上游返回 304 未修改）
+
+        Args:
+            bv: BV号
+            fields: 需要刷新获取时间的字段，默认刷新所有字段
+
+        Returns:
+            Optional[Dict[str, Any]]: 条目中的元数据，不存在返回None
+        """
+        with self._lock:
+            entry = self._read_entry(bv)
+            if entry is None:
+                return None
+
+            now = time.time()
+            field_times = entry['field_times']
+            for field in (fields if fields is not None else entry['metadata'].keys()):
+                field_times[field] = now
+
+            self._conn.execute(
+                'UPDATE video_metadata SET field_times = ?, updated_at = ? WHERE bv = ?',
+                (json.dumps(field_times), now, bv)
+            )
+            self._conn.commit()
+            self.revalidated_count += 1
+        return entry['metadata']
+
+    def delete(self, bv: str):
+        """删除缓存条目
+
+        Args:
+            bv: BV号
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM video_metadata WHERE bv = ?', (bv,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM video_metadata').fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            'entries': len(self),
+            'hit_count': self.hit_count,
+            'stale_count': self.stale_count,
+            'miss_count': self.miss_count,
+            'write_count': self.write_count,
+            'revalidated_count': self.revalidated_count
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
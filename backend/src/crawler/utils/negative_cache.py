@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+失效视频缓存模块
+
+已删除、仅自己可见、地区限制等视频永远进不了时间线，增量爬取时每次运行都会被视为未爬取，
+依次请求搜索API、详情API、网页爬取并重试。本模块按BV号记录上游返回的错误码、
+首次和最近一次发现的时间，以及按指数退避安排的下次复查时间：
+复查时间之前直接跳过，不发起任何请求；复查仍然失效时间隔翻倍，视频恢复后移出缓存。
+
+缓存保存为 JSON 文件（原子写入），多个爬虫实例和工作线程可共用同一个实例。
+
+Usage (as module):
+  from src.crawler.utils.negative_cache import NegativeCache
+  cache = NegativeCache.load(path)
+  if cache.should_skip(bvid): ...
+  cache.record(bvid, -404, '啥都木有')
+  cache.save()
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# 缓存格式版本
+NEGATIVE_CACHE_VERSION = 1
+
+# 表示视频本身不可获取（而不是请求失败）的B站错误码
+DEAD_VIDEO_CODES = {
+    -404: '视频不存在',
+    -403: '访问权限不足',
+    -10403: '地区限制',
+    62002: '稿件不可见',
+    62004: '稿件审核中',
+    62012: '仅UP主自己可见',
+}
+
+
+def is_dead_video_code(code: Any) -> bool:
+    """判断上游错误码是否表示视频本身不可获取
+
+    Args:
+        code: API 返回的 code
+
+    Returns:
+        bool: 视频已删除、不可见或地区限制时返回True
+    """
+    return code in DEAD_VIDEO_CODES
+
+
+class NegativeCache:
+    """失效视频缓存（线程安全）
+
+    Attributes:
+        path: 缓存文件路径
+        base_interval: 首次复查间隔（秒）
+        max_interval: 复查间隔上限（秒）
+        entries: BV号 -> {'code', 'message', 'source', 'first_seen', 'last_seen', 'checks', 'next_check'}
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 base_interval: float = 86400, max_interval: float = 30 * 86400):
+        """初始化失效视频缓存
+
+        Args:
+            path: 缓存文件路径
+            entries: BV号 -> 失效记录
+            base_interval: 首次复查间隔（秒），默认 1 天
+            max_interval: 复查间隔上限（秒），默认 30 天
+
+        Raises:
+            ValueError: 当复查间隔无效时抛出
+        """
+        if base_interval <= 0 or max_interval < base_interval:
+            raise ValueError("max_interval必须大于等于base_interval且大于0")
+        self.path = Path(path)
+        self.entries = dict(entries or {})
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        # 本次运行的统计
+        self.skipped_count = 0
+        self.recorded_count = 0
+        self.recovered_count = 0
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> 'NegativeCache':
+        """加载缓存，不存在、损坏或版本不符时返回空缓存
+
+        Args:
+            path: 缓存文件路径
+            **kwargs: 传给构造函数的复查间隔参数
+
+        Returns:
+            NegativeCache: 失效视频缓存
+        """
+        cache = cls(path, **kwargs)
+        try:
+            with cache.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if isinstance(data, dict) and data.get('version') == NEGATIVE_CACHE_VERSION \
+                and isinstance(data.get('videos'), dict):
+            cache.entries = data['videos']
+        return cache
+
+    def __contains__(self, bvid: str) -> bool:
+        return bvid in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, bvid: str) -> Optional[Dict[str, Any]]:
+        """获取失效记录
+
+        Args:
+            bvid: BV号
+
+        Returns:
+            失效记录，不存在返回 None
+        """
+        return self.entries.get(bvid)
+
+    def should_skip(self, bvid: str, now: Optional[float] = None) -> bool:
+        """判断是否跳过该视频（已知失效且未到复查时间）
+
+        Args:
+            bvid: BV号
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            bool: 需要跳过返回True
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.entries.get(bvid)
+            if entry is None or entry.get('next_check', 0) <= now:
+                return False
+            self.skipped_count += 1
+            return True
+
+    def record(self, bvid: str, code: Any, message: Optional[str] = None,
+               source: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """记录一次失效结果，并按复查次数翻倍安排下次复查时间
+
+        Args:
+            bvid: BV号
+            code: 上游返回的错误码
+            message: 上游返回的错误信息
+            source: 发现失效的来源
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            dict: 失效记录
+        """
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            old = self.entries.get(bvid) or {}
+            checks = old.get('checks', 0) + 1
+            interval = min(self.base_interval * 2 ** (checks - 1), self.max_interval)
+            entry = {
+                'code': code,
+                'message': message or DEAD_VIDEO_CODES.get(code, ''),
+                'source': source,
+                'first_seen': old.get('first_seen', now),
+                'last_seen': now,
+                'checks': checks,
+                'next_check': int(now + interval),
+            }
+            self.entries[bvid] = entry
+            self.recorded_count += 1
+            self._dirty = True
+        return entry
+
+    def remove(self, bvid: str) -> bool:
+        """视频恢复可访问后移出缓存
+
+        Args:
+            bvid: BV号
+
+        Returns:
+            bool: 原来在缓存中返回True
+        """
+        with self._lock:
+            if self.entries.pop(bvid, None) is None:
+                return False
+            self.recovered_count += 1
+            self._dirty = True
+            return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息
+
+        Returns:
+            dict: 失效视频总数和本次运行跳过、新记录（含复查）、恢复的数量
+        """
+        with self._lock:
+            return {
+                'total': len(self.entries),
+                'skipped_count': self.skipped_count,
+                'recorded_count': self.recorded_count,
+                'recovered_count': self.recovered_count,
+            }
+
+    def save(self) -> bool:
+        """原子保存缓存（没有变化时不写入）
+
+        Returns:
+            bool: 写入了文件返回True
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = json.dumps(
+                {'version': NEGATIVE_CACHE_VERSION, 'videos': dict(sorted(self.entries.items()))},
+                ensure_ascii=False, indent=2
+            ).encode('utf-8')
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            with self._lock:
+                self._dirty = True
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        return True
@@ -3,14 +3,24 @@
 请求频率控制模块
 
 用于实现合理的请求间隔与随机延迟策略，降低爬虫被识别风险
+
+限速采用令牌桶：每个桶按当前延迟匀速补充令牌，最多积累 burst 个。
+等待时只在锁内计算并预约下一个可用时刻，睡眠在锁外进行，
+多个线程可同时等待各自的预约，record_success/record_failure 不会被等待中的线程阻塞。
 """
 
+import asyncio
 import time
 import random
 import threading
+import warnings
 from typing import Optional, Dict, Any
 
 
+# 默认桶名
+DEFAULT_BUCKET = 'default'
+
+
 class RateLimiter:
     """请求频率限制器类
     
@@ -23,7 +33,9 @@ class RateLimiter:
         enable_exponential_backoff: 是否启用指数退避
         enable_adaptive: 是否启用自适应调整
         backoff_factor: 指数退避因子
-        max_concurrent: 最大并发数
+        burst: 突发容量（空闲后最多可连续放行的请求数）
+    
+    限制器只控制请求间隔，不限制同时进行的请求数，并发数由调用方的线程池决定。
     """
     
     def __init__(
@@ -34,7 +46,8 @@ class RateLimiter:
         enable_exponential_backoff: bool = False,
         enable_adaptive: bool = False,
         backoff_factor: float = 2.0,
-        max_concurrent: int = 1
+        max_concurrent: Optional[int] = None,
+        burst: Optional[int] = None
     ):
         """初始化请求频率限制器
         
@@ -45,7 +58,10 @@ class RateLimiter:
             enable_exponential_backoff: 是否启用指数退避
             enable_adaptive: 是否启用自适应调整
             backoff_factor: 指数退避因子
-            max_concurrent: 最大并发数
+            max_concurrent: 已弃用，等同于 burst（限制器不再限制并发数）
+            burst: 突发容量，None 表示 1。
+                为1时每个请求之间至少间隔一个延迟（首个请求前也等待一个延迟）；
+                大于1时空闲一段时间后可立即放行 burst-1 个请求，之后按延迟匀速放行
             
         Raises:
             ValueError: 当参数无效时抛出
@@ -59,8 +75,15 @@ class RateLimiter:
         if backoff_factor < 1.0:
             raise ValueError("backoff_factor必须大于等于1.0")
         
-        if max_concurrent < 1:
-            raise ValueError("max_concurrent必须大于等于1")
+        if max_concurrent is not None:
+            warnings.warn("max_concurrent 已弃用，请改用 burst", DeprecationWarning, stacklevel=2)
+            if max_concurrent < 1:
+                raise ValueError("max_concurrent必须大于等于1")
+            if burst is None:
+                burst = max_concurrent
+        
+        if burst is not None and burst < 1:
+            raise ValueError("burst必须大于等于1")
         
         self.min_delay = min_delay
         self.max_delay = max_delay
@@ -68,55 +91,124 @@ class RateLimiter:
         self.enable_exponential_backoff = enable_exponential_backoff
         self.enable_adaptive = enable_adaptive
         self.backoff_factor = backoff_factor
-        self.max_concurrent = max_concurrent
+        self.burst = burst if burst is not None else 1
         
         # 统计信息
         self.success_count = 0
         self.failure_count = 0
-        self._last_request_time = 0
+        self.wait_count = 0
+        self.total_wait_time = 0.0
+        
+        # 令牌桶：桶名 -> {'last': 上次预约的放行时刻, 'tokens': 该时刻剩余令牌,
+        #                  'min_delay': 桶的最小延迟, 'burst': 桶的突发容量}
+        self._buckets: Dict[str, Dict[str, Any]] = {}
         
         # 自适应调整相关
         self._current_delay = min_delay
         self._consecutive_failures = 0
         self._consecutive_successes = 0
         
-        # 并发控制
-        self._semaphore = threading.Semaphore(max_concurrent)
         self._lock = threading.Lock()
     
-    def wait(self, attempt: int = 0) -> float:
-        """等待指定时间
+    def add_bucket(self, name: str, min_delay: Optional[float] = None, burst: Optional[int] = None) -> None:
+        """配置命名桶（如按主机、按接口分别限速）
         
-        根据配置计算等待时间并执行等待
+        未配置的桶在首次使用时按限制器的参数创建。各个桶独立预约，
+        共用抖动、指数退避和自适应延迟。
         
         Args:
-            attempt: 当前尝试次数（用于指数退避）
+            name: 桶名
+            min_delay: 该桶的最小延迟（秒），None 表示使用限制器的延迟
+            burst: 该桶的突发容量，None 表示使用限制器的 burst
+            
+        Raises:
+            ValueError: 当参数无效时抛出
+        """
+        if min_delay is not None and min_delay < 0:
+            raise ValueError("min_delay必须大于等于0")
+        if burst is not None and burst < 1:
+            raise ValueError("burst必须大于等于1")
+        with self._lock:
+            bucket = self._get_bucket(name, time.monotonic(), burst)
+            bucket['min_delay'] = min_delay
+            if burst is not None:
+                bucket['burst'] = burst
+                bucket['tokens'] = min(bucket['tokens'], burst - 1)
+    
+    def _get_bucket(self, name: str, now: float, burst: Optional[int] = None) -> Dict[str, Any]:
+        """获取桶，不存在时创建（调用方需持有锁）"""
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            burst = burst or self.burst
+            bucket = {'last': now, 'tokens': burst - 1, 'min_delay': None, 'burst': burst}
+            self._buckets[name] = bucket
+        return bucket
+    
+    def _reserve(self, attempt: int, bucket_name: str) -> tuple:
+        """在锁内预约下一个放行时刻，不睡眠
+        
+        Args:
+            attempt: 当前尝试次数
+            bucket_name: 桶名
             
         Returns:
-            实际等待的时间（秒）
+            tuple: (本次延迟, 需要等待的秒数)
         """
-        with self._semaphore:
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._get_bucket(bucket_name, now)
             delay = self._calculate_delay(attempt)
+            if bucket['min_delay'] is not None:
+                delay = max(delay, bucket['min_delay'])
+            
+            # 从上次预约的时刻起按当前延迟补充令牌；已有排队的预约时从最后一个预约之后开始
+            start = max(now, bucket['last'])
+            if delay > 0:
+                tokens = min(bucket['burst'], bucket['tokens'] + (start - bucket['last']) / delay)
+                if tokens < 1:
+                    start += (1 - tokens) * delay
+                    tokens = 1
+            else:
+                tokens = bucket['burst']
+            bucket['last'] = start
+            bucket['tokens'] = tokens - 1
             
-            # 确保距离上次请求有足够间隔
-            with self._lock:
-                current_time = time.time()
-                time_since_last = current_time - self._last_request_time
-                
-                # 如果是第一次请求（_last_request_time为0），则等待完整的delay
-                if self._last_request_time == 0:
-                    actual_delay = delay
-                elif time_since_last < delay:
-                    actual_delay = delay - time_since_last
-                else:
-                    actual_delay = 0
-                
-                if actual_delay > 0:
-                    time.sleep(actual_delay)
-                
-                self._last_request_time = time.time()
+            wait_time = start - now
+            self.wait_count += 1
+            self.total_wait_time += wait_time
+            return delay, wait_time
+    
+    def wait(self, attempt: int = 0, bucket: str = DEFAULT_BUCKET) -> float:
+        """等待到下一个可用时刻
+        
+        在锁内预约放行时刻，在锁外睡眠，多个线程可同时等待。
+        
+        Args:
+            attempt: 当前尝试次数（用于指数退避）
+            bucket: 桶名
+            
+        Returns:
+            本次使用的延迟时间（秒）
+        """
+        delay, wait_time = self._reserve(attempt, bucket)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return delay
+    
+    async def wait_async(self, attempt: int = 0, bucket: str = DEFAULT_BUCKET) -> float:
+        """wait 的异步版本，等待期间不阻塞事件循环
+        
+        Args:
+            attempt: 当前尝试次数（用于指数退避）
+            bucket: 桶名
             
-            return delay
+        Returns:
+            本次使用的延迟时间（秒）
+        """
+        delay, wait_time = self._reserve(attempt, bucket)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return delay
     
     def _calculate_delay(self, attempt: int = 0) -> float:
         """计算延迟时间
@@ -189,7 +281,9 @@ class RateLimiter:
             self._current_delay = self.min_delay
             self._consecutive_failures = 0
             self._consecutive_successes = 0
-            self._last_request_time = 0
+            self.wait_count = 0
+            self.total_wait_time = 0.0
+            self._buckets.clear()
     
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息
@@ -206,6 +300,10 @@ class RateLimiter:
                 'max_delay': self.max_delay,
                 'consecutive_failures': self._consecutive_failures,
                 'consecutive_successes': self._consecutive_successes,
+                'burst': self.burst,
+                'buckets': len(self._buckets),
+                'wait_count': self.wait_count,
+                'total_wait_time': self.total_wait_time,
             }
     
     def update_config(
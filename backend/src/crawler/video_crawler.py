@@ -8,13 +8,28 @@ import requests
 import json
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
 from pathlib import Path
 from datetime import datetime
 from src.utils.config import REQUEST_TIMEOUT, MAX_RETRIES, INITIAL_RETRY_DELAY, HEADERS
 from src.crawler.utils.user_agent_rotator import UserAgentRotator
-from src.crawler.utils.rate_limiter import RateLimiter
+from src.crawler.utils.rate_limiter import DEFAULT_BUCKET, RateLimiter
+from src.crawler.utils.circuit_breaker import CLOSED, SourceRouter
+from src.crawler.utils.negative_cache import is_dead_video_code
+from src.crawler.utils.dead_letters import DEAD_LETTER_BUCKET
 from src.crawler.utils.session_manager import SessionManager
+from src.crawler.utils.http_transport import get_shared_transport
+from src.crawler.batch_resolver import BatchMetadataResolver
+from src.crawler.metadata_resolver import MetadataResolver
+from src.utils.bv_utils import extract_bv_from_item, normalize_bv
+from src.utils.bv_index import load_bv_index
+
+
+# 元数据来源（默认尝试顺序）及显示名称
+METADATA_SOURCES = ('SearchAPI', 'DetailAPI', 'Crawl')
+SOURCE_LABELS = {'SearchAPI': '搜索API', 'DetailAPI': '详情API', 'Crawl': '网页爬取'}
 
 
 class VideoCrawler:
@@ -23,21 +38,56 @@ class VideoCrawler:
     用于爬取B站视频的元数据，集成反爬机制
     """
     
-    def __init__(self, use_anti_crawler=True):
+    def __init__(self, use_anti_crawler=True, max_workers=1, batch_size=1, metadata_cache=None,
+                 rate_limiter=None, source_router=None, negative_cache=None, dead_letters=None,
+                 dead_letter_delay=5.0, metadata_resolver=None):
         """初始化视频爬虫
         
         Args:
             use_anti_crawler: 是否启用反爬机制
+            max_workers: 并发爬取的工作线程数，1 表示逐个顺序爬取
+            batch_size: 每次搜索请求合并的BV号数量，1 表示不启用批量搜索
+            metadata_cache: 持久化元数据缓存（MetadataCache），None 表示不使用缓存
+            rate_limiter: 与其他爬虫实例共用的请求频率限制器，None 时自动创建
+            source_router: 与其他爬虫实例共用的元数据来源熔断器（SourceRouter），None 时自动创建
+            negative_cache: 失效视频缓存（NegativeCache），None 表示不使用
+            dead_letters: 失败视频重试队列（DeadLetterQueue），None 表示不使用
+            dead_letter_delay: 重试阶段的最小请求间隔（秒），与主爬取分别限速
+            metadata_resolver: 与其他爬虫实例共用的元数据解析器（MetadataResolver），None 时自动创建
         """
+        if max_workers < 1:
+            raise ValueError("max_workers必须大于等于1")
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于等于1")
+        
         self.use_anti_crawler = use_anti_crawler
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._batch_resolver = None  # 当前爬取任务的批量解析器
+        self.last_batch_stats = None  # 最近一次批量解析统计
+        self.metadata_cache = metadata_cache
+        # 时间线使用的字段，缓存中这些字段未过期即可直接复用
+        self.cache_fields = ['bv', 'title', 'url', 'up主', 'author', 'publish_date',
+                             'cover_url', 'thumbnail', 'duration']
+        self._fetch_state = threading.local()  # 当前线程最近一次请求的原始响应和校验信息
         self.crawled_bvs_cache = {}  # 缓存已爬取的BV号
+        # 已删除、不可见等失效视频在复查时间前直接跳过，不发起请求
+        self.negative_cache = negative_cache
+        # 所有来源都失败的视频进入重试队列，主爬取跳过，由重试阶段以独立的频率预算重试
+        self.dead_letters = dead_letters
+        self._failure_reasons = {}  # BV号 -> 最近一次失败原因（None 表示视频已失效）
+        # 同一BV号在本次运行中只请求一次：并发请求合并，结果在各数据类型之间共享
+        self.metadata_resolver = metadata_resolver or MetadataResolver()
+        # 每个元数据来源一个熔断器：来源持续失败时直接跳过，不再消耗限速名额和重试等待
+        self.source_router = source_router or SourceRouter(METADATA_SOURCES)
+        self.last_source_stats = None  # 最近一次爬取结束时各来源的统计
         
         # 初始化反爬组件
         if use_anti_crawler:
             # User-Agent轮换器
             self.user_agent_rotator = UserAgentRotator()
-            # 请求频率限制器（带抖动和自适应）
-            self.rate_limiter = RateLimiter(
+            # 请求频率限制器（带抖动和自适应），多个实例并行时共用同一个
+            self.rate_limiter = rate_limiter or RateLimiter(
                 min_delay=1.0,
                 max_delay=5.0,
                 enable_jitter=True,
@@ -50,6 +100,9 @@ class VideoCrawler:
             )
             # 使用SessionManager的session
             self.session = self.session_manager.get_session()
+            # 重试阶段使用独立的限速桶，不占用主爬取的请求频率预算
+            if dead_letters is not None:
+                self.rate_limiter.add_bucket(DEAD_LETTER_BUCKET, min_delay=dead_letter_delay, burst=1)
         else:
             # 传统方式
             self.session = requests.Session()
@@ -58,6 +111,9 @@ class VideoCrawler:
             self.rate_limiter = None
             self.session_manager = None
         
+        # 共享HTTP传输层（连接池 + Keep-Alive，所有工作线程复用）
+        self.transport = get_shared_transport()
+        
         # API配置
         self.api_config = {
             'base_url': 'https://api.bilibili.com/x/web-interface/wbi/view/detail',
@@ -79,9 +135,11 @@ class VideoCrawler:
         # 速率限制（传统方式）
         self.last_api_call_time = 0
         self.api_call_interval = 1  # API调用间隔（秒）
+        self._rate_lock = threading.Lock()
         # API重试配置
         self.api_max_retries = 3
         self.api_retry_delay = 2
+        self.search_api_requests = 0  # 实际发出的搜索API请求数（包括重试）
         # 必要字段配置
         self.required_fields = ['bv', 'title', 'url', 'up主']
     
@@ -92,54 +150,9 @@ class VideoCrawler:
             item: 时间线条目
             
         Returns:
-            str: 标准化的 BV 号（带 BV 前缀），未找到返回空字符串
-        """
-        if not isinstance(item, dict):
-            return ''
-        
-        import re
-        bv = None
-        
-        # 1. 从 videoUrl 字段提取（优先级最高）
-        if not bv and 'videoUrl' in item:
-            url = item.get('videoUrl', '')
-            match = re.search(r'(BV[0-9A-Za-z]+)', url)
-            if match:
-                bv = match.group(1)
-        
-        # 2. 从 cover 字段提取（支持带或不带 BV 前缀的格式）
-        if not bv and 'cover' in item:
-            cover = item.get('cover', '')
-            # 检查是否带 BV 前缀
-            if cover.startswith('BV'):
-                bv = cover.split('.')[0]
-            else:
-                # 尝试从文件名中提取可能的 BV 号格式
-                # 匹配类似 15NzrBBEJQ.jpg 的格式
-                match = re.search(r'([0-9A-Za-z]{10,})\.[a-zA-Z]+$', cover)
-                if match:
-                    # 直接使用匹配到的结果
-                    bv = match.group(1)
-        
-        # 3. 从嵌套的 video 对象中提取
-        if not bv and 'video' in item:
-            video_info = item.get('video')
-            if isinstance(video_info, dict):
-                bv = video_info.get('bv')
-        
-        # 4. 从顶级 bv 字段提取
-        if not bv and 'bv' in item:
-            bv = item.get('bv')
-        
-        # 标准化 BV 号格式
-        if bv:
-            normalized_bv = bv.upper()
-            # 确保带有BV前缀
-            if not normalized_bv.startswith('BV'):
-                normalized_bv = 'BV' + normalized_bv
-            return normalized_bv
-        
-        return ''
+            str: 标准化的 BV 号（带 BV 前缀，大写），未找到返回空字符串
+        """
+        return normalize_bv(extract_bv_from_item(item), upper=True)
 
     def is_video_crawled(self, bv_code, timeline_file):
         """检查视频是否已经被爬取
@@ -155,33 +168,16 @@ class VideoCrawler:
             # 生成缓存键
             cache_key = str(timeline_file)
             
-            # 标准化输入的BV号格式
-            normalized_bv = bv_code.upper()
-            # 移除可能的BV前缀重复
-            if normalized_bv.startswith('BVBV'):
-                normalized_bv = normalized_bv.replace('BVBV', 'BV')
-            # 确保只有一个BV前缀
-            elif not normalized_bv.startswith('BV'):
-                normalized_bv = 'BV' + normalized_bv
+            # 标准化输入的BV号格式（不区分大小写比较）
+            normalized_bv = normalize_bv(bv_code, upper=True)
             
-            # 检查缓存是否存在
+            # 检查缓存是否存在，不存在时从旁路索引加载（索引有效时无需解析时间线JSON）
             if cache_key not in self.crawled_bvs_cache:
-                if not timeline_file.exists():
+                bv_index = load_bv_index(timeline_file)
+                if bv_index is None:
                     self.crawled_bvs_cache[cache_key] = set()
                 else:
-                    with open(timeline_file, 'r', encoding='utf-8') as f:
-                        timeline_data = json.load(f)
-                    
-                    # 提取所有已爬取的BV号
-                    crawled_bvs = set()
-                    for item in timeline_data:
-                        if isinstance(item, dict):
-                            # 使用统一的 BV 号提取逻辑
-                            existing_bv = self._extract_bv_from_item(item)
-                            if existing_bv:
-                                crawled_bvs.add(existing_bv)
-                    
-                    self.crawled_bvs_cache[cache_key] = crawled_bvs
+                    self.crawled_bvs_cache[cache_key] = {normalize_bv(bv, upper=True) for bv in bv_index}
             
             # 检查BV号是否在缓存中
             return normalized_bv in self.crawled_bvs_cache[cache_key]
@@ -197,22 +193,24 @@ class VideoCrawler:
         self.crawled_bvs_cache.clear()
         print("已清除爬取状态缓存")
     
-    def _rate_limit(self, attempt=0):
+    def _rate_limit(self, attempt=0, bucket=DEFAULT_BUCKET):
         """速率限制
         
         Args:
             attempt: 当前尝试次数（用于指数退避）
+            bucket: 限速桶名称
         """
         if self.use_anti_crawler and self.rate_limiter:
             # 使用智能频率限制器
-            self.rate_limiter.wait(attempt=attempt)
+            self.rate_limiter.wait(attempt=attempt, bucket=bucket)
         else:
-            # 传统方式
-            current_time = time.time()
-            elapsed = current_time - self.last_api_call_time
-            if elapsed < self.api_call_interval:
-                time.sleep(self.api_call_interval - elapsed)
-            self.last_api_call_time = time.time()
+            # 传统方式（多个工作线程共用同一请求间隔：在锁内预约请求时刻，在锁外等待）
+            with self._rate_lock:
+                current_time = time.time()
+                request_time = max(current_time, self.last_api_call_time + self.api_call_interval)
+                self.last_api_call_time = request_time
+            if request_time > current_time:
+                time.sleep(request_time - current_time)
     
     def _update_session_headers(self):
         """更新Session请求头（使用随机User-Agent）"""
@@ -235,6 +233,45 @@ class VideoCrawler:
         if self.use_anti_crawler and self.rate_limiter:
             self.rate_limiter.record_failure()
     
+    def _allow_source(self, source):
+        """申请使用元数据来源发起一次请求（来源熔断中时拒绝）
+        
+        Args:
+            source: 来源名称
+            
+        Returns:
+            bool: 放行返回True，放行后必须调用 _record_source
+        """
+        if self.source_router.get(source).allow_request():
+            return True
+        print(f"{SOURCE_LABELS[source]}已熔断，跳过")
+        return False
+    
+    def _record_source(self, source, success, started):
+        """记录元数据来源一次请求的结果和耗时
+        
+        Args:
+            source: 来源名称
+            success: 是否成功
+            started: 请求开始时间（time.monotonic()）
+        """
+        breaker = self.source_router.get(source)
+        latency = time.monotonic() - started
+        if success:
+            breaker.record_success(latency)
+        else:
+            breaker.record_failure(latency)
+    
+    def _retry_sleep(self, source, delay):
+        """重试前等待；来源已熔断时不再等待（下一次申请会直接被拒绝）
+        
+        Args:
+            source: 来源名称
+            delay: 等待秒数
+        """
+        if self.source_router.get(source).state == CLOSED:
+            time.sleep(delay)
+    
     def load_bv_list(self, file_path):
         """从文件中加载BV号列表
         
@@ -266,13 +303,26 @@ class VideoCrawler:
             print(f"加载BV号文件失败: {e}")
             return []
 
-    def crawl_from_bv_list(self, bv_list, data_type, full_crawl=False):
+    def crawl_from_bv_list(self, bv_list, data_type, full_crawl=False, max_workers=None, batch_size=None,
+                           on_result=None, journal=None):
         """直接从BV号列表爬取视频信息
         
+        max_workers 大于 1 时使用线程池并发爬取，所有工作线程共用同一个
+        RateLimiter，请求总频率与顺序爬取时一致；结果顺序与输入顺序保持一致。
+        batch_size 大于 1 时先通过批量搜索获取元数据，未命中的BV号再逐个获取。
+        on_result 在每个视频的元数据获取成功后立即调用（按完成顺序），
+        下游阶段（如封面下载）无需等待整个列表爬取完成。
+        提供 journal 时，上次运行中断前已获取的元数据直接复用，
+        本次获取的元数据逐条追加到日志中，中途崩溃后下次运行可以继续。
+        
         Args:
             bv_list: BV号列表
             data_type: 数据类型
             full_crawl: 是否全量爬取
+            max_workers: 并发工作线程数，默认使用初始化时的配置
+            batch_size: 批量搜索每批BV号数量，默认使用初始化时的配置
+            on_result: 单个视频元数据回调函数，参数为元数据字典
+            journal: 爬取日志（CrawlJournal，已调用 load()），None 表示不记录
             
         Returns:
             list: 爬取的视频信息列表
@@ -281,6 +331,11 @@ class VideoCrawler:
             print("BV号列表为空")
             return []
         
+        if max_workers is None:
+            max_workers = self.max_workers
+        if batch_size is None:
+            batch_size = self.batch_size
+        
         print(f"\n=== 直接从BV号列表爬取视频信息 ===")
         print(f"共 {len(bv_list)} 个BV号，爬取模式: {'全量爬取' if full_crawl else '增量爬取'}")
         print(f"反爬机制: {'已启用' if self.use_anti_crawler else '已禁用'}")
@@ -289,47 +344,327 @@ class VideoCrawler:
         from src.utils.path_manager import get_data_paths
         timeline_file = get_data_paths(data_type).get('TIMELINE_FILE')
         
-        videos = []
-        
+        # 先过滤出需要爬取的BV号（在主线程中完成，避免并发构建缓存）
+        pending_bvs = []
+        seen = set()
+        duplicates = 0
+        dead_skipped = 0
+        queued = 0
         for bv_code in bv_list:
+            # 标准化后重复的BV号只爬取一次
+            if normalize_bv(bv_code) in seen:
+                duplicates += 1
+                continue
+            seen.add(normalize_bv(bv_code))
             # 增量爬取模式下，检查视频是否已爬取
             if not full_crawl and self.is_video_crawled(bv_code, timeline_file):
                 # 确保BV号格式正确显示（避免双重BV前缀）
                 display_bv = bv_code if bv_code.startswith('BV') else f'BV{bv_code}'
                 print(f"视频 {display_bv} 已爬取，跳过")
                 continue
-            
-            metadata = self.crawl_video_metadata(bv_code)
-            if metadata:
-                videos.append(metadata)
-            
-            # 使用智能频率控制（如果启用反爬）或固定延迟
-            if self.use_anti_crawler and self.rate_limiter:
-                # 智能延迟已在 crawl_video_metadata 中处理
-                pass
+            if self.negative_cache is not None and self.negative_cache.should_skip(normalize_bv(bv_code)):
+                dead_skipped += 1
+                continue
+            # 重试队列中的视频由重试阶段处理（retry_dead_letters）
+            if self.dead_letters is not None and self.dead_letters.contains(normalize_bv(bv_code), data_type):
+                queued += 1
+                continue
+            pending_bvs.append(bv_code)
+        if duplicates:
+            print(f"重复的BV号 {duplicates} 个，跳过")
+        if dead_skipped:
+            print(f"失效视频 {dead_skipped} 个，未到复查时间，跳过")
+        if queued:
+            print(f"重试队列中的视频 {queued} 个，留给重试阶段")
+        
+        # 上次运行中断前已获取的元数据（爬取日志中的记录）直接复用
+        cached = {}
+        if journal is not None and journal.completed:
+            for bv_code in pending_bvs:
+                metadata = journal.completed.get(normalize_bv(bv_code))
+                if metadata:
+                    cached[bv_code] = metadata
+            print(f"从爬取日志恢复 {len(cached)} 个视频的元数据")
+        
+        # 持久化缓存中时间线字段未过期的条目直接复用，只请求缺失或过期的条目
+        if self.metadata_cache is not None:
+            cache_hits = 0
+            for bv_code in pending_bvs:
+                if bv_code in cached:
+                    continue
+                metadata = self.metadata_cache.get_fresh(
+                    normalize_bv(bv_code), self.cache_fields
+                )
+                if metadata:
+                    cached[bv_code] = metadata
+                    cache_hits += 1
+            print(f"元数据缓存命中 {cache_hits} 个，需要请求 {len(pending_bvs) - len(cached)} 个")
+        fetch_bvs = [bv_code for bv_code in pending_bvs if bv_code not in cached]
+        
+        # 缓存命中的元数据已经就绪，立即交给下游
+        if on_result is not None:
+            for metadata in cached.values():
+                on_result(metadata)
+        
+        # 请求获取的元数据先追加到爬取日志，再交给下游
+        emit = on_result
+        if journal is not None:
+            def emit(metadata):
+                journal.append(metadata)
+                if on_result is not None:
+                    on_result(metadata)
+        
+        # 批量搜索：合并多个BV号为一次请求，结果在工作线程中领取
+        self.last_batch_stats = None
+        #   其他数据类型已经获取或正在获取的BV号不参与批量搜索
+        batch_bvs = [bv_code for bv_code in fetch_bvs if not self.metadata_resolver.is_known(bv_code)]
+        if batch_size > 1 and len(batch_bvs) > 1:
+            self._batch_resolver = BatchMetadataResolver(self, batch_size=batch_size)
+            self._batch_resolver.resolve(batch_bvs)
+        
+        try:
+            if max_workers > 1 and len(fetch_bvs) > 1:
+                print(f"并发爬取: {min(max_workers, len(fetch_bvs))} 个工作线程")
+                fetched = self._crawl_concurrently(fetch_bvs, max_workers, on_result=emit)
             else:
-                # 传统方式：固定延迟
-                time.sleep(2)
+                fetched = []
+                for bv_code in fetch_bvs:
+                    metadata = self._crawl_one(bv_code)
+                    if metadata and emit is not None:
+                        emit(metadata)
+                    fetched.append(metadata)
+        finally:
+            if journal is not None:
+                journal.flush()
+            if self._batch_resolver:
+                self.last_batch_stats = self._batch_resolver.get_stats()
+                self._batch_resolver = None
+        
+        # 所有来源都失败的视频进入重试队列
+        for bv_code, metadata in zip(fetch_bvs, fetched):
+            self._update_dead_letter(bv_code, metadata, data_type)
+        
+        # 按输入顺序合并缓存结果与请求结果
+        fetched_iter = iter(fetched)
+        results = [cached[bv_code] if bv_code in cached else next(fetched_iter) for bv_code in pending_bvs]
+        videos = [metadata for metadata in results if metadata]
         
         # 打印统计信息
         if self.use_anti_crawler and self.rate_limiter:
             stats = self.rate_limiter.get_stats()
             print(f"\n请求统计: 成功 {stats['success_count']}, 失败 {stats['failure_count']}")
+        if self.last_batch_stats:
+            batch_stats = self.last_batch_stats
+            print(f"批量搜索统计: 批量请求 {batch_stats['batch_requests']} 次"
+                  f"(实际发出 {batch_stats['batch_http_requests']} 次, 失败 {batch_stats['failed_batches']} 次), "
+                  f"免请求获取 {batch_stats['resolved_without_request']} 个(顺带收集 {batch_stats['harvested']} 个), "
+                  f"回退逐个获取 {batch_stats['fallback_requests']} 个, "
+                  f"节省请求 {batch_stats['requests_saved']} 次")
+        self.last_source_stats = self.source_router.get_stats()
+        for source, source_stats in self.last_source_stats.items():
+            if source_stats['success_count'] or source_stats['failure_count'] or source_stats['rejected_count']:
+                print(f"{SOURCE_LABELS[source]}: {source_stats['state']}, 成功 {source_stats['success_count']}, "
+                      f"失败 {source_stats['failure_count']}, 熔断跳过 {source_stats['rejected_count']}, "
+                      f"熔断 {source_stats['trip_count']} 次, 最近成功率 {source_stats['success_rate']:.0%}, "
+                      f"平均耗时 {source_stats['avg_latency']:.2f}s")
         
         print(f"成功爬取 {len(videos)} 个视频的元数据")
         return videos
     
-    def _fetch_video_info_search_api(self, bv_code):
+    def _update_dead_letter(self, bv_code, metadata, data_type):
+        """按爬取结果更新重试队列：暂时性失败加入队列，成功或确认失效时移出
+        
+        Args:
+            bv_code: BV号
+            metadata: 爬取结果，失败为None
+            data_type: 数据类型
+        """
+        bv_code = normalize_bv(bv_code)
+        reason = self._failure_reasons.pop(bv_code, "未获取到元数据")
+        if self.dead_letters is None:
+            return
+        if metadata:
+            self.dead_letters.remove(bv_code, data_type)
+        elif reason is None:
+            # 视频已失效，由失效视频缓存处理
+            self.dead_letters.remove(bv_code, data_type, recovered=False)
+        else:
+            entry = self.dead_letters.add(bv_code, data_type, reason)
+            next_retry = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['next_retry']))
+            print(f"视频 {bv_code} 获取失败（第 {entry['attempts']} 次），加入重试队列，{next_retry} 后重试")
+    
+    def retry_dead_letters(self, bv_list, data_type, limit=20, on_result=None, journal=None):
+        """重试阶段：逐个重试重试队列中已到期的视频
+        
+        在主爬取之后执行，使用独立的限速桶（dead_letter_delay），不拖慢主爬取。
+        不在 bv_list 中的条目（已从收藏夹移除）直接移出队列。
+        
+        Args:
+            bv_list: 当前收藏夹的BV号列表
+            data_type: 数据类型
+            limit: 本次最多重试的数量
+            on_result: 单个视频元数据回调函数
+            journal: 爬取日志（CrawlJournal），None 表示不记录
+            
+        Returns:
+            list: 重试成功的视频元数据列表
+        """
+        if self.dead_letters is None:
+            return []
+        
+        current = {normalize_bv(bv_code) for bv_code in bv_list}
+        for bv_code in self.dead_letters.pending(data_type):
+            if bv_code not in current:
+                self.dead_letters.remove(bv_code, data_type, recovered=False)
+        
+        due = self.dead_letters.due(data_type, limit=limit)
+        if not due:
+            return []
+        print(f"\n=== 重试队列: {data_type} 重试 {len(due)} 个视频"
+              f"（队列中共 {len(self.dead_letters.pending(data_type))} 个）===")
+        
+        videos = []
+        try:
+            for bv_code in due:
+                metadata, _ = self._resolve_metadata(bv_code, bucket=DEAD_LETTER_BUCKET)
+                self._update_dead_letter(bv_code, metadata, data_type)
+                if not metadata:
+                    continue
+                if journal is not None:
+                    journal.append(metadata)
+                if on_result is not None:
+                    on_result(metadata)
+                videos.append(metadata)
+        finally:
+            if journal is not None:
+                journal.flush()
+        print(f"重试成功 {len(videos)} 个，失败 {len(due) - len(videos)} 个")
+        return videos
+    
+    def _crawl_one(self, bv_code):
+        """爬取单个BV号并执行爬取间隔控制
+        
+        Args:
+            bv_code: BV号
+            
+        Returns:
+            dict: 视频元数据，失败返回None
+        """
+        # 优先领取批量搜索已获取的元数据，无需再发起请求
+        if self._batch_resolver:
+            metadata, raw = self._batch_resolver.take(bv_code, with_raw=True)
+            if metadata:
+                print(f"获取视频元数据: {metadata['bv']}（批量搜索结果）")
+                self._validate_metadata(metadata, metadata['bv'], 'SearchAPI')
+                self._store_in_cache(metadata['bv'], metadata, 'SearchAPI', raw=raw)
+                self.metadata_resolver.remember(metadata['bv'], metadata)
+                return metadata
+        
+        metadata, requested = self._resolve_metadata(bv_code)
+        
+        # 使用智能频率控制（如果启用反爬）或固定延迟
+        if self.use_anti_crawler and self.rate_limiter:
+            # 智能延迟已在 crawl_video_metadata 中处理
+            pass
+        elif requested:
+            # 传统方式：固定延迟（复用共享结果时没有发起请求，无需等待）
+            time.sleep(2)
+        
+        return metadata
+    
+    def _resolve_metadata(self, bv_code, bucket=DEFAULT_BUCKET):
+        """通过共享元数据解析器获取元数据
+        
+        本次运行中已成功获取过（包括其他数据类型）的BV号直接复用结果，
+        其他线程正在请求的BV号等待该请求完成，都不再向上游发起请求；
+        失败结果不复用，再次遇到时重新请求。
+        
+        Args:
+            bv_code: BV号
+            bucket: 限速桶名称（重试阶段使用 DEAD_LETTER_BUCKET）
+            
+        Returns:
+            tuple: (视频元数据或None, 是否由本次调用发起了请求)
+        """
+        requested = []
+        
+        def fetch(bv):
+            requested.append(bv)
+            metadata = self.crawl_video_metadata(bv, bucket=bucket)
+            reason = None if metadata else self._failure_reasons.pop(bv, "未获取到元数据")
+            return metadata, reason
+        
+        metadata, reason = self.metadata_resolver.resolve(bv_code, fetch)
+        if not metadata:
+            # 失败原因供重试队列使用（合并到同一请求的并发调用同样记录）
+            self._failure_reasons[normalize_bv(bv_code)] = reason
+        return metadata, bool(requested)
+    
+    def _crawl_concurrently(self, bv_list, max_workers, on_result=None):
+        """使用线程池并发爬取BV号列表
+        
+        Args:
+            bv_list: 需要爬取的BV号列表
+            max_workers: 工作线程数
+            on_result: 单个视频元数据回调函数（在调用线程中按完成顺序调用）
+            
+        Returns:
+            list: 与 bv_list 一一对应的元数据列表，失败的位置为None
+        """
+        results = [None] * len(bv_list)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_index = {
+                executor.submit(self._crawl_one, bv_code): index
+                for index, bv_code in enumerate(bv_list)
+            }
+            
+            for future in as_completed(future_to_index):
+                index = future_to_index[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"爬取 {bv_list[index]} 时发生异常: {e}")
+                    self._failure_reasons[normalize_bv(bv_list[index])] = f"爬取异常: {e}"
+                    continue
+                if results[index] and on_result is not None:
+                    on_result(results[index])
+        
+        return results
+    
+    def _fetch_video_info_search_api(self, bv_code, bucket=DEFAULT_BUCKET):
         """使用搜索API获取视频信息
         
         Args:
             bv_code: BV号
+            bucket: 限速桶名称
             
         Returns:
             dict: 视频信息，失败返回None
         """
         print(f"使用搜索API获取视频信息: {bv_code}")
         
+        data = self._request_search_api(bv_code, bucket=bucket)
+        if not data:
+            return None
+        
+        # 顺带收集搜索结果中命中其他待爬取BV号的视频
+        if self._batch_resolver:
+            self._batch_resolver.harvest(data, requested=[bv_code])
+        
+        # 解析搜索API返回数据
+        return self._parse_search_api_response(data, bv_code)
+    
+    def _request_search_api(self, keyword, bucket=DEFAULT_BUCKET):
+        """调用搜索API并返回原始响应数据
+        
+        Args:
+            keyword: 搜索关键词（单个BV号或以空格分隔的多个BV号）
+            bucket: 限速桶名称
+            
+        Returns:
+            dict: 搜索API响应数据，失败返回None
+        """
         # 使用配置中的搜索API URL
         search_api_url = self.api_config['search_url']
         
@@ -337,7 +672,7 @@ class VideoCrawler:
             "__refresh__": "true",
             "page": 1,
             "page_size": 42,
-            "keyword": bv_code,
+            "keyword": keyword,
             "platform": "pc",
             "highlight": 1,
             "single_column": 0
@@ -345,7 +680,7 @@ class VideoCrawler:
         
         # 使用配置中的搜索API headers，并动态更新referer
         headers = self.api_config['search_headers'].copy()
-        headers['referer'] = f"https://search.bilibili.com/all?keyword={bv_code}&from_source=webtop_search"
+        headers['referer'] = f"https://search.bilibili.com/all?keyword={keyword}&from_source=webtop_search"
         
         # 如果启用反爬，更新User-Agent
         if self.use_anti_crawler:
@@ -353,11 +688,16 @@ class VideoCrawler:
             headers.update(self.session.headers)
         
         for retry in range(self.api_max_retries):
+            if not self._allow_source('SearchAPI'):
+                return None
+            
             # 速率限制（带指数退避）
-            self._rate_limit(attempt=retry)
+            self._rate_limit(attempt=retry, bucket=bucket)
+            started = time.monotonic()
             
+            self.search_api_requests += 1
             try:
-                response = requests.get(
+                response = self.transport.get(
                     search_api_url,
                     params=params,
                     headers=headers,
@@ -371,57 +711,162 @@ class VideoCrawler:
                 if data.get('code') != 0:
                     print(f"搜索API返回错误: {data.get('message')}")
                     self._record_request_failure()
+                    self._record_source('SearchAPI', False, started)
                     if retry < self.api_max_retries - 1:
                         print(f"{self.api_retry_delay}秒后重试")
-                        time.sleep(self.api_retry_delay)
+                        self._retry_sleep('SearchAPI', self.api_retry_delay)
                         continue
                     return None
                 
                 # 记录成功
                 self._record_request_success()
-                
-                # 解析搜索API返回数据
-                return self._parse_search_api_response(data, bv_code)
+                self._record_source('SearchAPI', True, started)
+                return data
             except requests.exceptions.Timeout:
                 print(f"搜索API请求超时，{self.api_retry_delay}秒后重试")
                 self._record_request_failure()
-                time.sleep(self.api_retry_delay)
+                self._record_source('SearchAPI', False, started)
+                self._retry_sleep('SearchAPI', self.api_retry_delay)
             except requests.exceptions.HTTPError as e:
                 print(f"搜索API HTTP错误: {e}")
                 self._record_request_failure()
+                self._record_source('SearchAPI', False, started)
                 if retry < self.api_max_retries - 1:
                     print(f"{self.api_retry_delay}秒后重试")
-                    time.sleep(self.api_retry_delay)
+                    self._retry_sleep('SearchAPI', self.api_retry_delay)
                 else:
                     return None
             except Exception as e:
                 print(f"搜索API调用错误: {e}")
                 self._record_request_failure()
+                self._record_source('SearchAPI', False, started)
                 if retry < self.api_max_retries - 1:
                     print(f"{self.api_retry_delay}秒后重试")
-                    time.sleep(self.api_retry_delay)
+                    self._retry_sleep('SearchAPI', self.api_retry_delay)
                 else:
                     return None
         
         return None
     
-    def _fetch_video_info_api(self, bv_code):
-        """使用API获取视频信息
+    def _detail_api_params(self, bv_code):
+        """构造详情API请求参数
         
         Args:
             bv_code: BV号
             
         Returns:
-            dict: 视频信息，失败返回None
+            dict: 请求参数
         """
-        print(f"使用详情API获取视频信息: {bv_code}")
-        
-        params = {
+        return {
             'bvid': bv_code,
             'need_view': 1,
             'isGaiaAvoided': False,
             'web_location': 1315873
         }
+    
+    def _remember_validators(self, response):
+        """记录响应中的 ETag / Last-Modified，写入缓存时用于后续条件请求
+        
+        Args:
+            response: HTTP响应
+        """
+        self._fetch_state.etag = response.headers.get('ETag')
+        self._fetch_state.last_modified = response.headers.get('Last-Modified')
+    
+    def _store_in_cache(self, bv_code, metadata, source, raw=None):
+        """将获取到的元数据写入持久化缓存
+        
+        Args:
+            bv_code: BV号
+            metadata: 视频元数据
+            source: 数据来源（SearchAPI、DetailAPI、Crawl）
+            raw: 原始响应，默认使用当前线程最近一次解析的响应
+        """
+        if self.metadata_cache is None or not metadata:
+            return
+        
+        if raw is None:
+            raw = getattr(self._fetch_state, 'raw', None)
+        try:
+            self.metadata_cache.put(
+                bv_code,
+                metadata,
+                raw=raw,
+                source=source,
+                etag=getattr(self._fetch_state, 'etag', None),
+                last_modified=getattr(self._fetch_state, 'last_modified', None)
+            )
+        except Exception as e:
+            print(f"写入元数据缓存失败: {e}")
+    
+    def _revalidate_cached(self, bv_code, entry, bucket=DEFAULT_BUCKET):
+        """使用条件请求重新验证过期的缓存条目
+        
+        仅在条目保存了 ETag 或 Last-Modified 时调用，上游返回 304 时
+        直接刷新缓存时间并复用缓存元数据。
+        
+        Args:
+            bv_code: BV号
+            entry: 缓存条目
+            bucket: 限速桶名称
+            
+        Returns:
+            dict: 视频元数据，无法重新验证返回None
+        """
+        headers = self.api_config['headers'].copy()
+        if self.use_anti_crawler:
+            self._update_session_headers()
+            headers.update(self.session.headers)
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        
+        self._rate_limit(bucket=bucket)
+        try:
+            response = self.transport.get(
+                self.api_config['base_url'],
+                params=self._detail_api_params(bv_code),
+                headers=headers,
+                cookies=self.api_config['cookies'],
+                timeout=REQUEST_TIMEOUT
+            )
+            
+            if response.status_code == 304:
+                self._record_request_success()
+                print(f"缓存条目未修改: {bv_code}")
+                return self.metadata_cache.touch(bv_code)
+            
+            response.raise_for_status()
+            data = response.json()
+            if data.get('code') != 0:
+                if is_dead_video_code(data.get('code')):
+                    self._fetch_state.dead = (data.get('code'), data.get('message'))
+                return None
+            
+            self._record_request_success()
+            self._remember_validators(response)
+            metadata = self._parse_api_response(data, bv_code)
+            self._store_in_cache(bv_code, metadata, 'DetailAPI')
+            return metadata
+        except Exception as e:
+            print(f"条件请求重新验证失败: {e}")
+            self._record_request_failure()
+            return None
+    
+    def _fetch_video_info_api(self, bv_code, bucket=DEFAULT_BUCKET):
+        """使用API获取视频信息
+        
+        Args:
+            bv_code: BV号
+            bucket: 限速桶名称
+            
+        Returns:
+            dict: 视频信息，失败返回None
+        """
+        print(f"使用详情API获取视频信息: {bv_code}")
+        
+        params = self._detail_api_params(bv_code)
         
         # 如果启用反爬，更新请求头
         headers = self.api_config['headers'].copy()
@@ -430,11 +875,15 @@ class VideoCrawler:
             headers.update(self.session.headers)
         
         for retry in range(self.api_max_retries):
+            if not self._allow_source('DetailAPI'):
+                return None
+            
             # 速率限制（带指数退避）
-            self._rate_limit(attempt=retry)
+            self._rate_limit(attempt=retry, bucket=bucket)
+            started = time.monotonic()
             
             try:
-                response = requests.get(
+                response = self.transport.get(
                     self.api_config['base_url'],
                     params=params,
                     headers=headers,
@@ -447,36 +896,48 @@ class VideoCrawler:
                 
                 if data.get('code') != 0:
                     print(f"详情API返回错误: {data.get('message')}")
+                    if is_dead_video_code(data.get('code')):
+                        # 视频已删除、不可见或地区限制：接口本身正常，重试没有意义
+                        self._record_request_success()
+                        self._record_source('DetailAPI', True, started)
+                        self._fetch_state.dead = (data.get('code'), data.get('message'))
+                        return None
                     self._record_request_failure()
+                    self._record_source('DetailAPI', False, started)
                     if retry < self.api_max_retries - 1:
                         print(f"{self.api_retry_delay}秒后重试")
-                        time.sleep(self.api_retry_delay)
+                        self._retry_sleep('DetailAPI', self.api_retry_delay)
                         continue
                     return None
                 
                 # 记录成功
                 self._record_request_success()
+                self._record_source('DetailAPI', True, started)
+                self._remember_validators(response)
                 
                 # 解析API返回数据
                 return self._parse_api_response(data, bv_code)
             except requests.exceptions.Timeout:
                 print(f"详情API请求超时，{self.api_retry_delay}秒后重试")
                 self._record_request_failure()
-                time.sleep(self.api_retry_delay)
+                self._record_source('DetailAPI', False, started)
+                self._retry_sleep('DetailAPI', self.api_retry_delay)
             except requests.exceptions.HTTPError as e:
                 print(f"详情API HTTP错误: {e}")
                 self._record_request_failure()
+                self._record_source('DetailAPI', False, started)
                 if retry < self.api_max_retries - 1:
                     print(f"{self.api_retry_delay}秒后重试")
-                    time.sleep(self.api_retry_delay)
+                    self._retry_sleep('DetailAPI', self.api_retry_delay)
                 else:
                     return None
             except Exception as e:
                 print(f"详情API调用错误: {e}")
                 self._record_request_failure()
+                self._record_source('DetailAPI', False, started)
                 if retry < self.api_max_retries - 1:
                     print(f"{self.api_retry_delay}秒后重试")
-                    time.sleep(self.api_retry_delay)
+                    self._retry_sleep('DetailAPI', self.api_retry_delay)
                 else:
                     return None
         
@@ -492,28 +953,49 @@ class VideoCrawler:
         Returns:
             dict: 视频元数据
         """
-        data = response_data.get('data', {})
-        result = data.get('result', [])
-        
-        # 查找视频类型的结果
+        # 查找匹配BV号的视频
+        # 如果没有找到匹配的BV号，不使用第一个视频结果，因为可能返回不相关的视频
         video_data = None
-        for item in result:
-            if item.get('result_type') == 'video':
-                video_data_list = item.get('data', [])
-                if video_data_list:
-                    # 查找匹配BV号的视频
-                    for video_item in video_data_list:
-                        if video_item.get('bvid') == bv_code:
-                            video_data = video_item
-                            break
-                    # 如果没有找到匹配的BV号，不使用第一个视频结果
-                    # 因为可能返回不相关的视频
-                    break
+        for video_item in self._extract_search_video_items(response_data):
+            if video_item.get('bvid') == bv_code:
+                video_data = video_item
+                break
         
         if not video_data:
             print(f"[失败] 搜索API未找到与BV号 {bv_code} 匹配的视频信息")
             return None
         
+        self._fetch_state.raw = video_data
+        return self._search_item_to_metadata(video_data, bv_code)
+    
+    def _extract_search_video_items(self, response_data):
+        """提取搜索API响应中的视频结果列表
+        
+        Args:
+            response_data: 搜索API响应数据
+            
+        Returns:
+            list: 视频类型的结果条目，没有时返回空列表
+        """
+        data = response_data.get('data') or {}
+        result = data.get('result') or []
+        
+        # 查找视频类型的结果
+        for item in result:
+            if isinstance(item, dict) and item.get('result_type') == 'video':
+                return item.get('data') or []
+        return []
+    
+    def _search_item_to_metadata(self, video_data, bv_code):
+        """将搜索结果中的单个视频条目转换为视频元数据
+        
+        Args:
+            video_data: 搜索结果视频条目
+            bv_code: BV号
+            
+        Returns:
+            dict: 视频元数据
+        """
         # 提取视频信息
         author = video_data.get('author', "")
         metadata = {
@@ -558,6 +1040,7 @@ class VideoCrawler:
         """
         data = response_data.get('data', {})
         view_detail = data.get('View', {})
+        self._fetch_state.raw = view_detail
         
         # 提取视频信息
         author = view_detail.get('owner', {}).get('name', "")
@@ -623,63 +1106,119 @@ class VideoCrawler:
             if not metadata.get(field):
                 print(f"警告: {bv_code} 缺少字段 '{field}'")
     
-    def crawl_video_metadata(self, bv_code):
+    def crawl_video_metadata(self, bv_code, bucket=DEFAULT_BUCKET):
         """爬取视频元数据（优化版）
         
         Args:
             bv_code: BV号
+            bucket: 限速桶名称（重试阶段使用 DEAD_LETTER_BUCKET）
             
         Returns:
             dict: 视频元数据
         """
-        # BV号标准化处理
+        # BV号标准化处理（保持原始大小写，因为Bilibili的BV号是大小写敏感的）
         if bv_code:
-            # 移除可能的BV前缀重复
-            bv_code = bv_code.replace('BVBV', 'BV')
-            # 确保只有一个BV前缀
-            if not bv_code.startswith('BV'):
-                bv_code = 'BV' + bv_code
-            # 保持原始大小写，因为Bilibili的BV号是大小写敏感的
-            # bv_code = bv_code.upper()
+            bv_code = normalize_bv(bv_code)
         
         print(f"获取视频元数据: {bv_code}")
         
-        # 1. 优先使用搜索API方式
-        try:
-            metadata = self._fetch_video_info_search_api(bv_code)
-            if metadata:
-                print("搜索API获取成功")
-                # 校验元信息
-                self._validate_metadata(metadata, bv_code, 'SearchAPI')
-                return metadata
-        except Exception as e:
-            print(f"搜索API方式执行失败: {e}")
+        # 清除当前线程上一次请求的原始响应和校验信息
+        self._fetch_state.__dict__.clear()
+        
+        # 0. 持久化缓存：未过期直接复用，过期且带校验信息时先发条件请求
+        if self.metadata_cache is not None:
+            entry = self.metadata_cache.get_entry(bv_code)
+            if entry:
+                if not self.metadata_cache.get_stale_fields(entry, self.cache_fields):
+                    print("元数据缓存命中")
+                    return entry['metadata']
+                if entry.get('etag') or entry.get('last_modified'):
+                    metadata = self._revalidate_cached(bv_code, entry, bucket)
+                    if metadata:
+                        self._record_alive(bv_code)
+                        return metadata
+                    if self._record_dead(bv_code, 'DetailAPI'):
+                        return None
+        
+        # 1. 依次尝试搜索API、详情API、网页爬取；
+        #    熔断中的来源直接跳过，最近成功率偏低的来源排到后面
+        fetchers = {
+            'SearchAPI': self._fetch_video_info_search_api,
+            'DetailAPI': self._fetch_video_info_api,
+            'Crawl': self._crawl_with_requests,
+        }
+        sources = self.source_router.order()
+        if not sources:
+            print("所有元数据来源均已熔断，跳过")
+            self._failure_reasons[bv_code] = "所有元数据来源均已熔断"
+            return None
+        if sources != list(METADATA_SOURCES):
+            print(f"来源顺序: {' -> '.join(SOURCE_LABELS[source] for source in sources)}")
         
-        # 2. 搜索API失败，使用详情API方式
-        print("搜索API获取失败，切换到详情API方式")
-        try:
-            metadata = self._fetch_video_info_api(bv_code)
+        errors = []
+        for index, source in enumerate(sources):
+            if index > 0:
+                print(f"{SOURCE_LABELS[sources[index - 1]]}获取失败，切换到{SOURCE_LABELS[source]}方式")
+            try:
+                metadata = fetchers[source](bv_code, bucket)
+            except Exception as e:
+                print(f"{SOURCE_LABELS[source]}方式执行失败: {e}")
+                errors.append(f"{SOURCE_LABELS[source]}: {e}")
+                continue
             if metadata:
-                print("详情API获取成功")
+                print(f"{SOURCE_LABELS[source]}获取成功")
                 # 校验元信息
-                self._validate_metadata(metadata, bv_code, 'DetailAPI')
+                self._validate_metadata(metadata, bv_code, source)
+                self._store_in_cache(bv_code, metadata, source)
+                self._record_alive(bv_code)
                 return metadata
-        except Exception as e:
-            print(f"详情API方式执行失败: {e}")
+            # 视频本身不可获取时其他来源同样拿不到，不再继续尝试
+            if self._record_dead(bv_code, source):
+                return None
         
-        # 3. 详情API失败，使用网页爬虫方式
-        print("详情API获取失败，切换到网页爬取方式")
-        metadata = self._crawl_with_requests(bv_code)
-        if metadata:
-            # 校验元信息
-            self._validate_metadata(metadata, bv_code, 'Crawl')
-        return metadata
+        # 所有来源都失败（暂时性错误），记录原因供重试队列使用
+        self._failure_reasons[bv_code] = '；'.join(errors) or \
+            f"{'、'.join(SOURCE_LABELS[source] for source in sources)}均未获取到元数据"
+        return None
     
-    def _crawl_with_requests(self, bv_code):
+    def _record_dead(self, bv_code, source):
+        """当前线程最近一次请求确认视频失效时，记录到失效视频缓存
+        
+        Args:
+            bv_code: BV号
+            source: 返回失效结果的来源
+            
+        Returns:
+            bool: 视频已确认失效返回True
+        """
+        dead = getattr(self._fetch_state, 'dead', None)
+        if not dead:
+            return False
+        code, message = dead
+        self._failure_reasons[bv_code] = None
+        if self.negative_cache is not None:
+            entry = self.negative_cache.record(bv_code, code, message, source)
+            next_check = time.strftime('%Y-%m-%d', time.localtime(entry['next_check']))
+            print(f"视频 {bv_code} 已失效({code} {entry['message']})，{next_check} 前不再请求")
+        else:
+            print(f"视频 {bv_code} 已失效({code} {message})")
+        return True
+    
+    def _record_alive(self, bv_code):
+        """视频获取成功时移出失效视频缓存
+        
+        Args:
+            bv_code: BV号
+        """
+        if self.negative_cache is not None and self.negative_cache.remove(bv_code):
+            print(f"视频 {bv_code} 已恢复，移出失效视频缓存")
+    
+    def _crawl_with_requests(self, bv_code, bucket=DEFAULT_BUCKET):
         """使用requests库爬取视频信息
         
         Args:
             bv_code: BV号
+            bucket: 限速桶名称
             
         Returns:
             dict: 视频元数据
@@ -687,20 +1226,30 @@ class VideoCrawler:
         video_url = f"https://www.bilibili.com/video/{bv_code}"
         
         for retry in range(MAX_RETRIES):
+            if not self._allow_source('Crawl'):
+                return None
+            
             # 速率限制（带指数退避）
-            self._rate_limit(attempt=retry)
+            self._rate_limit(attempt=retry, bucket=bucket)
             
             # 如果启用反爬，更新Session和User-Agent
             if self.use_anti_crawler:
                 self._update_session_headers()
             
+            started = time.monotonic()
             try:
-                response = self.session.get(video_url, timeout=REQUEST_TIMEOUT)
+                response = self.transport.get(
+                    video_url,
+                    headers=dict(self.session.headers),
+                    cookies=self.session.cookies.get_dict(),
+                    timeout=REQUEST_TIMEOUT
+                )
                 response.raise_for_status()
                 response.encoding = response.apparent_encoding
                 
                 # 记录成功
                 self._record_request_success()
+                self._record_source('Crawl', True, started)
                 
                 # 解析视频页面
                 metadata = self._parse_video_page(response.text, bv_code)
@@ -708,21 +1257,30 @@ class VideoCrawler:
             except requests.exceptions.Timeout:
                 print(f"请求超时，{INITIAL_RETRY_DELAY}秒后重试")
                 self._record_request_failure()
-                time.sleep(INITIAL_RETRY_DELAY)
+                self._record_source('Crawl', False, started)
+                self._retry_sleep('Crawl', INITIAL_RETRY_DELAY)
             except requests.exceptions.HTTPError as e:
                 print(f"HTTP错误: {e}")
+                if getattr(e.response, 'status_code', None) == 404:
+                    # 视频页面不存在，重试没有意义
+                    self._record_request_success()
+                    self._record_source('Crawl', True, started)
+                    self._fetch_state.dead = (-404, str(e))
+                    return None
                 self._record_request_failure()
+                self._record_source('Crawl', False, started)
                 if retry < MAX_RETRIES - 1:
                     print(f"{INITIAL_RETRY_DELAY}秒后重试")
-                    time.sleep(INITIAL_RETRY_DELAY)
+                    self._retry_sleep('Crawl', INITIAL_RETRY_DELAY)
                 else:
                     print("达到最大重试次数，放弃爬取")
             except Exception as e:
                 print(f"爬取错误: {e}")
                 self._record_request_failure()
+                self._record_source('Crawl', False, started)
                 if retry < MAX_RETRIES - 1:
                     print(f"{INITIAL_RETRY_DELAY}秒后重试")
-                    time.sleep(INITIAL_RETRY_DELAY)
+                    self._retry_sleep('Crawl', INITIAL_RETRY_DELAY)
                 else:
                     print("达到最大重试次数，放弃爬取")
         
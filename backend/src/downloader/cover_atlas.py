@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+封面拼图（sprite sheet）生成模块
+
+前端时间线每个视频单独加载一张封面，长时间线需要上千次请求。
+本模块在封面下载完成后，按发布月份把封面拼成若干张拼图，
+并生成以BV号为键的坐标清单，时间线网格可以按坐标从拼图中显示封面。
+
+拼图保存在封面目录的 atlas 子目录下：
+  atlas/{名称}_{年-月}.webp   每月一张拼图（超过 atlas_max_tiles 时拆分为 {年-月}-2 等多页）
+  atlas/{名称}.json           坐标清单
+
+每张拼图记录其内容签名（BV号、源文件名和源文件内容哈希，不使用修改时间），
+重新生成时只重建签名变化的拼图，新增视频只会重建它所在月份的拼图；
+重新 checkout 后文件修改时间变化不会导致拼图重建。
+
+Usage (as module):
+  from src.downloader.cover_atlas import generate_cover_atlases
+  generate_cover_atlases(videos_path, thumbs_dir, 'lvjiang')
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utils.config import get_cover_config
+from src.downloader.cover_encoder import CoverEncoder, create_cover_encoder
+from src.downloader.cover_manifest import CoverManifest
+from src.downloader.download_thumbs import (
+    _get_video_bvid,
+    cleanup_stale_temp_files,
+    iter_videos_json,
+    write_file_atomic
+)
+
+
+# 拼图子目录名
+ATLAS_DIRNAME = 'atlas'
+
+# 坐标清单格式版本
+ATLAS_MANIFEST_VERSION = 1
+
+# 没有有效发布日期的视频归入的分组
+UNDATED_GROUP = 'undated'
+
+# 拼图源图可使用的变体格式（AVIF 解码较慢，不作为拼图源图）
+ATLAS_SOURCE_FORMATS = ('webp', 'jpg')
+
+_MONTH_PATTERN = re.compile(r'^(\d{4})-(\d{2})')
+
+
+def get_atlas_group(video: Dict[str, Any]) -> str:
+    """获取视频所属的拼图分组（发布月份）
+
+    Args:
+        video: 视频数据
+
+    Returns:
+        str: 'YYYY-MM'，没有有效日期时返回 'undated'
+    """
+    match = _MONTH_PATTERN.match(video.get('date') or '')
+    if not match:
+        return UNDATED_GROUP
+    return f"{match.group(1)}-{match.group(2)}"
+
+
+def choose_atlas_source(video: Dict[str, Any], cover: str, names: set, tile_width: int) -> str:
+    """选择拼图使用的源图：优先使用不小于图块宽度的最小变体，解码更快
+
+    Args:
+        video: 视频数据（可包含 cover_variants 字段）
+        cover: 主封面文件名
+        names: 封面目录中的文件名集合
+        tile_width: 图块宽度
+
+    Returns:
+        str: 源图文件名
+    """
+    candidates = [
+        (variant.get('width', 0), variant.get('file'))
+        for variant in video.get('cover_variants') or []
+        if variant.get('format') in ATLAS_SOURCE_FORMATS
+        and variant.get('width', 0) >= tile_width
+        and variant.get('file') in names
+    ]
+    return min(candidates)[1] if candidates else cover
+
+
+def load_atlas_manifest(manifest_path: Path) -> Dict[str, Any]:
+    """加载坐标清单，不存在、损坏或版本不符时返回空字典
+
+    Args:
+        manifest_path: 清单文件路径
+
+    Returns:
+        dict: 坐标清单
+    """
+    try:
+        with manifest_path.open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != ATLAS_MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def _source_digest(thumbs_dir: Path, bvid: str, source: str, manifest: Optional[CoverManifest]) -> str:
+    """获取源图内容哈希：主封面优先使用封面清单中的 SHA-256，其余（如变体）读取文件计算"""
+    entry = manifest.get(bvid) if manifest is not None else None
+    if entry and entry.get('file') == source and entry.get('sha256'):
+        return entry['sha256']
+    return hashlib.sha256((thumbs_dir / source).read_bytes()).hexdigest()
+
+
+def _atlas_signature(tiles: List[tuple], layout: Dict[str, int], digests: Dict[str, str]) -> str:
+    """计算拼图内容签名：图块顺序、源文件名及其内容哈希、布局参数"""
+    digest = hashlib.sha1(json.dumps(layout, sort_keys=True).encode('utf-8'))
+    for bvid, source in tiles:
+        digest.update(f"\n{bvid}\t{source}\t{digests[source]}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def generate_cover_atlases(videos_path: Path, thumbs_dir: Path, name: str,
+                           encoder: Optional[CoverEncoder] = None,
+                           quiet: bool = False,
+                           manifest: Optional[CoverManifest] = None) -> Dict[str, Any]:
+    """按发布月份生成封面拼图和坐标清单（增量，只重建内容变化的拼图）
+
+    坐标清单格式：
+      {
+        "version": 1,
+        "tile": {"width": 320, "height": 180},
+        "columns": 8,
+        "atlases": {"2026-01": {"file": "lvjiang_2026-01.webp", "width": ..., "height": ...,
+                                "count": ..., "signature": ...}},
+        "covers": {"BV...": {"atlas": "2026-01", "x": 0, "y": 0, "width": 320, "height": 180}}
+      }
+
+    Args:
+        videos_path: videos.json 文件路径
+        thumbs_dir: 封面目录
+        name: 拼图名称前缀（数据类型），用于区分共用封面目录的多个时间线
+        encoder: 编码进程池，为 None 时按配置创建并在结束后关闭
+        quiet: 静默模式
+        manifest: 封面清单（可选），主封面的内容哈希直接从清单读取，不再读取文件
+
+    Returns:
+        dict: {'built': int, 'reused': int, 'removed': int, 'failed': int, 'covers': int}
+    """
+    results = {'built': 0, 'reused': 0, 'removed': 0, 'failed': 0, 'covers': 0}
+    cover_config = get_cover_config()
+    if not cover_config['atlas_enabled'] or not videos_path.exists() or not thumbs_dir.exists():
+        return results
+
+    tile_width = cover_config['atlas_tile_width']
+    tile_height = cover_config['atlas_tile_height']
+    columns = cover_config['atlas_columns']
+    max_tiles = cover_config['atlas_max_tiles']
+    if min(tile_width, tile_height, columns, max_tiles) <= 0:
+        raise ValueError("拼图图块尺寸、列数和最大图块数必须大于0")
+    layout = {'tile_width': tile_width, 'tile_height': tile_height, 'columns': columns,
+              'quality': cover_config['atlas_quality']}
+
+    # 1. 一次性读取封面目录，按月份分组
+    with os.scandir(thumbs_dir) as entries:
+        files = {entry.name: entry for entry in entries if entry.is_file()}
+
+    groups: Dict[str, List[tuple]] = {}
+    seen = set()
+    for video in iter_videos_json(videos_path):
+        bvid = _get_video_bvid(video)
+        cover = video.get('cover')
+        if not bvid or bvid in seen or cover not in files:
+            continue
+        seen.add(bvid)
+        source = choose_atlas_source(video, cover, files, tile_width)
+        groups.setdefault(get_atlas_group(video), []).append((video.get('date') or '', bvid, source))
+
+    # 2. 每组按日期排序，超过最大图块数时拆分为多页
+    pages: Dict[str, List[tuple]] = {}
+    for group, items in groups.items():
+        items.sort()
+        for start in range(0, len(items), max_tiles):
+            key = group if start == 0 else f"{group}-{start // max_tiles + 1}"
+            pages[key] = [(bvid, source) for _, bvid, source in items[start:start + max_tiles]]
+
+    atlas_dir = thumbs_dir / ATLAS_DIRNAME
+    manifest_path = atlas_dir / f"{name}.json"
+    old_manifest = load_atlas_manifest(manifest_path)
+    old_atlases = old_manifest.get('atlases', {})
+    if atlas_dir.exists():
+        cleanup_stale_temp_files(atlas_dir)
+
+    # 3. 只重建签名变化或文件缺失的拼图
+    digests = {}
+    for tiles in pages.values():
+        for bvid, source in tiles:
+            digests[source] = _source_digest(thumbs_dir, bvid, source, manifest)
+
+    atlases = {}
+    pending = {}
+    owns_encoder = encoder is None
+    try:
+        for key, tiles in sorted(pages.items()):
+            signature = _atlas_signature(tiles, layout, digests)
+            filename = f"{name}_{key}.webp"
+            rows = (len(tiles) + columns - 1) // columns
+            atlases[key] = {
+                'file': filename,
+                'width': min(len(tiles), columns) * tile_width,
+                'height': rows * tile_height,
+                'count': len(tiles),
+                'signature': signature
+            }
+            old = old_atlases.get(key, {})
+            if old.get('signature') == signature and old.get('file') == filename \
+                    and (atlas_dir / filename).exists():
+                results['reused'] += 1
+                continue
+            if encoder is None:
+                encoder = create_cover_encoder()
+            sources = [thumbs_dir / source for _, source in tiles]
+            pending[key] = encoder.submit_atlas(sources, tile_width, tile_height, columns,
+                                                cover_config['atlas_quality'])
+
+        for key, future in pending.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                data = None
+                if not quiet:
+                    print(f"  [错误] 生成封面拼图失败: {key}: {str(e)}")
+            if data is None:
+                atlases.pop(key)
+                results['failed'] += 1
+                continue
+            write_file_atomic(atlas_dir / atlases[key]['file'], data)
+            results['built'] += 1
+    finally:
+        if owns_encoder and encoder is not None:
+            encoder.shutdown()
+
+    # 4. 删除不再使用的拼图
+    for key, old in old_atlases.items():
+        filename = old.get('file')
+        if key not in atlases and filename:
+            try:
+                (atlas_dir / filename).unlink()
+                results['removed'] += 1
+            except FileNotFoundError:
+                pass
+
+    # 5. 写入坐标清单（内容不变时不重写）
+    covers = {}
+    for key, atlas in atlases.items():
+        for i, (bvid, _) in enumerate(pages[key]):
+            covers[bvid] = {
+                'atlas': key,
+                'x': (i % columns) * tile_width,
+                'y': (i // columns) * tile_height,
+                'width': tile_width,
+                'height': tile_height
+            }
+    results['covers'] = len(covers)
+    manifest = {
+        'version': ATLAS_MANIFEST_VERSION,
+        'tile': {'width': tile_width, 'height': tile_height},
+        'columns': columns,
+        'atlases': dict(sorted(atlases.items())),
+        'covers': dict(sorted(covers.items()))
+    }
+    if manifest != old_manifest:
+        data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        write_file_atomic(manifest_path, data)
+
+    if not quiet and (results['built'] or results['removed'] or results['failed']):
+        print(f"封面拼图: 生成 {results['built']} 张, 复用 {results['reused']} 张, "
+              f"删除 {results['removed']} 张, 失败 {results['failed']} 张")
+    return results
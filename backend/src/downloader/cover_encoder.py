@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+封面编码模块
+
+WebP 编码是 CPU 密集型操作，在下载线程中执行会与网络 I/O 争用 GIL。
+本模块将编码放到进程池中执行，进程数默认等于 CPU 核心数，
+下载线程只负责网络 I/O，下载完成的文件提交给编码进程池。
+多尺寸封面变体和月度封面拼图（sprite sheet）同样在进程池中生成，每张源图只解码一次。
+"""
+
+import io
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+
+# WebP 默认编码参数
+DEFAULT_WEBP_QUALITY = 85
+DEFAULT_WEBP_METHOD = 6
+DEFAULT_AVIF_QUALITY = 60
+DEFAULT_AVIF_SPEED = 6
+
+# 封面变体格式 -> Pillow 格式名
+VARIANT_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF', 'jpg': 'JPEG'}
+
+# WebP 图片的最大边长
+WEBP_MAX_DIMENSION = 16383
+
+
+def _to_rgb(img):
+    """转换为 RGB 模式，透明区域使用白色背景"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        if img.mode in ('RGBA', 'LA'):
+            background.paste(img, mask=img.split()[-1])
+            return background
+        return img.convert('RGB')
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def encode_webp(input_path, output_path, quality: int = DEFAULT_WEBP_QUALITY,
+                method: int = DEFAULT_WEBP_METHOD) -> bool:
+    """将图片编码为 WebP 格式（模块级函数，可在子进程中执行）
+
+    Args:
+        input_path: 输入图片路径
+        output_path: 输出 WebP 路径
+        quality: 压缩质量 (0-100)
+        method: 编码方法 (0-6)，越大压缩率越高、速度越慢
+
+    Returns:
+        转换成功返回 True
+    """
+    try:
+        with Image.open(input_path) as img:
+            _to_rgb(img).save(output_path, 'WEBP', quality=quality, method=method)
+        return True
+    except Exception as e:
+        print(f"转换 WebP 失败: {e}")
+        return False
+
+
+def encode_webp_bytes(source, quality: int = DEFAULT_WEBP_QUALITY,
+                      method: int = DEFAULT_WEBP_METHOD) -> Optional[bytes]:
+    """在内存中将图片编码为 WebP（模块级函数，可在子进程中执行）
+
+    Args:
+        source: 图片字节或可读取的二进制文件对象
+        quality: 压缩质量 (0-100)
+        method: 编码方法 (0-6)
+
+    Returns:
+        WebP 字节，无法解码或编码失败返回 None
+    """
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with Image.open(source) as img:
+            output = io.BytesIO()
+            _to_rgb(img).save(output, 'WEBP', quality=quality, method=method)
+        return output.getvalue()
+    except Exception as e:
+        print(f"转换 WebP 失败: {e}")
+        return None
+
+
+def is_variant_format_supported(fmt: str) -> bool:
+    """检查当前 Pillow 是否支持编码指定的变体格式
+
+    Args:
+        fmt: 变体格式（webp、avif、jpg）
+
+    Returns:
+        bool: 支持返回True
+    """
+    if fmt not in VARIANT_FORMATS:
+        return False
+    return fmt == 'jpg' or bool(features.check(fmt))
+
+
+def encode_variants(source, variants: Iterable[Tuple[int, str]], quality: int = DEFAULT_WEBP_QUALITY,
+                    method: int = DEFAULT_WEBP_METHOD,
+                    avif_quality: int = DEFAULT_AVIF_QUALITY) -> Dict[Tuple[int, str], bytes]:
+    """解码一次源图，生成多个宽度和格式的变体（模块级函数，可在子进程中执行）
+
+    按宽度从大到小依次缩放，每个宽度只缩放一次，供该宽度的所有格式使用；
+    源图比目标宽度窄时不放大。
+
+    Args:
+        source: 源图路径、字节或二进制文件对象
+        variants: (宽度, 格式) 列表
+        quality: WebP/JPEG 压缩质量
+        method: WebP 编码方法
+        avif_quality: AVIF 压缩质量
+
+    Returns:
+        dict: (宽度, 格式) -> 编码后的字节，失败时返回空字典
+    """
+    options = {
+        'webp': {'quality': quality, 'method': method},
+        'avif': {'quality': avif_quality, 'speed': DEFAULT_AVIF_SPEED},
+        'jpg': {'quality': quality, 'optimize': True},
+    }
+    by_width: Dict[int, List[str]] = {}
+    for width, fmt in variants:
+        by_width.setdefault(width, []).append(fmt)
+
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with Image.open(source) as img:
+            current = _to_rgb(img)
+            current.load()
+
+        results = {}
+        for width in sorted(by_width, reverse=True):
+            if current.width > width:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.LANCZOS)
+            for fmt in by_width[width]:
+                output = io.BytesIO()
+                current.save(output, VARIANT_FORMATS[fmt], **options[fmt])
+                results[(width, fmt)] = output.getvalue()
+        return results
+    except Exception as e:
+        print(f"生成封面变体失败: {e}")
+        return {}
+
+
+def encode_atlas(sources: List[str], tile_width: int, tile_height: int, columns: int,
+                 quality: int = DEFAULT_WEBP_QUALITY, method: int = DEFAULT_WEBP_METHOD) -> Optional[bytes]:
+    """把多张封面按网格拼成一张 WebP 拼图（模块级函数，可在子进程中执行）
+
+    第 i 张封面位于第 i // columns 行、第 i % columns 列，裁剪缩放到图块大小；
+    无法解码的封面留白，不影响其他图块的位置。
+
+    Args:
+        sources: 封面路径列表
+        tile_width: 图块宽度
+        tile_height: 图块高度
+        columns: 每行图块数
+        quality: WebP 压缩质量
+        method: WebP 编码方法
+
+    Returns:
+        WebP 字节，没有封面或编码失败返回 None
+    """
+    if not sources:
+        return None
+    rows = (len(sources) + columns - 1) // columns
+    width = min(len(sources), columns) * tile_width
+    height = rows * tile_height
+    if width > WEBP_MAX_DIMENSION or height > WEBP_MAX_DIMENSION:
+        print(f"拼图尺寸 {width}x{height} 超过 WebP 上限")
+        return None
+
+    sheet = Image.new('RGB', (width, height), (255, 255, 255))
+    for i, source in enumerate(sources):
+        try:
+            with Image.open(source) as img:
+                # JPEG 在解码时直接缩小，减少解码开销
+                img.draft('RGB', (tile_width * 2, tile_height * 2))
+                tile = ImageOps.fit(_to_rgb(img), (tile_width, tile_height), Image.LANCZOS)
+        except Exception as e:
+            print(f"拼图读取封面失败: {source}: {e}")
+            continue
+        sheet.paste(tile, ((i % columns) * tile_width, (i // columns) * tile_height))
+
+    try:
+        output = io.BytesIO()
+        sheet.save(output, 'WEBP', quality=quality, method=method)
+        return output.getvalue()
+    except Exception as e:
+        print(f"拼图编码失败: {e}")
+        return None
+
+
+def create_cover_encoder() -> 'CoverEncoder':
+    """按配置文件 covers 配置创建编码器
+
+    Returns:
+        CoverEncoder: 编码器
+    """
+    from src.utils.config import get_cover_config
+    cover_config = get_cover_config()
+    return CoverEncoder(
+        quality=cover_config['webp_quality'],
+        method=cover_config['webp_method'],
+        workers=cover_config['encode_workers'],
+        avif_quality=cover_config['avif_quality']
+    )
+
+
+class CoverEncoder:
+    """封面 WebP 编码进程池
+
+    workers 为 0 时在调用线程中直接编码（用于不支持多进程的环境和测试）。
+    进程池异常退出时自动回退到调用线程编码，不影响下载流程。
+
+    用法：
+        with CoverEncoder(quality=85, method=6) as encoder:
+            future = encoder.submit_bytes(image_bytes)
+            webp_bytes = future.result()
+    """
+
+    def __init__(self, quality: int = DEFAULT_WEBP_QUALITY, method: int = DEFAULT_WEBP_METHOD,
+                 workers: Optional[int] = None, avif_quality: int = DEFAULT_AVIF_QUALITY):
+        """初始化编码器
+
+        Args:
+            quality: WebP 压缩质量 (0-100)
+            method: WebP 编码方法 (0-6)
+            workers: 编码进程数，None 表示使用 CPU 核心数，0 表示不使用进程池
+            avif_quality: 封面变体 AVIF 压缩质量 (0-100)
+        """
+        if not 0 <= quality <= 100:
+            raise ValueError("quality必须在0到100之间")
+        if not 0 <= method <= 6:
+            raise ValueError("method必须在0到6之间")
+        if not 0 <= avif_quality <= 100:
+            raise ValueError("avif_quality必须在0到100之间")
+        if workers is not None and workers < 0:
+            raise ValueError("workers必须大于等于0")
+
+        self.quality = quality
+        self.method = method
+        self.avif_quality = avif_quality
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor = None
+        if self.workers > 0:
+            # 编码器可能在流水线线程已启动后创建，fork 会复制其他线程持有的锁，
+            # 使用 spawn 启动的子进程只导入本模块，不继承父进程的线程状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+
+    def _submit(self, func, *args) -> Future:
+        """提交任务到进程池，进程池不可用时在当前线程执行"""
+        if self._executor is not None:
+            try:
+                return self._executor.submit(func, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                print(f"编码进程池不可用，改为在当前线程编码: {e}")
+                self._executor = None
+
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    def submit(self, input_path: Path, output_path: Path) -> Future:
+        """提交文件编码任务
+
+        Args:
+            input_path: 输入图片路径
+            output_path: 输出 WebP 路径
+
+        Returns:
+            Future: 结果为编码是否成功
+        """
+        return self._submit(encode_webp, str(input_path), str(output_path), self.quality, self.method)
+
+    def submit_bytes(self, data: bytes) -> Future:
+        """提交内存编码任务
+
+        Args:
+            data: 图片字节
+
+        Returns:
+            Future: 结果为 WebP 字节，失败为 None
+        """
+        return self._submit(encode_webp_bytes, bytes(data), self.quality, self.method)
+
+    def submit_variants(self, source, variants: List[Tuple[int, str]]) -> Future:
+        """提交封面变体生成任务
+
+        Args:
+            source: 源图路径或字节（路径只传递字符串，避免在进程间复制图片）
+            variants: (宽度, 格式) 列表
+
+        Returns:
+            Future: 结果为 (宽度, 格式) -> 字节 的字典
+        """
+        if isinstance(source, Path):
+            source = str(source)
+        return self._submit(encode_variants, source, list(variants), self.quality, self.method,
+                            self.avif_quality)
+
+    def submit_atlas(self, sources: List[Path], tile_width: int, tile_height: int, columns: int,
+                     quality: Optional[int] = None) -> Future:
+        """提交封面拼图任务
+
+        Args:
+            sources: 封面路径列表（按图块顺序）
+            tile_width: 图块宽度
+            tile_height: 图块高度
+            columns: 每行图块数
+            quality: 拼图 WebP 压缩质量，None 表示使用编码器的质量
+
+        Returns:
+            Future: 结果为 WebP 字节，失败为 None
+        """
+        return self._submit(encode_atlas, [str(source) for source in sources], tile_width, tile_height,
+                            columns, self.quality if quality is None else quality, self.method)
+
+    def submit_placeholders(self, sources: List[Path], x_components: int, y_components: int) -> Future:
+        """提交一批封面的 BlurHash 计算任务
+
+        Args:
+            sources: 封面路径列表
+            x_components: 横向分量数
+            y_components: 纵向分量数
+
+        Returns:
+            Future: 结果为与 sources 一一对应的 BlurHash 列表
+        """
+        from src.downloader.cover_placeholder import compute_placeholders
+        return self._submit(compute_placeholders, [str(source) for source in sources], x_components,
+                            y_components)
+
+    def encode_bytes(self, data: bytes) -> Optional[bytes]:
+        """同步内存编码，进程池异常时在当前线程重试
+
+        Args:
+            data: 图片字节
+
+        Returns:
+            WebP 字节，失败返回 None
+        """
+        try:
+            return self.submit_bytes(data).result()
+        except BrokenProcessPool:
+            self._executor = None
+            return encode_webp_bytes(data, self.quality, self.method)
+
+    def shutdown(self):
+        """关闭进程池，等待已提交的任务完成"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+封面目录清理模块
+
+封面目录被所有数据类型共用，只增不减：视频移出时间线后封面仍然保留，
+旧版本下载流程留下的 {BV号}_temp 原图和换格式后的旧封面也不会删除。
+
+清理分两步，总耗时与文件数和视频数之和成正比：
+1. 逐条读取所有数据类型的时间线一次，得到仍在使用的BV号及其封面、变体文件名
+2. 读取封面目录一次，对照第 1 步的结果找出可清理的文件
+
+可清理的文件：
+- orphaned: BV号不在任何时间线中的封面和变体
+- temp: {BV号}_temp.{扩展名} 原图
+- superseded: 时间线引用了其他格式的封面（且该文件存在）时的旧封面，
+  以及不在 cover_variants 中的旧尺寸、旧格式变体
+
+拼图目录、封面清单和其他非封面文件不处理。
+任一数据类型的时间线不存在或无法读取时不清理，避免误删。
+
+Usage (as script):
+  python -m src.downloader.cover_gc                 # 只报告，不删除
+  python -m src.downloader.cover_gc --quarantine    # 移动到隔离目录
+  python -m src.downloader.cover_gc --delete        # 直接删除
+
+Usage (as module):
+  from src.downloader.cover_gc import collect_cover_garbage
+  collect_cover_garbage(thumbs_dir, mode='dry-run')
+"""
+
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.downloader.download_thumbs import _get_video_bvid, iter_videos_json
+from src.utils.config import PROJECT_ROOT, get_cover_config, get_frontend_thumbs_dir
+from src.utils.path_manager import get_all_data_types, get_data_paths
+
+
+# 清理模式
+GC_MODES = ('off', 'dry-run', 'quarantine', 'delete')
+
+# 封面和变体文件名: {BV号}.{扩展名}、{BV号}_{宽度}w.{格式}、{BV号}_temp.{扩展名}
+COVER_FILE_PATTERN = re.compile(r'^(BV[0-9A-Za-z]+)(?:_(temp|\d+w))?\.(webp|jpe?g|png|avif)$', re.IGNORECASE)
+
+
+def get_timeline_files() -> List[Path]:
+    """获取所有数据类型的时间线文件
+
+    Returns:
+        list: 时间线文件路径列表
+    """
+    return [get_data_paths(data_type)['TIMELINE_FILE'] for data_type in get_all_data_types()]
+
+
+def collect_live_covers(timeline_files: Iterable[Path]) -> Optional[Dict[str, Set[str]]]:
+    """逐条读取时间线，收集仍在使用的BV号及其引用的封面和变体文件名
+
+    Args:
+        timeline_files: 时间线文件列表
+
+    Returns:
+        BV号 -> 引用的文件名集合；任一时间线不存在或无法读取时返回 None
+    """
+    live = {}
+    for timeline_file in timeline_files:
+        timeline_file = Path(timeline_file)
+        if not timeline_file.exists():
+            print(f"时间线不存在: {timeline_file}")
+            return None
+        try:
+            for video in iter_videos_json(timeline_file):
+                bv = _get_video_bvid(video)
+                if not bv:
+                    continue
+                names = live.setdefault(bv, set())
+                if video.get('cover'):
+                    names.add(video['cover'])
+                for variant in video.get('cover_variants') or []:
+                    if variant.get('file'):
+                        names.add(variant['file'])
+        except Exception as e:
+            print(f"读取时间线失败: {timeline_file}: {e}")
+            return None
+    return live
+
+
+def find_cover_garbage(thumbs_dir: Path, live: Dict[str, Set[str]]) -> List[Dict[str, Any]]:
+    """对照仍在使用的封面，找出封面目录中可清理的文件（只读取目录一次）
+
+    Args:
+        thumbs_dir: 封面目录
+        live: collect_live_covers 的结果
+
+    Returns:
+        list: [{'file', 'bv', 'reason', 'size'}]，reason 为 orphaned、temp 或 superseded
+    """
+    files = []
+    if thumbs_dir.exists():
+        with os.scandir(thumbs_dir) as entries:
+            for entry in entries:
+                match = COVER_FILE_PATTERN.match(entry.name)
+                if match and entry.is_file():
+                    files.append((entry.name, match.group(1), match.group(2), entry.stat().st_size))
+    suffixes = {name: suffix for name, _, suffix, _ in files}
+
+    # 时间线引用的主封面（或变体）确实存在的BV号：其余格式的主封面（或变体）才视为旧文件，
+    # 引用的文件还没下载时保留现有文件
+    has_cover = set()
+    has_variants = set()
+    for bv, names in live.items():
+        for name in names:
+            if name in suffixes:
+                (has_variants if suffixes[name] else has_cover).add(bv)
+
+    garbage = []
+    for name, bv, suffix, size in sorted(files):
+        referenced = live.get(bv)
+        if referenced is None:
+            reason = 'orphaned'
+        elif suffix and suffix.lower() == 'temp':
+            reason = 'temp'
+        elif name in referenced or bv not in (has_variants if suffix else has_cover):
+            continue
+        else:
+            reason = 'superseded'
+        garbage.append({'file': name, 'bv': bv, 'reason': reason, 'size': size})
+    return garbage
+
+
+def _format_size(size: int) -> str:
+    """把字节数格式化为 KB/MB"""
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def collect_cover_garbage(thumbs_dir: Path = None, mode: str = 'dry-run',
+                          timeline_files: Optional[Iterable[Path]] = None,
+                          quarantine_dir: Optional[Path] = None,
+                          manifest=None, quiet: bool = False) -> Dict[str, Any]:
+    """清理封面目录中不再使用的文件
+
+    Args:
+        thumbs_dir: 封面目录，None 表示配置文件中的前端封面目录
+        mode: dry-run 只报告，quarantine 移动到隔离目录，delete 直接删除，off 不处理
+        timeline_files: 时间线文件列表，None 表示所有数据类型的时间线
+        quarantine_dir: 隔离目录，None 表示配置中的 gc_quarantine_dir；
+            每次清理放在以时间命名的子目录中
+        manifest: 封面清单（CoverManifest），被清理的主封面从清单中移除
+        quiet: 静默模式
+
+    Returns:
+        dict: {'mode', 'skipped', 'files', 'bytes', 'orphaned', 'temp', 'superseded', 'removed', 'failed'}
+    """
+    if mode not in GC_MODES:
+        raise ValueError(f"未知的封面清理模式: {mode}")
+    results = {'mode': mode, 'skipped': False, 'files': [], 'bytes': 0,
+               'orphaned': 0, 'temp': 0, 'superseded': 0, 'removed': 0, 'failed': 0}
+    if mode == 'off':
+        results['skipped'] = True
+        return results
+
+    thumbs_dir = Path(thumbs_dir) if thumbs_dir is not None else get_frontend_thumbs_dir()
+    live = collect_live_covers(timeline_files if timeline_files is not None else get_timeline_files())
+    if not live:
+        if not quiet:
+            print("未能读取全部时间线，跳过封面清理")
+        results['skipped'] = True
+        return results
+
+    garbage = find_cover_garbage(thumbs_dir, live)
+    for item in garbage:
+        results[item['reason']] += 1
+        results['bytes'] += item['size']
+    results['files'] = [item['file'] for item in garbage]
+
+    if not quiet:
+        action = {'dry-run': '可清理', 'quarantine': '隔离', 'delete': '删除'}[mode]
+        print(f"封面清理({mode}): {action} {len(garbage)} 个文件，共 {_format_size(results['bytes'])}"
+              f"（孤立 {results['orphaned']}，临时原图 {results['temp']}，旧格式 {results['superseded']}）")
+        for item in garbage[:10]:
+            print(f"  {item['file']} ({item['reason']}, {_format_size(item['size'])})")
+        if len(garbage) > 10:
+            print(f"  ... 其余 {len(garbage) - 10} 个")
+
+    if mode == 'dry-run' or not garbage:
+        return results
+
+    target_dir = None
+    if mode == 'quarantine':
+        if quarantine_dir is None:
+            quarantine_dir = Path(get_cover_config()['gc_quarantine_dir'])
+            if not quarantine_dir.is_absolute():
+                quarantine_dir = PROJECT_ROOT / quarantine_dir
+        target_dir = Path(quarantine_dir) / time.strftime('%Y%m%d-%H%M%S')
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+    for item in garbage:
+        path = thumbs_dir / item['file']
+        try:
+            if target_dir is not None:
+                shutil.move(str(path), str(target_dir / item['file']))
+            else:
+                path.unlink()
+        except OSError as e:
+            results['failed'] += 1
+            if not quiet:
+                print(f"  清理失败 {item['file']}: {e}")
+            continue
+        results['removed'] += 1
+        if manifest is not None and manifest.filename(item['bv']) == item['file']:
+            manifest.remove(item['bv'])
+
+    if manifest is not None:
+        manifest.save()
+    if not quiet and target_dir is not None:
+        print(f"  已移动到: {target_dir}")
+    return results
+
+
+def main():
+    """主函数，命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='清理封面目录中不再使用的封面（默认只报告）')
+    parser.add_argument('thumbs_dir', type=Path, nargs='?', default=None,
+                        help='封面目录（默认使用配置文件中的前端路径）')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--delete', action='store_true', help='直接删除')
+    group.add_argument('--quarantine', type=Path, nargs='?', const=True, default=None, metavar='DIR',
+                       help='移动到隔离目录（默认使用配置中的 gc_quarantine_dir）')
+
+    args = parser.parse_args()
+
+    from src.downloader.cover_manifest import CoverManifest
+
+    mode = 'delete' if args.delete else 'quarantine' if args.quarantine else 'dry-run'
+    quarantine_dir = args.quarantine if isinstance(args.quarantine, Path) else None
+    thumbs_dir = args.thumbs_dir or get_frontend_thumbs_dir()
+    collect_cover_garbage(thumbs_dir, mode, quarantine_dir=quarantine_dir,
+                          manifest=CoverManifest.load(thumbs_dir))
+
+
+if __name__ == "__main__":
+    main()
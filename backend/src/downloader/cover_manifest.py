@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+封面清单模块
+
+封面清单记录每个BV号对应的封面：文件名、大小、尺寸、内容哈希和下载地址，
+以及下载内容的哈希和 ETag、Last-Modified（用于按条件请求刷新封面）。
+配置的前端封面目录会被提交和发布，它的清单保存在 backend/data 下（covers.manifest_file），
+其他封面目录的清单保存在封面目录中的 .cover_manifest.json。
+
+- 判断封面是否已存在、获取封面文件名时直接查清单，不再逐个检查文件
+- 校验时按大小和内容哈希判断文件是否变化（不使用修改时间，重新 checkout 后清单不变），
+  只对变化的和清单中没有的文件完整解码，多线程并行
+- 空文件、截断或无法解码的封面从清单中移除并删除，下次运行时重新下载
+
+Usage (as module):
+  from src.downloader.cover_manifest import load_cover_manifest
+  manifest = load_cover_manifest(thumbs_dir)
+  if bvid in manifest: ...
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from PIL import Image
+
+from src.utils.config import PROJECT_ROOT, get_cover_config, get_frontend_thumbs_dir
+
+
+# 封面目录中的清单文件名（配置的前端封面目录除外）
+MANIFEST_FILENAME = '.cover_manifest.json'
+
+# 清单格式版本
+MANIFEST_VERSION = 1
+
+# 封面文件扩展名
+COVER_EXTENSIONS = ('.webp', '.jpg', '.jpeg', '.png')
+
+
+def is_cover_filename(name: str) -> bool:
+    """判断文件名是否为主封面 {BV号}.{扩展名}（不包括变体和临时文件）
+
+    Args:
+        name: 文件名
+
+    Returns:
+        bool: 是主封面返回True
+    """
+    stem, ext = os.path.splitext(name)
+    return ext.lower() in COVER_EXTENSIONS and stem.startswith('BV') and '_' not in stem and '.' not in stem
+
+
+def inspect_cover(path: Path) -> Optional[Dict[str, Any]]:
+    """完整解码封面并计算内容哈希
+
+    Args:
+        path: 封面路径
+
+    Returns:
+        {'size', 'width', 'height', 'sha256'}，空文件、截断或无法解码时返回 None
+    """
+    try:
+        data = path.read_bytes()
+        if not data:
+            return None
+        with Image.open(io.BytesIO(data)) as img:
+            # load() 会完整解码，截断的文件在这里抛出异常
+            img.load()
+            width, height = img.size
+    except Exception:
+        return None
+    return {
+        'size': len(data),
+        'width': width,
+        'height': height,
+        'sha256': hashlib.sha256(data).hexdigest()
+    }
+
+
+def is_cover_unchanged(path: Path, entry: Dict[str, Any]) -> bool:
+    """只计算内容哈希（不解码），判断封面内容与清单记录是否一致
+
+    Args:
+        path: 封面路径
+        entry: 清单中的封面信息
+
+    Returns:
+        bool: 大小和内容哈希都与清单一致返回True
+    """
+    if not entry.get('sha256'):
+        return False
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return False
+    return len(data) == entry.get('size') and hashlib.sha256(data).hexdigest() == entry['sha256']
+
+
+def get_manifest_path(thumbs_dir: Path) -> Path:
+    """获取封面目录的清单文件路径
+
+    配置的前端封面目录会被提交和发布，清单保存在 backend/data 下（covers.manifest_file）；
+    其他目录（命令行指定的目录、测试目录）的清单保存在封面目录中。
+
+    Args:
+        thumbs_dir: 封面目录
+
+    Returns:
+        Path: 清单文件路径
+    """
+    thumbs_dir = Path(thumbs_dir)
+    if thumbs_dir.resolve() == get_frontend_thumbs_dir().resolve():
+        return PROJECT_ROOT / get_cover_config()['manifest_file']
+    return thumbs_dir / MANIFEST_FILENAME
+
+
+class CoverManifest:
+    """封面清单
+
+    线程安全：多个下载线程和流水线可共用同一个清单。
+    实现 in 运算，可代替已存在封面的BV号集合传给 fetch_cover。
+    """
+
+    def __init__(self, thumbs_dir: Path, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 path: Optional[Path] = None):
+        """初始化封面清单
+
+        Args:
+            thumbs_dir: 封面目录
+            entries: BV号 -> 封面信息
+            path: 清单文件路径，None 表示按 get_manifest_path 决定
+        """
+        self.thumbs_dir = Path(thumbs_dir)
+        self.path = Path(path) if path is not None else get_manifest_path(self.thumbs_dir)
+        self.entries = dict(entries or {})
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @property
+    def legacy_path(self) -> Path:
+        """旧版本保存在封面目录中的清单路径"""
+        return self.thumbs_dir / MANIFEST_FILENAME
+
+    @classmethod
+    def load(cls, thumbs_dir: Path, path: Optional[Path] = None) -> 'CoverManifest':
+        """加载封面清单，不存在、损坏或版本不符时返回空清单
+
+        清单文件不存在时读取旧版本保存在封面目录中的清单，保存时迁移到新位置。
+
+        Args:
+            thumbs_dir: 封面目录
+            path: 清单文件路径，None 表示按 get_manifest_path 决定
+
+        Returns:
+            CoverManifest: 封面清单
+        """
+        manifest = cls(thumbs_dir, path=path)
+        source = manifest.path
+        if not source.exists() and manifest.legacy_path.exists():
+            source = manifest.legacy_path
+            manifest._dirty = True
+        try:
+            with source.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if isinstance(data, dict) and data.get('version') == MANIFEST_VERSION \
+                and isinstance(data.get('covers'), dict):
+            manifest.entries = data['covers']
+            # 旧版本记录的修改时间不再使用
+            for entry in manifest.entries.values():
+                if entry.pop('mtime_ns', None) is not None:
+                    manifest._dirty = True
+        return manifest
+
+    def __contains__(self, bvid: str) -> bool:
+        return bvid in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.entries))
+
+    def get(self, bvid: str) -> Optional[Dict[str, Any]]:
+        """获取封面信息
+
+        Args:
+            bvid: BV号
+
+        Returns:
+            封面信息，不存在返回 None
+        """
+        return self.entries.get(bvid)
+
+    def filename(self, bvid: str) -> Optional[str]:
+        """获取封面文件名
+
+        Args:
+            bvid: BV号
+
+        Returns:
+            文件名，不存在返回 None
+        """
+        entry = self.entries.get(bvid)
+        return entry['file'] if entry else None
+
+    def record(self, bvid: str, filename: str, data: bytes, source_url: Optional[str] = None,
+               source: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """记录刚写入的封面（使用内存中的内容计算哈希和尺寸，不重新读取文件）
+
+        Args:
+            bvid: BV号
+            filename: 封面文件名
+            data: 写入的文件内容
+            source_url: 下载地址
+            source: 下载内容的信息 {'source_sha256', 'etag', 'last_modified'}（可选）
+
+        Returns:
+            dict: 封面信息
+        """
+        width = height = None
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                width, height = img.size
+        except Exception:
+            pass
+        entry = {
+            'file': filename,
+            'size': len(data),
+            'width': width,
+            'height': height,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'source_url': source_url
+        }
+        entry.update(source or {})
+        with self._lock:
+            self.entries[bvid] = entry
+            self._dirty = True
+        return entry
+
+    def update(self, bvid: str, fields: Dict[str, Any]):
+        """更新封面信息中的部分字段（如按条件请求确认未变化后更新 ETag）
+
+        Args:
+            bvid: BV号
+            fields: 要更新的字段
+        """
+        with self._lock:
+            entry = self.entries.get(bvid)
+            if entry is not None and any(entry.get(key) != value for key, value in fields.items()):
+                entry.update(fields)
+                self._dirty = True
+
+    def remove(self, bvid: str):
+        """从清单中移除封面
+
+        Args:
+            bvid: BV号
+        """
+        with self._lock:
+            if self.entries.pop(bvid, None) is not None:
+                self._dirty = True
+
+    def verify(self, workers: Optional[int] = None, quiet: bool = False) -> Dict[str, Any]:
+        """校验封面目录与清单是否一致
+
+        一次性读取封面目录，在线程池中并行检查：大小与清单一致的文件只计算内容哈希，
+        哈希也一致时视为未变化（不解码，清单不变）；其余文件（变化的和清单中没有的）完整解码。
+        不比较修改时间，重新 checkout 后清单不会因此改写。
+        损坏的文件被删除并从清单中移除，下次下载时重新下载。
+
+        Args:
+            workers: 并行检查线程数，None 表示 CPU 核心数
+            quiet: 静默模式
+
+        Returns:
+            dict: {'unchanged': int, 'verified': int, 'missing': int, 'corrupt': List[str]}
+        """
+        results = {'unchanged': 0, 'verified': 0, 'missing': 0, 'corrupt': []}
+        files = set()
+        if self.thumbs_dir.exists():
+            with os.scandir(self.thumbs_dir) as entries:
+                for entry in entries:
+                    if is_cover_filename(entry.name) and entry.is_file():
+                        files.add(entry.name)
+
+        # 1. 清单中的文件不存在时移除，存在时检查内容
+        to_check = {}
+        for bvid, entry in list(self.entries.items()):
+            name = entry.get('file')
+            if name in files:
+                files.discard(name)
+                to_check[bvid] = name
+            else:
+                self.remove(bvid)
+                results['missing'] += 1
+
+        # 2. 目录中有但清单中没有的封面（同一BV号有多个文件时按扩展名优先级取一个）
+        for name in sorted(files, key=lambda n: COVER_EXTENSIONS.index(os.path.splitext(n)[1].lower())):
+            bvid = os.path.splitext(name)[0]
+            if bvid not in self.entries and bvid not in to_check:
+                to_check[bvid] = name
+
+        if to_check:
+            max_workers = workers or os.cpu_count() or 1
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                checked = executor.map(self._check_cover, to_check.items())
+                for (bvid, name), (unchanged, info) in zip(list(to_check.items()), checked):
+                    if unchanged:
+                        results['unchanged'] += 1
+                        continue
+                    if info is None:
+                        results['corrupt'].append(bvid)
+                        self.remove(bvid)
+                        try:
+                            (self.thumbs_dir / name).unlink()
+                        except OSError:
+                            pass
+                        continue
+                    old = self.entries.get(bvid) or {}
+                    with self._lock:
+                        # 文件内容变化后原来的 ETag 等下载信息不再对应，只保留下载地址
+                        self.entries[bvid] = dict(info, file=name, source_url=old.get('source_url'))
+                        self._dirty = True
+                    results['verified'] += 1
+
+        if not quiet and (results['verified'] or results['missing'] or results['corrupt']):
+            print(f"封面校验: 未变化 {results['unchanged']}, 重新校验 {results['verified']}, "
+                  f"缺失 {results['missing']}, 损坏 {len(results['corrupt'])}")
+            if results['corrupt']:
+                print(f"  损坏的封面将重新下载: {', '.join(results['corrupt'][:10])}"
+                      f"{' ...' if len(results['corrupt']) > 10 else ''}")
+        return results
+
+    def _check_cover(self, item: Tuple[str, str]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """检查一个封面：清单中已有且大小和内容哈希一致时不解码，否则完整解码
+
+        Args:
+            item: (BV号, 文件名)
+
+        Returns:
+            tuple: (内容是否与清单一致, 不一致时 inspect_cover 的结果)
+        """
+        bvid, name = item
+        path = self.thumbs_dir / name
+        entry = self.entries.get(bvid)
+        if entry and entry.get('file') == name and is_cover_unchanged(path, entry):
+            return True, None
+        return False, inspect_cover(path)
+
+    def save(self) -> bool:
+        """原子保存清单（没有变化时不写入），并删除旧版本保存在封面目录中的清单
+
+        Returns:
+            bool: 写入了文件返回True
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = json.dumps(
+                {'version': MANIFEST_VERSION, 'covers': dict(sorted(self.entries.items()))},
+                ensure_ascii=False, indent=2
+            ).encode('utf-8')
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            with self._lock:
+                self._dirty = True
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        if self.legacy_path != self.path:
+            try:
+                self.legacy_path.unlink()
+            except FileNotFoundError:
+                pass
+        return True
+
+
+def load_cover_manifest(thumbs_dir: Path, workers: Optional[int] = None, quiet: bool = False) -> CoverManifest:
+    """加载并校验封面清单，有变化时保存
+
+    Args:
+        thumbs_dir: 封面目录
+        workers: 并行检查线程数，None 表示 CPU 核心数
+        quiet: 静默模式
+
+    Returns:
+        CoverManifest: 与封面目录一致的清单
+    """
+    manifest = CoverManifest.load(thumbs_dir)
+    manifest.verify(workers, quiet)
+    manifest.save()
+    return manifest
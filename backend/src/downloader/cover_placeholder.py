@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+封面占位图（BlurHash）模块
+
+前端加载封面前先显示由 BlurHash 解码出的模糊色块，避免封面加载时页面跳动。
+BlurHash 只有二三十个字符，直接写入 videos.json 的 blurhash 字段。
+
+计算分两步：
+1. 解码封面并缩小为固定尺寸的采样图（JPEG 在解码时直接缩小）
+2. 对一批采样图同时计算余弦分量
+
+安装 NumPy 时第 2 步对整批采样图做一次矩阵运算，回填上千张封面只需几秒；
+未安装时逐张计算，结果相同。
+"""
+
+import importlib.util
+import io
+import math
+from typing import Iterable, List, Optional, Sequence
+
+from PIL import Image
+
+from src.downloader.cover_encoder import _to_rgb
+
+
+# BlurHash 默认分量数（横向 x 纵向）
+DEFAULT_X_COMPONENTS = 4
+DEFAULT_Y_COMPONENTS = 3
+
+# 采样图尺寸：BlurHash 只保留低频分量，32x32 足够
+SAMPLE_SIZE = 32
+
+# 单个批次的封面数量（进程池中的一个任务）
+PLACEHOLDER_BATCH_SIZE = 256
+
+_BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+# sRGB 0-255 -> 线性亮度查找表
+_SRGB_TO_LINEAR = [
+    value / 255 / 12.92 if value / 255 <= 0.04045 else ((value / 255 + 0.055) / 1.055) ** 2.4
+    for value in range(256)
+]
+
+
+def is_numpy_available() -> bool:
+    """检查是否安装了 NumPy
+
+    Returns:
+        bool: 可用返回True
+    """
+    return importlib.util.find_spec('numpy') is not None
+
+
+def _base83(value: int, length: int) -> str:
+    """把整数编码为定长 base83 字符串"""
+    return ''.join(
+        _BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83] for i in range(length)
+    )
+
+
+def _linear_to_srgb(value: float) -> int:
+    """线性亮度 -> sRGB 0-255"""
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exp: float) -> float:
+    return math.copysign(abs(value) ** exp, value)
+
+
+def load_sample(source) -> Optional[bytes]:
+    """解码图片并缩小为 SAMPLE_SIZE x SAMPLE_SIZE 的 RGB 采样图
+
+    Args:
+        source: 图片路径、字节或二进制文件对象
+
+    Returns:
+        RGB 像素字节，无法解码时返回 None
+    """
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with Image.open(source) as img:
+            # JPEG 在解码时直接缩小，减少解码开销
+            img.draft('RGB', (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+            return _to_rgb(img).resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX).tobytes()
+    except Exception:
+        return None
+
+
+def _components_python(sample: bytes, x_components: int, y_components: int) -> List[List[tuple]]:
+    """逐张计算 BlurHash 余弦分量（未安装 NumPy 时使用）"""
+    size = SAMPLE_SIZE
+    linear = [_SRGB_TO_LINEAR[value] for value in sample]
+    cos_x = [[math.cos(math.pi * i * x / size) for x in range(size)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / size) for y in range(size)] for j in range(y_components)]
+
+    # 余弦基可分离：先沿横向求和，再沿纵向求和
+    rows = []
+    for y in range(size):
+        offset = y * size * 3
+        r_row = linear[offset:offset + size * 3:3]
+        g_row = linear[offset + 1:offset + size * 3:3]
+        b_row = linear[offset + 2:offset + size * 3:3]
+        rows.append([
+            (sum(map(float.__mul__, weights, r_row)),
+             sum(map(float.__mul__, weights, g_row)),
+             sum(map(float.__mul__, weights, b_row)))
+            for weights in cos_x
+        ])
+
+    factors = []
+    for j in range(y_components):
+        row = []
+        for i in range(x_components):
+            norm = (1 if i == 0 and j == 0 else 2) / (size * size)
+            r = g = b = 0.0
+            for y in range(size):
+                weight = cos_y[j][y]
+                sums = rows[y][i]
+                r += weight * sums[0]
+                g += weight * sums[1]
+                b += weight * sums[2]
+            row.append((r * norm, g * norm, b * norm))
+        factors.append(row)
+    return factors
+
+
+def _components_numpy(samples: Sequence[bytes], x_components: int, y_components: int) -> list:
+    """对整批采样图一次计算 BlurHash 余弦分量"""
+    import numpy as np
+
+    size = SAMPLE_SIZE
+    lut = np.asarray(_SRGB_TO_LINEAR, dtype=np.float64)
+    pixels = np.frombuffer(b''.join(samples), dtype=np.uint8).reshape(len(samples), size, size, 3)
+    linear = lut[pixels]
+
+    positions = np.arange(size)
+    cos_x = np.cos(np.pi * np.arange(x_components)[:, None] * positions[None, :] / size)
+    cos_y = np.cos(np.pi * np.arange(y_components)[:, None] * positions[None, :] / size)
+    norm = np.full((y_components, x_components), 2.0)
+    norm[0, 0] = 1.0
+
+    # (批次, 纵向分量, 横向分量, RGB)
+    factors = np.einsum('nyxc,jy,ix->njic', linear, cos_y, cos_x, optimize=True)
+    factors *= (norm / (size * size))[None, :, :, None]
+    return factors.tolist()
+
+
+def encode_blurhash(factors: List[List[Sequence[float]]]) -> str:
+    """把余弦分量编码为 BlurHash 字符串
+
+    Args:
+        factors: [纵向分量][横向分量] -> (r, g, b)
+
+    Returns:
+        str: BlurHash
+    """
+    y_components = len(factors)
+    x_components = len(factors[0])
+    dc = factors[0][0]
+    ac = [component for j, row in enumerate(factors) for i, component in enumerate(row) if i or j]
+
+    parts = [_base83((x_components - 1) + (y_components - 1) * 9, 1)]
+    if ac:
+        actual_max = max(abs(value) for component in ac for value in component)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        parts.append(_base83(quantised_max, 1))
+    else:
+        maximum = 1
+        parts.append(_base83(0, 1))
+
+    parts.append(_base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4
+    ))
+    for component in ac:
+        quantised = [
+            int(max(0, min(18, math.floor(_sign_pow(value / maximum, 0.5) * 9 + 9.5))))
+            for value in component
+        ]
+        parts.append(_base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2))
+    return ''.join(parts)
+
+
+def compute_placeholders(sources: Iterable, x_components: int = DEFAULT_X_COMPONENTS,
+                         y_components: int = DEFAULT_Y_COMPONENTS) -> List[Optional[str]]:
+    """批量计算封面的 BlurHash（模块级函数，可在子进程中执行）
+
+    Args:
+        sources: 图片路径、字节或二进制文件对象列表
+        x_components: 横向分量数 (1-9)
+        y_components: 纵向分量数 (1-9)
+
+    Returns:
+        list: 与 sources 一一对应的 BlurHash，无法解码的图片为 None
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("BlurHash 分量数必须在1到9之间")
+
+    samples = [load_sample(source) for source in sources]
+    valid = [sample for sample in samples if sample is not None]
+    if not valid:
+        return [None] * len(samples)
+
+    if is_numpy_available():
+        all_factors = iter(_components_numpy(valid, x_components, y_components))
+    else:
+        all_factors = (_components_python(sample, x_components, y_components) for sample in valid)
+
+    return [encode_blurhash(next(all_factors)) if sample is not None else None for sample in samples]
+
+
+def compute_placeholder(source, x_components: int = DEFAULT_X_COMPONENTS,
+                        y_components: int = DEFAULT_Y_COMPONENTS) -> Optional[str]:
+    """计算单张封面的 BlurHash
+
+    Args:
+        source: 图片路径、字节或二进制文件对象
+        x_components: 横向分量数
+        y_components: 纵向分量数
+
+    Returns:
+        BlurHash，无法解码时返回 None
+    """
+    return compute_placeholders([source], x_components, y_components)[0]
@@ -18,29 +18,77 @@ Usage (as module):
 
 Requirements:
   - Python 3.8+
-  - requests (install with `pip install -r requirements.txt`)
+  - requests, httpx (install with `pip install -r requirements.txt`)
 """
 
+import atexit
+import hashlib
+import io
+import os
 import sys
 import re
 import json
 import time
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from urllib.parse import urlparse
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Set, Iterable, Iterator, Callable
 
-from src.utils.config import get_frontend_thumbs_dir
+from src.utils.config import get_cover_config, get_frontend_thumbs_dir
+from src.utils.bv_utils import extract_bv_from_url
+from src.utils.bv_index import save_timeline_records
+from src.utils.json_stream import iter_json_array
+from src.downloader.cover_encoder import (
+    CoverEncoder,
+    create_cover_encoder,
+    encode_webp,
+    encode_webp_bytes,
+    is_variant_format_supported,
+    DEFAULT_WEBP_QUALITY,
+    DEFAULT_WEBP_METHOD
+)
+from src.downloader.cover_manifest import CoverManifest, load_cover_manifest
+from src.downloader.cover_placeholder import (
+    PLACEHOLDER_BATCH_SIZE,
+    compute_placeholder,
+    compute_placeholders
+)
 
 
 try:
     import requests
+    from src.crawler.utils.http_transport import HttpTransport
 except Exception:
-    print("Missing dependency: requests. Install it with:\n  pip install -r requirements.txt")
+    print("Missing dependency: requests/httpx. Install it with:\n  pip install -r requirements.txt")
     sys.exit(1)
 
 
 DELAY_SECONDS = 0.8
 
+# 同时等待编码的封面数上限，超过后暂停提交，避免原图字节在内存中堆积
+MAX_PENDING_ENCODES = 32
+
+# 超过该时长的原子写入临时文件视为崩溃残留，可以安全删除
+STALE_TEMP_SECONDS = 600
+
+# 未指定下载线程数时的连接池大小
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+DOWNLOAD_USER_AGENT = "Mozilla/5.0 (thumb-fetcher)"
+
+# 已有封面的刷新方式
+REFRESH_MODES = ('off', 'url', 'conditional')
+
+# B站图片CDN域名，这些主机支持通过 URL 的 @ 后缀参数返回缩放、转码后的图片
+BILIBILI_IMAGE_HOSTS = ('hdslb.com', 'biliimg.com')
+
+_download_transport = None
+_download_pool_size = 0
+_retired_transports = []
+_download_lock = threading.Lock()
+
 
 def get_og_image(html: str) -> Optional[str]:
     """从HTML中提取og:image URL
@@ -105,46 +153,204 @@ def extract_bvid(video_url: str) -> Optional[str]:
     Returns:
         BV号字符串，如'BV195zoB2EFY'，未找到返回None
     """
-    if not video_url:
+    return extract_bv_from_url(video_url) or None
+
+
+def build_cdn_variant_url(url: str, width: int, height: int) -> Optional[str]:
+    """构造B站图片CDN按指定尺寸裁剪缩放的 WebP 地址
+    
+    例如 https://i0.hdslb.com/bfs/archive/a.jpg
+    -> https://i0.hdslb.com/bfs/archive/a.jpg@672w_378h_1c.webp
+    
+    Args:
+        url: 原图URL
+        width: 目标宽度
+        height: 目标高度
+        
+    Returns:
+        CDN 缩放图URL，非B站图片CDN地址返回 None
+    """
+    parsed = urlparse(url)
+    host = parsed.hostname or ''
+    is_bilibili_cdn = any(host == suffix or host.endswith('.' + suffix) for suffix in BILIBILI_IMAGE_HOSTS)
+    if not is_bilibili_cdn or not parsed.path.startswith('/bfs/'):
         return None
-    m = re.search(r'(BV[0-9A-Za-z]+)', video_url)
-    if m:
-        return m.group(1)
-    return None
+    return f"{url.split('@', 1)[0]}@{width}w_{height}h_1c.webp"
+
+
+def is_webp(data: bytes) -> bool:
+    """检查字节是否为 WebP 图片
+    
+    Args:
+        data: 图片字节
+        
+    Returns:
+        是 WebP 返回 True
+    """
+    return len(data) >= 12 and data[:4] == b'RIFF' and data[8:12] == b'WEBP'
+
+
+def get_cdn_variant(enabled: Optional[bool] = None) -> Optional[Dict[str, int]]:
+    """获取CDN缩放参数
+    
+    Args:
+        enabled: 是否启用，None 表示按封面配置 cdn_resize 决定
+        
+    Returns:
+        {'width': int, 'height': int}，未启用返回 None
+    """
+    cover_config = get_cover_config()
+    if enabled is None:
+        enabled = cover_config['cdn_resize']
+    if not enabled:
+        return None
+    return {'width': cover_config['cdn_width'], 'height': cover_config['cdn_height']}
+
+
+def get_refresh_mode(mode: Optional[str] = None) -> str:
+    """获取已有封面的刷新方式
+    
+    Args:
+        mode: 刷新方式，None 表示按封面配置 refresh_mode 决定
+        
+    Returns:
+        'off'（不刷新）、'url'（cover_url 变化时重新下载）
+        或 'conditional'（另外对其余封面发送条件请求）
+    """
+    if mode is None:
+        mode = get_cover_config()['refresh_mode']
+    if mode not in REFRESH_MODES:
+        raise ValueError(f"未知的封面刷新方式: {mode}")
+    return mode
+
+
+def get_blurhash_components(enabled: Optional[bool] = None) -> Optional[tuple]:
+    """获取 BlurHash 分量数
+    
+    Args:
+        enabled: 是否启用，None 表示按封面配置 blurhash 决定
+        
+    Returns:
+        (横向分量数, 纵向分量数)，未启用返回 None
+    """
+    cover_config = get_cover_config()
+    if enabled is None:
+        enabled = cover_config['blurhash']
+    if not enabled:
+        return None
+    return (cover_config['blurhash_x_components'], cover_config['blurhash_y_components'])
 
 
-def convert_to_webp(input_path: Path, output_path: Path, quality: int = 85) -> bool:
-    """将图片转换为 WebP 格式
+def convert_to_webp(input_path: Path, output_path: Path, quality: int = DEFAULT_WEBP_QUALITY,
+                    method: int = DEFAULT_WEBP_METHOD) -> bool:
+    """将图片转换为 WebP 格式（在当前线程中编码）
     
     Args:
         input_path: 输入图片路径
         output_path: 输出 WebP 路径
         quality: 压缩质量 (0-100)
+        method: 编码方法 (0-6)
         
     Returns:
         转换成功返回 True
     """
+    return encode_webp(input_path, output_path, quality, method)
+
+
+def write_file_atomic(path: Path, data: bytes):
+    """原子写入文件：先写同目录下的隐藏临时文件，再替换目标文件
+    
+    进程中途退出时目标文件要么不存在，要么是完整的旧文件，不会留下半截图片。
+    
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
     try:
-        from PIL import Image
-        with Image.open(input_path) as img:
-            # 转换为 RGB 模式（处理 RGBA 等）
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                if img.mode in ('RGBA', 'LA'):
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img = background
-                else:
-                    img = img.convert('RGB')
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            img.save(output_path, 'WEBP', quality=quality, method=6)
-        return True
-    except Exception as e:
-        print(f"转换 WebP 失败: {e}")
-        return False
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def cleanup_stale_temp_files(thumbs_dir: Path, max_age: float = STALE_TEMP_SECONDS) -> int:
+    """删除封面目录中崩溃残留的临时文件
+    
+    包括旧版本下载流程留下的 {bvid}_temp{ext} 文件，以及超过 max_age 秒的
+    原子写入临时文件（较新的临时文件可能正被其他线程写入，不删除）。
+    
+    Args:
+        thumbs_dir: 封面保存目录
+        max_age: 原子写入临时文件的最大保留秒数
+        
+    Returns:
+        删除的文件数
+    """
+    if not thumbs_dir.exists():
+        return 0
+    
+    removed = 0
+    now = time.time()
+    with os.scandir(thumbs_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            is_legacy_temp = Path(name).stem.endswith('_temp')
+            is_atomic_temp = name.startswith('.') and name.endswith('.tmp')
+            if not (is_legacy_temp or is_atomic_temp) or not entry.is_file():
+                continue
+            try:
+                if is_atomic_temp and now - entry.stat().st_mtime < max_age:
+                    continue
+                os.unlink(entry.path)
+                removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def store_cover(fetched: Dict[str, Any], thumbs_dir: Path,
+                webp_data: Optional[bytes] = None,
+                blurhash: Optional[tuple] = None,
+                manifest: Optional[CoverManifest] = None) -> Dict[str, Any]:
+    """把内存中的封面一次性原子写入封面目录
+    
+    有 WebP 编码结果时只写入 {bvid}.webp，否则保留原图 {bvid}{ext}。
+    提供 blurhash 时顺便用内存中的图片计算占位图，不再从磁盘读取。
+    
+    Args:
+        fetched: fetch_cover 返回的结果（包含 data 和 ext）
+        thumbs_dir: 封面保存目录
+        webp_data: WebP 编码结果，None 表示不转换或编码失败
+        blurhash: BlurHash 分量数 (x, y)，None 表示不计算
+        manifest: 封面清单（可选），写入后记录文件信息和下载地址
+        
+    Returns:
+        download_cover 格式的下载结果，计算了占位图时包含 'blurhash'
+    """
+    bvid = fetched['bvid']
+    if webp_data:
+        filename, data = f"{bvid}.webp", webp_data
+    else:
+        filename, data = choose_filename(bvid, fetched['ext']), fetched['data']
+    
+    path = thumbs_dir / filename
+    write_file_atomic(path, data)
+    if manifest is not None:
+        manifest.record(bvid, filename, data, fetched.get('url'), fetched.get('source'))
+    result = {'status': 'success', 'bvid': bvid, 'filename': filename, 'cover': filename, 'path': path}
+    if blurhash:
+        placeholder = compute_placeholder(data, *blurhash)
+        if placeholder:
+            result['blurhash'] = placeholder
+    return result
 
 
 def get_existing_cover_filename(thumbs_dir: Path, bvid: str) -> Optional[str]:
@@ -177,26 +383,96 @@ def choose_filename(bvid: str, ext: str) -> str:
     return f"{bvid}{ext}"
 
 
-def download_binary(url: str, outpath: Path, quiet: bool = False) -> bool:
+def create_download_transport(max_workers: int) -> 'HttpTransport':
+    """按封面配置创建封面下载专用的HTTP传输对象
+    
+    连接池大小等于下载线程数，每个线程都能复用一个保活连接，
+    不再为每张封面重新进行 TCP/TLS 握手。
+    
+    Args:
+        max_workers: 并发下载线程数
+        
+    Returns:
+        HttpTransport: 连接池传输对象
+    """
+    cover_config = get_cover_config()
+    return HttpTransport(
+        max_connections=max_workers,
+        max_keepalive=max_workers,
+        per_host_limit=min(max_workers, cover_config['download_per_host']),
+        timeout=cover_config['download_timeout'],
+        retries=cover_config['download_retries'],
+        backoff_factor=cover_config['download_backoff'],
+        headers={"User-Agent": DOWNLOAD_USER_AGENT}
+    )
+
+
+def get_download_transport(max_workers: Optional[int] = None):
+    """获取封面下载使用的HTTP传输对象（进程内共享，线程安全）
+    
+    与爬虫接口请求使用不同的连接池，封面下载不占用接口请求的主机并发名额。
+    需要的连接池大于当前连接池时新建传输对象，旧对象继续服务已发出的请求，
+    在进程退出时关闭。
+    
+    Args:
+        max_workers: 并发下载线程数，None 表示使用当前连接池
+        
+    Returns:
+        HttpTransport: 连接池传输对象
+    """
+    global _download_transport, _download_pool_size
+    with _download_lock:
+        size = max_workers or DEFAULT_DOWNLOAD_WORKERS
+        if _download_transport is None or size > _download_pool_size:
+            if _download_transport is not None:
+                _retired_transports.append(_download_transport)
+            _download_transport = create_download_transport(size)
+            _download_pool_size = size
+        return _download_transport
+
+
+def close_download_transport():
+    """关闭封面下载使用的全部HTTP传输对象"""
+    global _download_transport, _download_pool_size
+    with _download_lock:
+        transports = _retired_transports + ([_download_transport] if _download_transport else [])
+        _retired_transports.clear()
+        _download_transport = None
+        _download_pool_size = 0
+    for transport in transports:
+        transport.close()
+
+
+atexit.register(close_download_transport)
+
+
+def _write_chunks(response, f):
+    """把响应体分块写入文件对象"""
+    for chunk in response.iter_content(chunk_size=8192):
+        if chunk:
+            f.write(chunk)
+
+
+def download_binary(url: str, outpath, quiet: bool = False) -> bool:
     """下载二进制文件
     
     Args:
         url: 下载URL
-        outpath: 保存路径
+        outpath: 保存路径，或可写入的二进制文件对象（如内存缓冲区）
         quiet: 静默模式，减少日志输出
         
     Returns:
         下载成功返回True，失败返回False
     """
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (thumb-fetcher)"}
-        with requests.get(url, headers=headers, stream=True, timeout=20) as r:
+        with get_download_transport().get(url) as r:
             r.raise_for_status()
-            outpath.parent.mkdir(parents=True, exist_ok=True)
-            with outpath.open("wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            if hasattr(outpath, 'write'):
+                _write_chunks(r, outpath)
+            else:
+                outpath.parent.mkdir(parents=True, exist_ok=True)
+                with outpath.open("wb") as f:
+                    _write_chunks(r, f)
         return True
     except requests.exceptions.Timeout:
         if not quiet:
@@ -216,6 +492,98 @@ def download_binary(url: str, outpath: Path, quiet: bool = False) -> bool:
         return False
 
 
+def _source_info(data: bytes, headers=None) -> Dict[str, Any]:
+    """下载内容的哈希和缓存校验头，记录到封面清单中用于之后的条件请求"""
+    info = {'source_sha256': hashlib.sha256(data).hexdigest()}
+    if headers is not None:
+        info['etag'] = headers.get('etag')
+        info['last_modified'] = headers.get('last-modified')
+    return info
+
+
+def get_source_base_url(url: Optional[str]) -> str:
+    """去掉B站图片CDN的 @ 缩放参数，得到原图地址（用于比较封面地址是否变化）
+    
+    Args:
+        url: 图片URL
+        
+    Returns:
+        原图URL，url 为空时返回空字符串
+    """
+    if not url:
+        return ''
+    return ensure_protocol(url).split('@', 1)[0]
+
+
+def is_cover_url_changed(entry: Optional[Dict[str, Any]], cover_url: Optional[str]) -> bool:
+    """判断视频元数据中的封面地址与下载已有封面时的地址是否不同
+    
+    清单中没有下载地址（旧版本下载的封面）或元数据没有封面地址时无法判断，视为未变化。
+    
+    Args:
+        entry: 封面清单中的封面信息
+        cover_url: 视频元数据中的 cover_url
+        
+    Returns:
+        地址不同返回True
+    """
+    source_url = (entry or {}).get('source_url')
+    if not source_url or not cover_url:
+        return False
+    return get_source_base_url(source_url) != get_source_base_url(cover_url)
+
+
+def revalidate_cover(bvid: str, entry: Dict[str, Any], quiet: bool = False) -> Dict[str, Any]:
+    """对已有封面的下载地址发送条件请求，判断封面内容是否变化
+    
+    带上清单中记录的 ETag（If-None-Match）和 Last-Modified（If-Modified-Since），
+    服务器返回 304 时没有响应体；返回 200 时比较内容哈希，
+    与上次下载的内容相同也视为未变化，只更新缓存校验头。
+    清单中没有上次下载内容的哈希时与封面文件的哈希比较。
+    
+    Args:
+        bvid: BV号
+        entry: 封面清单中的封面信息（需包含 source_url）
+        quiet: 静默模式
+        
+    Returns:
+        未变化时 status 为 'unchanged' 并包含 'source'（要更新的下载信息）；
+        变化时与 fetch_cover 的下载结果相同（status 为 'fetched'，可直接保存）；
+        请求失败时 status 为 'failed'
+    """
+    url = entry['source_url']
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    
+    try:
+        with get_download_transport().get(url, headers=headers) as r:
+            if r.status_code == 304:
+                return {'status': 'unchanged', 'bvid': bvid, 'source': {
+                    'etag': r.headers.get('etag') or entry.get('etag'),
+                    'last_modified': r.headers.get('last-modified') or entry.get('last_modified')
+                }}
+            r.raise_for_status()
+            data = r.content
+            source = _source_info(data, r.headers)
+    except Exception as e:
+        if not quiet:
+            print(f"  [失败] 条件请求失败: {bvid}: {str(e)}")
+        return {'status': 'failed', 'bvid': bvid}
+    
+    # 清单中没有上次下载内容的哈希（旧版本下载的封面）时与封面文件本身比较，
+    # 不同（内容变化或保存时转换过格式）时重新保存一次，之后以这次的下载信息为基准
+    baseline = entry.get('source_sha256') or entry.get('sha256')
+    if not data or source['source_sha256'] == baseline:
+        return {'status': 'unchanged', 'bvid': bvid, 'source': source}
+    
+    is_cdn_variant = get_source_base_url(url) != url
+    return {'status': 'fetched', 'bvid': bvid, 'ext': sanitize_ext(url), 'data': data, 'url': url,
+            'encoded': is_cdn_variant and is_webp(data), 'source': source}
+
+
 def get_cover_filename(bvid: str, html: str) -> str:
     """根据视频信息生成封面文件名
     
@@ -233,10 +601,238 @@ def get_cover_filename(bvid: str, html: str) -> str:
     return f"{bvid}.jpg"
 
 
+def variant_filename(bvid: str, width: int, fmt: str) -> str:
+    """生成封面变体文件名
+    
+    Args:
+        bvid: 视频BV号
+        width: 变体宽度
+        fmt: 变体格式
+        
+    Returns:
+        文件名，如 'BV195zoB2EFY_320w.webp'
+    """
+    return f"{bvid}_{width}w.{fmt}"
+
+
+def get_variant_specs() -> List[tuple]:
+    """按封面配置获取需要生成的变体，跳过当前 Pillow 不支持的格式
+    
+    Returns:
+        list: (宽度, 格式) 列表，按格式、宽度排序；没有配置变体宽度时为空列表
+    """
+    cover_config = get_cover_config()
+    if not cover_config['variant_widths']:
+        return []
+    formats = []
+    for fmt in cover_config['variant_formats']:
+        if is_variant_format_supported(fmt):
+            formats.append(fmt)
+        else:
+            print(f"当前环境不支持 {fmt} 编码，跳过该格式的封面变体")
+    return [(width, fmt) for fmt in formats for width in sorted(cover_config['variant_widths'])]
+
+
+def generate_cover_variants(thumbs_dir: Path, covers: Dict[str, str], encoder: CoverEncoder,
+                            variants: List[tuple], quiet: bool = False,
+                            force: Optional[Set[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """为已有封面生成多尺寸变体（增量，已存在的变体不重新编码）
+    
+    每张封面只解码一次，缺失的全部变体在编码进程池中一次生成，结果原子写入封面目录。
+    
+    Args:
+        thumbs_dir: 封面保存目录
+        covers: BV号 -> 主封面文件名
+        encoder: 编码进程池
+        variants: (宽度, 格式) 列表
+        quiet: 静默模式
+        force: 重新生成全部变体的BV号（封面已刷新，已有变体是旧封面的）
+        
+    Returns:
+        dict: BV号 -> 变体列表 [{'file': str, 'width': int, 'format': str}]，
+        只包含全部变体都已生成的封面
+    """
+    if not variants or not thumbs_dir.exists():
+        return {}
+    
+    with os.scandir(thumbs_dir) as entries:
+        existing = {entry.name for entry in entries}
+    
+    pending = {}
+    generated = 0
+    
+    def drain(limit):
+        nonlocal generated
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                bvid = pending.pop(future)
+                try:
+                    encoded = future.result()
+                except Exception as e:
+                    if not quiet:
+                        print(f"  [错误] 生成封面变体失败: {bvid}: {str(e)}")
+                    continue
+                for (width, fmt), data in encoded.items():
+                    filename = variant_filename(bvid, width, fmt)
+                    try:
+                        write_file_atomic(thumbs_dir / filename, data)
+                    except OSError as e:
+                        if not quiet:
+                            print(f"  [错误] 保存封面变体失败: {filename}: {str(e)}")
+                        continue
+                    existing.add(filename)
+                    generated += 1
+    
+    force = force or set()
+    for bvid, cover in covers.items():
+        missing = [(width, fmt) for width, fmt in variants
+                   if bvid in force or variant_filename(bvid, width, fmt) not in existing]
+        if missing and cover in existing:
+            drain(MAX_PENDING_ENCODES - 1)
+            pending[encoder.submit_variants(thumbs_dir / cover, missing)] = bvid
+    drain(0)
+    
+    if generated and not quiet:
+        print(f"已生成 {generated} 个封面变体")
+    
+    manifest = {}
+    for bvid in covers:
+        files = [(variant_filename(bvid, width, fmt), width, fmt) for width, fmt in variants]
+        if all(filename in existing for filename, _, _ in files):
+            manifest[bvid] = [{'file': filename, 'width': width, 'format': fmt} for filename, width, fmt in files]
+    return manifest
+
+
+def generate_cover_placeholders(thumbs_dir: Path, covers: Dict[str, str], encoder: Optional[CoverEncoder],
+                                components: tuple, quiet: bool = False) -> Dict[str, str]:
+    """批量计算已有封面的 BlurHash（用于回填没有 blurhash 字段的视频）
+    
+    每 PLACEHOLDER_BATCH_SIZE 张封面作为一个任务，提供编码器时在进程池中计算。
+    
+    Args:
+        thumbs_dir: 封面保存目录
+        covers: BV号 -> 封面文件名
+        encoder: 编码进程池，None 表示在当前线程计算
+        components: BlurHash 分量数 (x, y)
+        quiet: 静默模式
+        
+    Returns:
+        dict: BV号 -> BlurHash（无法解码的封面不包含在内）
+    """
+    items = list(covers.items())
+    batches = [items[i:i + PLACEHOLDER_BATCH_SIZE] for i in range(0, len(items), PLACEHOLDER_BATCH_SIZE)]
+    
+    pending = []
+    for batch in batches:
+        sources = [thumbs_dir / filename for _, filename in batch]
+        if encoder is not None:
+            future = encoder.submit_placeholders(sources, *components)
+        else:
+            future = Future()
+            future.set_result(compute_placeholders(sources, *components))
+        pending.append((batch, future))
+    
+    placeholders = {}
+    for batch, future in pending:
+        try:
+            hashes = future.result()
+        except Exception as e:
+            if not quiet:
+                print(f"  [错误] 计算封面占位图失败: {str(e)}")
+            continue
+        for (bvid, _), placeholder in zip(batch, hashes):
+            if placeholder:
+                placeholders[bvid] = placeholder
+    
+    if placeholders and not quiet:
+        print(f"已计算 {len(placeholders)} 个封面占位图")
+    return placeholders
+
+
+def backfill_cover_placeholders(thumbs_dir: Path, covers: Dict[str, str], encoder: Optional[CoverEncoder],
+                                components: tuple, current_covers: Dict[str, str],
+                                current_placeholders: Dict[str, Optional[str]],
+                                downloaded: Optional[Set[str]] = None, known: Optional[Dict[str, str]] = None,
+                                quiet: bool = False) -> Dict[str, str]:
+    """为需要占位图的封面补算 BlurHash
+    
+    需要计算的封面：本次新下载的、videos.json 中还没有 blurhash 的，以及封面文件名已变化的；
+    known 中已算好的不再重复计算。
+    
+    Args:
+        thumbs_dir: 封面保存目录
+        covers: BV号 -> 封面文件名
+        encoder: 编码进程池，None 表示在当前线程计算
+        components: BlurHash 分量数 (x, y)
+        current_covers: videos.json 中各视频当前的 cover
+        current_placeholders: videos.json 中各视频当前的 blurhash
+        downloaded: 本次新下载（包括重新下载）的BV号
+        known: 已算好的占位图 BV号 -> BlurHash（如流水线下载阶段的结果）
+        quiet: 静默模式
+        
+    Returns:
+        dict: BV号 -> BlurHash（包括 known 中的占位图）
+    """
+    placeholders = dict(known or {})
+    downloaded = downloaded or set()
+    missing = {
+        bv: filename for bv, filename in covers.items()
+        if bv not in placeholders
+        and (bv in downloaded or not current_placeholders.get(bv) or current_covers.get(bv) != filename)
+    }
+    if missing:
+        placeholders.update(generate_cover_placeholders(thumbs_dir, missing, encoder, components, quiet))
+    return placeholders
+
+
+def revalidate_covers(bvids: List[str], manifest: CoverManifest,
+                      on_changed: Callable[[Dict[str, Any]], None],
+                      max_workers: int = DEFAULT_DOWNLOAD_WORKERS, quiet: bool = False) -> Dict[str, int]:
+    """对已有封面批量发送条件请求（conditional 刷新方式）
+    
+    请求在线程池中并发进行；确认未变化的封面只更新清单中的 ETag 等下载信息，
+    内容变化的封面交给 on_changed 保存（在调用线程中调用，可直接提交编码）。
+    请求失败的封面保持不变，下次运行时重新检查。
+    
+    Args:
+        bvids: 要检查的BV号（清单中需有下载地址）
+        manifest: 封面清单
+        on_changed: 内容变化时的回调，参数为 revalidate_cover 返回的下载结果
+        max_workers: 并发请求线程数
+        quiet: 静默模式
+        
+    Returns:
+        dict: {'unchanged': int, 'changed': int, 'errors': int}
+    """
+    counts = {'unchanged': 0, 'changed': 0, 'errors': 0}
+    if not bvids:
+        return counts
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(revalidate_cover, bv, manifest.get(bv), quiet) for bv in bvids]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if not quiet:
+                    print(f"  [错误] 任务执行失败: {str(e)}")
+                counts['errors'] += 1
+                continue
+            
+            if result['status'] == 'unchanged':
+                manifest.update(result['bvid'], result['source'])
+                counts['unchanged'] += 1
+            elif result['status'] == 'fetched':
+                counts['changed'] += 1
+                on_changed(result)
+    return counts
+
+
 def get_existing_covers(thumbs_dir: Path) -> set:
     """获取已存在的封面列表
     
-    一次性读取目录下所有图片文件名，提取BV号。
+    一次性读取目录下所有图片文件名，提取BV号（不包括 {BV号}_{宽度}w 变体文件）。
     
     Args:
         thumbs_dir: 封面保存目录
@@ -253,7 +849,7 @@ def get_existing_covers(thumbs_dir: Path) -> set:
         if img_file.is_file() and img_file.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp'):
             # 提取BV号（文件名去除扩展名）
             bvid = img_file.stem
-            if bvid and 'BV' in bvid:
+            if bvid and 'BV' in bvid and '_' not in bvid:
                 existing_covers.add(bvid)
     
     return existing_covers
@@ -292,33 +888,26 @@ def is_cover_exists(thumbs_dir: Path, bvid: str, html: str = None, existing_cove
     return False
 
 
-def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False, 
-                   existing_covers: set = None, enable_webp_conversion: bool = True) -> Dict[str, Any]:
-    """下载单个视频的封面
+def fetch_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False,
+                existing_covers: set = None, cdn_variant: Optional[Dict[str, int]] = None,
+                refresh: bool = False) -> Dict[str, Any]:
+    """把单个视频的封面下载到内存，不写入磁盘
     
-    新流程：
-    1. 从 video['bv'] 获取 BV 号（不再依赖 videoUrl）
-    2. 检查封面是否已存在
-    3. 下载原图到临时文件
-    4. 转换为 WebP 格式（可选）
-    5. 删除原图，保留 WebP
-    6. 返回实际文件名
+    提供 cdn_variant 时优先下载B站图片CDN缩放、转码好的 WebP，
+    CDN 缩放图下载失败或不是 WebP 时回退到原图。
     
     Args:
         video: 视频数据字典，优先使用 'bv' 字段
         thumbs_dir: 封面保存目录
         quiet: 静默模式，减少日志输出
-        existing_covers: 已存在的BV号集合（可选，用于内存检查）
-        enable_webp_conversion: 是否转换为 WebP 格式
+        existing_covers: 已存在的BV号集合或封面清单（可选，用于内存检查）
+        cdn_variant: CDN 缩放参数 {'width': int, 'height': int}，None 表示只下载原图
+        refresh: 封面已存在时也重新下载（封面地址已变化）
         
     Returns:
-        包含结果信息的字典: {
-            'status': 'success' | 'skipped' | 'failed',
-            'bvid': str,
-            'filename': str (实际下载的文件名),
-            'cover': str (同 filename，用于更新 videos.json),
-            'path': Path (文件路径)
-        }
+        下载成功时 status 为 'fetched'，并包含图片字节 'data'、扩展名 'ext'、
+        下载地址 'url'、是否已是 WebP 成品 'encoded' 和下载信息 'source'；
+        跳过或失败时与 download_cover 的返回格式相同
     """
     # 1. 从 bv 字段获取 BV 号（优先级最高）
     bvid = video.get('bv', '')
@@ -339,8 +928,11 @@ def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False,
         return {'status': 'failed', 'bvid': None, 'filename': None, 'cover': None, 'path': None}
     
     # 2. 检查封面是否已存在
-    if is_cover_exists(thumbs_dir, bvid, existing_covers=existing_covers):
-        existing_file = get_existing_cover_filename(thumbs_dir, bvid)
+    if not refresh and is_cover_exists(thumbs_dir, bvid, existing_covers=existing_covers):
+        if isinstance(existing_covers, CoverManifest):
+            existing_file = existing_covers.filename(bvid)
+        else:
+            existing_file = get_existing_cover_filename(thumbs_dir, bvid)
         if not quiet:
             print(f"  [跳过] 封面已存在: {bvid}")
         return {
@@ -351,7 +943,7 @@ def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False,
             'path': None
         }
     
-    # 3. 下载原图
+    # 3. 下载原图到内存
     # 优先使用 cover_url，如果没有则尝试使用 thumbnail
     cover_url = video.get('cover_url', '') or video.get('thumbnail', '')
     if not cover_url:
@@ -361,44 +953,98 @@ def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False,
     
     try:
         cover_url = ensure_protocol(cover_url)
-        ext = sanitize_ext(cover_url)
         
-        # 下载到临时文件
-        temp_filename = f"{bvid}_temp{ext}"
-        temp_path = thumbs_dir / temp_filename
+        variant_url = None
+        if cdn_variant:
+            variant_url = build_cdn_variant_url(cover_url, cdn_variant['width'], cdn_variant['height'])
+        if variant_url:
+            if not quiet:
+                print(f"  下载: {variant_url}")
+            buffer = io.BytesIO()
+            if download_binary(variant_url, buffer, True) and is_webp(buffer.getvalue()):
+                return {'status': 'fetched', 'bvid': bvid, 'ext': '.webp', 'data': buffer.getvalue(),
+                        'url': variant_url, 'encoded': True, 'source': _source_info(buffer.getvalue())}
+            if not quiet:
+                print(f"  [回退] CDN 缩放图不可用，下载原图: {bvid}")
         
         if not quiet:
             print(f"  下载: {cover_url}")
         
-        if not download_binary(cover_url, temp_path, quiet):
+        buffer = io.BytesIO()
+        if not download_binary(cover_url, buffer, quiet):
             return {'status': 'failed', 'bvid': bvid, 'filename': None, 'cover': None, 'path': None}
         
-        # 4. 转换为 WebP（如果启用）
-        if enable_webp_conversion:
-            webp_path = thumbs_dir / f"{bvid}.webp"
-            if convert_to_webp(temp_path, webp_path):
-                # 删除原图
-                temp_path.unlink()
-                actual_filename = f"{bvid}.webp"
-                actual_path = webp_path
-            else:
-                # 转换失败，保留原图
-                actual_filename = temp_filename
-                actual_path = temp_path
-        else:
-            actual_filename = temp_filename
-            actual_path = temp_path
+        return {'status': 'fetched', 'bvid': bvid, 'ext': sanitize_ext(cover_url), 'data': buffer.getvalue(),
+                'url': cover_url, 'encoded': False, 'source': _source_info(buffer.getvalue())}
         
+    except Exception as e:
         if not quiet:
-            print(f"  [成功] {actual_filename}")
+            print(f"  [错误] {str(e)}")
+        return {'status': 'failed', 'bvid': bvid, 'filename': None, 'cover': None, 'path': None}
+
+
+def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False, 
+                   existing_covers: set = None, enable_webp_conversion: bool = True,
+                   encoder: Optional[CoverEncoder] = None,
+                   cdn_variant: Optional[Dict[str, int]] = None,
+                   blurhash: Optional[tuple] = None,
+                   manifest: Optional[CoverManifest] = None) -> Dict[str, Any]:
+    """下载单个视频的封面
+    
+    新流程：
+    1. 从 video['bv'] 获取 BV 号（不再依赖 videoUrl）
+    2. 检查封面是否已存在
+    3. 下载到内存（提供 cdn_variant 时优先下载CDN缩放好的 WebP，否则下载原图）
+    4. 原图在内存中转换为 WebP 格式（可选）
+    5. 原子写入 WebP（编码失败或不转换时写入原图），不产生临时文件
+    6. 用内存中的图片计算 BlurHash 占位图（可选）
+    7. 返回实际文件名
+    
+    Args:
+        video: 视频数据字典，优先使用 'bv' 字段
+        thumbs_dir: 封面保存目录
+        quiet: 静默模式，减少日志输出
+        existing_covers: 已存在的BV号集合（可选，用于内存检查）
+        enable_webp_conversion: 是否转换为 WebP 格式
+        encoder: WebP 编码进程池（可选，未提供时在当前线程编码）
+        cdn_variant: CDN 缩放参数（可选，仅在启用 WebP 转换时使用）
+        blurhash: BlurHash 分量数 (x, y)（可选，None 表示不计算占位图）
+        manifest: 封面清单（可选），写入后记录封面信息
         
-        return {
-            'status': 'success',
-            'bvid': bvid,
-            'filename': actual_filename,
-            'cover': actual_filename,  # 用于更新 videos.json
-            'path': actual_path
+    Returns:
+        包含结果信息的字典: {
+            'status': 'success' | 'skipped' | 'failed',
+            'bvid': str,
+            'filename': str (实际下载的文件名),
+            'cover': str (同 filename，用于更新 videos.json),
+            'path': Path (文件路径),
+            'blurhash': str (可选，封面占位图)
         }
+    """
+    fetched = fetch_cover(video, thumbs_dir, quiet, existing_covers,
+                          cdn_variant if enable_webp_conversion else None)
+    if fetched['status'] != 'fetched':
+        return fetched
+    
+    bvid = fetched['bvid']
+    try:
+        # 4. 在内存中编码（CDN 已返回 WebP 时跳过），编码失败时保留原图
+        webp_data = None
+        if fetched.get('encoded'):
+            webp_data = fetched['data']
+        elif enable_webp_conversion:
+            if encoder is not None:
+                webp_data = encoder.encode_bytes(fetched['data'])
+            else:
+                webp_data = encode_webp_bytes(fetched['data'])
+        
+        # 5-6. 一次性原子写入，并计算占位图
+        result = store_cover(fetched, thumbs_dir, webp_data, blurhash, manifest)
+        
+        if not quiet:
+            print(f"  [成功] {result['filename']}")
+        
+        return result
         
     except Exception as e:
         if not quiet:
@@ -406,6 +1052,28 @@ def download_cover(video: Dict[str, Any], thumbs_dir: Path, quiet: bool = False,
         return {'status': 'failed', 'bvid': bvid, 'filename': None, 'cover': None, 'path': None}
 
 
+def iter_videos_json(videos_path: Path) -> Iterator[Dict]:
+    """逐条读取 videos.json，不把整个文件加载到内存
+    
+    兼容顶层为 {"videos": [...]} 的旧格式（旧格式整体加载）。
+    
+    Args:
+        videos_path: 文件路径
+        
+    Yields:
+        视频数据
+    """
+    with videos_path.open("r", encoding="utf-8") as f:
+        head = f.read(1024).lstrip()
+    if not head or head.startswith('['):
+        yield from iter_json_array(videos_path)
+        return
+    
+    with videos_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from (data if isinstance(data, list) else data.get("videos", []))
+
+
 def load_videos_json(videos_path: Path) -> List[Dict]:
     """加载 videos.json
     
@@ -415,41 +1083,313 @@ def load_videos_json(videos_path: Path) -> List[Dict]:
     Returns:
         视频数据列表
     """
-    with videos_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data if isinstance(data, list) else data.get("videos", [])
+    return list(iter_videos_json(videos_path))
 
 
-def save_videos_json(videos_path: Path, videos: List[Dict]) -> bool:
-    """保存 videos.json
+def save_videos_json(videos_path: Path, videos: Iterable[Dict]) -> bool:
+    """原子保存 videos.json，并同步更新旁路BV号索引
     
     Args:
         videos_path: 文件路径
-        videos: 视频数据列表
+        videos: 视频数据列表或逐条生成的迭代器
         
     Returns:
         保存成功返回 True
     """
     try:
-        with videos_path.open('w', encoding='utf-8') as f:
-            json.dump(videos, f, ensure_ascii=False, indent=2)
+        save_timeline_records(videos_path, videos)
         return True
     except Exception as e:
         print(f"保存 videos.json 失败: {e}")
         return False
 
 
+def _get_video_bvid(video: Dict) -> Optional[str]:
+    """获取视频条目的BV号，依次尝试 bv、cover 和 videoUrl 字段
+    
+    Args:
+        video: 视频数据
+        
+    Returns:
+        BV号，未找到返回None
+    """
+    bv = video.get('bv', '')
+    # 如果没有 bv 字段，尝试从 cover 提取（兼容旧数据）
+    if not bv:
+        bv = extract_bvid(video.get('cover', ''))
+    # 如果还没有，尝试从 videoUrl 提取
+    if not bv:
+        bv = extract_bvid(video.get('videoUrl', ''))
+    return bv or None
+
+
+def update_videos_cover_fields(videos_path: Path, changed_covers: Dict[str, Dict[str, Any]],
+                               quiet: bool = False) -> int:
+    """把变化的封面字段写回 videos.json（流式读取并原子写入）
+    
+    Args:
+        videos_path: videos.json 文件路径
+        changed_covers: BV号 -> 要更新的字段（cover、cover_variants、blurhash）
+        quiet: 静默模式
+        
+    Returns:
+        int: 更新的视频数（没有变化或写入失败时为 0）
+    """
+    if not changed_covers:
+        return 0
+    
+    updated = []
+    
+    def updated_videos():
+        for video in iter_videos_json(videos_path):
+            bv = _get_video_bvid(video)
+            if bv in changed_covers:
+                # 更新 cover 为实际文件名，记录可用的封面变体
+                old_cover = video.get('cover', '')
+                video.update(changed_covers[bv])
+                updated.append(bv)
+                if not quiet and 'cover' in changed_covers[bv]:
+                    print(f"  更新 cover: {old_cover} -> {video['cover']}")
+            yield video
+    
+    # 原子写入：先写临时文件再替换，读取原文件与写入同时进行
+    if not save_videos_json(videos_path, updated_videos()):
+        if not quiet:
+            print(f"更新 videos.json 失败")
+        return 0
+    if not quiet:
+        print(f"已更新 {len(updated)} 条视频的封面字段")
+    return len(updated)
+
+
+def plan_cover_downloads(videos_path: Path, manifest: CoverManifest, refresh: str) -> Dict[str, Any]:
+    """流式读取 videos.json 并预过滤，只保留需要下载的视频
+    
+    需要下载的：清单中没有的封面（不存在或已损坏），以及刷新方式不为 off 时
+    cover_url 与清单中下载地址不同的封面（封面已更换，下载失败时仍使用已有封面）；
+    conditional 刷新方式下，其余有下载地址的已有封面加入条件请求列表。
+    
+    Args:
+        videos_path: videos.json 文件路径
+        manifest: 已校验的封面清单
+        refresh: 已有封面的刷新方式（off、url、conditional）
+        
+    Returns:
+        dict: {
+            'videos': List[Dict],  # 需要下载的视频
+            'refresh_bvids': Set[str],  # 因封面更换重新下载的BV号
+            'revalidate_bvids': List[str],  # 需要发送条件请求的BV号
+            'existing_files': Dict[str, str],  # bvid -> 已有封面文件名
+            'skipped': int,  # 已存在或无法获取BV号的视频数
+            'video_count': int,
+            'current': Dict[str, Dict[str, Any]]  # 字段名 -> {bvid -> videos.json 中的当前值}
+        }
+    """
+    plan = {'videos': [], 'refresh_bvids': set(), 'revalidate_bvids': [], 'existing_files': {},
+            'skipped': 0, 'video_count': 0,
+            'current': {'cover': {}, 'cover_variants': {}, 'blurhash': {}}}
+    current = plan['current']
+    for video in iter_videos_json(videos_path):
+        plan['video_count'] += 1
+        bv = _get_video_bvid(video)
+        if not bv:
+            # 无法获取 BV 号，跳过
+            plan['skipped'] += 1
+            continue
+        
+        current['cover'][bv] = video.get('cover', '')
+        current['cover_variants'][bv] = video.get('cover_variants')
+        current['blurhash'][bv] = video.get('blurhash')
+        if bv not in manifest:
+            plan['videos'].append(video)
+        elif refresh != 'off' and bv not in plan['refresh_bvids'] and is_cover_url_changed(
+                manifest.get(bv), video.get('cover_url', '') or video.get('thumbnail', '')):
+            # 封面已更换：重新下载（下载失败时仍使用已有封面）
+            plan['videos'].append(video)
+            plan['refresh_bvids'].add(bv)
+            plan['existing_files'][bv] = manifest.filename(bv)
+        else:
+            if refresh == 'conditional' and (manifest.get(bv) or {}).get('source_url'):
+                plan['revalidate_bvids'].append(bv)
+            # 已存在，记录到结果中
+            plan['skipped'] += 1
+            existing_file = manifest.filename(bv)
+            if existing_file:
+                plan['existing_files'][bv] = existing_file
+    return plan
+
+
+def fetch_and_store_covers(videos: List[Dict], thumbs_dir: Path, manifest: CoverManifest,
+                           results: Dict[str, Any], refresh_bvids: Set[str], revalidate_bvids: List[str],
+                           encoder: Optional[CoverEncoder], enable_webp_conversion: bool = True,
+                           cdn_variant: Optional[Dict[str, int]] = None,
+                           max_workers: int = DEFAULT_DOWNLOAD_WORKERS, quiet: bool = False) -> Set[str]:
+    """下载并保存封面，conditional 刷新方式下随后对已有封面发送条件请求
+    
+    下载阶段（线程池，网络 I/O）与编码阶段（进程池，CPU）分离：下载线程只把原图读入内存，
+    编码不占用下载线程，也不争用 GIL；每张封面只在编码完成后写入一次磁盘，
+    最多 MAX_PENDING_ENCODES 张原图等待编码。CDN 已编码的 WebP 直接保存。
+    
+    Args:
+        videos: 需要下载的视频
+        thumbs_dir: 封面保存目录
+        manifest: 封面清单
+        results: download_all_covers 的结果字典，就地更新计数和 downloaded_files
+        refresh_bvids: 因封面更换重新下载的BV号，条件请求发现变化的封面会加入其中
+        revalidate_bvids: 需要发送条件请求的BV号
+        encoder: WebP 编码进程池（启用 WebP 转换时必须提供）
+        enable_webp_conversion: 是否转换为 WebP 格式
+        cdn_variant: CDN 缩放尺寸，None 表示下载原图
+        max_workers: 并发下载线程数
+        quiet: 静默模式
+        
+    Returns:
+        set: 本次新下载（包括重新下载）并保存成功的BV号
+    """
+    downloaded_now = set()
+    encode_futures = {}
+    
+    def record(result):
+        bvid = result['bvid']
+        filename = result.get('cover') or result.get('filename')
+        
+        if result['status'] == 'success':
+            results['success'] += 1
+            if bvid and filename:
+                results['downloaded_files'][bvid] = filename
+                downloaded_now.add(bvid)
+            if bvid in refresh_bvids:
+                results['refreshed'] += 1
+        elif result['status'] == 'skipped':
+            results['skipped'] += 1
+            if bvid and filename:
+                results['downloaded_files'][bvid] = filename
+        else:
+            results['failed'] += 1
+    
+    def store(fetched, webp_data=None):
+        try:
+            record(store_cover(fetched, thumbs_dir, webp_data, manifest=manifest))
+        except Exception as e:
+            if not quiet:
+                print(f"  [错误] 保存封面失败: {str(e)}")
+            results['failed'] += 1
+    
+    def drain(limit):
+        # 等待编码完成，直到待编码数量不超过 limit
+        while len(encode_futures) > limit:
+            done, _ = wait(encode_futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                fetched = encode_futures.pop(future)
+                try:
+                    webp_data = future.result()
+                except Exception as e:
+                    if not quiet:
+                        print(f"  [错误] WebP 编码失败: {str(e)}")
+                    webp_data = None
+                store(fetched, webp_data)
+    
+    def process(result):
+        # 下载成功的封面提交编码（CDN 已编码的直接保存），其余只记录结果
+        if result['status'] != 'fetched':
+            record(result)
+        elif result.get('encoded'):
+            store(result, result['data'])
+        elif enable_webp_conversion:
+            drain(MAX_PENDING_ENCODES - 1)
+            encode_futures[encoder.submit_bytes(result['data'])] = result
+        else:
+            store(result)
+    
+    def process_changed(result):
+        # 封面内容已变化：按新下载的封面保存（之前已计入跳过）
+        results['skipped'] -= 1
+        refresh_bvids.add(result['bvid'])
+        process(result)
+    
+    get_download_transport(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 提交下载任务（只下载原图到内存，不在下载线程中编码）
+        futures = [
+            executor.submit(fetch_cover, video, thumbs_dir, quiet, manifest, cdn_variant,
+                            _get_video_bvid(video) in refresh_bvids)
+            for video in videos
+        ]
+        
+        # 收集下载结果，成功的提交编码
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if not quiet:
+                    print(f"  [错误] 任务执行失败: {str(e)}")
+                results['failed'] += 1
+                continue
+            process(result)
+    
+    # 条件请求：未变化的已有封面只更新清单中的 ETag 等信息，变化的封面重新保存
+    revalidated = revalidate_covers(revalidate_bvids, manifest, process_changed, max_workers, quiet)
+    results['revalidated'] += revalidated['unchanged']
+    results['failed'] += revalidated['errors']
+    
+    # 收集剩余的编码结果
+    drain(0)
+    return downloaded_now
+
+
+def collect_cover_field_changes(downloaded_files: Dict[str, str],
+                                variant_manifest: Dict[str, List[Dict[str, Any]]],
+                                placeholders: Dict[str, str],
+                                current: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """对比 videos.json 中的当前值，找出需要写回的封面字段
+    
+    Args:
+        downloaded_files: BV号 -> 封面文件名
+        variant_manifest: BV号 -> 封面变体列表
+        placeholders: BV号 -> BlurHash
+        current: 字段名 -> {BV号 -> videos.json 中的当前值}（plan_cover_downloads 的 current）
+        
+    Returns:
+        dict: BV号 -> 有变化的字段（没有新值的字段保持不变）
+    """
+    changed_covers = {}
+    for bv, filename in downloaded_files.items():
+        fields = {'cover': filename, 'cover_variants': variant_manifest.get(bv),
+                  'blurhash': placeholders.get(bv)}
+        changes = {field: value for field, value in fields.items()
+                   if value is not None and current[field].get(bv) != value}
+        if changes:
+            changed_covers[bv] = changes
+    return changed_covers
+
+
 def download_all_covers(videos_path: Path, thumbs_dir: Path = None, quiet: bool = False,
                        max_workers: int = 4, update_videos_json: bool = True,
-                       enable_webp_conversion: bool = True) -> Dict[str, Any]:
+                       enable_webp_conversion: bool = True,
+                       encoder: Optional[CoverEncoder] = None,
+                       cdn_resize: Optional[bool] = None,
+                       variants: Optional[List[tuple]] = None,
+                       blurhash: Optional[bool] = None,
+                       placeholders: Optional[Dict[str, str]] = None,
+                       manifest: Optional[CoverManifest] = None,
+                       refresh: Optional[str] = None) -> Dict[str, Any]:
     """下载所有视频封面
 
     新流程：
-    1. 加载 videos.json
-    2. 预过滤：只保留需要下载的视频（封面不存在或为空）
-    3. 并发下载封面
-    4. 更新 videos.json 中的 cover 字段为实际文件名
-    5. 保存更新后的 videos.json
+    1. 流式读取 videos.json
+    2. 预过滤（plan_cover_downloads）：按封面清单判断，只保留需要下载的视频（封面不存在或已损坏），
+       以及 cover_url 与清单中下载地址不同的视频（封面已更换）
+    3. 并发下载封面到内存（fetch_and_store_covers，线程池）：启用CDN缩放时优先下载CDN缩放好的 WebP 直接保存，
+       否则下载原图并提交 WebP 编码（进程池），编码结果一次性原子写入封面目录；
+       conditional 刷新方式下随后对其余已有封面发送条件请求（revalidate_covers），
+       只有内容变化的封面重新保存
+    4. 为所有封面增量生成多尺寸变体（generate_cover_variants，进程池，已存在的变体不重新编码，刷新的封面重新生成）
+    5. 为新下载和缺少 blurhash 字段的封面批量计算 BlurHash 占位图（backfill_cover_placeholders，进程池）
+    6. 对比当前字段（collect_cover_field_changes），流式更新 cover、cover_variants 和 blurhash 字段
+       并原子写入 videos.json（update_videos_cover_fields，均无变化时不重写）
+
+    内存中只保留需要下载的视频、各视频当前的 cover、cover_variants 和 blurhash，
+    以及最多 MAX_PENDING_ENCODES 张等待编码的原图。
 
     Args:
         videos_path: videos.json 文件路径
@@ -458,147 +1398,120 @@ def download_all_covers(videos_path: Path, thumbs_dir: Path = None, quiet: bool
         max_workers: 并发下载线程数
         update_videos_json: 是否更新 videos.json 中的 cover 字段
         enable_webp_conversion: 是否转换为 WebP 格式
+        encoder: WebP 编码进程池（可选，未提供时按配置创建并在结束时关闭）
+        cdn_resize: 是否优先下载CDN缩放图，None 表示按封面配置 cdn_resize 决定
+        variants: 封面变体 (宽度, 格式) 列表，None 表示按封面配置生成，
+            空列表表示不生成（仅在启用 WebP 转换时生成）
+        blurhash: 是否计算封面占位图，None 表示按封面配置 blurhash 决定
+        placeholders: 已算好的占位图 BV号 -> BlurHash（如流水线下载阶段的结果），不再重复计算
+        manifest: 已校验的封面清单（可选，多个流水线共用），未提供时加载并校验封面目录的清单
+        refresh: 已有封面的刷新方式（off、url、conditional），None 表示按封面配置 refresh_mode 决定
 
     Returns:
         包含结果信息的字典: {
             'success': int,
             'failed': int,
             'skipped': int,
-            'downloaded_files': Dict[str, str]  # bvid -> filename
+            'refreshed': int,  # 因封面更换重新下载的封面数（计入 success）
+            'revalidated': int,  # 条件请求确认未变化的封面数
+            'downloaded_files': Dict[str, str],  # bvid -> filename
+            'placeholders': Dict[str, str]  # bvid -> 本次计算的 BlurHash
         }
     """
     # 使用默认的前端路径
     if thumbs_dir is None:
         thumbs_dir = get_frontend_thumbs_dir()
     
+    results = {'success': 0, 'failed': 0, 'skipped': 0, 'refreshed': 0, 'revalidated': 0,
+               'downloaded_files': {}, 'placeholders': {}}
     if not videos_path.exists():
         if not quiet:
             print(f"[错误] videos.json不存在: {videos_path}")
-        return {'success': 0, 'failed': 0, 'skipped': 0, 'downloaded_files': {}}
-    
-    # 1. 加载 videos.json
-    videos = load_videos_json(videos_path)
-    
-    if not quiet:
-        print(f"找到 {len(videos)} 个视频")
-        print(f"封面保存目录: {thumbs_dir}")
-        print(f"并发下载线程数: {max_workers}")
+        return results
     
     thumbs_dir.mkdir(parents=True, exist_ok=True)
+    cleanup_stale_temp_files(thumbs_dir)
     
-    # 2. 批量预加载已存在的封面
-    existing_covers = get_existing_covers(thumbs_dir)
-    if not quiet:
-        print(f"已存在 {len(existing_covers)} 个封面")
+    # 已存在的封面以清单为准：只重新解码有变化的文件，损坏的封面从清单中移除后重新下载
+    if manifest is None:
+        manifest = load_cover_manifest(thumbs_dir, quiet=quiet)
     
-    results = {'success': 0, 'failed': 0, 'skipped': 0, 'downloaded_files': {}}
+    blurhash_components = get_blurhash_components(blurhash)
     
-    # 3. 预过滤：只保留需要下载的视频
-    videos_need_download = []
-    for video in videos:
-        bv = video.get('bv', '')
-        # 如果没有 bv 字段，尝试从 cover 提取（兼容旧数据）
-        if not bv:
-            bv = extract_bvid(video.get('cover', ''))
-        # 如果还没有，尝试从 videoUrl 提取
-        if not bv:
-            bv = extract_bvid(video.get('videoUrl', ''))
-        
-        # 检查是否需要下载
-        if bv:
-            if bv not in existing_covers:
-                videos_need_download.append(video)
-            else:
-                # 已存在，记录到结果中
-                results['skipped'] += 1
-                existing_file = get_existing_cover_filename(thumbs_dir, bv)
-                if existing_file:
-                    results['downloaded_files'][bv] = existing_file
-        else:
-            # 无法获取 BV 号，跳过
-            results['skipped'] += 1
+    # 1-2. 流式读取并预过滤：只保留需要下载的视频
+    plan = plan_cover_downloads(videos_path, manifest, get_refresh_mode(refresh))
+    videos_need_download = plan['videos']
+    refresh_bvids = plan['refresh_bvids']
+    revalidate_bvids = plan['revalidate_bvids']
+    current = plan['current']
+    results['skipped'] = plan['skipped']
+    results['downloaded_files'].update(plan['existing_files'])
     
     if not quiet:
+        print(f"找到 {plan['video_count']} 个视频")
+        print(f"封面保存目录: {thumbs_dir}")
+        print(f"并发下载线程数: {max_workers}")
+        print(f"已存在 {len(manifest)} 个封面")
         print(f"需要下载 {len(videos_need_download)} 个封面")
-    
-    if not videos_need_download:
-        if not quiet:
+        if refresh_bvids:
+            print(f"其中 {len(refresh_bvids)} 个封面地址已变化，重新下载")
+        if revalidate_bvids:
+            print(f"条件请求检查 {len(revalidate_bvids)} 个已有封面是否变化")
+        if not videos_need_download:
+            # 仍然需要更新 videos.json 中已存在封面的文件名
             print("没有需要下载的封面")
-        # 仍然需要更新 videos.json 中已存在封面的文件名
-        # 继续执行更新逻辑，跳过下载部分
-    
-    # 4. 并发下载（只在有需要下载的视频时执行）
-    if videos_need_download:
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交下载任务
-            future_to_video = {}
-            for video in videos_need_download:
-                future = executor.submit(
-                    download_cover,
-                    video,
-                    thumbs_dir,
-                    quiet,
-                    existing_covers,
-                    enable_webp_conversion
-                )
-                future_to_video[future] = video
-            
-            # 收集结果
-            for future in as_completed(future_to_video):
-                try:
-                    result = future.result()
-                    bvid = result['bvid']
-                    filename = result.get('cover') or result.get('filename')
-                    
-                    if result['status'] == 'success':
-                        results['success'] += 1
-                        if bvid and filename:
-                            results['downloaded_files'][bvid] = filename
-                            # 将新下载的封面添加到集合中
-                            existing_covers.add(bvid)
-                    elif result['status'] == 'skipped':
-                        results['skipped'] += 1
-                        if bvid and filename:
-                            results['downloaded_files'][bvid] = filename
-                    else:
-                        results['failed'] += 1
-                except Exception as e:
-                    if not quiet:
-                        print(f"  [错误] 任务执行失败: {str(e)}")
-                    results['failed'] += 1
-    
-    # 5. 更新 videos.json 中的 cover 字段
-    if update_videos_json and results['downloaded_files']:
-        updated_count = 0
-        for video in videos:
-            bv = video.get('bv', '')
-            if not bv:
-                bv = extract_bvid(video.get('cover', ''))
-            if not bv:
-                bv = extract_bvid(video.get('videoUrl', ''))
-            
-            if bv in results['downloaded_files']:
-                # 更新 cover 为实际文件名
-                old_cover = video.get('cover', '')
-                new_cover = results['downloaded_files'][bv]
-                video['cover'] = new_cover
-                updated_count += 1
-                
-                if not quiet:
-                    print(f"  更新 cover: {old_cover} -> {new_cover}")
+    
+    if variants is None:
+        variants = get_variant_specs() if enable_webp_conversion else []
+    elif not enable_webp_conversion:
+        variants = []
+    owns_encoder = enable_webp_conversion and encoder is None and bool(
+        videos_need_download or revalidate_bvids or variants or blurhash_components
+    )
+    if owns_encoder:
+        encoder = create_cover_encoder()
+    downloaded_now = set()
+    variant_manifest = {}
+    
+    try:
+        # 3. 下载（线程池）与编码（进程池）分离，随后发送条件请求
+        if videos_need_download or revalidate_bvids:
+            cdn_variant = get_cdn_variant(cdn_resize) if enable_webp_conversion else None
+            downloaded_now = fetch_and_store_covers(
+                videos_need_download, thumbs_dir, manifest, results, refresh_bvids, revalidate_bvids,
+                encoder, enable_webp_conversion, cdn_variant, max_workers, quiet
+            )
         
-        # 保存更新后的 videos.json
-        if save_videos_json(videos_path, videos):
-            if not quiet:
-                print(f"已更新 {updated_count} 条视频的 cover 字段")
-        else:
-            if not quiet:
-                print(f"更新 videos.json 失败")
+        # 4. 为所有封面增量生成多尺寸变体
+        if variants:
+            variant_manifest = generate_cover_variants(
+                thumbs_dir, results['downloaded_files'], encoder, variants, quiet,
+                force=refresh_bvids & downloaded_now
+            )
+        
+        # 5. 新下载的封面和缺少占位图的已有封面批量计算 BlurHash
+        if blurhash_components:
+            results['placeholders'] = backfill_cover_placeholders(
+                thumbs_dir, results['downloaded_files'], encoder, blurhash_components,
+                current['cover'], current['blurhash'], downloaded_now, placeholders, quiet
+            )
+    finally:
+        if owns_encoder:
+            encoder.shutdown()
+    
+    manifest.save()
+    
+    # 6. 更新 videos.json 中的 cover、cover_variants 和 blurhash 字段（只在有变化时重写文件）
+    if update_videos_json:
+        changed_covers = collect_cover_field_changes(
+            results['downloaded_files'], variant_manifest, results['placeholders'], current
+        )
+        update_videos_cover_fields(videos_path, changed_covers, quiet)
     
     if not quiet:
         print(f"\n下载完成: 成功 {results['success']}, 失败 {results['failed']}, 跳过 {results['skipped']}")
+        if results['refreshed'] or results['revalidated']:
+            print(f"封面刷新: 重新下载 {results['refreshed']}, 确认未变化 {results['revalidated']}")
     
     return results
 
@@ -612,10 +1525,13 @@ def main():
     parser.add_argument('thumbs_dir', type=Path, nargs='?', default=None, help='封面保存目录（默认使用配置文件中的前端路径）')
     parser.add_argument('--quiet', '-q', action='store_true', help='静默模式，减少输出')
     parser.add_argument('--max-workers', type=int, default=4, help='并发下载线程数（默认：4）')
+    parser.add_argument('--refresh', choices=REFRESH_MODES, default=None,
+                        help='已有封面的刷新方式（默认使用配置文件中的 refresh_mode）')
     
     args = parser.parse_args()
     
-    results = download_all_covers(args.videos_json, args.thumbs_dir, args.quiet, args.max_workers)
+    results = download_all_covers(args.videos_json, args.thumbs_dir, args.quiet, args.max_workers,
+                                  refresh=args.refresh)
     
     sys.exit(0 if results['success'] > 0 else 1)
 
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+流水线更新模块
+"""
+
+from .update_pipeline import (
+    CoverDownloadStage,
+    DataTypePipeline,
+    run_pipelines
+)
+
+__all__ = [
+    'CoverDownloadStage',
+    'DataTypePipeline',
+    'run_pipelines'
+]
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+流水线更新模块
+
+每个数据类型在独立线程中执行 收藏夹 -> 元数据 -> 时间线 -> 封面 -> 前端 的更新流程，
+元数据与封面下载之间通过有界队列衔接：每个视频的元数据获取后立即进入封面下载，
+不必等待整个收藏夹爬取完成。总耗时接近最慢阶段的耗时，而不是各阶段耗时之和。
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.crawler.utils.crawl_journal import JOURNAL_FILENAME, CrawlJournal
+from src.downloader.cover_atlas import generate_cover_atlases
+from src.downloader.download_thumbs import (
+    MAX_PENDING_ENCODES,
+    cleanup_stale_temp_files,
+    download_cover,
+    download_all_covers,
+    fetch_cover,
+    get_cdn_variant,
+    get_blurhash_components,
+    get_download_transport,
+    get_existing_covers,
+    store_cover
+)
+from src.updater.frontend_updater import update_frontend_files
+from src.utils.path_manager import ensure_directories, get_data_paths
+
+
+# 队列结束标记
+_STOP = object()
+
+
+class CoverDownloadStage:
+    """封面下载阶段
+
+    元数据通过 submit() 进入有界队列，由若干工作线程并发下载封面。
+    队列满时 submit() 阻塞，使元数据爬取速度不会超过封面下载太多（背压）。
+    提供编码器时，工作线程只把原图下载到内存，WebP 编码交给编码进程池，
+    编码完成后一次性写入封面目录；等待编码的原图最多 MAX_PENDING_ENCODES 张。
+    启用CDN缩放时优先下载CDN缩放好的 WebP，直接写入，不经过编码。
+    在下载线程中写入的封面顺便用内存中的图片计算 BlurHash 占位图，
+    其余封面的占位图由最后的 download_all_covers 批量计算。
+    """
+
+    def __init__(self, thumbs_dir: Path, workers: int = 4, queue_size: int = 32,
+                 existing_covers: Optional[set] = None, enable_webp_conversion: bool = True,
+                 name: str = 'covers', encoder=None, cdn_resize: Optional[bool] = None,
+                 blurhash: Optional[bool] = None, manifest=None):
+        """初始化封面下载阶段
+
+        Args:
+            thumbs_dir: 封面保存目录
+            workers: 下载工作线程数
+            queue_size: 待下载队列容量
+            existing_covers: 已存在封面的BV号集合，多个数据类型可共用
+            enable_webp_conversion: 是否转换为 WebP 格式
+            name: 线程名前缀
+            encoder: WebP 编码进程池（CoverEncoder），None 时在下载线程中编码
+            cdn_resize: 是否优先下载CDN缩放图，None 表示按封面配置决定
+            blurhash: 是否计算封面占位图，None 表示按封面配置决定
+            manifest: 封面清单（CoverManifest），写入的封面记录到清单中
+        """
+        if workers < 1:
+            raise ValueError("workers必须大于等于1")
+        if queue_size < 1:
+            raise ValueError("queue_size必须大于等于1")
+
+        self.thumbs_dir = Path(thumbs_dir)
+        self.workers = workers
+        self.enable_webp_conversion = enable_webp_conversion
+        self.encoder = encoder
+        self.cdn_variant = get_cdn_variant(cdn_resize) if enable_webp_conversion else None
+        self.blurhash = get_blurhash_components(blurhash)
+        self.manifest = manifest
+        self.existing_covers = existing_covers if existing_covers is not None else get_existing_covers(self.thumbs_dir)
+        self.results = {'success': 0, 'failed': 0, 'skipped': 0, 'downloaded_files': {}, 'placeholders': {}}
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._closed = False
+        self._encode_slots = threading.BoundedSemaphore(MAX_PENDING_ENCODES)
+        self._pending_encodes = 0
+        self._encodes_done = threading.Condition(self._lock)
+
+    def start(self):
+        """启动下载工作线程"""
+        self.thumbs_dir.mkdir(parents=True, exist_ok=True)
+        cleanup_stale_temp_files(self.thumbs_dir)
+        get_download_transport(self.workers)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def submit(self, metadata: Dict[str, Any]):
+        """提交一个视频的元数据，封面已存在时直接跳过
+
+        Args:
+            metadata: 视频元数据（爬虫输出格式，包含 bv 和 cover_url/thumbnail）
+        """
+        bv = metadata.get('bv', '')
+        if bv and bv in self.existing_covers:
+            with self._lock:
+                self.results['skipped'] += 1
+            return
+        self._queue.put({
+            'bv': bv,
+            'cover_url': metadata.get('cover_url', ''),
+            'thumbnail': metadata.get('thumbnail', '')
+        })
+
+    def _worker(self):
+        """下载工作线程：从队列中取出视频并下载封面，直到收到结束标记"""
+        encode_separately = self.enable_webp_conversion and self.encoder is not None
+        while True:
+            video = self._queue.get()
+            if video is _STOP:
+                return
+            try:
+                if encode_separately:
+                    result = fetch_cover(video, self.thumbs_dir, True, self.existing_covers, self.cdn_variant)
+                    if result.get('status') == 'fetched' and result.get('encoded'):
+                        result = store_cover(result, self.thumbs_dir, result['data'], self.blurhash,
+                                             self.manifest)
+                    elif result.get('status') == 'fetched':
+                        self._submit_encode(result)
+                        continue
+                else:
+                    result = download_cover(
+                        video, self.thumbs_dir, True, self.existing_covers, self.enable_webp_conversion,
+                        cdn_variant=self.cdn_variant, blurhash=self.blurhash, manifest=self.manifest
+                    )
+            except Exception as e:
+                print(f"  [错误] 封面下载任务执行失败: {e}")
+                result = {'status': 'failed', 'bvid': video.get('bv')}
+            self._record(result)
+
+    def _submit_encode(self, fetched: Dict[str, Any]):
+        """提交编码，待编码数量达到上限时阻塞，编码完成后由回调写入封面"""
+        self._encode_slots.acquire()
+        with self._lock:
+            self._pending_encodes += 1
+        try:
+            future = self.encoder.submit_bytes(fetched['data'])
+        except Exception as e:
+            print(f"  [错误] 提交 WebP 编码失败: {e}")
+            future = None
+        if future is None:
+            self._encode_done(None, fetched)
+        else:
+            future.add_done_callback(lambda f: self._encode_done(f, fetched))
+
+    def _encode_done(self, future, fetched: Dict[str, Any]):
+        """编码完成回调：写入 WebP（编码失败时写入原图）并记录结果"""
+        webp_data = None
+        if future is not None:
+            try:
+                webp_data = future.result()
+            except Exception as e:
+                print(f"  [错误] WebP 编码失败: {e}")
+        try:
+            # 回调在进程池的管理线程中执行，不在这里计算占位图，以免阻塞其他编码结果
+            result = store_cover(fetched, self.thumbs_dir, webp_data, manifest=self.manifest)
+        except Exception as e:
+            print(f"  [错误] 保存封面失败: {e}")
+            result = {'status': 'failed', 'bvid': fetched['bvid']}
+        finally:
+            fetched.pop('data', None)
+            self._encode_slots.release()
+        self._record(result)
+        with self._lock:
+            self._pending_encodes -= 1
+            self._encodes_done.notify_all()
+
+    def _record(self, result: Dict[str, Any]):
+        """记录单个封面的处理结果"""
+        with self._lock:
+            status = result.get('status')
+            if status in ('success', 'skipped'):
+                self.results[status] += 1
+                filename = result.get('cover') or result.get('filename')
+                if result.get('bvid') and filename:
+                    self.results['downloaded_files'][result['bvid']] = filename
+                    self.existing_covers.add(result['bvid'])
+                if result.get('bvid') and result.get('blurhash'):
+                    self.results['placeholders'][result['bvid']] = result['blurhash']
+            else:
+                self.results['failed'] += 1
+
+    def close(self):
+        """通知工作线程在队列中的任务完成后退出（不等待）"""
+        if not self._closed:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(_STOP)
+
+    def join(self) -> Dict[str, Any]:
+        """等待所有下载完成
+
+        Returns:
+            dict: 下载结果统计
+        """
+        self.close()
+        for thread in self._threads:
+            thread.join()
+
+        with self._lock:
+            while self._pending_encodes:
+                self._encodes_done.wait()
+        return self.results
+
+
+class DataTypePipeline:
+    """单个数据类型的更新流水线"""
+
+    def __init__(self, data_type: str, favorites_crawler, video_crawler, timeline_generator,
+                 thumbs_dir: Path, full_crawl: bool = False, cover_workers: int = 4,
+                 queue_size: int = 32, existing_covers: Optional[set] = None,
+                 backend_data_dir: str = './data', encoder=None, manifest=None,
+                 journal_flush_interval: Optional[float] = None, dead_letter_limit: Optional[int] = None):
+        """初始化数据类型流水线
+
+        Args:
+            data_type: 数据类型
+            favorites_crawler: 收藏夹爬虫（可在多个流水线间共用）
+            video_crawler: 视频爬虫（每个流水线独立实例，可共用频率限制器）
+            timeline_generator: 时间线生成器
+            thumbs_dir: 封面保存目录
+            full_crawl: 是否全量爬取
+            cover_workers: 封面下载工作线程数
+            queue_size: 元数据到封面下载的队列容量
+            existing_covers: 已存在封面的BV号集合
+            backend_data_dir: 后端数据目录（前端更新使用）
+            encoder: WebP 编码进程池（CoverEncoder），可在多个流水线间共用
+            manifest: 已校验的封面清单（CoverManifest），可在多个流水线间共用
+            journal_flush_interval: 爬取日志的写入间隔（秒），None 表示不记录爬取日志；
+                记录时上次中断的爬取从日志继续，时间线保存成功后删除日志
+            dead_letter_limit: 主爬取之后重试队列中最多重试的视频数，None 表示不执行重试阶段
+        """
+        self.data_type = data_type
+        self.favorites_crawler = favorites_crawler
+        self.video_crawler = video_crawler
+        self.timeline_generator = timeline_generator
+        self.thumbs_dir = Path(thumbs_dir)
+        self.full_crawl = full_crawl
+        self.cover_workers = cover_workers
+        self.queue_size = queue_size
+        self.existing_covers = existing_covers
+        self.backend_data_dir = backend_data_dir
+        self.encoder = encoder
+        self.manifest = manifest
+        self.journal_flush_interval = journal_flush_interval
+        self.dead_letter_limit = dead_letter_limit
+        self.timings = {}
+
+    def _log(self, message: str):
+        print(f"[{self.data_type}] {message}")
+
+    def _timed(self, stage: str, start: float):
+        self.timings[stage] = round(time.time() - start, 2)
+
+    def run(self) -> Dict[str, Any]:
+        """运行流水线
+
+        Returns:
+            dict: 各阶段结果和耗时
+        """
+        result = {'data_type': self.data_type, 'success': False, 'timings': self.timings}
+
+        # 1. 收藏夹
+        start = time.time()
+        bv_list = self.favorites_crawler.crawl_favorites_to_memory(self.data_type)
+        self._timed('favorites', start)
+        if not bv_list:
+            result['message'] = f"没有找到 {self.data_type} 的BV号"
+            self._log(result['message'])
+            return result
+
+        ensure_directories(self.data_type)
+        timeline_file = get_data_paths(self.data_type).get('TIMELINE_FILE')
+
+        # 2. 元数据爬取，每个视频的元数据立即进入封面下载队列
+        covers = CoverDownloadStage(
+            self.thumbs_dir,
+            workers=self.cover_workers,
+            queue_size=self.queue_size,
+            existing_covers=self.existing_covers,
+            name=f"{self.data_type}-covers",
+            encoder=self.encoder,
+            manifest=self.manifest
+        ).start()
+        journal = None
+        if self.journal_flush_interval is not None:
+            journal = CrawlJournal(timeline_file.with_name(JOURNAL_FILENAME),
+                                   flush_interval=self.journal_flush_interval)
+            if journal.load():
+                self._log(f"发现上次中断的爬取日志: {len(journal.completed)} 个视频")
+        start = time.time()
+        try:
+            videos = self.video_crawler.crawl_from_bv_list(
+                bv_list, self.data_type, self.full_crawl, on_result=covers.submit, journal=journal
+            )
+            # 重试阶段：主爬取之后以独立的请求频率预算重试之前失败的视频
+            if self.dead_letter_limit:
+                videos = videos + self.video_crawler.retry_dead_letters(
+                    bv_list, self.data_type, limit=self.dead_letter_limit, on_result=covers.submit, journal=journal
+                )
+        finally:
+            covers.close()
+            if journal is not None:
+                journal.close()
+        self._timed('metadata', start)
+
+        if not videos:
+            if journal is not None:
+                journal.discard()
+            covers.join()
+            result['success'] = True
+            result['message'] = (f"没有爬取到 {self.data_type} 的视频元数据" if self.full_crawl
+                                 else f"所有 {self.data_type} 的视频都已爬取，无需更新")
+            self._log(result['message'])
+            return result
+
+        # 3. 生成时间线（与剩余的封面下载同时进行）
+        start = time.time()
+        timeline_result = self.timeline_generator.run(videos, self.data_type)
+        self._timed('timeline', start)
+        result['timeline_result'] = timeline_result
+        self._log(f"时间线生成结果: {timeline_result}")
+        # 元数据已保存到时间线，不再需要爬取日志（失败时保留，下次运行继续）
+        if journal is not None and timeline_result.get('success'):
+            journal.discard()
+
+        # 4. 等待封面下载完成，再把实际文件名写回时间线（补下载之前失败的封面）
+        start = time.time()
+        result['cover_result'] = covers.join()
+        if not timeline_result.get('success'):
+            self._timed('covers', start)
+            result['message'] = "时间线生成失败"
+            return result
+        if timeline_file.exists():
+            download_all_covers(timeline_file, self.thumbs_dir, quiet=True,
+                                max_workers=self.cover_workers, update_videos_json=True,
+                                encoder=self.encoder,
+                                placeholders=result['cover_result'].get('placeholders'),
+                                manifest=self.manifest)
+        self._timed('covers', start)
+        cover_stats = result['cover_result']
+        self._log(f"封面下载: 成功 {cover_stats['success']}, 失败 {cover_stats['failed']}, "
+                  f"跳过 {cover_stats['skipped']}")
+
+        # 按月份增量生成封面拼图，只重建有新封面的月份
+        if timeline_file.exists():
+            start = time.time()
+            result['atlas_result'] = generate_cover_atlases(timeline_file, self.thumbs_dir, self.data_type,
+                                                            encoder=self.encoder, quiet=True,
+                                                            manifest=self.manifest)
+            self._timed('atlas', start)
+
+        # 5. 更新前端文件
+        start = time.time()
+        frontend_result = update_frontend_files(self.data_type, {'backend_data_dir': self.backend_data_dir})
+        self._timed('frontend', start)
+        result['frontend_result'] = frontend_result
+        merge_msg = frontend_result.get('merge_result', {}).get('message', '')
+        self._log(f"前端更新: {'成功' if frontend_result['success'] else '失败'} {merge_msg}")
+
+        result['success'] = frontend_result['success']
+        return result
+
+
+def run_pipelines(pipelines: List[DataTypePipeline]) -> Dict[str, Dict[str, Any]]:
+    """并行运行多个数据类型的流水线
+
+    Args:
+        pipelines: 数据类型流水线列表
+
+    Returns:
+        dict: 数据类型 -> 流水线结果
+    """
+    results = {}
+
+    def run_one(pipeline):
+        try:
+            results[pipeline.data_type] = pipeline.run()
+        except Exception as e:
+            print(f"[{pipeline.data_type}] 流水线执行失败: {e}")
+            results[pipeline.data_type] = {
+                'data_type': pipeline.data_type,
+                'success': False,
+                'message': str(e),
+                'timings': pipeline.timings
+            }
+
+    threads = [
+        threading.Thread(target=run_one, args=(pipeline,), name=f"pipeline-{pipeline.data_type}")
+        for pipeline in pipelines
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {pipeline.data_type: results[pipeline.data_type] for pipeline in pipelines}
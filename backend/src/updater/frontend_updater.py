@@ -11,39 +11,12 @@
 注意：封面图片现在直接下载到前端目录，无需复制操作。
 """
 
-import json
-import re
 from pathlib import Path
 from typing import Dict, List, Any
 
-
-def extract_bv_from_url(url: str) -> str:
-    """从视频 URL 中提取 BV 号
-    
-    Args:
-        url: 视频 URL
-        
-    Returns:
-        str: BV 号
-    """
-    match = re.search(r'(BV[0-9A-Za-z]+)', url)
-    if match:
-        return match.group(1)
-    return ''
-
-
-def extract_bv_from_cover(cover: str) -> str:
-    """从封面文件名中提取 BV 号
-    
-    Args:
-        cover: 封面文件名
-        
-    Returns:
-        str: BV 号
-    """
-    if cover.startswith('BV'):
-        return cover.split('.')[0]
-    return ''
+from src.utils.bv_utils import extract_bv_from_item, normalize_bv
+from src.utils.bv_index import BVIndex, load_bv_index, save_timeline_records
+from src.utils.json_stream import iter_json_array
 
 
 def merge_videos_json(backend_file: Path, frontend_file: Path) -> Dict[str, Any]:
@@ -59,64 +32,64 @@ def merge_videos_json(backend_file: Path, frontend_file: Path) -> Dict[str, Any]
         dict: 合并结果
     """
     try:
-        # 读取后端数据
-        with open(backend_file, 'r', encoding='utf-8') as f:
-            backend_data = json.load(f)
-        
-        if not isinstance(backend_data, list):
-            return {"success": False, "message": "后端数据格式错误"}
+        # 后端文件未变化且前端文件仍是上次合并的结果时无需重新合并
+        backend_index = load_bv_index(backend_file)
+        frontend_index = BVIndex.load(frontend_file)
+        if (backend_index is not None and frontend_index is not None
+                and frontend_index.meta.get('merged_from') == backend_index.source_hash):
+            return {
+                "success": True,
+                "merged_count": frontend_index.count,
+                "skipped": True,
+                "message": "前端文件已是最新，无需合并"
+            }
         
-        # 读取前端数据
+        # 流式读取前端数据，只保留 BV 号 -> tags 映射
+        # 前后端条目都用与索引相同的规则提取并标准化 BV 号，同一视频的键始终一致
         frontend_tags = {}
         if frontend_file.exists():
-            with open(frontend_file, 'r', encoding='utf-8') as f:
-                frontend_data = json.load(f)
-            
-            if isinstance(frontend_data, list):
-                # 提取前端数据中的 tags
-                for item in frontend_data:
+            try:
+                for item in iter_json_array(frontend_file):
                     if isinstance(item, dict):
-                        # 从 URL 或封面中提取 BV 号
-                        bv = extract_bv_from_url(item.get('videoUrl', ''))
-                        if not bv:
-                            bv = extract_bv_from_cover(item.get('cover', ''))
-                        
+                        bv = normalize_bv(extract_bv_from_item(item))
                         if bv:
                             frontend_tags[bv] = item.get('tags', [])
+            except ValueError:
+                # 前端文件格式错误时不保留 tags
+                frontend_tags = {}
         
-        # 合并数据
-        merged_data = []
-        for item in backend_data:
-            if isinstance(item, dict):
-                # 提取 BV 号
-                bv = extract_bv_from_url(item.get('videoUrl', ''))
-                if not bv:
-                    bv = extract_bv_from_cover(item.get('cover', ''))
-                
-                # 保留前端的 tags
-                if bv and bv in frontend_tags:
-                    item['tags'] = frontend_tags[bv]
-                else:
-                    item['tags'] = []
-                
-                merged_data.append(item)
+        def merged_items():
+            for item in iter_json_array(backend_file):
+                if isinstance(item, dict):
+                    bv = normalize_bv(extract_bv_from_item(item))
+                    # 保留前端的 tags
+                    item['tags'] = frontend_tags[bv] if bv and bv in frontend_tags else []
+                    yield item
         
-        # 按日期排序
-        merged_data.sort(key=lambda x: x.get('date', ''), reverse=True)
+        # 后端时间线已按日期降序时逐条流式写入，否则加载后按日期排序
+        if backend_index is not None and backend_index.dates_sorted:
+            merged_data = merged_items()
+        else:
+            merged_data = list(merged_items())
+            merged_data.sort(key=lambda x: x.get('date', ''), reverse=True)
         
-        # 重新生成 ID
-        for i, item in enumerate(merged_data):
-            item['id'] = str(i + 1)
+        def renumbered(items):
+            # 重新生成 ID
+            for i, item in enumerate(items):
+                item['id'] = str(i + 1)
+                yield item
         
-        # 保存到前端文件
-        frontend_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(frontend_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
+        # 原子写入前端文件，并记录合并来源，后端文件未变化时下次可跳过合并
+        meta = {'merged_from': backend_index.source_hash} if backend_index is not None else None
+        try:
+            merged_index = save_timeline_records(frontend_file, renumbered(merged_data), meta=meta)
+        except ValueError:
+            return {"success": False, "message": "后端数据格式错误"}
         
         return {
             "success": True,
-            "merged_count": len(merged_data),
-            "message": f"成功合并 {len(merged_data)} 条视频数据"
+            "merged_count": merged_index.count,
+            "message": f"成功合并 {merged_index.count} 条视频数据"
         }
         
     except Exception as e:
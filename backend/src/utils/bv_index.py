@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+BV号索引模块
+为 videos.json 生成并维护旁路索引文件（videos.index.json），
+记录 BV 号到行号、日期和封面文件名的映射，按内容哈希判断是否失效
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src.utils.bv_utils import extract_bv_from_item, normalize_bv
+from src.utils.json_stream import AtomicJsonArrayWriter, iter_json_array
+
+
+# 索引文件格式版本，格式变化时递增以使旧索引失效
+INDEX_VERSION = 1
+
+
+def get_index_file(timeline_file):
+    """获取时间线文件对应的索引文件路径
+
+    Args:
+        timeline_file: 时间线文件路径（如 data/lvjiang/videos.json）
+
+    Returns:
+        Path: 索引文件路径（如 data/lvjiang/videos.index.json）
+    """
+    timeline_file = Path(timeline_file)
+    return timeline_file.with_name(f"{timeline_file.stem}.index.json")
+
+
+def hash_file(file_path):
+    """计算文件内容的 SHA-256
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BVIndex:
+    """时间线BV号索引类
+
+    entries 以标准化 BV 号为键，值为 [行号, 日期, 封面文件名]。
+    索引从磁盘加载时只读取原文件计算哈希，不解析 JSON。
+    """
+
+    def __init__(self, entries=None, count=0, dates_sorted=True, ids_sequential=True,
+                 source_hash='', meta=None):
+        """初始化BV号索引
+
+        Args:
+            entries: BV号 -> [行号, 日期, 封面文件名]
+            count: 时间线条目总数（包括没有BV号或重复的条目）
+            dates_sorted: 时间线是否已按日期降序排列
+            ids_sequential: 条目 id 是否为按位置编号的 1..N
+            source_hash: 时间线文件内容哈希
+            meta: 附加信息（如前端合并时记录的后端文件哈希）
+        """
+        self.entries = entries or {}
+        self.count = count
+        self.dates_sorted = dates_sorted
+        self.ids_sequential = ids_sequential
+        self.source_hash = source_hash
+        self.meta = meta or {}
+        # add_item 增量构建时记录上一条的日期
+        self._previous_date = None
+
+    @classmethod
+    def from_timeline(cls, timeline_data, source_hash=''):
+        """从时间线数据构建索引（单次遍历）
+
+        Args:
+            timeline_data: 时间线记录可迭代对象（列表或流式读取的生成器）
+            source_hash: 时间线文件内容哈希
+
+        Returns:
+            BVIndex: 索引对象
+        """
+        index = cls(source_hash=source_hash)
+        for item in timeline_data:
+            index.add_item(item)
+        return index
+
+    def add_item(self, item):
+        """按顺序追加一条时间线记录到索引
+
+        Args:
+            item: 时间线条目
+        """
+        row = self.count
+        self.count += 1
+        if not isinstance(item, dict):
+            return
+
+        date = item.get('date') or ''
+        if self._previous_date is not None and date > self._previous_date:
+            self.dates_sorted = False
+        self._previous_date = date
+
+        if item.get('id') != str(row + 1):
+            self.ids_sequential = False
+
+        bv = normalize_bv(extract_bv_from_item(item))
+        if bv and bv not in self.entries:
+            self.entries[bv] = [row, date, item.get('cover') or '']
+
+    @classmethod
+    def load(cls, timeline_file):
+        """加载时间线文件的索引
+
+        索引文件不存在、版本不符或内容哈希与时间线文件不一致时返回None。
+
+        Args:
+            timeline_file: 时间线文件路径
+
+        Returns:
+            BVIndex: 有效的索引对象，失效返回None
+        """
+        timeline_file = Path(timeline_file)
+        index_file = get_index_file(timeline_file)
+        if not timeline_file.exists() or not index_file.exists():
+            return None
+
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return None
+            if data.get('source_hash') != hash_file(timeline_file):
+                return None
+            return cls(
+                entries=data.get('entries', {}),
+                count=data.get('count', 0),
+                dates_sorted=data.get('dates_sorted', False),
+                ids_sequential=data.get('ids_sequential', False),
+                source_hash=data['source_hash'],
+                meta=data.get('meta', {})
+            )
+        except Exception as e:
+            print(f"读取BV号索引失败: {e}")
+            return None
+
+    def save(self, timeline_file):
+        """保存索引到时间线文件旁的索引文件
+
+        Args:
+            timeline_file: 时间线文件路径
+
+        Returns:
+            bool: 保存成功返回True，否则返回False
+        """
+        index_file = get_index_file(timeline_file)
+        tmp_file = index_file.with_name(index_file.name + '.tmp')
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'source_hash': self.source_hash,
+                    'count': self.count,
+                    'dates_sorted': self.dates_sorted,
+                    'ids_sequential': self.ids_sequential,
+                    'meta': self.meta,
+                    'entries': self.entries
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, index_file)
+            return True
+        except Exception as e:
+            print(f"保存BV号索引失败: {e}")
+            if tmp_file.exists():
+                tmp_file.unlink()
+            return False
+
+    @property
+    def is_mergeable(self):
+        """时间线是否可以增量合并：已按日期降序且每个条目都有唯一BV号"""
+        return self.dates_sorted and len(self.entries) == self.count
+
+    def __contains__(self, bv):
+        return bv in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, bv):
+        """获取BV号对应的索引条目
+
+        Args:
+            bv: 标准化的BV号
+
+        Returns:
+            list: [行号, 日期, 封面文件名]，不存在返回None
+        """
+        return self.entries.get(bv)
+
+    def bv_by_row(self):
+        """获取按行号排列的BV号列表
+
+        Returns:
+            list: 下标为行号，没有BV号的行为空字符串
+        """
+        rows = [''] * self.count
+        for bv, (row, _date, _cover) in self.entries.items():
+            rows[row] = bv
+        return rows
+
+    def dates_ascending(self):
+        """获取按日期升序（时间线倒序）排列的日期列表
+
+        Returns:
+            list: 日期列表
+        """
+        return [entry[1] for entry in sorted(self.entries.values(), key=lambda entry: entry[0], reverse=True)]
+
+
+def write_bv_index(timeline_file, timeline_data, meta=None):
+    """为已写入的时间线文件生成索引
+
+    Args:
+        timeline_file: 时间线文件路径
+        timeline_data: 文件中的时间线记录
+        meta: 附加信息
+
+    Returns:
+        BVIndex: 生成的索引对象，失败返回None
+    """
+    try:
+        index = BVIndex.from_timeline(timeline_data, hash_file(timeline_file))
+        if meta:
+            index.meta.update(meta)
+        index.save(timeline_file)
+        return index
+    except Exception as e:
+        print(f"生成BV号索引失败: {e}")
+        return None
+
+
+def save_timeline_records(timeline_file, records, meta=None):
+    """流式原子写入时间线文件，并在同一次遍历中生成旁路索引
+
+    Args:
+        timeline_file: 时间线文件路径
+        records: 时间线记录可迭代对象（可以是生成器）
+        meta: 写入索引的附加信息
+
+    Returns:
+        BVIndex: 新文件的索引对象
+    """
+    index = BVIndex(meta=dict(meta) if meta else None)
+    with AtomicJsonArrayWriter(timeline_file) as writer:
+        for record in records:
+            writer.write(record)
+            index.add_item(record)
+    index.source_hash = writer.sha256
+    index.save(timeline_file)
+    return index
+
+
+def load_bv_index(timeline_file):
+    """加载时间线文件的索引，失效时流式读取时间线重新生成
+
+    Args:
+        timeline_file: 时间线文件路径
+
+    Returns:
+        BVIndex: 索引对象，时间线文件不存在或格式错误返回None
+    """
+    timeline_file = Path(timeline_file)
+    index = BVIndex.load(timeline_file)
+    if index is not None:
+        return index
+    if not timeline_file.exists():
+        return None
+
+    try:
+        return write_bv_index(timeline_file, iter_json_array(timeline_file))
+    except ValueError as e:
+        print(f"解析时间线文件失败: {e}")
+        return None
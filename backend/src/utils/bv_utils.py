@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+BV号工具模块
+统一BV号的提取和标准化逻辑，供爬虫、时间线生成、前端更新和脚本共用
+"""
+
+import re
+
+
+# 匹配 URL 或文本中的 BV 号
+BV_PATTERN = re.compile(r'(BV[0-9A-Za-z]+)')
+
+# 匹配不带 BV 前缀的封面文件名，如 15NzrBBEJQ.jpg
+_BARE_COVER_PATTERN = re.compile(r'([0-9A-Za-z]{10,})\.[a-zA-Z]+$')
+
+
+def extract_bv_from_url(url):
+    """从视频 URL（或任意包含BV号的字符串）中提取 BV 号
+
+    Args:
+        url: 视频 URL
+
+    Returns:
+        str: BV 号，未找到返回空字符串
+    """
+    if not url:
+        return ''
+    match = BV_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    return ''
+
+
+def extract_bv_from_cover(cover, allow_bare=False):
+    """从封面文件名中提取 BV 号
+
+    Args:
+        cover: 封面文件名
+        allow_bare: 是否识别不带 BV 前缀的文件名（识别后补全 BV 前缀）
+
+    Returns:
+        str: BV 号，未找到返回空字符串
+    """
+    if not cover:
+        return ''
+    if cover.startswith('BV'):
+        return cover.split('.')[0]
+    if allow_bare:
+        match = _BARE_COVER_PATTERN.search(cover)
+        if match:
+            return f"BV{match.group(1)}"
+    return ''
+
+
+def extract_bv_from_item(item):
+    """从时间线条目中提取 BV 号
+
+    依次尝试 videoUrl、cover、嵌套 video.bv 和顶级 bv 字段。
+
+    Args:
+        item: 时间线条目
+
+    Returns:
+        str: BV 号（保持原始大小写），未找到返回空字符串
+    """
+    if not isinstance(item, dict):
+        return ''
+
+    # 1. 从 videoUrl 字段提取（优先级最高）
+    bv = extract_bv_from_url(item.get('videoUrl') or '')
+
+    # 2. 从 cover 字段提取（支持带或不带 BV 前缀的格式）
+    if not bv:
+        bv = extract_bv_from_cover(item.get('cover') or '', allow_bare=True)
+
+    # 3. 从嵌套的 video 对象中提取
+    if not bv:
+        video_info = item.get('video')
+        if isinstance(video_info, dict):
+            bv = video_info.get('bv') or ''
+
+    # 4. 从顶级 bv 字段提取
+    if not bv:
+        bv = item.get('bv') or ''
+
+    return bv
+
+
+def normalize_bv(bv_code, upper=False):
+    """标准化 BV 号，确保只有一个 BV 前缀
+
+    Args:
+        bv_code: BV号（可以带或不带BV前缀）
+        upper: 是否转为大写（B站BV号区分大小写，仅用于不区分大小写的比较）
+
+    Returns:
+        str: 标准化的 BV 号，输入为空时返回空字符串
+    """
+    if not bv_code:
+        return ''
+    bv_code = bv_code.strip()
+    if upper:
+        bv_code = bv_code.upper()
+    if bv_code.startswith('BVBV'):
+        bv_code = bv_code[2:]
+    elif not bv_code.startswith('BV'):
+        bv_code = 'BV' + bv_code
+    return bv_code
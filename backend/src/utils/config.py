@@ -243,3 +243,46 @@ def get_frontend_thumbs_dir():
     thumbs_dir = config.get('frontend', {}).get('thumbs_dir', '../frontend/public/thumbs')
     # 转换为绝对路径
     return PROJECT_ROOT / thumbs_dir
+
+
+# 封面处理默认配置
+DEFAULT_COVER_CONFIG = {
+    'webp_quality': 85,      # WebP 压缩质量 (0-100)
+    'webp_method': 6,        # WebP 编码方法 (0-6)
+    'encode_workers': None,  # 编码进程数，None 表示 CPU 核心数，0 表示不使用进程池
+    'download_timeout': 20,  # 封面下载超时时间（秒）
+    'download_retries': 3,   # 封面下载超时、连接错误和 429/5xx 的重试次数
+    'download_backoff': 0.5, # 重试退避基数（秒），第 n 次重试前等待 backoff * 2^(n-1) 秒
+    'download_per_host': 8,  # 单个图片主机的最大并发连接数
+    'cdn_resize': True,      # 优先下载B站图片CDN按尺寸缩放好的 WebP，失败时回退到原图本地编码
+    'cdn_width': 672,        # CDN 缩放宽度（前端卡片最大显示宽度约 336px，按 2 倍像素密度）
+    'cdn_height': 378,       # CDN 缩放高度（16:9）
+    'variant_widths': [],    # 封面变体宽度，如 [160, 320, 640]，空列表表示不生成变体（前端尚未使用变体）
+    'variant_formats': ['webp', 'avif'],  # 封面变体格式（webp、avif、jpg），不支持的格式自动跳过
+    'avif_quality': 60,      # 封面变体 AVIF 压缩质量 (0-100)
+    'atlas_enabled': True,   # 是否按月生成封面拼图（sprite sheet）和坐标清单
+    'atlas_tile_width': 320, # 拼图图块宽度
+    'atlas_tile_height': 180,  # 拼图图块高度（16:9）
+    'atlas_columns': 8,      # 拼图每行图块数
+    'atlas_max_tiles': 128,  # 单张拼图最多图块数，超过时按页拆分
+    'atlas_quality': 80,     # 拼图 WebP 压缩质量 (0-100)
+    'blurhash': True,        # 是否计算封面 BlurHash 占位图并写入 videos.json 的 blurhash 字段
+    'blurhash_x_components': 4,  # BlurHash 横向分量数 (1-9)
+    'blurhash_y_components': 3,  # BlurHash 纵向分量数 (1-9)
+    'refresh_mode': 'url',   # 已有封面的刷新方式：off 不刷新，url 在 cover_url 变化时重新下载，conditional 另外发送条件请求检查其余封面
+    'gc_mode': 'dry-run',    # 封面目录清理：off 不清理，dry-run 只报告，quarantine 移动到隔离目录，delete 删除
+    'gc_quarantine_dir': 'data/cover_quarantine',  # 隔离目录（相对于 backend 目录）
+    'manifest_file': 'data/cover_manifest.json'  # 前端封面目录的封面清单（相对于 backend 目录，不随前端发布）
+}
+
+
+def get_cover_config():
+    """获取封面处理配置
+    
+    Returns:
+        dict: 封面处理配置（缺失的项使用默认值）
+    """
+    config = get_config()
+    cover_config = dict(DEFAULT_COVER_CONFIG)
+    cover_config.update(config.get('covers', {}))
+    return cover_config
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+JSON 流式读写模块
+逐条读取顶层为数组的 JSON 文件，并以“临时文件 + 重命名”的方式原子写入，
+输出格式与 json.dump(data, f, ensure_ascii=False, indent=2) 完全一致
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+# 默认读取块大小（字符）
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class _ArrayStream:
+    """按块读取文件的解码缓冲区，只保留尚未解码的部分"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """读取下一块数据，丢弃已解码部分
+
+        Returns:
+            bool: 读取到新数据返回True，文件结束返回False
+        """
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白并返回下一个字符，文件结束返回None"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def advance(self):
+        """跳过当前字符"""
+        self.pos += 1
+
+    def decode(self):
+        """解码下一个 JSON 值，数据不完整时继续读取"""
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 值恰好结束在缓冲区末尾时（如被截断的数字）需要读取更多数据确认
+            if end >= len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐条读取顶层为数组的 JSON 文件
+
+    内存占用与单条记录大小相关，与数组长度无关。
+
+    Args:
+        file_path: JSON 文件路径
+        chunk_size: 每次读取的字符数
+
+    Yields:
+        数组中的每一条记录
+
+    Raises:
+        ValueError: 文件顶层不是数组或格式错误时抛出（json.JSONDecodeError 是其子类）
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        stream = _ArrayStream(f, chunk_size)
+        if stream.peek() != '[':
+            raise ValueError(f"JSON 顶层不是数组: {file_path}")
+        stream.advance()
+
+        first = True
+        while True:
+            char = stream.peek()
+            if char is None:
+                raise ValueError(f"JSON 数组未结束: {file_path}")
+            if char == ']':
+                return
+            if not first:
+                if char != ',':
+                    raise ValueError(f"JSON 数组缺少分隔符: {file_path}")
+                stream.advance()
+                if stream.peek() is None:
+                    raise ValueError(f"JSON 数组未结束: {file_path}")
+            yield stream.decode()
+            first = False
+
+
+class AtomicJsonArrayWriter:
+    """原子 JSON 数组写入器
+
+    记录逐条序列化写入同目录下的临时文件，正常退出上下文时重命名覆盖目标文件；
+    发生异常时删除临时文件，目标文件保持不变。写入的同时计算内容 SHA-256。
+
+    用法：
+        with AtomicJsonArrayWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, file_path, indent=2):
+        """初始化写入器
+
+        Args:
+            file_path: 目标文件路径
+            indent: 缩进空格数，与 json.dump 的 indent 参数一致
+        """
+        self.file_path = Path(file_path)
+        self.indent = indent
+        self.count = 0
+        self.tmp_path = None
+        self._file = None
+        self._hash = hashlib.sha256()
+        self._pad = ' ' * indent if indent is not None else ''
+
+    def __enter__(self):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=str(self.file_path.parent),
+            prefix=f".{self.file_path.name}.",
+            suffix='.tmp'
+        )
+        self.tmp_path = Path(tmp_name)
+        # mkstemp 创建的文件权限为 0600，沿用目标文件原有权限
+        mode = self.file_path.stat().st_mode & 0o777 if self.file_path.exists() else 0o644
+        os.chmod(tmp_name, mode)
+        self._file = os.fdopen(fd, 'wb')
+        return self
+
+    def _write_text(self, text):
+        data = text.encode('utf-8')
+        self._hash.update(data)
+        self._file.write(data)
+
+    def write(self, record):
+        """写入一条记录
+
+        Args:
+            record: 可 JSON 序列化的记录
+        """
+        text = json.dumps(record, ensure_ascii=False, indent=self.indent)
+        if self.indent is None:
+            self._write_text(('[' if self.count == 0 else ', ') + text)
+        else:
+            # 字符串中的换行会被转义，按行缩进不会影响字符串内容
+            text = self._pad + text.replace('\n', '\n' + self._pad)
+            self._write_text(('[\n' if self.count == 0 else ',\n') + text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                if self.count == 0:
+                    self._write_text('[]')
+                else:
+                    self._write_text(']' if self.indent is None else '\n]')
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            if exc_type is None:
+                os.replace(self.tmp_path, self.file_path)
+        finally:
+            # 重命名成功后临时文件已不存在，其余情况清理临时文件
+            if self.tmp_path.exists():
+                self.tmp_path.unlink()
+        return False
+
+    @property
+    def sha256(self):
+        """已写入内容的 SHA-256 十六进制值"""
+        return self._hash.hexdigest()
+
+
+def write_json_array(file_path, records, indent=2):
+    """原子写入 JSON 数组文件
+
+    Args:
+        file_path: 目标文件路径
+        records: 记录可迭代对象（可以是生成器）
+        indent: 缩进空格数
+
+    Returns:
+        int: 写入的记录数
+    """
+    with AtomicJsonArrayWriter(file_path, indent=indent) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+批量元数据解析测试
+"""
+
+import json
+
+import pytest
+from unittest.mock import patch
+
+from src.crawler.video_crawler import VideoCrawler
+from src.crawler.batch_resolver import BatchMetadataResolver
+from src.crawler.utils.rate_limiter import DEFAULT_BUCKET
+
+
+def make_search_response(bv_list):
+    """构造搜索API响应数据"""
+    return {
+        'code': 0,
+        'data': {
+            'result': [
+                {'result_type': 'bili_user', 'data': []},
+                {
+                    'result_type': 'video',
+                    'data': [
+                        {
+                            'bvid': bv,
+                            'title': f'标题 {bv}',
+                            'author': '测试UP主',
+                            'arcurl': f'https://www.bilibili.com/video/{bv}',
+                            'pubdate': 1700000000,
+                            'play': 100,
+                            'pic': f'//i0.hdslb.com/bfs/archive/{bv}.jpg',
+                            'duration': '3:00'
+                        }
+                        for bv in bv_list
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class TestBatchMetadataResolver:
+    """批量元数据解析器测试类"""
+
+    def setup_method(self):
+        """测试初始化"""
+        self.crawler = VideoCrawler()
+
+    def test_batches_bv_codes_into_few_requests(self):
+        """测试多个BV号合并为少量搜索请求"""
+        keywords = []
+
+        def fake_search(keyword):
+            keywords.append(keyword)
+            return make_search_response(keyword.split())
+
+        bv_list = [f"BV1batch{i:04d}" for i in range(10)]
+        resolver = BatchMetadataResolver(self.crawler, batch_size=4)
+        with patch.object(self.crawler, '_request_search_api', side_effect=fake_search):
+            assert resolver.resolve(bv_list) == 10
+
+        assert len(keywords) == 3
+        assert keywords[0].split() == bv_list[:4]
+
+        metadata = resolver.take("BV1batch0003")
+        assert metadata['bv'] == "BV1batch0003"
+        assert metadata['cover_url'].startswith('https://')
+        assert metadata['publish_date'] != 1700000000
+
+        stats = resolver.get_stats()
+        assert stats['batch_requests'] == 3
+        assert stats['resolved_without_request'] == 1
+
+    def test_harvests_other_pending_bv_codes(self):
+        """测试顺带收集命中其他待爬取BV号的结果"""
+        bv_list = [f"BV1harv{i:04d}" for i in range(6)]
+
+        def fake_search(keyword):
+            # 第一批的响应中顺带返回了所有待爬取视频
+            return make_search_response(bv_list)
+
+        resolver = BatchMetadataResolver(self.crawler, batch_size=2)
+        with patch.object(self.crawler, '_request_search_api', side_effect=fake_search) as mock_search:
+            resolver.resolve(bv_list)
+
+        assert mock_search.call_count == 1
+        assert resolver.harvested == 4
+        assert all(resolver.take(bv) for bv in bv_list)
+        assert resolver.get_stats()['requests_saved'] == 5
+
+    def test_unmatched_results_are_ignored(self):
+        """测试不在队列中的搜索结果不会被收集"""
+        resolver = BatchMetadataResolver(self.crawler, batch_size=4)
+        with patch.object(self.crawler, '_request_search_api',
+                          return_value=make_search_response(["BV1other0001", "BV1want0001"])):
+            resolver.resolve(["BV1want0001", "BV1want0002"])
+
+        assert resolver.take("BV1other0001") is None
+        assert resolver.take("BV1want0001")["bv"] == "BV1want0001"
+        assert resolver.take("BV1want0002") is None
+
+    def test_disables_batching_when_upstream_never_matches(self):
+        """测试连续零命中后停止批量搜索"""
+        resolver = BatchMetadataResolver(self.crawler, batch_size=2, probe_batches=2)
+        with patch.object(self.crawler, '_request_search_api',
+                          return_value=make_search_response([])) as mock_search:
+            resolver.resolve([f"BV1miss{i:04d}" for i in range(10)])
+
+        assert mock_search.call_count == 2
+        assert resolver.batching_disabled
+
+    def test_normalize_bv_keeps_case(self):
+        """测试BV号标准化保留大小写"""
+        assert BatchMetadataResolver.normalize_bv("1AbCdEfGhI") == "BV1AbCdEfGhI"
+        assert BatchMetadataResolver.normalize_bv("BVBV1AbCdEfGhI") == "BV1AbCdEfGhI"
+
+    def test_invalid_batch_size_raises_error(self):
+        """测试无效的批量大小抛出异常"""
+        with pytest.raises(ValueError):
+            BatchMetadataResolver(self.crawler, batch_size=0)
+        with pytest.raises(ValueError):
+            VideoCrawler(batch_size=0)
+
+    def test_crawl_from_bv_list_falls_back_for_unresolved(self):
+        """测试批量未命中的BV号回退到逐个获取，结果顺序保持一致"""
+        bv_list = [f"BV1mix{i:04d}" for i in range(6)]
+        found = [bv for bv in bv_list if bv != "BV1mix0002"]
+
+        def fake_search(keyword):
+            return make_search_response([bv for bv in keyword.split() if bv in found])
+
+        def fake_crawl(bv_code, bucket=None):
+            return {"bv": bv_code, "title": "逐个获取"}
+
+        crawler = VideoCrawler(max_workers=2, batch_size=3)
+        with patch.object(crawler, '_request_search_api', side_effect=fake_search), \
+                patch.object(crawler, 'crawl_video_metadata', side_effect=fake_crawl) as mock_crawl:
+            videos = crawler.crawl_from_bv_list(bv_list, 'lvjiang', full_crawl=True)
+
+        assert [video['bv'] for video in videos] == bv_list
+        mock_crawl.assert_called_once_with("BV1mix0002", bucket=DEFAULT_BUCKET)
+        assert crawler.last_batch_stats['batch_requests'] == 2
+        assert crawler.last_batch_stats['fallback_requests'] == 1
+        assert crawler.last_batch_stats['requests_saved'] == 3
+        assert crawler._batch_resolver is None
+
+    def test_failed_probes_count_every_retry(self):
+        """测试失败批次的每次重试都计入成本，批量搜索得不偿失时节省请求数为负"""
+        from src.crawler.utils.http_transport import TransportResponse
+
+        crawler = VideoCrawler(use_anti_crawler=False)
+        crawler.api_call_interval = 0
+        crawler.api_retry_delay = 0
+        body = json.dumps({'code': -412, 'message': '请求被拦截'}).encode('utf-8')
+        error = TransportResponse(200, {}, body, crawler.api_config['search_url'])
+        bv_list = [f"BV1fail{i:04d}" for i in range(4)]
+
+        resolver = BatchMetadataResolver(crawler, batch_size=2, probe_batches=2)
+        with patch.object(crawler.transport, 'get', return_value=error) as mock_get, \
+                patch('src.crawler.video_crawler.time.sleep'):
+            assert resolver.resolve(bv_list) == 0
+        assert all(resolver.take(bv) is None for bv in bv_list)
+
+        stats = resolver.get_stats()
+        # 第一批重试耗尽后搜索API熔断，第二批没有发出请求
+        assert mock_get.call_count == stats['batch_http_requests'] == crawler.api_max_retries
+        assert (stats['batch_requests'], stats['failed_batches'], stats['fallback_requests']) == (2, 2, 4)
+        assert stats['requests_saved'] == -crawler.api_max_retries
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+BV号工具与旁路索引测试
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from src.utils.bv_utils import (
+    extract_bv_from_url,
+    extract_bv_from_cover,
+    extract_bv_from_item,
+    normalize_bv
+)
+from src.utils.bv_index import BVIndex, get_index_file, load_bv_index, write_bv_index
+
+
+def make_timeline(count=3):
+    """构造按日期降序、编号连续的时间线数据"""
+    return [
+        {
+            "id": str(i + 1),
+            "date": f"2023-12-{30 - i:02d}",
+            "title": f"视频{i}",
+            "videoUrl": f"https://www.bilibili.com/video/BV1idx{i:04d}",
+            "cover": f"BV1idx{i:04d}.webp",
+            "tags": []
+        }
+        for i in range(count)
+    ]
+
+
+def write_timeline(path, data):
+    """写入时间线文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class TestBVUtils:
+    """BV号工具函数测试类"""
+
+    def test_extract_bv_from_url(self):
+        """测试从URL提取BV号"""
+        assert extract_bv_from_url("https://www.bilibili.com/video/BV1xx411c7mD?p=1") == "BV1xx411c7mD"
+        assert extract_bv_from_url("https://www.example.com/video/123") == ""
+        assert extract_bv_from_url(None) == ""
+
+    def test_extract_bv_from_cover(self):
+        """测试从封面文件名提取BV号"""
+        assert extract_bv_from_cover("BV1xx411c7mD.webp") == "BV1xx411c7mD"
+        assert extract_bv_from_cover("15NzrBBEJQ.jpg") == ""
+        assert extract_bv_from_cover("15NzrBBEJQ.jpg", allow_bare=True) == "BV15NzrBBEJQ"
+
+    def test_extract_bv_from_item_priority(self):
+        """测试条目BV号提取优先级"""
+        assert extract_bv_from_item({"videoUrl": "https://b23.tv/BV1aaa", "cover": "BV1bbb.webp"}) == "BV1aaa"
+        assert extract_bv_from_item({"cover": "BV1bbb.webp", "bv": "BV1ccc"}) == "BV1bbb"
+        assert extract_bv_from_item({"video": {"bv": "BV1ddd"}, "bv": "BV1ccc"}) == "BV1ddd"
+        assert extract_bv_from_item({"bv": "1ccc"}) == "1ccc"
+        assert extract_bv_from_item({"videoUrl": None}) == ""
+        assert extract_bv_from_item("not a dict") == ""
+
+    def test_normalize_bv(self):
+        """测试BV号标准化"""
+        assert normalize_bv("1AbC") == "BV1AbC"
+        assert normalize_bv("BVBV1AbC") == "BV1AbC"
+        assert normalize_bv("bv1abc", upper=True) == "BV1ABC"
+        assert normalize_bv("") == ""
+
+
+class TestBVIndex:
+    """旁路BV号索引测试类"""
+
+    def test_index_file_next_to_timeline(self, tmp_path):
+        """测试索引文件与时间线文件同目录"""
+        assert get_index_file(tmp_path / "videos.json") == tmp_path / "videos.index.json"
+
+    def test_write_and_load(self, tmp_path):
+        """测试生成索引后可以直接加载"""
+        timeline_file = tmp_path / "videos.json"
+        data = make_timeline()
+        write_timeline(timeline_file, data)
+        write_bv_index(timeline_file, data)
+
+        index = BVIndex.load(timeline_file)
+        assert index is not None
+        assert "BV1idx0001" in index
+        assert index.get("BV1idx0001") == [1, "2023-12-29", "BV1idx0001.webp"]
+        assert index.is_mergeable and index.ids_sequential
+        assert index.bv_by_row() == ["BV1idx0000", "BV1idx0001", "BV1idx0002"]
+        assert index.dates_ascending() == ["2023-12-28", "2023-12-29", "2023-12-30"]
+
+    def test_invalidated_by_content_hash(self, tmp_path):
+        """测试时间线内容变化后索引失效"""
+        timeline_file = tmp_path / "videos.json"
+        data = make_timeline()
+        write_timeline(timeline_file, data)
+        write_bv_index(timeline_file, data)
+
+        data[0]["videoUrl"] = "https://www.bilibili.com/video/BV1changed0"
+        write_timeline(timeline_file, data)
+
+        assert BVIndex.load(timeline_file) is None
+        rebuilt = load_bv_index(timeline_file)
+        assert "BV1changed0" in rebuilt
+        assert BVIndex.load(timeline_file) is not None
+
+    def test_load_does_not_parse_timeline(self, tmp_path):
+        """测试索引有效时不解析时间线JSON"""
+        timeline_file = tmp_path / "videos.json"
+        data = make_timeline()
+        write_timeline(timeline_file, data)
+        write_bv_index(timeline_file, data)
+
+        import src.utils.bv_index as bv_index_module
+        real_load = json.load
+
+        def guarded_load(f, *args, **kwargs):
+            assert Path(f.name) != timeline_file, "不应解析时间线文件"
+            return real_load(f, *args, **kwargs)
+
+        with patch.object(bv_index_module.json, 'load', side_effect=guarded_load):
+            assert "BV1idx0002" in load_bv_index(timeline_file)
+
+    def test_unsorted_or_duplicate_timeline_not_mergeable(self, tmp_path):
+        """测试无序或重复的时间线标记为不可增量合并"""
+        data = make_timeline()
+        data.append(dict(data[0]))
+        index = BVIndex.from_timeline(data)
+        assert not index.is_mergeable
+        assert not index.ids_sequential
+        assert len(index) == 3 and index.count == 4
+
+    def test_is_video_crawled_uses_index(self, tmp_path):
+        """测试视频爬虫从索引判断是否已爬取"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        timeline_file = tmp_path / "videos.json"
+        write_timeline(timeline_file, make_timeline())
+
+        crawler = VideoCrawler()
+        assert crawler.is_video_crawled("bv1IDX0001", timeline_file)
+        assert not crawler.is_video_crawled("BV1missing0", timeline_file)
+        assert get_index_file(timeline_file).exists()
+
+    def test_frontend_merge_skipped_when_backend_unchanged(self, tmp_path):
+        """测试后端文件未变化时跳过前端合并"""
+        from src.updater.frontend_updater import merge_videos_json
+
+        backend_file = tmp_path / "backend" / "videos.json"
+        frontend_file = tmp_path / "frontend" / "videos.json"
+        backend_file.parent.mkdir()
+        write_timeline(backend_file, make_timeline())
+
+        first = merge_videos_json(backend_file, frontend_file)
+        assert first["success"] and not first.get("skipped")
+
+        second = merge_videos_json(backend_file, frontend_file)
+        assert second["success"] and second["skipped"]
+        assert second["merged_count"] == 3
+
+        # 前端手动修改 tags 后重新合并并保留 tags
+        frontend_data = json.loads(frontend_file.read_text(encoding='utf-8'))
+        frontend_data[1]["tags"] = ["精彩"]
+        write_timeline(frontend_file, frontend_data)
+        third = merge_videos_json(backend_file, frontend_file)
+        assert not third.get("skipped")
+        merged = json.loads(frontend_file.read_text(encoding='utf-8'))
+        assert merged[1]["tags"] == ["精彩"]
+
+    def test_frontend_merge_uses_canonical_bv(self, tmp_path):
+        """测试前后端条目按同一规则提取BV号，重复BV号的每一行都保留 tags"""
+        from src.updater.frontend_updater import merge_videos_json
+
+        backend_file = tmp_path / "backend" / "videos.json"
+        frontend_file = tmp_path / "frontend" / "videos.json"
+        backend_file.parent.mkdir()
+        frontend_file.parent.mkdir()
+        data = make_timeline()
+        data[1].update(videoUrl="https://www.bilibili.com/video/BV15NzrBBEJQ", cover="BV15NzrBBEJQ.webp")
+        data.append(dict(data[0], id="4", date="2023-12-01"))
+        write_timeline(backend_file, data)
+        write_bv_index(backend_file, data)
+        write_timeline(frontend_file, [
+            {"id": "1", "bv": "BV1idx0000", "tags": ["开头"]},
+            {"id": "2", "cover": "15NzrBBEJQ.jpg", "tags": ["中间"]},
+            {"id": "3", "video": {"bv": "1idx0002"}, "tags": ["结尾"]},
+        ])
+        write_bv_index(frontend_file, json.loads(frontend_file.read_text(encoding='utf-8')))
+
+        assert merge_videos_json(backend_file, frontend_file)["success"]
+        merged = json.loads(frontend_file.read_text(encoding='utf-8'))
+        assert [item["tags"] for item in merged] == [["开头"], ["中间"], ["结尾"], ["开头"]]
+
+    def test_dedup_skips_clean_timeline(self, tmp_path):
+        """测试去重脚本在索引记录无重复时跳过"""
+        from scripts.dedup_videos import dedup_videos_json
+
+        timeline_file = tmp_path / "videos.json"
+        data = make_timeline()
+        data.append(dict(data[0]))
+        write_timeline(timeline_file, data)
+
+        result = dedup_videos_json(timeline_file)
+        assert result["removed_count"] == 1
+        assert BVIndex.load(timeline_file).is_mergeable
+
+        mtime = timeline_file.stat().st_mtime_ns
+        result = dedup_videos_json(timeline_file)
+        assert result["removed_count"] == 0
+        assert timeline_file.stat().st_mtime_ns == mtime
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+封面拼图生成测试
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+from PIL import Image
+
+from src.downloader.cover_atlas import choose_atlas_source, generate_cover_atlases, get_atlas_group
+from src.downloader.cover_encoder import CoverEncoder, encode_atlas
+from src.utils.config import DEFAULT_COVER_CONFIG
+
+
+ATLAS_CONFIG = dict(DEFAULT_COVER_CONFIG, atlas_tile_width=16, atlas_tile_height=9,
+                    atlas_columns=2, atlas_max_tiles=3, atlas_quality=60)
+
+
+def write_cover(path, color):
+    """写入一张测试封面"""
+    Image.new('RGB', (64, 36), color).save(path, 'WEBP')
+
+
+def write_videos(tmp_path, videos):
+    """写入 videos.json 和对应的封面"""
+    thumbs_dir = tmp_path / "thumbs"
+    thumbs_dir.mkdir(exist_ok=True)
+    for i, video in enumerate(videos):
+        video.setdefault('cover', f"{video['bv']}.webp")
+        write_cover(thumbs_dir / video['cover'], (i * 40 % 256, 100, 200))
+    videos_path = tmp_path / "videos.json"
+    videos_path.write_text(json.dumps(videos), encoding='utf-8')
+    return videos_path, thumbs_dir
+
+
+def run_atlases(videos_path, thumbs_dir, encoder):
+    """按测试配置生成拼图"""
+    with patch('src.downloader.cover_atlas.get_cover_config', return_value=ATLAS_CONFIG):
+        return generate_cover_atlases(videos_path, thumbs_dir, 'test', encoder=encoder, quiet=True)
+
+
+class TestCoverAtlas:
+    """封面拼图测试类"""
+
+    def test_encode_atlas_grid(self, tmp_path):
+        """测试按网格拼接封面，无法解码的封面留白"""
+        write_cover(tmp_path / "a.webp", (255, 0, 0))
+        write_cover(tmp_path / "c.webp", (0, 0, 255))
+        (tmp_path / "b.webp").write_bytes(b"not an image")
+        data = encode_atlas([tmp_path / "a.webp", tmp_path / "b.webp", tmp_path / "c.webp"],
+                            16, 9, 2, quality=100, method=0)
+
+        (tmp_path / "atlas.webp").write_bytes(data)
+        with Image.open(tmp_path / "atlas.webp") as img:
+            assert img.size == (32, 18)
+            red, blank, blue = img.getpixel((8, 4)), img.getpixel((24, 4)), img.getpixel((8, 13))
+        assert red[0] > 200 and red[2] < 50
+        assert min(blank) > 200
+        assert blue[2] > 200 and blue[0] < 50
+        assert encode_atlas([], 16, 9, 2) is None
+
+    def test_atlas_group_and_source(self):
+        """测试按月份分组，优先使用不小于图块宽度的最小变体作为源图"""
+        assert get_atlas_group({'date': '2026-01-17'}) == '2026-01'
+        assert get_atlas_group({'date': '2026年01月17日'}) == 'undated'
+        assert get_atlas_group({}) == 'undated'
+
+        video = {'cover_variants': [
+            {'file': 'BV1a_160w.webp', 'width': 160, 'format': 'webp'},
+            {'file': 'BV1a_320w.avif', 'width': 320, 'format': 'avif'},
+            {'file': 'BV1a_320w.webp', 'width': 320, 'format': 'webp'},
+            {'file': 'BV1a_640w.webp', 'width': 640, 'format': 'webp'},
+        ]}
+        names = {'BV1a.webp', 'BV1a_160w.webp', 'BV1a_320w.avif', 'BV1a_320w.webp', 'BV1a_640w.webp'}
+        assert choose_atlas_source(video, 'BV1a.webp', names, 320) == 'BV1a_320w.webp'
+        assert choose_atlas_source(video, 'BV1a.webp', names - {'BV1a_320w.webp', 'BV1a_640w.webp'},
+                                   320) == 'BV1a.webp'
+
+    def test_generate_manifest_by_month(self, tmp_path):
+        """测试按月份生成拼图和坐标清单，超过最大图块数时拆分为多页"""
+        videos = [{'bv': f'BV1jan{i}', 'date': f'2026-01-0{i + 1}'} for i in range(4)]
+        videos.append({'bv': 'BV1feb0', 'date': '2026-02-01'})
+        videos.append({'bv': 'BV1none', 'date': '2026-02-02', 'cover': 'missing.webp'})
+        videos_path, thumbs_dir = write_videos(tmp_path, videos)
+        (thumbs_dir / "missing.webp").unlink()
+
+        results = run_atlases(videos_path, thumbs_dir, CoverEncoder(workers=0))
+
+        assert results == {'built': 3, 'reused': 0, 'removed': 0, 'failed': 0, 'covers': 5}
+        manifest = json.loads((thumbs_dir / "atlas" / "test.json").read_text(encoding='utf-8'))
+        assert sorted(manifest['atlases']) == ['2026-01', '2026-01-2', '2026-02']
+        assert manifest['atlases']['2026-01']['file'] == 'test_2026-01.webp'
+        assert manifest['atlases']['2026-01']['count'] == 3
+        assert manifest['covers']['BV1jan2'] == {'atlas': '2026-01', 'x': 0, 'y': 9, 'width': 16, 'height': 9}
+        assert manifest['covers']['BV1jan3'] == {'atlas': '2026-01-2', 'x': 0, 'y': 0, 'width': 16, 'height': 9}
+        assert 'BV1none' not in manifest['covers']
+        with Image.open(thumbs_dir / "atlas" / "test_2026-01.webp") as img:
+            assert img.size == (32, 18)
+
+    def test_incremental_rebuild(self, tmp_path):
+        """测试新增视频只重建所在月份的拼图，月份消失时删除对应拼图"""
+        videos = [{'bv': 'BV1jan0', 'date': '2026-01-01'}, {'bv': 'BV1feb0', 'date': '2026-02-01'}]
+        videos_path, thumbs_dir = write_videos(tmp_path, videos)
+        encoder = CoverEncoder(workers=0)
+        run_atlases(videos_path, thumbs_dir, encoder)
+        manifest_mtime = (thumbs_dir / "atlas" / "test.json").stat().st_mtime_ns
+
+        with patch.object(encoder, 'submit_atlas') as mock_submit:
+            assert run_atlases(videos_path, thumbs_dir, encoder)['reused'] == 2
+        mock_submit.assert_not_called()
+        assert (thumbs_dir / "atlas" / "test.json").stat().st_mtime_ns == manifest_mtime
+
+        # 新增一月的视频：只重建一月的拼图
+        write_cover(thumbs_dir / "BV1jan1.webp", (0, 0, 0))
+        videos.append({'bv': 'BV1jan1', 'date': '2026-01-05', 'cover': 'BV1jan1.webp'})
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+        with patch.object(encoder, 'submit_atlas', wraps=encoder.submit_atlas) as mock_submit:
+            results = run_atlases(videos_path, thumbs_dir, encoder)
+
+        assert mock_submit.call_count == 1
+        assert [p.name for p in mock_submit.call_args[0][0]] == ['BV1jan0.webp', 'BV1jan1.webp']
+        assert results == {'built': 1, 'reused': 1, 'removed': 0, 'failed': 0, 'covers': 3}
+
+        # 二月的视频被移除：删除二月的拼图
+        videos_path.write_text(json.dumps(videos[::2]), encoding='utf-8')
+        results = run_atlases(videos_path, thumbs_dir, encoder)
+        assert results['removed'] == 1
+        assert sorted(p.name for p in (thumbs_dir / "atlas").iterdir()) == ['test.json', 'test_2026-01.webp']
+
+    def test_signature_ignores_mtime(self, tmp_path):
+        """测试只有修改时间变化（重新 checkout）时复用拼图，内容变化时重建"""
+        videos = [{'bv': 'BV1jan0', 'date': '2026-01-01'}, {'bv': 'BV1feb0', 'date': '2026-02-01'}]
+        videos_path, thumbs_dir = write_videos(tmp_path, videos)
+        encoder = CoverEncoder(workers=0)
+        run_atlases(videos_path, thumbs_dir, encoder)
+        for path in thumbs_dir.glob("*.webp"):
+            os.utime(path, ns=(1, 1))
+
+        with patch.object(encoder, 'submit_atlas') as mock_submit:
+            assert run_atlases(videos_path, thumbs_dir, encoder)['reused'] == 2
+        mock_submit.assert_not_called()
+
+        write_cover(thumbs_dir / "BV1feb0.webp", (0, 0, 0))
+        assert run_atlases(videos_path, thumbs_dir, encoder)['built'] == 1
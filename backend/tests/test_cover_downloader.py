@@ -13,6 +13,13 @@ from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
 
+def patch_transport_get(**kwargs):
+    """替换封面下载使用的HTTP传输对象的 get 方法"""
+    transport = Mock()
+    transport.get = Mock(**kwargs)
+    return patch('src.downloader.download_thumbs.get_download_transport', return_value=transport)
+
+
 class TestCoverDownloader(unittest.TestCase):
     """封面下载器测试类"""
 
@@ -189,7 +196,7 @@ class TestCoverDownloader(unittest.TestCase):
         mock_response.__enter__ = Mock(return_value=mock_response)
         mock_response.__exit__ = Mock(return_value=False)
 
-        with patch('requests.get', return_value=mock_response):
+        with patch_transport_get(return_value=mock_response):
             result = download_binary(
                 "https://i0.hdslb.com/bfs/archive/test.jpg",
                 self.thumbs_dir / "test.jpg"
@@ -200,7 +207,7 @@ class TestCoverDownloader(unittest.TestCase):
         """测试下载二进制文件失败"""
         from src.downloader.download_thumbs import download_binary
 
-        with patch('requests.get', side_effect=Exception("Network error")):
+        with patch_transport_get(side_effect=Exception("Network error")):
             result = download_binary(
                 "https://i0.hdslb.com/bfs/archive/test.jpg",
                 self.thumbs_dir / "test.jpg"
@@ -243,7 +250,7 @@ class TestCoverDownloader(unittest.TestCase):
         mock_img_response.__enter__ = Mock(return_value=mock_img_response)
         mock_img_response.__exit__ = Mock(return_value=False)
 
-        with patch('requests.get', return_value=mock_img_response):
+        with patch_transport_get(return_value=mock_img_response):
             result = download_cover(video, self.thumbs_dir, quiet=True)
             self.assertEqual(result['status'], 'success')
             self.assertEqual(result['bvid'], 'BV19YzYBjELJ')
@@ -262,7 +269,7 @@ class TestCoverDownloader(unittest.TestCase):
         mock_img_response.__enter__ = Mock(return_value=mock_img_response)
         mock_img_response.__exit__ = Mock(return_value=False)
 
-        with patch('requests.get', return_value=mock_img_response):
+        with patch_transport_get(return_value=mock_img_response):
             result = download_cover(video, self.thumbs_dir, quiet=True)
             self.assertEqual(result['status'], 'success')
             self.assertEqual(result['bvid'], 'BV19YzYBjELJ')
@@ -282,7 +289,7 @@ class TestCoverDownloader(unittest.TestCase):
         mock_img_response.__enter__ = Mock(return_value=mock_img_response)
         mock_img_response.__exit__ = Mock(return_value=False)
 
-        with patch('requests.get', return_value=mock_img_response):
+        with patch_transport_get(return_value=mock_img_response):
             result = download_cover(video, self.thumbs_dir, quiet=True)
             self.assertEqual(result['status'], 'success')
             self.assertEqual(result['bvid'], 'BV19YzYBjELJ')
@@ -328,7 +335,7 @@ class TestCoverDownloader(unittest.TestCase):
             img_response.__exit__ = Mock(return_value=False)
             return img_response
 
-        with patch('requests.get', side_effect=mock_get):
+        with patch_transport_get(side_effect=mock_get):
             results = download_all_covers(videos_path, self.thumbs_dir, quiet=True)
 
             self.assertGreater(results['success'], 0)
@@ -359,7 +366,7 @@ class TestCoverDownloader(unittest.TestCase):
         mock_img_response.__enter__ = Mock(return_value=mock_img_response)
         mock_img_response.__exit__ = Mock(return_value=False)
 
-        with patch('requests.get', return_value=mock_img_response):
+        with patch_transport_get(return_value=mock_img_response):
             results = download_all_covers(videos_path, self.thumbs_dir, quiet=True, max_workers=2)
 
             self.assertGreater(results['success'], 0)
@@ -417,5 +424,42 @@ class TestCoverDownloader(unittest.TestCase):
         self.assertNotIn("BV15NzrBBEJQ", existing_covers)
 
 
+class TestDownloadTransport(unittest.TestCase):
+    """封面下载连接池测试类"""
+
+    def setUp(self):
+        from src.downloader.download_thumbs import close_download_transport
+        close_download_transport()
+
+    tearDown = setUp
+
+    def test_pool_sized_by_max_workers(self):
+        """测试连接池大小等于下载线程数，只增大不缩小"""
+        from src.downloader.download_thumbs import get_download_transport
+
+        transport = get_download_transport(6)
+        stats = transport.get_stats()
+        self.assertEqual(stats['max_connections'], 6)
+        self.assertEqual(stats['per_host_limit'], 6)
+        self.assertIs(get_download_transport(), transport)
+        self.assertIs(get_download_transport(2), transport)
+
+        larger = get_download_transport(16)
+        self.assertIsNot(larger, transport)
+        self.assertEqual(larger.get_stats()['max_connections'], 16)
+        self.assertEqual(larger.get_stats()['per_host_limit'], 8)
+
+    def test_retry_config_applied(self):
+        """测试重试和超时配置传入连接池"""
+        from src.downloader.download_thumbs import get_download_transport
+
+        config = {'download_timeout': 7, 'download_retries': 5, 'download_backoff': 0.1,
+                  'download_per_host': 2}
+        with patch('src.downloader.download_thumbs.get_cover_config', return_value=config):
+            transport = get_download_transport(4).async_transport
+        self.assertEqual((transport.timeout, transport.retries, transport.backoff_factor), (7, 5, 0.1))
+        self.assertEqual(transport.per_host_limit, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -20,8 +20,11 @@ from downloader.download_thumbs import (
     download_all_covers,
     convert_to_webp,
     get_existing_cover_filename,
-    extract_bvid
+    extract_bvid,
+    plan_cover_downloads,
+    collect_cover_field_changes
 )
+from downloader.cover_manifest import CoverManifest
 
 
 class TestExtractBvid:
@@ -269,9 +272,10 @@ class TestDownloadAllCovers:
     @patch('downloader.download_thumbs.download_binary')
     def test_download_all_covers_skips_existing(self, mock_download):
         """测试跳过已存在的封面"""
-        # Arrange - 创建一个已存在的封面
+        # Arrange - 创建一个已存在的封面（能被完整解码，否则会被视为损坏并重新下载）
+        from PIL import Image
         existing_file = self.thumbs_dir / 'BV1XCffBPEj4.jpg'
-        existing_file.write_bytes(b'fake image data')
+        Image.new('RGB', (16, 9), (200, 30, 30)).save(existing_file, 'JPEG')
         mock_download.return_value = True
         
         # Act
@@ -288,6 +292,40 @@ class TestDownloadAllCovers:
         assert result['success'] == 1  # 只有第二个视频需要下载
 
 
+class TestCoverDownloadStages:
+    """测试批量下载的预过滤与字段对比阶段"""
+    
+    def test_plan_and_field_changes(self, tmp_path):
+        """测试预过滤按清单分出需要下载、重新下载和条件请求的封面，只写回有变化的字段"""
+        videos = [
+            {'bv': 'BV1new', 'cover_url': 'https://i0.hdslb.com/bfs/archive/new.jpg'},
+            {'bv': 'BV1moved', 'cover': 'BV1moved.webp', 'cover_url': 'https://i0.hdslb.com/bfs/archive/b.jpg'},
+            {'bv': 'BV1same', 'cover': 'BV1same.webp', 'blurhash': 'LKO2',
+             'cover_url': 'https://i0.hdslb.com/bfs/archive/c.jpg@320w'},
+            {'title': '没有BV号'},
+        ]
+        videos_path = tmp_path / 'videos.json'
+        videos_path.write_text(json.dumps(videos, ensure_ascii=False), encoding='utf-8')
+        manifest = CoverManifest(tmp_path, {
+            'BV1moved': {'file': 'BV1moved.webp', 'source_url': 'https://i0.hdslb.com/bfs/archive/a.jpg'},
+            'BV1same': {'file': 'BV1same.webp', 'source_url': 'https://i0.hdslb.com/bfs/archive/c.jpg'},
+        })
+        
+        plan = plan_cover_downloads(videos_path, manifest, 'conditional')
+        assert [video['bv'] for video in plan['videos']] == ['BV1new', 'BV1moved']
+        assert plan['refresh_bvids'] == {'BV1moved'}
+        assert plan['revalidate_bvids'] == ['BV1same']
+        assert plan['existing_files'] == {'BV1moved': 'BV1moved.webp', 'BV1same': 'BV1same.webp'}
+        assert (plan['skipped'], plan['video_count']) == (2, 4)
+        assert plan_cover_downloads(videos_path, manifest, 'off')['refresh_bvids'] == set()
+        
+        changes = collect_cover_field_changes(
+            {'BV1new': 'BV1new.webp', 'BV1moved': 'BV1moved.webp', 'BV1same': 'BV1same.webp'},
+            {}, {'BV1new': 'LEHV', 'BV1same': 'LKO2'}, plan['current']
+        )
+        assert changes == {'BV1new': {'cover': 'BV1new.webp', 'blurhash': 'LEHV'}}
+
+
 class TestGetExistingCoverFilename:
     """测试获取已存在封面文件名功能"""
     
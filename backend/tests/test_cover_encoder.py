@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+封面 WebP 编码进程池测试
+"""
+
+import io
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.downloader.cover_encoder import CoverEncoder, encode_variants, encode_webp, encode_webp_bytes
+from src.downloader.download_thumbs import (
+    build_cdn_variant_url,
+    cleanup_stale_temp_files,
+    download_all_covers,
+    download_cover,
+    generate_cover_variants,
+    get_existing_covers,
+    get_variant_specs,
+    write_file_atomic
+)
+
+
+def write_jpeg(path, color=(200, 30, 30), mode='RGB'):
+    """写入一张测试图片"""
+    Image.new(mode, (64, 40), color).save(path, 'PNG' if mode != 'RGB' else 'JPEG')
+    return path
+
+
+def jpeg_bytes(color=(200, 30, 30)):
+    """生成一张测试图片的字节"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 40), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def fake_download(url, outpath, quiet=False):
+    """模拟下载：向内存缓冲区写入一张 JPEG"""
+    outpath.write(jpeg_bytes())
+    return True
+
+
+class TestCoverEncoder:
+    """编码器测试类"""
+
+    def test_encode_webp_converts_rgba(self, tmp_path):
+        """测试 RGBA 图片转换为 RGB WebP"""
+        source = write_jpeg(tmp_path / "a.png", color=(0, 0, 0, 0), mode='RGBA')
+        assert encode_webp(source, tmp_path / "a.webp", quality=80, method=4)
+        with Image.open(tmp_path / "a.webp") as img:
+            assert img.format == 'WEBP' and img.mode == 'RGB'
+
+    def test_encode_webp_invalid_input(self, tmp_path):
+        """测试无效输入返回 False"""
+        (tmp_path / "bad.jpg").write_bytes(b"not an image")
+        assert not encode_webp(tmp_path / "bad.jpg", tmp_path / "bad.webp")
+
+    def test_encode_webp_bytes(self):
+        """测试内存编码，无法解码时返回 None"""
+        data = encode_webp_bytes(jpeg_bytes(), quality=80, method=0)
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.format == 'WEBP'
+        assert encode_webp_bytes(b"not an image") is None
+
+    @pytest.mark.parametrize("workers", [0, 1])
+    def test_submit_inline_and_process_pool(self, tmp_path, workers):
+        """测试当前线程编码和进程池编码结果一致"""
+        source = write_jpeg(tmp_path / "a.jpg")
+        with CoverEncoder(quality=70, method=0, workers=workers) as encoder:
+            assert encoder.submit(source, tmp_path / "a.webp").result()
+            assert encoder.submit_bytes(jpeg_bytes()).result()[:4] == b'RIFF'
+            assert encoder.encode_bytes(jpeg_bytes())[:4] == b'RIFF'
+        assert (tmp_path / "a.webp").stat().st_size > 0
+
+    def test_process_pool_uses_spawn(self):
+        """测试编码进程池用 spawn 启动，子进程不继承流水线线程持有的锁"""
+        with CoverEncoder(workers=1) as encoder:
+            assert encoder._executor._mp_context.get_start_method() == 'spawn'
+            assert encoder.submit_bytes(jpeg_bytes()).result()[:4] == b'RIFF'
+
+    def test_invalid_arguments(self):
+        """测试参数校验"""
+        with pytest.raises(ValueError):
+            CoverEncoder(quality=101, workers=0)
+        with pytest.raises(ValueError):
+            CoverEncoder(method=7, workers=0)
+        with pytest.raises(ValueError):
+            CoverEncoder(workers=-1)
+
+    def test_default_workers_is_cpu_count(self):
+        """测试默认进程数等于 CPU 核心数"""
+        with patch('src.downloader.cover_encoder.os.cpu_count', return_value=3):
+            encoder = CoverEncoder()
+        assert encoder.workers == 3
+        encoder.shutdown()
+
+
+class TestEncodeStage:
+    """下载与编码分阶段测试类"""
+
+    def test_download_all_covers_encodes_in_separate_stage(self, tmp_path):
+        """测试下载线程只下载原图，编码由编码器完成"""
+        videos_path = tmp_path / "videos.json"
+        thumbs_dir = tmp_path / "thumbs"
+        videos = [{"id": str(i + 1), "bv": f"BV1enc{i}", "cover": "",
+                   "cover_url": f"https://i0.hdslb.com/bfs/archive/{i}.jpg"} for i in range(3)]
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+
+        encoder = CoverEncoder(quality=60, method=0, workers=0)
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=fake_download), \
+                patch('src.downloader.download_thumbs.convert_to_webp') as mock_convert, \
+                patch.object(encoder, 'submit_bytes', wraps=encoder.submit_bytes) as mock_submit:
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, max_workers=2, encoder=encoder,
+                                          variants=[])
+
+        mock_convert.assert_not_called()
+        assert mock_submit.call_count == 3
+        assert results['success'] == 3
+        assert sorted(p.name for p in thumbs_dir.iterdir()) == [
+            '.cover_manifest.json', 'BV1enc0.webp', 'BV1enc1.webp', 'BV1enc2.webp'
+        ]
+        saved = json.loads(videos_path.read_text(encoding='utf-8'))
+        assert [item['cover'] for item in saved] == ['BV1enc0.webp', 'BV1enc1.webp', 'BV1enc2.webp']
+
+
+class TestInMemoryCover:
+    """内存下载与原子写入测试类"""
+
+    def test_download_cover_writes_only_final_file(self, tmp_path):
+        """测试下载封面时只写入最终文件，不产生临时文件"""
+        video = {'bv': 'BV1mem', 'cover_url': 'https://i0.hdslb.com/bfs/archive/a.jpg'}
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=fake_download):
+            result = download_cover(video, tmp_path, quiet=True)
+
+        assert result['status'] == 'success' and result['cover'] == 'BV1mem.webp'
+        assert [p.name for p in tmp_path.iterdir()] == ['BV1mem.webp']
+
+    def test_download_cover_keeps_original_when_decode_fails(self, tmp_path):
+        """测试无法解码时原样保存原图"""
+        def download(url, outpath, quiet=False):
+            outpath.write(b"not an image")
+            return True
+
+        video = {'bv': 'BV1raw', 'cover_url': 'https://i0.hdslb.com/bfs/archive/a.png'}
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download):
+            result = download_cover(video, tmp_path, quiet=True)
+
+        assert result['cover'] == 'BV1raw.png'
+        assert (tmp_path / 'BV1raw.png').read_bytes() == b"not an image"
+        assert [p.name for p in tmp_path.iterdir()] == ['BV1raw.png']
+
+    def test_write_file_atomic_failure_leaves_no_file(self, tmp_path):
+        """测试写入中途失败时不留下目标文件和临时文件"""
+        with patch('src.downloader.download_thumbs.os.replace', side_effect=OSError("磁盘已满")):
+            with pytest.raises(OSError):
+                write_file_atomic(tmp_path / "BV1a.webp", b"data")
+        assert list(tmp_path.iterdir()) == []
+
+        write_file_atomic(tmp_path / "BV1a.webp", b"data")
+        assert (tmp_path / "BV1a.webp").read_bytes() == b"data"
+
+    def test_cleanup_stale_temp_files(self, tmp_path):
+        """测试清理旧版临时文件和过期的原子写入临时文件，保留正在写入的临时文件"""
+        (tmp_path / "BV1a_temp.jpg").write_bytes(b"x")
+        (tmp_path / ".BV1b.webp.old.tmp").write_bytes(b"x")
+        (tmp_path / ".BV1c.webp.new.tmp").write_bytes(b"x")
+        (tmp_path / "BV1d.webp").write_bytes(b"x")
+        old = time.time() - 3600
+        os.utime(tmp_path / ".BV1b.webp.old.tmp", (old, old))
+
+        assert cleanup_stale_temp_files(tmp_path) == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['.BV1c.webp.new.tmp', 'BV1d.webp']
+
+
+class TestCdnVariant:
+    """CDN 缩放图测试类"""
+
+    def test_build_cdn_variant_url(self):
+        """测试只为B站图片CDN地址构造缩放地址，并替换已有的 @ 参数"""
+        assert build_cdn_variant_url("https://i0.hdslb.com/bfs/archive/a.jpg", 672, 378) == \
+            "https://i0.hdslb.com/bfs/archive/a.jpg@672w_378h_1c.webp"
+        assert build_cdn_variant_url("https://i1.hdslb.com/bfs/archive/a.jpg@100w.jpg", 320, 180) == \
+            "https://i1.hdslb.com/bfs/archive/a.jpg@320w_180h_1c.webp"
+        assert build_cdn_variant_url("https://example.com/bfs/archive/a.jpg", 672, 378) is None
+        assert build_cdn_variant_url("https://evilhdslb.com/bfs/archive/a.jpg", 672, 378) is None
+        assert build_cdn_variant_url("https://i0.hdslb.com/other/a.jpg", 672, 378) is None
+
+    def test_cdn_variant_saved_without_local_encode(self, tmp_path):
+        """测试CDN返回 WebP 时直接保存，不在本地编码"""
+        webp = encode_webp_bytes(jpeg_bytes(), method=0)
+        urls = []
+
+        def download(url, outpath, quiet=False):
+            urls.append(url)
+            outpath.write(webp if '@' in url else jpeg_bytes())
+            return True
+
+        video = {'bv': 'BV1cdn', 'cover_url': '//i0.hdslb.com/bfs/archive/a.jpg'}
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download), \
+                patch('src.downloader.download_thumbs.encode_webp_bytes') as mock_encode:
+            result = download_cover(video, tmp_path, quiet=True, cdn_variant={'width': 672, 'height': 378})
+
+        mock_encode.assert_not_called()
+        assert urls == ["https://i0.hdslb.com/bfs/archive/a.jpg@672w_378h_1c.webp"]
+        assert result['cover'] == 'BV1cdn.webp'
+        assert (tmp_path / 'BV1cdn.webp').read_bytes() == webp
+
+    @pytest.mark.parametrize("variant_ok", [False, True])
+    def test_fallback_to_local_encode(self, tmp_path, variant_ok):
+        """测试CDN缩放图下载失败或不是 WebP 时，回退到原图并在本地编码"""
+        urls = []
+
+        def download(url, outpath, quiet=False):
+            urls.append(url)
+            if '@' in url and not variant_ok:
+                return False
+            outpath.write(jpeg_bytes())
+            return True
+
+        video = {'bv': 'BV1fb', 'cover_url': 'https://i0.hdslb.com/bfs/archive/a.jpg'}
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download):
+            result = download_cover(video, tmp_path, quiet=True, cdn_variant={'width': 672, 'height': 378})
+
+        assert len(urls) == 2 and urls[1] == "https://i0.hdslb.com/bfs/archive/a.jpg"
+        assert result['cover'] == 'BV1fb.webp'
+        with Image.open(tmp_path / 'BV1fb.webp') as img:
+            assert img.format == 'WEBP' and img.size == (64, 40)
+
+
+class TestCoverVariants:
+    """多尺寸封面变体测试类"""
+
+    def test_encode_variants_single_decode(self):
+        """测试一次解码生成多个宽度和格式，源图较窄时不放大"""
+        encoded = encode_variants(jpeg_bytes(), [(32, 'webp'), (32, 'jpg'), (16, 'webp'), (128, 'webp')],
+                                  quality=60, method=0)
+
+        assert set(encoded) == {(32, 'webp'), (32, 'jpg'), (16, 'webp'), (128, 'webp')}
+        sizes = {}
+        for key, data in encoded.items():
+            with Image.open(io.BytesIO(data)) as img:
+                sizes[key] = (img.format, img.size)
+        assert sizes[(32, 'webp')] == ('WEBP', (32, 20))
+        assert sizes[(32, 'jpg')] == ('JPEG', (32, 20))
+        assert sizes[(16, 'webp')] == ('WEBP', (16, 10))
+        assert sizes[(128, 'webp')] == ('WEBP', (64, 40))
+        assert encode_variants(b"not an image", [(32, 'webp')]) == {}
+
+    def test_variants_off_by_default(self):
+        """测试默认不生成封面变体，配置宽度后按格式和宽度生成"""
+        assert get_variant_specs() == []
+        config = {'variant_widths': [320, 160], 'variant_formats': ['webp']}
+        with patch('src.downloader.download_thumbs.get_cover_config', return_value=config):
+            assert get_variant_specs() == [(160, 'webp'), (320, 'webp')]
+
+    def test_generate_cover_variants_is_incremental(self, tmp_path):
+        """测试只为缺失的变体编码，已生成的变体不重新编码"""
+        (tmp_path / "BV1a.webp").write_bytes(encode_webp_bytes(jpeg_bytes(), method=0))
+        (tmp_path / "BV1a_16w.webp").write_bytes(b"existing")
+        variants = [(16, 'webp'), (32, 'webp')]
+
+        encoder = CoverEncoder(quality=60, method=0, workers=0)
+        with patch.object(encoder, 'submit_variants', wraps=encoder.submit_variants) as mock_submit:
+            manifest = generate_cover_variants(tmp_path, {'BV1a': 'BV1a.webp', 'BV1x': 'BV1x.webp'},
+                                               encoder, variants, quiet=True)
+            assert mock_submit.call_args[0][1] == [(32, 'webp')]
+            generate_cover_variants(tmp_path, {'BV1a': 'BV1a.webp'}, encoder, variants, quiet=True)
+
+        assert mock_submit.call_count == 1
+        assert (tmp_path / "BV1a_16w.webp").read_bytes() == b"existing"
+        assert manifest == {'BV1a': [
+            {'file': 'BV1a_16w.webp', 'width': 16, 'format': 'webp'},
+            {'file': 'BV1a_32w.webp', 'width': 32, 'format': 'webp'},
+        ]}
+        assert get_existing_covers(tmp_path) == {'BV1a'}
+
+    def test_download_all_covers_records_variants(self, tmp_path):
+        """测试下载后生成变体并写入 videos.json 的 cover_variants 字段"""
+        videos_path = tmp_path / "videos.json"
+        thumbs_dir = tmp_path / "thumbs"
+        videos = [{"id": "1", "bv": "BV1var", "cover": "",
+                   "cover_url": "https://i0.hdslb.com/bfs/archive/a.jpg"}]
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+
+        encoder = CoverEncoder(quality=60, method=0, workers=0)
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=fake_download):
+            download_all_covers(videos_path, thumbs_dir, quiet=True, encoder=encoder, variants=[(32, 'webp')])
+
+        saved = json.loads(videos_path.read_text(encoding='utf-8'))
+        assert saved[0]['cover'] == 'BV1var.webp'
+        assert saved[0]['cover_variants'] == [{'file': 'BV1var_32w.webp', 'width': 32, 'format': 'webp'}]
+        assert sorted(p.name for p in thumbs_dir.iterdir()) == ['.cover_manifest.json', 'BV1var.webp', 'BV1var_32w.webp']
+
+        # 再次运行时变体已存在，不重新编码，也不重写 videos.json
+        mtime = videos_path.stat().st_mtime_ns
+        with patch.object(encoder, 'submit_variants') as mock_submit:
+            download_all_covers(videos_path, thumbs_dir, quiet=True, encoder=encoder, variants=[(32, 'webp')])
+        mock_submit.assert_not_called()
+        assert videos_path.stat().st_mtime_ns == mtime
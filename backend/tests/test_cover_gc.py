@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+封面目录清理测试
+"""
+
+import json
+
+import pytest
+
+from src.downloader.cover_gc import collect_cover_garbage, collect_live_covers, find_cover_garbage
+from src.downloader.cover_manifest import CoverManifest
+
+
+def write_timeline(path, videos):
+    """写入时间线文件"""
+    path.write_text(json.dumps(videos), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def covers(tmp_path):
+    """两个数据类型的时间线和一个共用的封面目录"""
+    thumbs_dir = tmp_path / "thumbs"
+    (thumbs_dir / "atlas").mkdir(parents=True)
+    timelines = [
+        write_timeline(tmp_path / "a.json", [
+            {'bv': 'BV1live', 'cover': 'BV1live.webp',
+             'cover_variants': [{'file': 'BV1live_160w.webp', 'width': 160, 'format': 'webp'}]},
+            {'bv': 'BV1pending', 'cover': 'BV1pending.webp'},
+        ]),
+        write_timeline(tmp_path / "b.json", [{'bv': 'BV1other', 'cover': 'BV1other.jpg'}]),
+    ]
+    files = {
+        'BV1live.webp': 10, 'BV1live.jpg': 20, 'BV1live_160w.webp': 3, 'BV1live_320w.webp': 4,
+        'BV1live_temp.jpg': 50, 'BV1pending.jpg': 7, 'BV1other.jpg': 8,
+        'BV1gone.webp': 100, 'BV1gone_160w.avif': 5,
+        '.cover_manifest.json': 1, 'readme.txt': 1, 'atlas/a_2026-01.webp': 1,
+    }
+    for name, size in files.items():
+        (thumbs_dir / name).write_bytes(b'x' * size)
+    return thumbs_dir, timelines
+
+
+class TestCoverGC:
+    """封面目录清理测试类"""
+
+    def test_live_covers_across_timelines(self, covers):
+        """测试合并所有数据类型的时间线，任一时间线缺失时返回 None"""
+        thumbs_dir, timelines = covers
+        live = collect_live_covers(timelines)
+        assert live['BV1live'] == {'BV1live.webp', 'BV1live_160w.webp'}
+        assert live['BV1other'] == {'BV1other.jpg'}
+        assert collect_live_covers(timelines + [thumbs_dir / "missing.json"]) is None
+
+    def test_find_garbage(self, covers):
+        """测试识别孤立、临时和旧格式文件，引用的封面还没下载时保留旧文件"""
+        thumbs_dir, timelines = covers
+        garbage = find_cover_garbage(thumbs_dir, collect_live_covers(timelines))
+        assert [(item['file'], item['reason'], item['size']) for item in garbage] == [
+            ('BV1gone.webp', 'orphaned', 100),
+            ('BV1gone_160w.avif', 'orphaned', 5),
+            ('BV1live.jpg', 'superseded', 20),
+            ('BV1live_320w.webp', 'superseded', 4),
+            ('BV1live_temp.jpg', 'temp', 50),
+        ]
+
+    def test_dry_run_reports_only(self, covers):
+        """测试 dry-run 只统计可回收的空间，不删除文件"""
+        thumbs_dir, timelines = covers
+        before = sorted(p.name for p in thumbs_dir.iterdir())
+        results = collect_cover_garbage(thumbs_dir, 'dry-run', timelines, quiet=True)
+        assert (results['orphaned'], results['temp'], results['superseded']) == (2, 1, 2)
+        assert results['bytes'] == 179 and results['removed'] == 0
+        assert sorted(p.name for p in thumbs_dir.iterdir()) == before
+
+    def test_delete_updates_manifest(self, covers):
+        """测试删除可清理的文件，并把被删除的主封面移出封面清单"""
+        thumbs_dir, timelines = covers
+        manifest = CoverManifest(thumbs_dir, {
+            'BV1gone': {'file': 'BV1gone.webp'}, 'BV1live': {'file': 'BV1live.webp'},
+        })
+        results = collect_cover_garbage(thumbs_dir, 'delete', timelines, manifest=manifest, quiet=True)
+
+        assert results['removed'] == 5 and results['failed'] == 0
+        assert sorted(p.name for p in thumbs_dir.iterdir()) == [
+            '.cover_manifest.json', 'BV1live.webp', 'BV1live_160w.webp', 'BV1other.jpg',
+            'BV1pending.jpg', 'atlas', 'readme.txt',
+        ]
+        assert list(manifest) == ['BV1live']
+        assert list(CoverManifest.load(thumbs_dir)) == ['BV1live']
+
+    def test_quarantine_and_skip(self, covers, tmp_path):
+        """测试隔离模式移动文件；时间线不完整时不清理"""
+        thumbs_dir, timelines = covers
+        results = collect_cover_garbage(thumbs_dir, 'delete', timelines + [tmp_path / "missing.json"], quiet=True)
+        assert results['skipped'] is True and (thumbs_dir / "BV1gone.webp").exists()
+
+        results = collect_cover_garbage(thumbs_dir, 'quarantine', timelines,
+                                        quarantine_dir=tmp_path / "quarantine", quiet=True)
+        assert results['removed'] == 5
+        moved = [p.name for p in (tmp_path / "quarantine").glob("*/*")]
+        assert sorted(moved) == sorted(results['files'])
+        assert not (thumbs_dir / "BV1gone.webp").exists()
+
+        with pytest.raises(ValueError):
+            collect_cover_garbage(thumbs_dir, 'purge', timelines)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+封面清单与完整性校验测试
+"""
+
+import hashlib
+import io
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from src.crawler.utils.http_transport import TransportResponse
+from src.downloader import cover_manifest
+from src.downloader.cover_encoder import CoverEncoder
+from src.downloader.cover_manifest import CoverManifest, is_cover_filename, load_cover_manifest
+from src.downloader.download_thumbs import download_all_covers, revalidate_covers
+
+
+def jpeg_bytes(color=(200, 30, 30)):
+    """生成一张测试图片的字节"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 40), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class TestCoverManifest:
+    """封面清单测试类"""
+
+    def test_is_cover_filename(self):
+        """测试只把 {BV号}.{扩展名} 视为主封面"""
+        assert is_cover_filename('BV1a.webp') and is_cover_filename('BV1a.JPG')
+        assert not is_cover_filename('BV1a_160w.webp')
+        assert not is_cover_filename('BV1a_temp.jpg')
+        assert not is_cover_filename('.BV1a.webp.x.tmp')
+        assert not is_cover_filename('readme.png')
+
+    def test_verify_detects_corrupt_covers(self, tmp_path):
+        """测试空文件和截断的封面被删除并移出清单，完好的封面记录尺寸和哈希"""
+        data = jpeg_bytes()
+        (tmp_path / "BV1good.jpg").write_bytes(data)
+        (tmp_path / "BV1empty.webp").write_bytes(b"")
+        (tmp_path / "BV1cut.jpg").write_bytes(data[:len(data) // 2])
+
+        manifest = CoverManifest.load(tmp_path)
+        results = manifest.verify(workers=2, quiet=True)
+
+        assert results['verified'] == 1
+        assert sorted(results['corrupt']) == ['BV1cut', 'BV1empty']
+        assert list(manifest) == ['BV1good']
+        entry = manifest.get('BV1good')
+        assert (entry['file'], entry['width'], entry['height'], entry['size']) == ('BV1good.jpg', 64, 40, len(data))
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['BV1good.jpg']
+
+    def test_only_changed_files_are_decoded(self, tmp_path):
+        """测试内容未变的封面不重新解码，变化和缺失的封面被发现"""
+        for name in ['BV1a.jpg', 'BV1b.jpg', 'BV1c.jpg']:
+            (tmp_path / name).write_bytes(jpeg_bytes())
+        load_cover_manifest(tmp_path, quiet=True)
+
+        (tmp_path / "BV1b.jpg").write_bytes(jpeg_bytes((0, 0, 255)) + b"\0")
+        (tmp_path / "BV1c.jpg").unlink()
+
+        with patch.object(cover_manifest, 'inspect_cover', wraps=cover_manifest.inspect_cover) as mock_inspect:
+            manifest = load_cover_manifest(tmp_path, quiet=True)
+
+        assert [call.args[0].name for call in mock_inspect.call_args_list] == ['BV1b.jpg']
+        assert sorted(manifest) == ['BV1a', 'BV1b']
+        saved = json.loads((tmp_path / ".cover_manifest.json").read_text(encoding='utf-8'))
+        assert saved['covers']['BV1b']['sha256'] == hashlib.sha256((tmp_path / "BV1b.jpg").read_bytes()).hexdigest()
+
+    def test_mtime_only_change_is_not_rewritten(self, tmp_path):
+        """测试只有修改时间变化（重新 checkout）的封面不重新解码，清单保留下载信息且不重写"""
+        data = jpeg_bytes()
+        (tmp_path / "BV1a.jpg").write_bytes(data)
+        manifest = CoverManifest(tmp_path)
+        source = {'source_sha256': 'abc', 'etag': '"v1"', 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+        entry = dict(manifest.record('BV1a', 'BV1a.jpg', data, 'https://i0.hdslb.com/bfs/archive/a.jpg', source))
+        manifest.save()
+        saved = (tmp_path / ".cover_manifest.json").read_bytes()
+        os.utime(tmp_path / "BV1a.jpg", ns=(1, 1))
+
+        with patch.object(cover_manifest, 'inspect_cover') as mock_inspect:
+            manifest = CoverManifest.load(tmp_path)
+            results = manifest.verify(workers=2, quiet=True)
+
+        mock_inspect.assert_not_called()
+        assert (results['unchanged'], results['verified']) == (1, 0)
+        assert manifest.get('BV1a') == entry and 'mtime_ns' not in entry
+        assert manifest.save() is False
+        assert (tmp_path / ".cover_manifest.json").read_bytes() == saved
+
+    def test_frontend_manifest_lives_in_backend_data(self, tmp_path):
+        """测试配置的前端封面目录的清单保存在 backend/data 下，旧清单迁移后删除"""
+        thumbs_dir = tmp_path / "public" / "thumbs"
+        thumbs_dir.mkdir(parents=True)
+        data = jpeg_bytes()
+        (thumbs_dir / "BV1a.jpg").write_bytes(data)
+        legacy = CoverManifest(thumbs_dir, path=thumbs_dir / ".cover_manifest.json")
+        legacy.record('BV1a', 'BV1a.jpg', data, 'https://i0.hdslb.com/bfs/archive/a.jpg')
+        legacy.save()
+
+        manifest_file = tmp_path / "data" / "cover_manifest.json"
+        with patch.object(cover_manifest, 'get_frontend_thumbs_dir', return_value=thumbs_dir), \
+                patch.object(cover_manifest, 'PROJECT_ROOT', tmp_path):
+            manifest = load_cover_manifest(thumbs_dir, quiet=True)
+
+        assert manifest.path == manifest_file and list(manifest) == ['BV1a']
+        assert manifest_file.exists() and sorted(p.name for p in thumbs_dir.iterdir()) == ['BV1a.jpg']
+
+    def test_record_and_save(self, tmp_path):
+        """测试记录刚写入的封面，没有变化时不重写清单"""
+        data = jpeg_bytes()
+        (tmp_path / "BV1new.jpg").write_bytes(data)
+        manifest = CoverManifest(tmp_path)
+        entry = manifest.record('BV1new', 'BV1new.jpg', data, 'https://i0.hdslb.com/bfs/archive/a.jpg')
+
+        assert entry['width'] == 64 and entry['source_url'] == 'https://i0.hdslb.com/bfs/archive/a.jpg'
+        assert manifest.save() is True
+        assert manifest.save() is False
+        assert CoverManifest.load(tmp_path).get('BV1new') == entry
+
+        (tmp_path / ".cover_manifest.json").write_text("not json", encoding='utf-8')
+        assert len(CoverManifest.load(tmp_path)) == 0
+
+
+class TestManifestDownload:
+    """按清单跳过和重新下载测试类"""
+
+    def test_truncated_cover_is_redownloaded(self, tmp_path):
+        """测试截断的封面被重新下载，完好的封面按清单跳过且不检查文件"""
+        thumbs_dir = tmp_path / "thumbs"
+        thumbs_dir.mkdir()
+        (thumbs_dir / "BV1ok.jpg").write_bytes(jpeg_bytes())
+        (thumbs_dir / "BV1cut.jpg").write_bytes(jpeg_bytes()[:100])
+        videos = [
+            {"id": "1", "bv": "BV1ok", "cover": "BV1ok.jpg", "cover_url": "https://i0.hdslb.com/bfs/archive/ok.jpg"},
+            {"id": "2", "bv": "BV1cut", "cover": "BV1cut.jpg", "cover_url": "https://i0.hdslb.com/bfs/archive/cut.jpg"},
+        ]
+        videos_path = tmp_path / "videos.json"
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+
+        def download(url, outpath, quiet=False):
+            outpath.write(jpeg_bytes())
+            return True
+
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download) as mock_download, \
+                patch('src.downloader.download_thumbs.get_existing_cover_filename') as mock_lookup:
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, enable_webp_conversion=False,
+                                          blurhash=False)
+
+        mock_lookup.assert_not_called()
+        assert [call.args[0] for call in mock_download.call_args_list] == ["https://i0.hdslb.com/bfs/archive/cut.jpg"]
+        assert results['success'] == 1 and results['skipped'] == 1
+        manifest = CoverManifest.load(thumbs_dir)
+        assert manifest.get('BV1cut')['source_url'] == "https://i0.hdslb.com/bfs/archive/cut.jpg"
+        assert manifest.get('BV1cut')['sha256'] == manifest.get('BV1ok')['sha256']
+
+
+class TestCoverRefresh:
+    """已有封面刷新测试类"""
+
+    def write_covers(self, tmp_path, videos, entries):
+        """写入封面、清单和 videos.json"""
+        thumbs_dir = tmp_path / "thumbs"
+        thumbs_dir.mkdir()
+        manifest = CoverManifest(thumbs_dir)
+        for bv, (url, data, source) in entries.items():
+            (thumbs_dir / f"{bv}.jpg").write_bytes(data)
+            manifest.record(bv, f"{bv}.jpg", data, url, source)
+        manifest.save()
+        videos_path = tmp_path / "videos.json"
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+        return videos_path, thumbs_dir
+
+    def test_changed_cover_url_is_redownloaded(self, tmp_path):
+        """测试 cover_url 变化的封面重新下载并重新生成变体，CDN 缩放参数不同不视为变化"""
+        old = jpeg_bytes()
+        videos = [
+            {"id": "1", "bv": "BV1new", "cover": "BV1new.jpg", "cover_url": "https://i0.hdslb.com/bfs/archive/b.jpg"},
+            {"id": "2", "bv": "BV1same", "cover": "BV1same.jpg", "cover_url": "//i0.hdslb.com/bfs/archive/s.jpg"},
+        ]
+        videos_path, thumbs_dir = self.write_covers(tmp_path, videos, {
+            'BV1new': ("https://i0.hdslb.com/bfs/archive/a.jpg", old, None),
+            'BV1same': ("https://i0.hdslb.com/bfs/archive/s.jpg@672w_378h_1c.webp", old, None),
+        })
+        (thumbs_dir / "BV1new_160w.jpg").write_bytes(old)
+
+        def download(url, outpath, quiet=False):
+            outpath.write(jpeg_bytes((0, 0, 255)))
+            return True
+
+        encoder = CoverEncoder(workers=0)
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download) as mock_download, \
+                patch.object(encoder, 'submit_variants', wraps=encoder.submit_variants) as mock_variants:
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, encoder=encoder, cdn_resize=False,
+                                          variants=[(160, 'jpg')], blurhash=False, refresh='url')
+
+        assert [call.args[0] for call in mock_download.call_args_list] == ["https://i0.hdslb.com/bfs/archive/b.jpg"]
+        assert results['refreshed'] == 1 and results['skipped'] == 1
+        assert [call.args[1] for call in mock_variants.call_args_list] == [[(160, 'jpg')]] * 2
+        manifest = CoverManifest.load(thumbs_dir)
+        assert manifest.get('BV1new')['source_url'] == "https://i0.hdslb.com/bfs/archive/b.jpg"
+        assert manifest.filename('BV1new') == 'BV1new.webp'
+        saved = json.loads(videos_path.read_text(encoding='utf-8'))
+        assert saved[0]['cover'] == 'BV1new.webp'
+
+    def test_conditional_refresh(self, tmp_path):
+        """测试条件请求：304 和内容相同的 200 只更新 ETag，内容变化时重新保存"""
+        old, new = jpeg_bytes(), jpeg_bytes((0, 0, 255))
+        source = {'source_sha256': hashlib.sha256(old).hexdigest(), 'etag': '"v1"', 'last_modified': None}
+        urls = {bv: f"https://i0.hdslb.com/bfs/archive/{bv}.jpg" for bv in ['BV1a', 'BV1b', 'BV1c']}
+        videos = [{"id": str(i), "bv": bv, "cover": f"{bv}.jpg", "cover_url": url}
+                  for i, (bv, url) in enumerate(urls.items())]
+        videos_path, thumbs_dir = self.write_covers(
+            tmp_path, videos, {bv: (url, old, dict(source)) for bv, url in urls.items()}
+        )
+        responses = {
+            urls['BV1a']: TransportResponse(304, {}, b'', urls['BV1a']),
+            urls['BV1b']: TransportResponse(200, {'etag': '"v2"'}, old, urls['BV1b']),
+            urls['BV1c']: TransportResponse(200, {'etag': '"v3"'}, new, urls['BV1c']),
+        }
+        transport = MagicMock()
+        transport.get.side_effect = lambda url, headers=None: responses[url]
+
+        with patch('src.downloader.download_thumbs.get_download_transport', return_value=transport):
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, enable_webp_conversion=False,
+                                          blurhash=False, refresh='conditional')
+
+        assert all(call.kwargs['headers'] == {'If-None-Match': '"v1"'} for call in transport.get.call_args_list)
+        assert (results['revalidated'], results['refreshed'], results['success']) == (2, 1, 1)
+        assert (thumbs_dir / "BV1c.jpg").read_bytes() == new
+        manifest = CoverManifest.load(thumbs_dir)
+        assert [manifest.get(bv)['etag'] for bv in urls] == ['"v1"', '"v2"', '"v3"']
+        assert manifest.get('BV1c')['source_sha256'] == hashlib.sha256(new).hexdigest()
+
+    def test_conditional_refresh_after_checkout(self, tmp_path):
+        """测试重新 checkout（只有修改时间变化）后条件请求仍带 ETag，并能发现变化的封面"""
+        old, new = jpeg_bytes(), jpeg_bytes((0, 0, 255))
+        source = {'source_sha256': hashlib.sha256(old).hexdigest(), 'etag': '"v1"', 'last_modified': None}
+        url = "https://i0.hdslb.com/bfs/archive/BV1c.jpg"
+        videos_path, thumbs_dir = self.write_covers(
+            tmp_path, [{"id": "1", "bv": "BV1c", "cover": "BV1c.jpg", "cover_url": url}],
+            {'BV1c': (url, old, source)}
+        )
+        os.utime(thumbs_dir / "BV1c.jpg", ns=(1, 1))
+        transport = MagicMock()
+        transport.get.return_value = TransportResponse(200, {'etag': '"v2"'}, new, url)
+
+        with patch('src.downloader.download_thumbs.get_download_transport', return_value=transport):
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, enable_webp_conversion=False,
+                                          blurhash=False, refresh='conditional')
+
+        assert transport.get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+        assert results['refreshed'] == 1
+        assert (thumbs_dir / "BV1c.jpg").read_bytes() == new
+        assert CoverManifest.load(thumbs_dir).get('BV1c')['etag'] == '"v2"'
+
+    def test_revalidate_covers(self, tmp_path):
+        """测试批量条件请求：未变化的只更新清单，变化的交给回调，请求失败的保持不变"""
+        old, new = jpeg_bytes(), jpeg_bytes((0, 0, 255))
+        source = {'source_sha256': hashlib.sha256(old).hexdigest(), 'etag': '"v1"', 'last_modified': None}
+        urls = {bv: f"https://i0.hdslb.com/bfs/archive/{bv}.jpg" for bv in ['BV1a', 'BV1b', 'BV1c']}
+        _, thumbs_dir = self.write_covers(tmp_path, [], {bv: (url, old, dict(source)) for bv, url in urls.items()})
+        manifest = CoverManifest.load(thumbs_dir)
+        responses = {
+            urls['BV1a']: TransportResponse(304, {'etag': '"v2"'}, b'', urls['BV1a']),
+            urls['BV1b']: TransportResponse(200, {'etag': '"v3"'}, new, urls['BV1b']),
+            urls['BV1c']: TransportResponse(503, {}, b'', urls['BV1c']),
+        }
+        transport = MagicMock()
+        transport.get.side_effect = lambda url, headers=None: responses[url]
+
+        changed = []
+        with patch('src.downloader.download_thumbs.get_download_transport', return_value=transport):
+            counts = revalidate_covers(list(urls), manifest, changed.append, max_workers=2, quiet=True)
+
+        assert counts == {'unchanged': 1, 'changed': 1, 'errors': 0}
+        assert [(result['bvid'], result['data']) for result in changed] == [('BV1b', new)]
+        assert [manifest.get(bv)['etag'] for bv in urls] == ['"v2"', '"v1"', '"v1"']
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+封面 BlurHash 占位图测试
+"""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.downloader import cover_placeholder
+from src.downloader.cover_encoder import CoverEncoder
+from src.downloader.cover_placeholder import compute_placeholder, compute_placeholders
+from src.downloader.download_thumbs import backfill_cover_placeholders, download_all_covers, download_cover
+
+
+def image_bytes(color=(255, 0, 0), size=(64, 36), fmt='PNG'):
+    """生成一张纯色测试图片的字节"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def gradient_bytes():
+    """生成一张左右渐变的测试图片的字节"""
+    img = Image.new('RGB', (64, 36))
+    img.putdata([(x * 4, 255 - x * 4, 128) for _ in range(36) for x in range(64)])
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class TestBlurHash:
+    """BlurHash 计算测试类"""
+
+    def test_solid_color(self):
+        """测试纯色图片：尺寸标记和直流分量（原色）"""
+        placeholder = compute_placeholder(image_bytes())
+        assert len(placeholder) == 28
+        assert placeholder[0] == 'L' and placeholder[2:6] == 'TI:j'
+        assert compute_placeholder(image_bytes(), 1, 1) == '00TI:j'
+
+    def test_gradient_has_horizontal_components(self):
+        """测试左右渐变图片的横向分量不为0"""
+        solid = compute_placeholder(image_bytes((128, 128, 128)), 4, 3)
+        placeholder = compute_placeholder(gradient_bytes(), 4, 3)
+        assert len(placeholder) == 28
+        assert placeholder[6:8] != solid[6:8]
+
+    def test_batch_matches_single(self, tmp_path):
+        """测试批量计算与逐张计算一致，无法解码的图片为 None"""
+        (tmp_path / "a.png").write_bytes(gradient_bytes())
+        sources = [tmp_path / "a.png", b"not an image", image_bytes((0, 0, 255), fmt='JPEG')]
+        results = compute_placeholders(sources)
+
+        assert results[0] == compute_placeholder(gradient_bytes())
+        assert results[1] is None
+        assert results[2] == compute_placeholder(image_bytes((0, 0, 255), fmt='JPEG'))
+        assert compute_placeholders([b"bad"]) == [None]
+        with pytest.raises(ValueError):
+            compute_placeholders([gradient_bytes()], 10, 3)
+
+    def test_numpy_matches_python(self):
+        """测试 NumPy 批量计算与逐张计算结果一致"""
+        pytest.importorskip('numpy')
+        sources = [gradient_bytes(), image_bytes((10, 200, 30))]
+        with patch.object(cover_placeholder, 'is_numpy_available', return_value=True):
+            vectorized = compute_placeholders(sources)
+        with patch.object(cover_placeholder, 'is_numpy_available', return_value=False):
+            scalar = compute_placeholders(sources)
+        assert vectorized == scalar
+
+
+class TestPlaceholderIntegration:
+    """占位图写入 videos.json 测试类"""
+
+    def test_download_cover_returns_placeholder(self, tmp_path):
+        """测试下载封面时用内存中的图片计算占位图"""
+        def download(url, outpath, quiet=False):
+            outpath.write(image_bytes(fmt='JPEG'))
+            return True
+
+        video = {'bv': 'BV1ph', 'cover_url': 'https://example.com/a.jpg'}
+        with patch('src.downloader.download_thumbs.download_binary', side_effect=download):
+            result = download_cover(video, tmp_path, quiet=True, blurhash=(4, 3))
+        assert result['blurhash'] == compute_placeholder(tmp_path / 'BV1ph.webp')
+
+    def test_download_all_covers_backfills_placeholders(self, tmp_path):
+        """测试为已有封面批量回填 blurhash 字段，已有占位图的不重新计算"""
+        thumbs_dir = tmp_path / "thumbs"
+        thumbs_dir.mkdir()
+        for i in range(3):
+            (thumbs_dir / f"BV1old{i}.png").write_bytes(image_bytes((i * 80, 0, 0)))
+        videos = [{"id": str(i + 1), "bv": f"BV1old{i}", "cover": f"BV1old{i}.png"} for i in range(3)]
+        videos[2]['blurhash'] = 'kept'
+        videos_path = tmp_path / "videos.json"
+        videos_path.write_text(json.dumps(videos), encoding='utf-8')
+
+        encoder = CoverEncoder(workers=0)
+        with patch.object(encoder, 'submit_placeholders', wraps=encoder.submit_placeholders) as mock_submit:
+            results = download_all_covers(videos_path, thumbs_dir, quiet=True, encoder=encoder,
+                                          variants=[], blurhash=True)
+
+        assert mock_submit.call_count == 1
+        assert sorted(results['placeholders']) == ['BV1old0', 'BV1old1']
+        saved = json.loads(videos_path.read_text(encoding='utf-8'))
+        assert saved[0]['blurhash'] == compute_placeholder(thumbs_dir / "BV1old0.png")
+        assert saved[2]['blurhash'] == 'kept'
+
+    def test_known_placeholders_not_recomputed(self, tmp_path):
+        """测试流水线下载阶段已算好的占位图直接写入，不重复计算"""
+        thumbs_dir = tmp_path / "thumbs"
+        thumbs_dir.mkdir()
+        (thumbs_dir / "BV1new.webp").write_bytes(image_bytes(fmt='WEBP'))
+        videos_path = tmp_path / "videos.json"
+        videos_path.write_text(json.dumps([{"id": "1", "bv": "BV1new", "cover": ""}]), encoding='utf-8')
+
+        with patch('src.downloader.download_thumbs.compute_placeholders') as mock_compute:
+            download_all_covers(videos_path, thumbs_dir, quiet=True, enable_webp_conversion=False,
+                                blurhash=True, placeholders={'BV1new': 'known'})
+
+        mock_compute.assert_not_called()
+        saved = json.loads(videos_path.read_text(encoding='utf-8'))
+        assert saved[0]['cover'] == 'BV1new.webp' and saved[0]['blurhash'] == 'known'
+
+    def test_backfill_selects_missing_placeholders(self, tmp_path):
+        """测试只为新下载、缺少占位图和文件名变化的封面计算占位图"""
+        for bv in ['BV1kept', 'BV1new', 'BV1none', 'BV1renamed', 'BV1known']:
+            (tmp_path / f"{bv}.png").write_bytes(image_bytes())
+        covers = {bv: f"{bv}.png" for bv in ['BV1kept', 'BV1new', 'BV1none', 'BV1renamed', 'BV1known']}
+        current_covers = dict(covers, BV1renamed='BV1renamed.jpg')
+        current_placeholders = {'BV1kept': 'a', 'BV1new': 'b', 'BV1renamed': 'c', 'BV1known': 'd'}
+
+        placeholders = backfill_cover_placeholders(
+            tmp_path, covers, None, (4, 3), current_covers, current_placeholders,
+            downloaded={'BV1new'}, known={'BV1known': 'known'}, quiet=True
+        )
+
+        expected = compute_placeholder(tmp_path / "BV1new.png")
+        assert placeholders == {'BV1known': 'known', 'BV1new': expected, 'BV1none': expected,
+                                'BV1renamed': expected}
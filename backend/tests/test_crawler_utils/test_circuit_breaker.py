@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+元数据来源熔断器测试
+"""
+
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from src.crawler.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, SourceRouter
+
+
+class FakeClock:
+    """可手动推进的 time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """替换熔断器模块中的 time.monotonic"""
+    fake = FakeClock()
+    with patch('src.crawler.utils.circuit_breaker.time.monotonic', fake):
+        yield fake
+
+
+class TestCircuitBreaker:
+    """熔断器测试类"""
+
+    def test_trips_after_consecutive_failures(self, clock):
+        """测试连续失败达到阈值后熔断，冷却期内拒绝请求"""
+        breaker = CircuitBreaker('SearchAPI', failure_threshold=3, open_seconds=30)
+        for _ in range(2):
+            breaker.record_failure(0.1)
+        assert breaker.state == CLOSED and breaker.allow_request()
+
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+        assert not breaker.allow_request() and not breaker.is_available()
+        stats = breaker.get_stats()
+        assert (stats['trip_count'], stats['rejected_count'], stats['failure_count']) == (1, 1, 3)
+
+    def test_trips_on_failure_rate(self, clock):
+        """测试失败率达到阈值时熔断（即使没有连续失败）"""
+        breaker = CircuitBreaker('DetailAPI', failure_threshold=10, failure_rate=0.5, min_samples=4)
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+    def test_half_open_single_probe(self, clock):
+        """测试冷却期结束后只放行一个探测请求，探测成功后恢复"""
+        breaker = CircuitBreaker('Crawl', failure_threshold=1, open_seconds=30)
+        breaker.record_failure()
+        clock.now += 30
+
+        assert breaker.is_available()
+        assert breaker.allow_request() and breaker.state == HALF_OPEN
+        assert not breaker.allow_request()
+
+        breaker.record_success(0.2)
+        assert breaker.state == CLOSED and breaker.success_rate() == 1.0
+
+    def test_failed_probe_doubles_cooldown(self, clock):
+        """测试探测失败后以翻倍的冷却时间再次熔断，且不超过上限"""
+        breaker = CircuitBreaker('Crawl', failure_threshold=1, open_seconds=30, max_open_seconds=50)
+        breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        clock.now += 49
+        assert not breaker.allow_request()
+        clock.now += 1
+        assert breaker.allow_request()
+
+        with pytest.raises(ValueError):
+            CircuitBreaker('x', failure_rate=0)
+
+
+class TestSourceRouter:
+    """来源路由测试类"""
+
+    def test_order_skips_open_and_demotes_unhealthy(self, clock):
+        """测试熔断中的来源被跳过，成功率偏低的来源排到后面"""
+        router = SourceRouter(['SearchAPI', 'DetailAPI', 'Crawl'], healthy_rate=0.8,
+                              failure_threshold=2, failure_rate=1.0)
+        assert router.order() == ['SearchAPI', 'DetailAPI', 'Crawl']
+
+        router.get('DetailAPI').record_success()
+        router.get('DetailAPI').record_failure()
+        assert router.order() == ['SearchAPI', 'Crawl', 'DetailAPI']
+
+        router.get('SearchAPI').record_failure()
+        router.get('SearchAPI').record_failure()
+        assert router.order() == ['Crawl', 'DetailAPI']
+        assert router.get_stats()['SearchAPI']['state'] == OPEN
+
+
+class TestVideoCrawlerCircuitBreaker:
+    """视频爬虫来源熔断测试类"""
+
+    def test_tripped_source_is_skipped(self):
+        """测试搜索API熔断后，后续视频不再请求搜索API，直接使用详情API"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        crawler = VideoCrawler(use_anti_crawler=True)
+        crawler.rate_limiter.min_delay = 0
+        crawler.api_retry_delay = 0
+
+        def fetch_detail(bv_code, bucket=None):
+            return {'bv': bv_code, 'title': '详情标题', 'url': f'https://www.bilibili.com/video/{bv_code}'}
+
+        bvs = ['BV1trip00001', 'BV1trip00002', 'BV1trip00003']
+        with patch.object(crawler.transport, 'get', side_effect=requests.exceptions.Timeout()) as mock_get, \
+                patch.object(crawler, '_fetch_video_info_api', side_effect=fetch_detail), \
+                patch('src.crawler.video_crawler.time.sleep'):
+            videos = [crawler.crawl_video_metadata(bv) for bv in bvs]
+
+        assert [video['bv'] for video in videos] == bvs
+        assert mock_get.call_count == 3
+        stats = crawler.source_router.get_stats()['SearchAPI']
+        assert (stats['state'], stats['failure_count'], stats['trip_count']) == (OPEN, 3, 1)
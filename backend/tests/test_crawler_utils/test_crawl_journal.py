@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+爬取日志测试
+"""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.crawler.utils.crawl_journal import JOURNAL_FILENAME, CrawlJournal
+
+
+def read_records(path):
+    """读取日志中的全部记录"""
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+class TestCrawlJournal:
+    """爬取日志测试类"""
+
+    def test_batched_writes(self, tmp_path):
+        """测试记录按批写入：缓冲满时写入一次，close 时写入剩余记录"""
+        path = tmp_path / JOURNAL_FILENAME
+        journal = CrawlJournal(path, flush_interval=3600, flush_records=3)
+        with patch('src.crawler.utils.crawl_journal.os.fsync') as mock_fsync:
+            for i in range(4):
+                journal.append({'bv': f'BV1a{i}', 'title': f'标题{i}'})
+            assert [record['bv'] for record in read_records(path)] == ['BV1a0', 'BV1a1', 'BV1a2']
+            journal.close()
+
+        assert mock_fsync.call_count == 2
+        assert len(read_records(path)) == 4
+        assert journal.get_stats() == {'resumed_count': 0, 'appended_count': 4, 'flush_count': 2}
+        with pytest.raises(ValueError):
+            CrawlJournal(path, flush_records=0)
+
+    def test_load_ignores_partial_and_expired_records(self, tmp_path):
+        """测试加载时截掉不完整的最后一行，忽略过期记录，之后的追加从新行开始"""
+        path = tmp_path / JOURNAL_FILENAME
+        now = int(time.time())
+        lines = [
+            json.dumps({'bv': 'BV1old', 'ts': now - 7200, 'metadata': {'bv': 'BV1old'}}),
+            json.dumps({'bv': 'BV1ok', 'ts': now, 'metadata': {'bv': 'BV1ok', 'title': '旧'}}),
+            json.dumps({'bv': 'BV1ok', 'ts': now, 'metadata': {'bv': 'BV1ok', 'title': '新'}}),
+        ]
+        path.write_text('\n'.join(lines) + '\n{"bv": "BV1cut", "ts"', encoding='utf-8')
+
+        journal = CrawlJournal(path, flush_interval=0, max_age=3600)
+        assert journal.load() == {'BV1ok': {'bv': 'BV1ok', 'title': '新'}}
+        journal.append({'bv': 'BV1next'})
+        journal.close()
+
+        assert [record['bv'] for record in read_records(path)] == ['BV1old', 'BV1ok', 'BV1ok', 'BV1next']
+        journal.discard()
+        assert not path.exists()
+
+
+class TestCrawlResume:
+    """中断后继续爬取测试类"""
+
+    def test_pipeline_resumes_after_crash(self, tmp_path):
+        """测试爬取中途崩溃后，下次运行只请求剩余的BV号，时间线保存后删除日志"""
+        from src.crawler.video_crawler import VideoCrawler
+        from src.pipeline import DataTypePipeline
+
+        timeline_file = tmp_path / "videos.json"
+        timeline_file.write_text("[]", encoding='utf-8')
+        journal_path = tmp_path / JOURNAL_FILENAME
+        bv_list = ['BV1r1', 'BV1r2', 'BV1r3', 'BV1r4']
+        favorites = MagicMock()
+        favorites.crawl_favorites_to_memory.return_value = bv_list
+        timeline_generator = MagicMock()
+        timeline_generator.run.return_value = {'success': True}
+
+        def crash_at_third(bv_code):
+            if bv_code == 'BV1r3':
+                raise KeyboardInterrupt()
+            return {'bv': bv_code, 'title': bv_code}
+
+        def run(crawl_one):
+            crawler = VideoCrawler(use_anti_crawler=False)
+            pipeline = DataTypePipeline('lvjiang', favorites, crawler, timeline_generator, tmp_path / "thumbs",
+                                        existing_covers=set(), journal_flush_interval=3600)
+            with patch('src.pipeline.update_pipeline.get_data_paths', return_value={'TIMELINE_FILE': timeline_file}), \
+                    patch('src.pipeline.update_pipeline.ensure_directories'), \
+                    patch('src.pipeline.update_pipeline.download_cover', return_value={'status': 'skipped'}), \
+                    patch('src.pipeline.update_pipeline.download_all_covers'), \
+                    patch('src.pipeline.update_pipeline.generate_cover_atlases'), \
+                    patch('src.pipeline.update_pipeline.update_frontend_files', return_value={'success': True}), \
+                    patch.object(crawler, 'is_video_crawled', return_value=False), \
+                    patch.object(crawler, '_crawl_one', side_effect=crawl_one) as mock_crawl:
+                pipeline.run()
+            return mock_crawl
+
+        with pytest.raises(KeyboardInterrupt):
+            run(crash_at_third)
+        assert [record['bv'] for record in read_records(journal_path)] == ['BV1r1', 'BV1r2']
+        timeline_generator.run.assert_not_called()
+
+        mock_crawl = run(lambda bv_code: {'bv': bv_code, 'title': bv_code})
+        assert [call.args[0] for call in mock_crawl.call_args_list] == ['BV1r3', 'BV1r4']
+        videos = timeline_generator.run.call_args.args[0]
+        assert [video['bv'] for video in videos] == bv_list
+        assert not journal_path.exists()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+失败视频重试队列测试
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler.utils.dead_letters import DEAD_LETTER_BUCKET, DeadLetterQueue
+
+
+class TestDeadLetterQueue:
+    """重试队列测试类"""
+
+    def test_backoff_and_due(self, tmp_path):
+        """测试重试间隔按尝试次数翻倍，按到期先后返回到期的视频"""
+        queue = DeadLetterQueue(tmp_path / "dead_letters.json", base_interval=600, max_interval=1000)
+        entry = queue.add('BV1a', 'lvjiang', '超时', now=0)
+        assert (entry['attempts'], entry['next_retry']) == (1, 600)
+        entry = queue.add('BV1a', 'lvjiang', '限流', now=100)
+        assert (entry['attempts'], entry['first_failed'], entry['next_retry']) == (2, 0, 1100)
+        queue.add('BV1b', 'lvjiang', '超时', now=0)
+        queue.add('BV1a', 'tiantong', '超时', now=0)
+
+        assert queue.due('lvjiang', now=700) == ['BV1b']
+        assert queue.due('lvjiang', now=2000) == ['BV1b', 'BV1a']
+        assert queue.due('lvjiang', now=2000, limit=1) == ['BV1b']
+        assert queue.contains('BV1a', 'tiantong') and not queue.contains('BV1b', 'tiantong')
+        with pytest.raises(ValueError):
+            DeadLetterQueue(tmp_path / "x.json", base_interval=0)
+
+    def test_save_load_and_remove(self, tmp_path):
+        """测试原子保存与加载，移出队列后空的数据类型被删除"""
+        path = tmp_path / "data" / "dead_letters.json"
+        queue = DeadLetterQueue(path)
+        queue.add('BV1a', 'lvjiang', '超时')
+        assert queue.save() is True and queue.save() is False
+
+        loaded = DeadLetterQueue.load(path)
+        assert loaded.get('BV1a', 'lvjiang') == queue.get('BV1a', 'lvjiang')
+        assert loaded.remove('BV1a', 'lvjiang') and not loaded.remove('BV1a', 'lvjiang')
+        assert loaded.entries == {} and len(loaded) == 0
+        assert loaded.get_stats()['recovered_count'] == 1
+
+
+class TestVideoCrawlerDeadLetters:
+    """视频爬虫使用重试队列测试类"""
+
+    def make_crawler(self, tmp_path):
+        """创建不等待的爬虫"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        queue = DeadLetterQueue(tmp_path / "dead_letters.json")
+        crawler = VideoCrawler(dead_letters=queue, dead_letter_delay=0)
+        crawler.rate_limiter.min_delay = 0
+        return crawler, queue
+
+    def test_failed_videos_are_queued_and_skipped(self, tmp_path):
+        """测试所有来源都失败的视频连同原因进入队列，下次主爬取跳过"""
+        crawler, queue = self.make_crawler(tmp_path)
+        ok = {'bv': 'BV1ok', 'title': '标题', 'url': 'https://www.bilibili.com/video/BV1ok', 'up主': 'UP'}
+
+        def search(bv_code, bucket=None):
+            if bv_code == 'BV1boom':
+                raise RuntimeError("连接被重置")
+            return ok if bv_code == 'BV1ok' else None
+
+        with patch.object(crawler, 'is_video_crawled', return_value=False), \
+                patch.object(crawler, '_fetch_video_info_search_api', side_effect=search), \
+                patch.object(crawler, '_fetch_video_info_api', return_value=None), \
+                patch.object(crawler, '_crawl_with_requests', return_value=None):
+            videos = crawler.crawl_from_bv_list(['BV1ok', 'BV1fail', 'BV1boom'], 'lvjiang', full_crawl=True)
+
+        assert [video['bv'] for video in videos] == ['BV1ok']
+        assert queue.pending('lvjiang') == ['BV1fail', 'BV1boom']
+        assert queue.get('BV1fail', 'lvjiang')['reason'] == '搜索API、详情API、网页爬取均未获取到元数据'
+        assert queue.get('BV1boom', 'lvjiang')['reason'] == '搜索API: 连接被重置'
+
+        with patch.object(crawler, 'crawl_video_metadata', return_value=None) as mock_metadata:
+            crawler.crawl_from_bv_list(['BV1fail', 'BV1boom'], 'lvjiang', full_crawl=True)
+        mock_metadata.assert_not_called()
+
+    def test_retry_pass_uses_own_bucket(self, tmp_path):
+        """测试重试阶段使用独立的限速桶，成功的视频移出队列，已移出收藏夹的视频直接删除"""
+        crawler, queue = self.make_crawler(tmp_path)
+        for bv in ['BV1back', 'BV1still', 'BV1gone']:
+            queue.add(bv, 'lvjiang', '超时', now=0)
+        queue.add('BV1later', 'lvjiang', '超时')
+
+        buckets = []
+
+        def search(bv_code, bucket=None):
+            crawler._rate_limit(bucket=bucket)
+            buckets.append(bucket)
+            if bv_code == 'BV1back':
+                return {'bv': bv_code, 'title': '标题', 'url': 'https://www.bilibili.com/video/BV1back', 'up主': 'UP'}
+            return None
+
+        received = []
+        with patch.object(crawler, '_fetch_video_info_search_api', side_effect=search), \
+                patch.object(crawler, '_fetch_video_info_api', return_value=None), \
+                patch.object(crawler, '_crawl_with_requests', return_value=None) as mock_crawl, \
+                patch.object(crawler.rate_limiter, 'wait') as mock_wait:
+            videos = crawler.retry_dead_letters(['BV1back', 'BV1still', 'BV1later'], 'lvjiang',
+                                                on_result=received.append)
+
+        assert [video['bv'] for video in videos] == [video['bv'] for video in received] == ['BV1back']
+        # 限速桶作为参数传入各来源，不修改爬虫实例的共享状态
+        assert buckets == [DEAD_LETTER_BUCKET] * 2
+        assert [call.args[1] for call in mock_crawl.call_args_list] == [DEAD_LETTER_BUCKET]
+        assert all(call.kwargs['bucket'] == DEAD_LETTER_BUCKET for call in mock_wait.call_args_list)
+        assert queue.pending('lvjiang') == ['BV1still', 'BV1later']
+        assert queue.get('BV1still', 'lvjiang')['attempts'] == 2
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+HTTP传输模块测试
+
+使用本地HTTP服务验证连接池传输层的请求、异常映射和并发控制
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """测试用请求处理类"""
+
+    protocol_version = 'HTTP/1.1'
+    active = 0
+    peak = 0
+    flaky_calls = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/json'):
+            payload = {'code': 0, 'cookie': self.headers.get('Cookie', ''), 'path': self.path}
+            self._send(200, json.dumps(payload).encode('utf-8'))
+        elif self.path.startswith('/set-cookie'):
+            body = b'{}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Set-Cookie', 'SESSDATA=leaked; Path=/')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith('/slow'):
+            with _Handler.lock:
+                _Handler.active += 1
+                _Handler.peak = max(_Handler.peak, _Handler.active)
+            time.sleep(0.1)
+            with _Handler.lock:
+                _Handler.active -= 1
+            self._send(200, b'{}')
+        elif self.path.startswith('/flaky'):
+            # /flaky/<key>/<失败次数>：前若干次返回 503，之后返回 200
+            _, _, key, failures = self.path.split('/')
+            with _Handler.lock:
+                calls = _Handler.flaky_calls.get(key, 0) + 1
+                _Handler.flaky_calls[key] = calls
+            if calls <= int(failures):
+                self._send(503, b'busy', 'text/plain')
+            else:
+                self._send(200, json.dumps({'calls': calls}).encode('utf-8'))
+        elif self.path.startswith('/hang'):
+            time.sleep(1.0)
+            self._send(200, b'{}')
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        self._send(200, json.dumps({'body': body}).encode('utf-8'))
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    """启动本地测试服务"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpTransport:
+    """HTTP传输同步门面测试类"""
+
+    def test_get_json(self, server_url):
+        """测试GET请求并解析JSON"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            response = transport.get(f"{server_url}/json", params={'a': 1}, cookies={'SESSDATA': 'x'})
+            assert response.status_code == 200
+            assert response.ok
+            data = response.json()
+            assert data['code'] == 0
+            assert data['path'] == '/json?a=1'
+            assert 'SESSDATA=x' in data['cookie']
+        finally:
+            transport.close()
+
+    def test_set_cookie_is_not_kept(self, server_url):
+        """测试响应中的 Set-Cookie 不会保存到共享客户端并带到后续请求中"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            transport.get(f"{server_url}/set-cookie")
+            assert transport.get(f"{server_url}/json").json()['cookie'] == ''
+            assert transport.get(f"{server_url}/json", cookies={'buvid3': 'y'}).json()['cookie'] == 'buvid3=y'
+        finally:
+            transport.close()
+
+    def test_post_form(self, server_url):
+        """测试POST表单请求"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            response = transport.post(f"{server_url}/post", data={'rid': 1, 'type': 2})
+            assert response.json()['body'] == 'rid=1&type=2'
+        finally:
+            transport.close()
+
+    def test_raise_for_status_uses_requests_exception(self, server_url):
+        """测试HTTP错误映射为 requests.exceptions.HTTPError"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            response = transport.get(f"{server_url}/missing")
+            assert response.status_code == 404
+            with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+                response.raise_for_status()
+            assert exc_info.value.response.status_code == 404
+        finally:
+            transport.close()
+
+    def test_timeout_maps_to_requests_timeout(self, server_url):
+        """测试超时映射为 requests.exceptions.Timeout"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            with pytest.raises(requests.exceptions.Timeout):
+                transport.get(f"{server_url}/hang", timeout=0.2)
+        finally:
+            transport.close()
+
+    def test_connection_error_maps_to_requests_connection_error(self):
+        """测试连接失败映射为 requests.exceptions.ConnectionError"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport(timeout=2)
+        try:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                transport.get("http://127.0.0.1:9/unreachable")
+        finally:
+            transport.close()
+
+    def test_per_host_limit(self, server_url):
+        """测试单主机并发上限"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        _Handler.peak = 0
+        transport = HttpTransport(per_host_limit=2)
+        try:
+            results = transport.gather([{'url': f"{server_url}/slow"} for _ in range(6)])
+            assert all(result.status_code == 200 for result in results)
+            assert _Handler.peak <= 2
+            assert transport.get_stats()['peak_in_flight'] <= 2
+        finally:
+            transport.close()
+
+    def test_gather_keeps_order_and_returns_exceptions(self, server_url):
+        """测试批量请求保持顺序并返回异常对象"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            results = transport.gather([
+                {'url': f"{server_url}/json?i=0"},
+                {'url': f"{server_url}/hang", 'timeout': 0.2},
+                {'url': f"{server_url}/json?i=2"},
+            ])
+            assert results[0].json()['path'] == '/json?i=0'
+            assert isinstance(results[1], requests.exceptions.Timeout)
+            assert results[2].json()['path'] == '/json?i=2'
+        finally:
+            transport.close()
+
+    def test_shared_across_threads(self, server_url):
+        """测试多个线程共用同一个传输对象"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        statuses = []
+
+        def worker():
+            statuses.append(transport.get(f"{server_url}/json").status_code)
+
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert statuses == [200] * 8
+            assert transport.get_stats()['request_count'] == 8
+        finally:
+            transport.close()
+
+    def test_shared_transport_singleton(self):
+        """测试共享传输对象为单例"""
+        from src.crawler.utils.http_transport import get_shared_transport
+
+        assert get_shared_transport() is get_shared_transport()
+
+    def test_invalid_params_raise_error(self):
+        """测试无效参数抛出异常"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        with pytest.raises(ValueError):
+            HttpTransport(max_connections=0)
+        with pytest.raises(ValueError):
+            HttpTransport(per_host_limit=0)
+        with pytest.raises(ValueError):
+            HttpTransport(retries=-1)
+        with pytest.raises(ValueError):
+            HttpTransport(backoff_factor=-1)
+
+    def test_retry_with_backoff(self, server_url):
+        """测试可重试状态码按指数退避重试，重试用尽时返回最后一次响应"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport(retries=2, backoff_factor=0.05)
+        try:
+            start = time.time()
+            response = transport.get(f"{server_url}/flaky/recover/2")
+            elapsed = time.time() - start
+            assert response.status_code == 200 and response.json()['calls'] == 3
+            # 两次退避：0.05 + 0.1 秒
+            assert elapsed >= 0.15
+
+            response = transport.get(f"{server_url}/flaky/exhausted/5")
+            assert response.status_code == 503
+            assert transport.get_stats()['retry_count'] == 4
+        finally:
+            transport.close()
+
+    def test_no_retry_by_default(self, server_url):
+        """测试默认不重试"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport()
+        try:
+            assert transport.get(f"{server_url}/flaky/default/1").status_code == 503
+            assert transport.get_stats()['retry_count'] == 0
+        finally:
+            transport.close()
+
+    def test_retry_connection_error(self):
+        """测试连接错误重试用尽后抛出 requests 异常"""
+        from src.crawler.utils.http_transport import HttpTransport
+
+        transport = HttpTransport(retries=1, backoff_factor=0)
+        try:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                transport.get("http://127.0.0.1:1/unreachable", timeout=2)
+            assert transport.get_stats()['retry_count'] == 1
+        finally:
+            transport.close()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+元数据持久化缓存测试
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler.utils.metadata_cache import MetadataCache
+from src.crawler.utils.http_transport import TransportResponse
+from src.crawler.utils.rate_limiter import DEFAULT_BUCKET
+
+
+def make_metadata(bv, title='标题', views=100):
+    """构造视频元数据"""
+    return {
+        'bv': bv,
+        'title': title,
+        'url': f'https://www.bilibili.com/video/{bv}',
+        'up主': '测试UP主',
+        'author': '测试UP主',
+        'publish_date': '2026-01-17',
+        'cover_url': 'https://i0.hdslb.com/cover.jpg',
+        'thumbnail': 'https://i0.hdslb.com/cover.jpg',
+        'duration': '03:00',
+        'views': views
+    }
+
+
+class TestMetadataCache:
+    """元数据缓存测试类"""
+
+    def test_put_and_get_fresh(self, tmp_path):
+        """测试写入后读取未过期元数据"""
+        cache = MetadataCache(tmp_path / 'cache.db')
+        cache.put('BV1cache0001', make_metadata('BV1cache0001'), raw={'bvid': 'BV1cache0001'}, source='SearchAPI')
+
+        assert cache.get_fresh('BV1cache0001')['title'] == '标题'
+        entry = cache.get_entry('BV1cache0001')
+        assert entry['raw'] == {'bvid': 'BV1cache0001'}
+        assert entry['source'] == 'SearchAPI'
+        assert cache.get_fresh('BV1missing01') is None
+        assert cache.get_stats()['hit_count'] == 1
+        assert cache.get_stats()['miss_count'] == 1
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        """测试缓存跨实例（跨运行）保存"""
+        db_path = tmp_path / 'data' / 'cache.db'
+        cache = MetadataCache(db_path)
+        cache.put('BV1cache0002', make_metadata('BV1cache0002'))
+        cache.close()
+
+        reopened = MetadataCache(db_path)
+        assert len(reopened) == 1
+        assert reopened.get_fresh('BV1cache0002')['bv'] == 'BV1cache0002'
+        reopened.close()
+
+    def test_per_field_ttl(self):
+        """测试字段级过期时间：统计字段过期不影响静态字段"""
+        cache = MetadataCache(':memory:', field_ttls={'views': 10}, default_ttl=1000)
+        cache.put('BV1cache0003', make_metadata('BV1cache0003'))
+        entry = cache.get_entry('BV1cache0003')
+        later = time.time() + 100
+
+        assert cache.get_stale_fields(entry, now=later) == ['views']
+        assert cache.get_fresh('BV1cache0003', now=later) is None
+        assert cache.get_fresh('BV1cache0003', fields=['title', 'publish_date'], now=later) is not None
+        assert cache.get_fresh('BV1cache0003', fields=['title'], now=time.time() + 2000) is None
+
+    def test_partial_put_merges_fields(self):
+        """测试部分字段写入时与已有条目合并"""
+        cache = MetadataCache(':memory:')
+        cache.put('BV1cache0004', make_metadata('BV1cache0004'), etag='"v1"')
+        cache.put('BV1cache0004', {'views': 999})
+
+        entry = cache.get_entry('BV1cache0004')
+        assert entry['metadata']['views'] == 999
+        assert entry['metadata']['title'] == '标题'
+        assert entry['etag'] == '"v1"'
+
+    def test_touch_refreshes_field_times(self):
+        """测试重新验证后条目恢复为未过期"""
+        cache = MetadataCache(':memory:', field_ttls={'views': 10})
+        cache.put('BV1cache0005', make_metadata('BV1cache0005'))
+
+        with patch('src.crawler.utils.metadata_cache.time.time', return_value=time.time() + 100):
+            assert cache.touch('BV1cache0005')['bv'] == 'BV1cache0005'
+            assert cache.get_fresh('BV1cache0005') is not None
+        assert cache.touch('BV1missing01') is None
+        assert cache.get_stats()['revalidated_count'] == 1
+
+    def test_concurrent_writes(self, tmp_path):
+        """测试多个工作线程同时写入"""
+        cache = MetadataCache(tmp_path / 'cache.db')
+
+        def worker(start):
+            for i in range(start, start + 20):
+                cache.put(f'BV1conc{i:04d}', make_metadata(f'BV1conc{i:04d}'))
+
+        threads = [threading.Thread(target=worker, args=(n * 20,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(cache) == 80
+        cache.close()
+
+    def test_concurrent_partial_puts_same_bv(self, tmp_path):
+        """测试多个线程同时写入同一BV号的不同字段时不会互相覆盖"""
+        cache = MetadataCache(tmp_path / 'cache.db')
+
+        def worker(n):
+            for i in range(25):
+                cache.put('BV1same0001', {f'field_{n}_{i}': i})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        entry = cache.get_entry('BV1same0001')
+        assert len(entry['metadata']) == len(entry['field_times']) == 200
+        cache.close()
+
+    def test_invalid_ttl_raises_error(self):
+        """测试无效过期时间抛出异常"""
+        with pytest.raises(ValueError):
+            MetadataCache(':memory:', default_ttl=0)
+        with pytest.raises(ValueError):
+            MetadataCache(':memory:', field_ttls={'views': -1})
+
+
+class TestVideoCrawlerMetadataCache:
+    """视频爬虫使用元数据缓存测试类"""
+
+    def test_fresh_entries_skip_requests(self):
+        """测试未过期的缓存条目不再发起请求"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        cache = MetadataCache(':memory:')
+        cache.put('BV1hit00001', make_metadata('BV1hit00001', title='缓存标题'))
+        crawler = VideoCrawler(metadata_cache=cache)
+
+        def fake_crawl(bv_code, bucket=None):
+            return make_metadata(bv_code, title='请求标题')
+
+        with patch.object(crawler, 'crawl_video_metadata', side_effect=fake_crawl) as mock_crawl:
+            videos = crawler.crawl_from_bv_list(['BV1hit00001', 'BV1new00001'], 'lvjiang', full_crawl=True)
+
+        mock_crawl.assert_called_once_with('BV1new00001', bucket=DEFAULT_BUCKET)
+        assert [video['title'] for video in videos] == ['缓存标题', '请求标题']
+
+    def test_fetched_metadata_is_stored(self):
+        """测试请求获取的元数据写入缓存"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        cache = MetadataCache(':memory:')
+        crawler = VideoCrawler(metadata_cache=cache)
+        video_item = {'bvid': 'BV1store0001', 'title': '搜索标题', 'author': 'UP', 'pic': '//i0.hdslb.com/a.jpg'}
+        response = {'code': 0, 'data': {'result': [{'result_type': 'video', 'data': [video_item]}]}}
+
+        with patch.object(crawler, '_request_search_api', return_value=response):
+            metadata = crawler.crawl_video_metadata('BV1store0001')
+
+        entry = cache.get_entry('BV1store0001')
+        assert entry['metadata']['title'] == metadata['title'] == '搜索标题'
+        assert entry['raw'] == video_item
+        assert entry['source'] == 'SearchAPI'
+
+    def test_stale_entry_revalidated_with_conditional_request(self):
+        """测试过期条目使用条件请求重新验证，304 时复用缓存"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        cache = MetadataCache(':memory:', default_ttl=1)
+        cache.put('BV1etag00001', make_metadata('BV1etag00001'), etag='"abc"')
+        crawler = VideoCrawler(metadata_cache=cache)
+        crawler.rate_limiter.min_delay = 0
+
+        not_modified = TransportResponse(304, {}, b'', url=crawler.api_config['base_url'])
+        with patch('src.crawler.utils.metadata_cache.time.time', return_value=time.time() + 10), \
+                patch.object(crawler.transport, 'get', return_value=not_modified) as mock_get, \
+                patch.object(crawler, '_fetch_video_info_search_api') as mock_search:
+            metadata = crawler.crawl_video_metadata('BV1etag00001')
+
+        assert metadata['bv'] == 'BV1etag00001'
+        assert mock_get.call_args.kwargs['headers']['If-None-Match'] == '"abc"'
+        mock_search.assert_not_called()
+        assert cache.get_stats()['revalidated_count'] == 1
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+失效视频缓存测试
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler.utils.http_transport import TransportResponse
+from src.crawler.utils.negative_cache import NegativeCache, is_dead_video_code
+
+
+DAY = 86400
+
+
+class TestNegativeCache:
+    """失效视频缓存测试类"""
+
+    def test_recheck_schedule_doubles(self, tmp_path):
+        """测试复查间隔按复查次数翻倍且不超过上限，首次发现时间保持不变"""
+        cache = NegativeCache(tmp_path / "dead.json", base_interval=DAY, max_interval=3 * DAY)
+        entry = cache.record('BV1dead00001', -404, None, 'DetailAPI', now=1000)
+        assert (entry['message'], entry['checks'], entry['next_check']) == ('视频不存在', 1, 1000 + DAY)
+
+        assert cache.should_skip('BV1dead00001', now=1000 + DAY - 1)
+        assert not cache.should_skip('BV1dead00001', now=1000 + DAY)
+
+        entry = cache.record('BV1dead00001', 62012, '仅UP主自己可见', 'DetailAPI', now=5000)
+        assert (entry['first_seen'], entry['last_seen'], entry['next_check']) == (1000, 5000, 5000 + 2 * DAY)
+        entry = cache.record('BV1dead00001', 62012, None, 'DetailAPI', now=6000)
+        assert entry['next_check'] == 6000 + 3 * DAY
+
+        assert not cache.should_skip('BV1other0001')
+        assert is_dead_video_code(-404) and not is_dead_video_code(-412)
+        with pytest.raises(ValueError):
+            NegativeCache(tmp_path / "dead.json", base_interval=DAY, max_interval=1)
+
+    def test_save_load_and_remove(self, tmp_path):
+        """测试原子保存与加载，恢复的视频移出缓存，损坏的文件视为空缓存"""
+        path = tmp_path / "data" / "negative_cache.json"
+        cache = NegativeCache(path)
+        cache.record('BV1dead00001', -404, '啥都木有', 'DetailAPI')
+        cache.record('BV1dead00002', 62002, '稿件不可见', 'DetailAPI')
+        assert cache.save() is True
+        assert cache.save() is False
+
+        loaded = NegativeCache.load(path)
+        assert loaded.get('BV1dead00001') == cache.get('BV1dead00001')
+        assert loaded.remove('BV1dead00002') and not loaded.remove('BV1dead00002')
+        loaded.save()
+        assert list(json.loads(path.read_text(encoding='utf-8'))['videos']) == ['BV1dead00001']
+        assert loaded.get_stats() == {'total': 1, 'skipped_count': 0, 'recorded_count': 0, 'recovered_count': 1}
+
+        path.write_text("not json", encoding='utf-8')
+        assert len(NegativeCache.load(path)) == 0
+
+
+class TestVideoCrawlerNegativeCache:
+    """视频爬虫使用失效视频缓存测试类"""
+
+    def test_dead_video_costs_no_requests_on_next_run(self, tmp_path):
+        """测试详情API返回失效错误码时不重试、不再尝试网页爬取，下次运行不发起请求"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        cache = NegativeCache(tmp_path / "negative_cache.json")
+        crawler = VideoCrawler(negative_cache=cache)
+        crawler.rate_limiter.min_delay = 0
+        crawler.api_retry_delay = 0
+
+        deleted = TransportResponse(
+            200, {}, json.dumps({'code': -404, 'message': '啥都木有'}).encode('utf-8'),
+            crawler.api_config['base_url']
+        )
+        with patch.object(crawler, '_fetch_video_info_search_api', return_value=None), \
+                patch.object(crawler.transport, 'get', return_value=deleted) as mock_get, \
+                patch.object(crawler, '_crawl_with_requests') as mock_crawl:
+            assert crawler.crawl_video_metadata('BV1dead00001') is None
+
+        assert mock_get.call_count == 1
+        mock_crawl.assert_not_called()
+        entry = cache.get('BV1dead00001')
+        assert (entry['code'], entry['source'], entry['checks']) == (-404, 'DetailAPI', 1)
+        assert crawler.source_router.get_stats()['DetailAPI']['failure_count'] == 0
+
+        with patch.object(crawler, 'crawl_video_metadata') as mock_metadata:
+            videos = crawler.crawl_from_bv_list(['BV1dead00001'], 'lvjiang', full_crawl=True)
+        assert videos == []
+        mock_metadata.assert_not_called()
+        assert cache.get_stats()['skipped_count'] == 1
+
+    def test_recovered_video_is_removed(self, tmp_path):
+        """测试复查时视频恢复可访问后移出缓存"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        cache = NegativeCache(tmp_path / "negative_cache.json")
+        cache.record('BV1back00001', 62004, '稿件审核中', 'DetailAPI', now=0)
+        crawler = VideoCrawler(negative_cache=cache)
+        metadata = {'bv': 'BV1back00001', 'title': '标题', 'url': 'https://www.bilibili.com/video/BV1back00001',
+                    'up主': 'UP'}
+
+        with patch.object(crawler, '_fetch_video_info_search_api', return_value=metadata):
+            assert crawler.crawl_video_metadata('BV1back00001') == metadata
+        assert 'BV1back00001' not in cache
@@ -215,11 +215,11 @@ class TestRateLimiter:
         assert stats['failure_count'] >= 1
     
     def test_concurrent_wait(self):
-        """测试并发等待（信号量控制）"""
+        """测试多个线程同时等待各自的预约"""
         from src.crawler.utils.rate_limiter import RateLimiter
         import threading
         
-        limiter = RateLimiter(min_delay=0.1, max_concurrent=2)
+        limiter = RateLimiter(min_delay=0.1, burst=2)
         
         results = []
         
@@ -251,3 +251,90 @@ class TestRateLimiter:
         
         with pytest.raises((ValueError, AssertionError)):
             RateLimiter(min_delay=1.0, max_delay=0.5)
+    
+    def test_max_concurrent_is_deprecated_alias_for_burst(self):
+        """测试 max_concurrent 已弃用，传入时发出警告并作为 burst 使用"""
+        from src.crawler.utils.rate_limiter import RateLimiter
+        
+        assert RateLimiter().burst == 1
+        with pytest.warns(DeprecationWarning):
+            assert RateLimiter(max_concurrent=3).burst == 3
+        with pytest.warns(DeprecationWarning):
+            assert RateLimiter(max_concurrent=3, burst=2).burst == 2
+        with pytest.warns(DeprecationWarning), pytest.raises(ValueError):
+            RateLimiter(max_concurrent=0)
+    
+    def test_record_not_blocked_by_waiting_threads(self):
+        """测试等待中的线程不持有锁，record_success 立即返回"""
+        from src.crawler.utils.rate_limiter import RateLimiter
+        import threading
+        
+        limiter = RateLimiter(min_delay=0.5, max_delay=0.5, enable_jitter=False)
+        thread = threading.Thread(target=limiter.wait)
+        thread.start()
+        time.sleep(0.05)
+        
+        start_time = time.time()
+        limiter.record_success()
+        limiter.get_stats()
+        assert time.time() - start_time < 0.05
+        thread.join()
+    
+    def test_concurrent_reservations_are_spaced(self):
+        """测试多个线程同时等待时按延迟依次放行，总耗时等于各次间隔之和"""
+        from src.crawler.utils.rate_limiter import RateLimiter
+        import threading
+        
+        limiter = RateLimiter(min_delay=0.05, max_delay=0.05, enable_jitter=False)
+        start_time = time.monotonic()
+        finished = []
+        
+        def worker():
+            limiter.wait()
+            finished.append(time.monotonic() - start_time)
+        
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        finished.sort()
+        assert finished[0] >= 0.045
+        assert all(b - a >= 0.04 for a, b in zip(finished, finished[1:]))
+        assert finished[-1] < 0.5
+    
+    def test_burst_and_named_buckets(self):
+        """测试突发容量内立即放行，命名桶之间互不影响"""
+        from src.crawler.utils.rate_limiter import RateLimiter
+        
+        limiter = RateLimiter(min_delay=0.3, max_delay=0.3, enable_jitter=False, burst=3)
+        start_time = time.time()
+        limiter.wait()
+        limiter.wait()
+        assert time.time() - start_time < 0.1
+        limiter.wait()
+        assert time.time() - start_time >= 0.25
+        
+        limiter.add_bucket('search', min_delay=0.6, burst=1)
+        start_time = time.time()
+        limiter.wait(bucket='api.example.com')
+        assert time.time() - start_time < 0.1
+        assert limiter.wait(bucket='search') == 0.6
+        assert time.time() - start_time >= 0.55
+        assert limiter.get_stats()['buckets'] == 3
+    
+    def test_wait_async(self):
+        """测试异步等待按同样的间隔放行"""
+        from src.crawler.utils.rate_limiter import RateLimiter
+        import asyncio
+        
+        limiter = RateLimiter(min_delay=0.05, max_delay=0.05, enable_jitter=False)
+        
+        async def run():
+            start_time = time.monotonic()
+            await asyncio.gather(*(limiter.wait_async() for _ in range(3)))
+            return time.monotonic() - start_time
+        
+        elapsed = asyncio.run(run())
+        assert 0.14 <= elapsed < 0.5
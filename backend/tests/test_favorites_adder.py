@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+浏览器收藏脚本会话复用测试
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts.add_to_favorites_concurrent import BiliBiliFavoritesAdderConcurrent, BrowserSession
+
+
+def mock_playwright():
+    """构造模拟的 sync_playwright，每次 launch 返回新的浏览器"""
+    driver = MagicMock()
+    launched = []
+
+    def launch(headless=True):
+        browser = MagicMock()
+        browser.is_connected.return_value = True
+        context = browser.new_context.return_value
+        context.new_page.side_effect = lambda: MagicMock(**{'is_closed.return_value': False})
+        launched.append(browser)
+        return browser
+
+    driver.start.return_value.chromium.launch.side_effect = launch
+    return MagicMock(return_value=driver), launched
+
+
+class TestBrowserSession:
+    """浏览器会话测试类"""
+
+    def test_browser_launched_once_and_pages_recycled(self):
+        """测试浏览器只启动一次，页面按上限回收"""
+        factory, launched = mock_playwright()
+        with patch('scripts.add_to_favorites_concurrent.sync_playwright', factory):
+            session = BrowserSession(cookies=[{'name': 'SESSDATA'}], max_page_uses=2)
+            pages = [session.page() for _ in range(5)]
+            session.close()
+
+        assert session.browser_launches == 1
+        assert pages[0] is pages[1] and pages[1] is not pages[2] and pages[2] is pages[3]
+        launched[0].new_context.return_value.add_cookies.assert_called_once_with([{'name': 'SESSDATA'}])
+        pages[0].close.assert_called_once()
+        launched[0].close.assert_called_once()
+
+    def test_browser_restarted_after_page_limit_or_disconnect(self):
+        """测试浏览器创建页面数达到上限或断开后重启"""
+        factory, launched = mock_playwright()
+        with patch('scripts.add_to_favorites_concurrent.sync_playwright', factory):
+            session = BrowserSession(max_page_uses=1, max_browser_pages=2)
+            for _ in range(3):
+                session.page()
+            assert session.browser_launches == 2
+
+            launched[-1].is_connected.return_value = False
+            session.discard()
+            session.page()
+            session.close()
+
+        assert session.browser_launches == 3
+        factory.return_value.start.assert_called_once()
+
+    def test_invalid_arguments(self):
+        """测试参数校验"""
+        with pytest.raises(ValueError):
+            BrowserSession(max_page_uses=0)
+        with pytest.raises(ValueError):
+            BrowserSession(max_browser_pages=0)
+
+
+class TestFavoritesAdderWorkers:
+    """工作线程测试类"""
+
+    def test_workers_share_cookies_and_own_sessions(self, tmp_path):
+        """测试Cookie只读取一次，每个工作线程使用自己的浏览器会话"""
+        bv_file = tmp_path / "bv.txt"
+        bv_file.write_text("BV1a\nBV1b\nBV1c\nBV1d\n", encoding='utf-8')
+        cookie_file = tmp_path / "cookies.json"
+        cookie_file.write_text(json.dumps([{'name': 'SESSDATA'}]), encoding='utf-8')
+        adder = BiliBiliFavoritesAdderConcurrent(bv_file, "测试", cookie_file=cookie_file, max_workers=2)
+
+        sessions = []
+
+        def add_with_session(session, bv_code):
+            sessions.append(session)
+            with adder.lock:
+                adder.success_count += 1
+                adder.success_bv_codes.append(bv_code)
+            return True
+
+        with patch.object(adder, '_add_with_session', side_effect=add_with_session), \
+                patch('builtins.open', wraps=open) as mock_open:
+            assert adder.run()
+
+        cookie_reads = [c for c in mock_open.call_args_list if c.args and c.args[0] == cookie_file]
+        assert len(cookie_reads) == 1
+        assert len(sessions) == 4 and len(set(map(id, sessions))) <= 2
+        assert all(session.cookies == [{'name': 'SESSDATA'}] for session in sessions)
+        assert bv_file.read_text(encoding='utf-8').strip() == ""
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+JSON 流式读写测试
+"""
+
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.json_stream import AtomicJsonArrayWriter, iter_json_array, write_json_array
+from src.utils.bv_index import BVIndex, hash_file, save_timeline_records, write_bv_index
+
+
+def make_records(count=5):
+    """构造包含中文、转义字符和嵌套结构的记录"""
+    return [
+        {
+            "id": str(i + 1),
+            "date": f"2023-12-{28 - i:02d}",
+            "title": f"视频{i} \"引号\"\n换行\t制表",
+            "videoUrl": f"https://www.bilibili.com/video/BV1json{i:04d}",
+            "tags": ["精彩", {"nested": [1, 2.5, None, True]}],
+            "duration": 60 * i
+        }
+        for i in range(count)
+    ]
+
+
+class TestIterJsonArray:
+    """流式读取测试类"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 4096])
+    def test_matches_json_load(self, tmp_path, chunk_size):
+        """测试任意块大小下读取结果与 json.load 一致"""
+        path = tmp_path / "videos.json"
+        records = make_records() + [123, "文本", [], {}]
+        path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
+
+        assert list(iter_json_array(path, chunk_size=chunk_size)) == records
+
+    def test_empty_array(self, tmp_path):
+        """测试空数组"""
+        path = tmp_path / "videos.json"
+        path.write_text(" [ ] ", encoding='utf-8')
+        assert list(iter_json_array(path)) == []
+
+    @pytest.mark.parametrize("content", ['{"videos": []}', '', '[{"a": 1}', '[{"a": 1} {"b": 2}]', '[1,'])
+    def test_invalid_content_raises_value_error(self, tmp_path, content):
+        """测试非数组或截断的文件抛出 ValueError"""
+        path = tmp_path / "videos.json"
+        path.write_text(content, encoding='utf-8')
+        with pytest.raises(ValueError):
+            list(iter_json_array(path, chunk_size=2))
+
+
+class TestAtomicJsonArrayWriter:
+    """原子写入测试类"""
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_output_identical_to_json_dump(self, tmp_path, indent):
+        """测试输出与 json.dump 逐字节一致，哈希与文件内容一致"""
+        path = tmp_path / "videos.json"
+        records = make_records()
+        with AtomicJsonArrayWriter(path, indent=indent) as writer:
+            for record in records:
+                writer.write(record)
+
+        expected = json.dumps(records, ensure_ascii=False, indent=indent)
+        assert path.read_text(encoding='utf-8') == expected
+        assert writer.count == len(records)
+        assert writer.sha256 == hash_file(path)
+
+    def test_empty_records(self, tmp_path):
+        """测试写入空数组"""
+        path = tmp_path / "videos.json"
+        assert write_json_array(path, []) == 0
+        assert path.read_text(encoding='utf-8') == json.dumps([], indent=2)
+
+    def test_error_keeps_original_file(self, tmp_path):
+        """测试写入中途出错时原文件保持不变且不残留临时文件"""
+        path = tmp_path / "videos.json"
+        write_json_array(path, make_records(2))
+        original = path.read_text(encoding='utf-8')
+
+        def broken_records():
+            yield {"id": "1"}
+            raise RuntimeError("中断")
+
+        with pytest.raises(RuntimeError):
+            write_json_array(path, broken_records())
+
+        assert path.read_text(encoding='utf-8') == original
+        assert [p.name for p in tmp_path.iterdir()] == ["videos.json"]
+
+    def test_read_and_rewrite_same_file(self, tmp_path):
+        """测试边读边写同一文件"""
+        path = tmp_path / "videos.json"
+        write_json_array(path, make_records())
+
+        def updated():
+            for record in iter_json_array(path, chunk_size=16):
+                record["cover"] = f"{record['id']}.webp"
+                yield record
+
+        write_json_array(path, updated())
+        assert [item["cover"] for item in json.loads(path.read_text(encoding='utf-8'))] == [
+            "1.webp", "2.webp", "3.webp", "4.webp", "5.webp"
+        ]
+
+    def test_save_timeline_records_builds_index(self, tmp_path):
+        """测试写入时间线的同时生成有效索引"""
+        path = tmp_path / "videos.json"
+        records = make_records()
+        index = save_timeline_records(path, iter(records), meta={"merged_from": "abc"})
+
+        loaded = BVIndex.load(path)
+        assert loaded is not None
+        assert loaded.entries == write_bv_index(path, records).entries
+        assert index.count == 5 and index.is_mergeable and index.ids_sequential
+        assert loaded.meta == {"merged_from": "abc"}
+
+
+class TestStreamingTimelineMerge:
+    """时间线流式合并测试类"""
+
+    def _make_item(self, index, date):
+        bv = f"BV1stream{index:04d}"
+        return {
+            "id": str(index + 1),
+            "date": date,
+            "title": f"视频{index}",
+            "videoUrl": f"https://www.bilibili.com/video/{bv}",
+            "bv": bv,
+            "cover": f"{bv}.webp"
+        }
+
+    def test_streaming_merge_matches_full_sort(self, tmp_path):
+        """测试索引有效时流式合并结果与全量稳定排序一致，且不整体加载时间线"""
+        from src.crawler.timeline_generator import TimelineGenerator
+
+        rng = random.Random(7)
+        dates = sorted((f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(50)), reverse=True)
+        existing = [self._make_item(i, date) for i, date in enumerate(dates)]
+        timeline_file = tmp_path / "videos.json"
+        save_timeline_records(timeline_file, existing)
+
+        videos = [
+            {
+                "bv": f"BV1fresh{i:04d}",
+                "url": f"https://www.bilibili.com/video/BV1fresh{i:04d}",
+                "title": f"新视频{i}",
+                "publish_date": rng.choice(dates + ["2024-01-01", "2022-01-01"])
+            }
+            for i in range(10)
+        ]
+        videos.append({"bv": "BV1stream0003", "url": "https://www.bilibili.com/video/BV1stream0003",
+                       "publish_date": "2024-02-01"})
+
+        generator = TimelineGenerator()
+        mock_config = {'DATA_TYPE_DIR': tmp_path, 'TIMELINE_FILE': timeline_file}
+        with patch('src.crawler.timeline_generator.get_data_paths', return_value=mock_config), \
+                patch.object(generator, 'load_existing_timeline') as mock_load:
+            result = generator.run(videos, "test")
+
+        expected = [dict(item) for item in existing] + [
+            item for item in generator.generate_timeline(videos) if item["bv"] != "BV1stream0003"
+        ]
+        expected.sort(key=lambda x: x.get('date', ''), reverse=True)
+        for i, item in enumerate(expected):
+            item['id'] = str(i + 1)
+
+        mock_load.assert_not_called()
+        assert result == {"success": True, "count": 60, "added": 10}
+        assert json.loads(timeline_file.read_text(encoding='utf-8')) == expected
+        assert BVIndex.load(timeline_file).is_mergeable
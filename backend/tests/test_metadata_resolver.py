@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+共享元数据解析测试
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler.metadata_resolver import MetadataResolver
+from src.crawler.video_crawler import VideoCrawler
+
+
+class TestMetadataResolver:
+    """共享元数据解析器测试类"""
+
+    def test_concurrent_requests_are_coalesced(self):
+        """测试同一BV号的并发请求只发起一次，其余调用等待并复用结果"""
+        resolver = MetadataResolver()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch(bv):
+            calls.append(bv)
+            started.set()
+            release.wait(timeout=5)
+            return {'bv': bv}, None
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(resolver.resolve('BV1same', fetch)))
+        leader.start()
+        assert started.wait(timeout=5)
+        followers = [threading.Thread(target=lambda: results.append(resolver.resolve('1same', fetch)))
+                     for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while resolver.get_stats()['coalesced'] < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+
+        assert calls == ['BV1same']
+        assert results == [({'bv': 'BV1same'}, None)] * 4
+        assert resolver.resolve('BV1same', fetch) == ({'bv': 'BV1same'}, None)
+        assert resolver.get_stats() == {'fetched': 1, 'memo_hits': 1, 'coalesced': 3, 'requests_saved': 4}
+
+    def test_errors_are_not_memoized(self):
+        """测试请求异常时抛出且不记住结果，下次调用重新请求"""
+        resolver = MetadataResolver()
+
+        def broken(bv):
+            raise RuntimeError("网络错误")
+
+        with pytest.raises(RuntimeError):
+            resolver.resolve('BV1err', broken)
+        assert not resolver.is_known('BV1err')
+        assert resolver.resolve('BV1err', lambda bv: (None, '超时')) == (None, '超时')
+        assert not resolver.is_known('BV1err')
+        assert resolver.resolve('BV1err', lambda bv: ({'bv': bv}, None)) == ({'bv': 'BV1err'}, None)
+        assert resolver.is_known('BV1err')
+        assert resolver.get_stats()['fetched'] == 2
+
+    def test_results_are_copies(self):
+        """测试每次返回元数据副本，调用方修改不影响已记住的结果"""
+        resolver = MetadataResolver()
+        metadata, _ = resolver.resolve('BV1copy', lambda bv: ({'bv': bv, 'title': '原标题'}, None))
+        metadata['title'] = '被修改'
+        resolver.remember('BV1kept', {'bv': 'BV1kept'})
+        resolver.remember('BV1none', None)
+
+        assert resolver.resolve('BV1copy', None)[0]['title'] == '原标题'
+        assert resolver.resolve('BV1kept', None)[0] is not resolver.resolve('BV1kept', None)[0]
+        assert not resolver.is_known('BV1none')
+
+
+class TestSharedAcrossDataTypes:
+    """跨数据类型共享元数据测试类"""
+
+    def test_each_bv_fetched_once_per_run(self):
+        """测试多个数据类型和重复的BV号在一次运行中只成功请求一次"""
+        first = VideoCrawler(use_anti_crawler=False, max_workers=3)
+        second = VideoCrawler(use_anti_crawler=False, max_workers=3, metadata_resolver=first.metadata_resolver)
+        requested = []
+
+        def crawl(bv_code, bucket=None):
+            requested.append(bv_code)
+            return None if bv_code == 'BV1fail' else {'bv': bv_code}
+
+        lists = {
+            'lvjiang': ['BV1a', 'BV1shared', '1a', 'BV1fail'],
+            'tiantong': ['BV1shared', 'BV1b', 'BV1fail'],
+        }
+        results = {}
+        with patch('src.crawler.video_crawler.time.sleep'), \
+                patch.object(first, 'is_video_crawled', return_value=False), \
+                patch.object(second, 'is_video_crawled', return_value=False), \
+                patch.object(first, 'crawl_video_metadata', side_effect=crawl), \
+                patch.object(second, 'crawl_video_metadata', side_effect=crawl):
+            for crawler, data_type in [(first, 'lvjiang'), (second, 'tiantong')]:
+                results[data_type] = crawler.crawl_from_bv_list(lists[data_type], data_type)
+
+        # 失败结果不复用，其他数据类型遇到时重新请求
+        assert sorted(requested) == ['BV1a', 'BV1b', 'BV1fail', 'BV1fail', 'BV1shared']
+        assert [video['bv'] for video in results['lvjiang']] == ['BV1a', 'BV1shared']
+        assert [video['bv'] for video in results['tiantong']] == ['BV1shared', 'BV1b']
+        assert first.metadata_resolver.get_stats()['requests_saved'] == 1
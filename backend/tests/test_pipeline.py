@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+流水线更新测试
+"""
+
+import threading
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from src.pipeline import CoverDownloadStage, DataTypePipeline, run_pipelines
+
+
+def fake_download(video, thumbs_dir, quiet, existing_covers, enable_webp_conversion, cdn_variant=None,
+                  blurhash=None, manifest=None):
+    """模拟封面下载：直接返回成功"""
+    return {'status': 'success', 'bvid': video['bv'], 'filename': f"{video['bv']}.webp",
+            'cover': f"{video['bv']}.webp", 'path': None}
+
+
+class FakeFavoritesCrawler:
+    """模拟收藏夹爬虫"""
+
+    def __init__(self, bv_lists, barrier=None):
+        self.bv_lists = bv_lists
+        self.barrier = barrier
+
+    def crawl_favorites_to_memory(self, data_type):
+        if self.barrier is not None:
+            # 所有数据类型同时到达才能继续，证明各数据类型并行执行
+            self.barrier.wait(timeout=5)
+        if data_type == 'broken':
+            raise RuntimeError("收藏夹爬取失败")
+        return self.bv_lists.get(data_type, [])
+
+
+class StreamingVideoCrawler:
+    """模拟视频爬虫：逐个回调元数据，最后一个视频等待封面下载开始后才返回"""
+
+    def __init__(self, downloaded_event):
+        self.downloaded_event = downloaded_event
+        self.finished_before_download = None
+
+    def crawl_from_bv_list(self, bv_list, data_type, full_crawl=False, on_result=None, journal=None):
+        videos = []
+        for bv in bv_list:
+            metadata = {'bv': bv, 'cover_url': f"https://i0.hdslb.com/bfs/archive/{bv}.jpg"}
+            on_result(metadata)
+            videos.append(metadata)
+        # 爬取尚未结束时封面已经开始下载
+        self.finished_before_download = not self.downloaded_event.wait(timeout=5)
+        return videos
+
+
+class TestCoverDownloadStage:
+    """封面下载阶段测试类"""
+
+    def test_downloads_and_skips_existing(self, tmp_path):
+        """测试提交的元数据被下载，已存在的封面直接跳过"""
+        with patch('src.pipeline.update_pipeline.download_cover', side_effect=fake_download) as mock_download:
+            stage = CoverDownloadStage(tmp_path, workers=2, queue_size=1, existing_covers={'BV1old'}).start()
+            for bv in ['BV1old', 'BV1a', 'BV1b', 'BV1c']:
+                stage.submit({'bv': bv, 'cover_url': 'https://example.com/a.jpg'})
+            results = stage.join()
+
+        assert mock_download.call_count == 3
+        assert results['success'] == 3 and results['skipped'] == 1
+        assert results['downloaded_files']['BV1b'] == 'BV1b.webp'
+        assert {'BV1a', 'BV1b', 'BV1c'} <= stage.existing_covers
+
+    def test_download_exception_counts_as_failed(self, tmp_path):
+        """测试单个下载异常不影响其他视频"""
+        def flaky_download(video, *args, **kwargs):
+            if video['bv'] == 'BV1bad':
+                raise RuntimeError("网络错误")
+            return fake_download(video, *args, **kwargs)
+
+        with patch('src.pipeline.update_pipeline.download_cover', side_effect=flaky_download):
+            stage = CoverDownloadStage(tmp_path, workers=1, existing_covers=set()).start()
+            stage.submit({'bv': 'BV1bad'})
+            stage.submit({'bv': 'BV1good'})
+            results = stage.join()
+
+        assert results['failed'] == 1 and results['success'] == 1
+
+    def test_encoder_stage_writes_covers_once(self, tmp_path):
+        """测试提供编码器时原图只在内存中，编码完成后写入最终文件"""
+        from src.downloader.cover_encoder import CoverEncoder
+
+        def fake_fetch(video, thumbs_dir, quiet, existing_covers, cdn_variant):
+            return {'status': 'fetched', 'bvid': video['bv'], 'ext': '.jpg', 'data': b'raw', 'encoded': False}
+
+        encoder = CoverEncoder(workers=0)
+        with patch('src.pipeline.update_pipeline.fetch_cover', side_effect=fake_fetch), \
+                patch('src.downloader.cover_encoder.encode_webp_bytes',
+                      return_value=b'webp'):
+            stage = CoverDownloadStage(tmp_path, workers=2, existing_covers=set(), encoder=encoder).start()
+            for bv in ['BV1a', 'BV1b']:
+                stage.submit({'bv': bv})
+            results = stage.join()
+
+        assert results['success'] == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['BV1a.webp', 'BV1b.webp']
+        assert (tmp_path / 'BV1a.webp').read_bytes() == b'webp'
+
+    def test_invalid_arguments(self, tmp_path):
+        """测试参数校验"""
+        with pytest.raises(ValueError):
+            CoverDownloadStage(tmp_path, workers=0, existing_covers=set())
+        with pytest.raises(ValueError):
+            CoverDownloadStage(tmp_path, queue_size=0, existing_covers=set())
+
+
+class TestDataTypePipeline:
+    """数据类型流水线测试类"""
+
+    def _patch_stages(self, tmp_path, downloaded_event=None):
+        """替换文件系统相关的阶段"""
+        def download(video, *args, **kwargs):
+            if downloaded_event is not None:
+                downloaded_event.set()
+            return fake_download(video, *args, **kwargs)
+
+        timeline_file = tmp_path / "videos.json"
+        timeline_file.write_text("[]", encoding='utf-8')
+        return [
+            patch('src.pipeline.update_pipeline.download_cover', side_effect=download),
+            patch('src.pipeline.update_pipeline.download_all_covers'),
+            patch('src.pipeline.update_pipeline.generate_cover_atlases', return_value={'built': 0}),
+            patch('src.pipeline.update_pipeline.ensure_directories'),
+            patch('src.pipeline.update_pipeline.get_data_paths', return_value={'TIMELINE_FILE': timeline_file}),
+            patch('src.pipeline.update_pipeline.update_frontend_files',
+                  return_value={'success': True, 'merge_result': {'message': 'ok'}}),
+        ]
+
+    def test_covers_download_while_crawling(self, tmp_path):
+        """测试元数据回调后立即下载封面，随后生成时间线并更新前端"""
+        downloaded = threading.Event()
+        video_crawler = StreamingVideoCrawler(downloaded)
+        timeline_generator = MagicMock()
+        timeline_generator.run.return_value = {'success': True, 'count': 2, 'added': 2}
+
+        patches = self._patch_stages(tmp_path, downloaded)
+        for p in patches:
+            p.start()
+        try:
+            pipeline = DataTypePipeline(
+                'lvjiang', FakeFavoritesCrawler({'lvjiang': ['BV1a', 'BV1b']}), video_crawler,
+                timeline_generator, tmp_path / "thumbs", existing_covers=set()
+            )
+            result = pipeline.run()
+        finally:
+            for p in patches:
+                p.stop()
+
+        assert video_crawler.finished_before_download is False
+        assert result['success']
+        assert result['cover_result']['success'] == 2
+        assert set(result['timings']) == {'favorites', 'metadata', 'timeline', 'covers', 'atlas', 'frontend'}
+        timeline_generator.run.assert_called_once()
+
+    def test_no_new_videos_skips_downstream(self, tmp_path):
+        """测试没有新视频时跳过时间线和前端更新"""
+        video_crawler = MagicMock()
+        video_crawler.crawl_from_bv_list.return_value = []
+        timeline_generator = MagicMock()
+
+        patches = self._patch_stages(tmp_path)
+        for p in patches:
+            p.start()
+        try:
+            pipeline = DataTypePipeline(
+                'lvjiang', FakeFavoritesCrawler({'lvjiang': ['BV1a']}), video_crawler,
+                timeline_generator, tmp_path / "thumbs", existing_covers=set()
+            )
+            result = pipeline.run()
+        finally:
+            for p in patches:
+                p.stop()
+
+        assert result['success']
+        timeline_generator.run.assert_not_called()
+
+    def test_data_types_run_in_parallel(self, tmp_path):
+        """测试各数据类型并行执行，单个数据类型失败不影响其他数据类型"""
+        favorites = FakeFavoritesCrawler({}, barrier=threading.Barrier(3))
+        pipelines = [
+            DataTypePipeline(data_type, favorites, MagicMock(), MagicMock(), tmp_path, existing_covers=set())
+            for data_type in ['lvjiang', 'tiantong', 'broken']
+        ]
+
+        results = run_pipelines(pipelines)
+
+        assert list(results) == ['lvjiang', 'tiantong', 'broken']
+        assert not results['lvjiang']['success'] and 'BV号' in results['lvjiang']['message']
+        assert results['broken']['message'] == "收藏夹爬取失败"
+
+
+class TestVideoCrawlerOnResult:
+    """视频爬虫逐条回调测试类"""
+
+    @pytest.mark.parametrize("max_workers", [1, 3])
+    def test_on_result_called_per_video(self, max_workers):
+        """测试每个成功获取的元数据都会回调，失败的不回调"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        crawler = VideoCrawler(use_anti_crawler=False, max_workers=max_workers)
+        received = []
+
+        def crawl_one(bv_code):
+            return None if bv_code == 'BV1fail' else {'bv': bv_code}
+
+        with patch.object(crawler, 'is_video_crawled', return_value=False), \
+                patch.object(crawler, '_crawl_one', side_effect=crawl_one):
+            videos = crawler.crawl_from_bv_list(['BV1a', 'BV1fail', 'BV1b'], 'lvjiang',
+                                                on_result=received.append)
+
+        assert [video['bv'] for video in videos] == ['BV1a', 'BV1b']
+        assert sorted(item['bv'] for item in received) == ['BV1a', 'BV1b']
+
+    def test_shared_rate_limiter(self):
+        """测试多个爬虫实例共用同一个频率限制器"""
+        from src.crawler.video_crawler import VideoCrawler
+
+        first = VideoCrawler()
+        second = VideoCrawler(rate_limiter=first.rate_limiter)
+        assert second.rate_limiter is first.rate_limiter
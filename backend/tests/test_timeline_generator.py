@@ -89,12 +89,15 @@ class TestTimelineGenerator(unittest.TestCase):
         result = self.generator.save_timeline(timeline_data, output_file)
         self.assertTrue(result)
         
-        # 验证文件存在
+        # 验证文件存在，并同步生成了旁路索引
         self.assertTrue(output_file.exists())
+        index_file = Path("test_timeline.index.json")
+        self.assertTrue(index_file.exists())
         
         # 清理测试文件
-        if output_file.exists():
-            output_file.unlink()
+        for path in (output_file, index_file):
+            if path.exists():
+                path.unlink()
     
     def test_run(self):
         """测试运行时间线生成任务"""
@@ -214,6 +217,119 @@ class TestTimelineGenerator(unittest.TestCase):
         
         # 测试数据中应该包含2个条目
         self.assertEqual(len(existing_timeline), 2)
+    
+    def _make_item(self, index, date):
+        """构造时间线条目"""
+        bv = f"BV1merge{index:04d}"
+        return {
+            "id": str(index + 1),
+            "date": date,
+            "title": f"视频{index}",
+            "videoUrl": f"https://www.bilibili.com/video/{bv}",
+            "bv": bv,
+            "cover": f"{bv}.webp"
+        }
+    
+    def _run_with_file(self, existing, videos):
+        """使用临时时间线文件运行生成任务"""
+        import tempfile
+        from unittest.mock import patch
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            timeline_file = Path(tmpdir) / "videos.json"
+            with open(timeline_file, 'w', encoding='utf-8') as f:
+                json.dump(existing, f, ensure_ascii=False, indent=2)
+            mock_config = {'DATA_TYPE_DIR': Path(tmpdir), 'TIMELINE_FILE': timeline_file}
+            
+            with patch('src.crawler.timeline_generator.get_data_paths', return_value=mock_config), \
+                    patch.object(self.generator, 'save_timeline', wraps=self.generator.save_timeline) as mock_save:
+                result = self.generator.run(videos, "test")
+            
+            with open(timeline_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        return result, saved, mock_save.call_count
+    
+    def test_incremental_merge_matches_full_sort(self):
+        """测试增量合并结果与全量排序结果一致"""
+        import random
+        
+        rng = random.Random(42)
+        dates = sorted((f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(60)), reverse=True)
+        existing = [self._make_item(i, date) for i, date in enumerate(dates)]
+        videos = [
+            {
+                "bv": f"BV1new{i:04d}",
+                "url": f"https://www.bilibili.com/video/BV1new{i:04d}",
+                "title": f"新视频{i}",
+                "publish_date": rng.choice(dates + ["2024-01-01", "2022-01-01"])
+            }
+            for i in range(8)
+        ]
+        # 重复的BV号不会被插入
+        videos.append({"bv": "BV1merge0003", "url": "https://www.bilibili.com/video/BV1merge0003",
+                       "publish_date": "2024-02-01"})
+        
+        result, saved, _ = self._run_with_file(existing, videos)
+        
+        # 按原有全量算法计算期望结果
+        expected = [dict(item) for item in existing] + [
+            item for item in self.generator.generate_timeline(videos) if item["bv"] != "BV1merge0003"
+        ]
+        expected.sort(key=lambda x: x.get('date', ''), reverse=True)
+        for i, item in enumerate(expected):
+            item['id'] = str(i + 1)
+        
+        self.assertTrue(result["success"])
+        self.assertEqual(result["added"], 8)
+        self.assertEqual(saved, expected)
+    
+    def test_incremental_merge_skips_save_without_changes(self):
+        """测试没有新增条目时不重写时间线文件"""
+        existing = [self._make_item(0, "2023-12-02"), self._make_item(1, "2023-12-01")]
+        videos = [{"bv": "BV1merge0001", "url": "https://www.bilibili.com/video/BV1merge0001",
+                   "publish_date": "2023-12-01"}]
+        
+        result, saved, save_count = self._run_with_file(existing, videos)
+        
+        self.assertTrue(result["success"])
+        self.assertEqual(result["added"], 0)
+        self.assertEqual(save_count, 0)
+        self.assertEqual(saved, existing)
+    
+    def test_unsorted_timeline_falls_back_to_full_merge(self):
+        """测试现有时间线无序或重复时回退到全量合并"""
+        existing = [
+            self._make_item(0, "2023-01-01"),
+            self._make_item(1, "2023-12-01"),
+            self._make_item(1, "2023-12-01")
+        ]
+        videos = [{"bv": "BV1new0000", "url": "https://www.bilibili.com/video/BV1new0000",
+                   "publish_date": "2023-06-01"}]
+        
+        result, saved, _ = self._run_with_file(existing, videos)
+        
+        self.assertEqual(result["count"], 3)
+        self.assertEqual([item["date"] for item in saved], ["2023-12-01", "2023-06-01", "2023-01-01"])
+        self.assertEqual([item["id"] for item in saved], ["1", "2", "3"])
+    
+    def test_timeline_index_insert_position(self):
+        """测试索引插入位置：同日期新条目排在已有条目之后"""
+        from src.crawler.timeline_index import TimelineIndex
+        
+        timeline = [self._make_item(0, "2023-12-03"), self._make_item(1, "2023-12-02"),
+                    self._make_item(2, "2023-12-02"), self._make_item(3, "2023-12-01")]
+        index = TimelineIndex(timeline, self.generator._extract_bv_from_item)
+        
+        self.assertTrue(index.is_mergeable)
+        self.assertTrue(index.ids_sequential)
+        self.assertEqual(index.insert_position("2023-12-04"), 0)
+        self.assertEqual(index.insert_position("2023-12-02"), 3)
+        self.assertEqual(index.insert_position("2023-11-30"), 4)
+        
+        position = index.insert(timeline, self._make_item(9, "2023-12-02"), "BV1merge0009")
+        self.assertEqual(position, 3)
+        self.assertIn("BV1merge0009", index)
+        self.assertEqual(index.insert_position("2023-12-02"), 4)
 
 
 if __name__ == "__main__":
@@ -133,3 +133,70 @@ class TestVideoCrawler:
         
         # 测试未爬取的视频
         assert not self.crawler.is_video_crawled("non_existent_bv", test_data_file)
+    
+    def test_crawl_from_bv_list_concurrent_keeps_order(self):
+        """测试并发爬取时结果顺序与输入顺序一致"""
+        import random
+        import time
+        from unittest.mock import patch
+        
+        bv_list = [f"BV1test{i:04d}" for i in range(12)]
+        
+        def fake_crawl(bv_code, bucket=None):
+            time.sleep(random.uniform(0, 0.02))
+            if bv_code == "BV1test0005":
+                return None
+            return {"bv": bv_code}
+        
+        crawler = VideoCrawler(max_workers=4)
+        with patch.object(crawler, 'crawl_video_metadata', side_effect=fake_crawl):
+            videos = crawler.crawl_from_bv_list(bv_list, 'lvjiang', full_crawl=True)
+        
+        expected = [bv for bv in bv_list if bv != "BV1test0005"]
+        assert [video['bv'] for video in videos] == expected
+    
+    def test_crawl_from_bv_list_concurrent_uses_worker_pool(self):
+        """测试并发爬取时多个BV号同时处理"""
+        import threading
+        import time
+        from unittest.mock import patch
+        
+        active = {'current': 0, 'peak': 0}
+        lock = threading.Lock()
+        
+        def fake_crawl(bv_code, bucket=None):
+            with lock:
+                active['current'] += 1
+                active['peak'] = max(active['peak'], active['current'])
+            time.sleep(0.05)
+            with lock:
+                active['current'] -= 1
+            return {"bv": bv_code}
+        
+        crawler = VideoCrawler(max_workers=3)
+        with patch.object(crawler, 'crawl_video_metadata', side_effect=fake_crawl):
+            videos = crawler.crawl_from_bv_list([f"BV1par{i}" for i in range(6)], 'lvjiang', full_crawl=True)
+        
+        assert len(videos) == 6
+        assert active['peak'] > 1
+        assert active['peak'] <= 3
+    
+    def test_invalid_max_workers_raises_error(self):
+        """测试无效的并发数参数抛出异常"""
+        with pytest.raises(ValueError):
+            VideoCrawler(max_workers=0)
+    
+    def test_crawl_with_requests_sends_session_cookies(self):
+        """测试网页爬取经共享传输层发送时带上Session中的Cookie"""
+        from unittest.mock import patch
+        from src.crawler.utils.http_transport import TransportResponse
+        
+        crawler = VideoCrawler(use_anti_crawler=False)
+        crawler.session.cookies.set('buvid3', 'abc', domain='.bilibili.com')
+        page = TransportResponse(200, {}, b'<html></html>', 'https://www.bilibili.com/video/BV1ck4y1b7Ly')
+        
+        with patch.object(crawler.transport, 'get', return_value=page) as mock_get, \
+                patch.object(crawler, '_parse_video_page', return_value={'bv': 'BV1ck4y1b7Ly'}):
+            assert crawler._crawl_with_requests('BV1ck4y1b7Ly') == {'bv': 'BV1ck4y1b7Ly'}
+        
+        assert mock_get.call_args.kwargs['cookies'] == {'buvid3': 'abc'}